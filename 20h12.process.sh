@@ -285,6 +285,16 @@ else:
         print(f"- {tool} : {n}x ({'reussi' if ok else 'echec'})")
 PYEOF
 
+########################################################################
+## RÊVE — compression mémorielle de TOUTE la station (slots MULTIPASS et
+## mémoires géo), hors conversation : le chemin chaud ne fait que mettre en
+## file (IA/reve_scheduler.py). Passe nocturne complète, métriques dans
+## ~/.zen/flashmem/reve_scheduler/runs.jsonl.
+########################################################################
+echo "=== RÊVE (compression mémoire) ===============================" >> $LOG_FILE
+python3 "${MY_PATH}/IA/reve_scheduler.py" run --all >> "$LOG_FILE" 2>&1 \
+    || echo "⚠️  [20h12] RÊVE : au moins une mémoire non compressée (nouvel essai au prochain passage)" >> "$LOG_FILE"
+
 echo "=== YOUTUBE / IA SCRAPERS ===================================" >> $LOG_FILE
 tail -n 300 $HOME/.zen/tmp/IA.log 2>/dev/null >> $LOG_FILE
 tail -n 300 $HOME/.zen/tmp/youtube.com_* 2>/dev/null >> $LOG_FILE
@@ -497,6 +507,10 @@ if [[ -f "$_a4l_cert" ]]; then
     echo "[20h12] atom4love_certified.txt : $(wc -l < "$_a4l_cert") pubkeys actifs"
 fi
 
+## Daemon keygen résident : les clés UMAP / SECTOR / REGION et portefeuilles
+## re-dérivées par les refresh suivants ne paient scrypt qu'une fois
+python3 ${MY_PATH}/tools/keygen_daemon.py --daemon >/dev/null 2>&1
+
 ${MY_PATH}/RUNTIME/NOSTRCARD.refresh.sh
 
 ########################################################################
@@ -1031,11 +1031,11 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
                 has_soc_access=false
                 check_memory_slot_access "$user_id" "1" && has_soc_access=true
                 cleared_slots=""
-                rm -f "$user_dir/slot0.json" 2>/dev/null && cleared_slots="0"
+                rm -f "$user_dir/slot0".{json,jsonl,idx} 2>/dev/null && cleared_slots="0"
                 if [[ "$has_soc_access" == true ]]; then
                     for s in $(seq 1 12); do
                         if [[ -f "$user_dir/slot${s}.json" ]]; then
-                            rm -f "$user_dir/slot${s}.json"
+                            rm -f "$user_dir/slot${s}".{json,jsonl,idx}
                             cleared_slots="${cleared_slots:+$cleared_slots, }$s"
                         fi
                     done
@@ -1051,7 +1051,7 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
             if check_memory_slot_access "$user_id" "$reset_slot"; then
                 slot_file="$HOME/.zen/flashmem/${user_id}/slot${reset_slot}.json"
                 if [[ -f "$slot_file" ]]; then
-                    rm -f "$slot_file"
+                    rm -f "$slot_file" "${slot_file%.json}".{jsonl,idx}
                     echo "Memory reset for USER: $user_id, SLOT: $reset_slot"
                     KeyANSWER="Mémoire slot $reset_slot réinitialisée."
                 else
@@ -1067,7 +1067,7 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
             # Reset only slot 0 (default behavior)
             slot_file="$HOME/.zen/flashmem/${user_id}/slot0.json"
             if [[ -f "$slot_file" ]]; then
-                rm -f "$slot_file"
+                rm -f "$slot_file" "${slot_file%.json}".{jsonl,idx}
                 echo "Memory reset for USER: $user_id, SLOT: 0"
                 KeyANSWER="Mémoire slot 0 réinitialisée."
             else
@@ -1096,8 +1096,9 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
                 [[ $s -gt 0 && "$has_soc_access" != true ]] && continue
                 slot_file="$user_dir/slot${s}.json"
                 [[ -f "$slot_file" ]] || continue
-                last_msg=$(jq -r '.messages[-1].content // ""' "$slot_file" 2>/dev/null | cut -c1-80)
-                msg_count=$(jq -r '.messages | length' "$slot_file" 2>/dev/null)
+                slot_json=$(python3 "$MY_PATH/slot_store.py" cat "$slot_file" 2>/dev/null)
+                last_msg=$(jq -r '.messages[-1].content // ""' <<< "$slot_json" 2>/dev/null | cut -c1-80)
+                msg_count=$(jq -r '.messages | length' <<< "$slot_json" 2>/dev/null)
                 [[ -z "$last_msg" ]] && continue
                 mem_summary="${mem_summary}
   Slot $s (${msg_count} msg) : ${last_msg}…"
@@ -1117,7 +1118,7 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
                     temp_mem_file="$HOME/.zen/tmp/memory_${user_id}_slot${mem_slot}.txt"
                     echo "📝 Historique (#mem slot $mem_slot)" > "$temp_mem_file"
                     echo "========================" >> "$temp_mem_file"
-                    jq -r '.messages | to_entries | .[-30:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content | sub("#BOT "; "") | sub("#BRO "; "") | sub("#bot "; "") | sub("#bro "; ""))\n---"' "$slot_file" >> "$temp_mem_file"
+                    python3 "$MY_PATH/slot_store.py" cat "$slot_file" | jq -r '.messages | to_entries | .[-30:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content | sub("#BOT "; "") | sub("#BRO "; "") | sub("#bot "; "") | sub("#bro "; ""))\n---"' >> "$temp_mem_file"
                     KeyANSWER=$(cat "$temp_mem_file")
                     rm -f "$temp_mem_file"
                 else
@@ -1137,7 +1138,7 @@ if [[ "${TAGS[BRO]}" == true || "${TAGS[BOT]}" == true ]]; then
                 temp_mem_file="$HOME/.zen/tmp/memory_${user_id}_slot0.txt"
                 echo "📝 Historique (#mem slot 0)" > "$temp_mem_file"
             echo "========================" >> "$temp_mem_file"
-                jq -r '.messages | to_entries | .[-30:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content | sub("#BOT "; "") | sub("#BRO "; "") | sub("#bot "; "") | sub("#bro "; ""))\n---"' "$slot_file" >> "$temp_mem_file"
+                python3 "$MY_PATH/slot_store.py" cat "$slot_file" | jq -r '.messages | to_entries | .[-30:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content | sub("#BOT "; "") | sub("#BRO "; "") | sub("#bot "; "") | sub("#bro "; ""))\n---"' >> "$temp_mem_file"
             KeyANSWER=$(cat "$temp_mem_file")
             rm -f "$temp_mem_file"
         else
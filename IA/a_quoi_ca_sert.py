@@ -71,12 +71,18 @@ def _ensure_ollama():
 
 def _ollama_vision(image_bytes, prompt, model='llama3.2-vision:11b'):
     import ollama
+    try:
+        import model_residency
+        lease = model_residency.begin('identify', model)
+    except Exception:   # optimiseur, jamais une dépendance dure
+        model_residency, lease = None, None
     def _call():
         return ollama.chat(
             model=model,
             messages=[{'role': 'user', 'content': prompt, 'images': [image_bytes]}],
             options={'temperature': 0.1, 'num_predict': 400},
-            format='json'
+            format='json',
+            **(model_residency.chat_options(lease) if lease else {})
         )
     try:
         return _call()['message']['content']
@@ -87,6 +93,9 @@ def _ollama_vision(image_bytes, prompt, model='llama3.2-vision:11b'):
                 subprocess.run([script], capture_output=True, timeout=15)
             return _call()['message']['content']
         raise
+    finally:
+        if lease:
+            model_residency.end(lease)
 
 
 def _ollama_text(prompt, model=None, num_predict=1200):
@@ -15,8 +15,9 @@ import tempfile
 import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
+import identity_index
 
-__all__ = ['BRO_IA_PATH', 'TOOLS_PATH', 'NOSTR_DIR', 'DEFAULT_RELAY', 'DM_TTL_DAYS', '_owner_dir', '_owner_hex', '_owner_nsec', '_owner_g1_pubkey', '_load_relays', 'RELAYS', '_now_iso', 'COMMAND_INTERPRETATION_MODEL', 'BRO_WATCH_CORE_PATH', 'PYTHON_BIN', '_is_valid_owner_email']
+__all__ = ['BRO_IA_PATH', 'TOOLS_PATH', 'NOSTR_DIR', 'DEFAULT_RELAY', 'DM_TTL_DAYS', '_owner_dir', '_owner_hex', '_owner_nsec', '_owner_g1_pubkey', '_load_relays', 'RELAYS', '_now_iso', 'COMMAND_INTERPRETATION_MODEL', 'BRO_WATCH_CORE_PATH', 'PYTHON_BIN', '_is_valid_owner_email', '_launch_background']
 
 # Interpréteur venv ~/.astro (si présent) — à utiliser à la place du "python3"
 # système pour invoquer question.py et les autres scripts IA/*.py en sous-
@@ -35,12 +36,29 @@ PYTHON_BIN = (os.path.expanduser("~/.astro/bin/python3")
 # réinvocation en sous-processus détaché DEPUIS un submodule bro.*, où
 # `os.path.abspath(__file__)` pointerait à tort vers ce submodule lui-même
 # (ex: bro/media.py) au lieu de bro_watch_core.py qui porte le "if __name__ ==
-# '__main__':". Voir bro.media._run_scraper_now, bro.media._dispatch_media_background,
-# bro.identity._dispatch_identity_update_check, bro.tools._tool_craft/_tool_badge.
+# '__main__':". Utilisé par _launch_background ci-dessous (repli quand la
+# file de travaux bro_jobs.py n'est pas disponible).
 BRO_WATCH_CORE_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bro_watch_core.py"
 )
 
+def _launch_background(argv):
+    """Lance la sous-commande `bro_watch_core.py <argv>` (run-*-background)
+    hors du chemin de traitement : d'abord via la file de travaux du worker
+    résident (bro_jobs.py — plafonds par type, priorités, coalescence des
+    doublons), sinon en sous-processus détaché comme historiquement. Lève
+    l'exception du Popen en cas d'échec du lancement (l'appelant la rapporte)."""
+    try:
+        import bro_jobs
+        if bro_jobs.submit(argv) is not None:
+            return
+    except Exception as e:
+        print(f"[BRO_WATCH] File de travaux indisponible, lancement détaché : {e}")
+    subprocess.Popen(
+        ["python3", BRO_WATCH_CORE_PATH, *argv],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
 BRO_IA_PATH = os.path.expanduser("~/.zen/Astroport.ONE/IA")
 
 TOOLS_PATH = os.path.expanduser("~/.zen/Astroport.ONE/tools")
@@ -55,11 +73,7 @@ def _owner_dir(owner_email):
     return os.path.join(NOSTR_DIR, owner_email)
 
 def _owner_hex(owner_email):
-    try:
-        with open(os.path.join(_owner_dir(owner_email), "HEX")) as f:
-            return f.read().strip()
-    except Exception:
-        return ""
+    return identity_index.hex_of(owner_email)
 
 def _owner_nsec(owner_email):
     secret_file = os.path.join(_owner_dir(owner_email), ".secret.nostr")
@@ -75,15 +89,9 @@ def _owner_nsec(owner_email):
     return ""
 
 def _owner_g1_pubkey(owner_email):
-    """Clé publique G1 (pour chiffrement natools.py seal box), depuis .secret.dunikey."""
-    for name in (".secret.dunikey", "secret.dunikey"):
-        p = os.path.join(_owner_dir(owner_email), name)
-        if os.path.isfile(p):
-            with open(p) as f:
-                for line in f:
-                    if line.startswith("pub:"):
-                        return line.split(":", 1)[1].strip()
-    return None
+    """Clé publique G1 (pour chiffrement natools.py seal box), depuis .secret.dunikey
+    (ligne pub:, indexée par identity_index)."""
+    return identity_index.field(owner_email, "dunikey_pub") or None
 
 def _is_valid_owner_email(owner_email):
     """Anti path-traversal + existence : owner_email doit résoudre à un
@@ -301,10 +301,16 @@ bro_load_user_keys() {
 #   avoir de .secret.nostr correspondant (copie partielle) — matcher un tel
 #   alias en premier romprait le déchiffrement pour tout appelant qui lit
 #   ensuite EMAIL/.secret.nostr.
+#   Via IA/identity_index.py (index HEX/HEX_LOVE -> email, même préférence) ;
+#   les grep ci-dessous ne servent plus qu'en repli si l'index échoue.
 ########################################################################
 bro_resolve_email() {
     local _hex="$1"
-    local _hex_file
+    local _hex_file _email
+    if _email=$(python3 "${_BRO_LIB_MY_PATH}/../identity_index.py" email "$_hex" 2>/dev/null); then
+        echo "$_email"
+        return 0
+    fi
     _hex_file=$(grep -rl "^${_hex}$" "$HOME/.zen/game/nostr/"*"@"*"/HEX" 2>/dev/null | head -1)
     [[ -z "$_hex_file" ]] && \
         _hex_file=$(grep -rl "^${_hex}$" "$HOME/.zen/game/nostr/"*"/HEX" 2>/dev/null | head -1)
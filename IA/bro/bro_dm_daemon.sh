@@ -227,6 +227,12 @@ trap 'kill "${_SWEEP_PID:-}" "${_CONSTELLATION_SUB_PID:-}" 2>/dev/null; pkill -f
 
 _log "🚀 Daemon DM NODE démarré (PID $$, sériel) — queue: $QUEUE_DIR"
 
+## Démarrage à froid : préchauffe le cache atom4love (comptes locaux +
+## expéditeurs récents) en UN REQ groupé, en tâche de fond — les premiers
+## DMs ne paient plus chacun une connexion relais (bro_user_level.py).
+( _py="${HOME}/.astro/bin/python3"; command -v "$_py" &>/dev/null || _py="python3"
+  "$_py" "$BRO_USER_LEVEL" --prefetch "${_CONSTELLATION_RELAY}" >/dev/null 2>&1 ) &
+
 ## ── Canal "#badge" : génération d'image de badge skill via ComfyUI ────────
 ## Syntaxe DM : "#badge <skill>"  ex: "#badge docker"
 ## Appelle generate_image.sh avec un prompt adapté, retourne l'URL IPFS.
@@ -693,18 +699,19 @@ _handle_mem() {
             local s
             for s in $(seq 1 12); do _allowed+=("$s"); done
         fi
-        reply=$(python3 - "$user_dir" "${_allowed[*]}" <<'PYEOF'
+        reply=$(python3 - "$user_dir" "${_allowed[*]}" "$MY_PATH/.." <<'PYEOF'
 import json, os, sys
 user_dir = sys.argv[1]
 allowed = {int(x) for x in sys.argv[2].split()} if sys.argv[2] else set()
+sys.path.insert(0, sys.argv[3])
+import slot_store
 lines = ["🧠 Mémoires enregistrées :"]
 found = False
 for s in sorted(allowed):
     sf = os.path.join(user_dir, f"slot{s}.json")
     if not os.path.exists(sf): continue
     try:
-        d = json.load(open(sf))
-        msgs = d.get("messages", [])
+        msgs = slot_store.messages(sf)
         if not msgs: continue
         last = msgs[-1].get("content", "")[:80]
         lines.append(f"  Slot {s} ({len(msgs)} msg) : {last}…")
@@ -723,17 +730,19 @@ PYEOF
                 "${_RELAYS[0]}" 2>/dev/null
             return
         fi
-        reply=$(python3 - "$user_dir" "$slot" <<'PYEOF'
+        reply=$(python3 - "$user_dir" "$slot" "$MY_PATH/.." <<'PYEOF'
 import json, os, sys
 user_dir, slot = sys.argv[1], sys.argv[2]
+sys.path.insert(0, sys.argv[3])
+import slot_store
 sf = os.path.join(user_dir, f"slot{slot}.json")
 if not os.path.exists(sf):
     print(f"Slot {slot} vide.")
     sys.exit()
 try:
-    d = json.load(open(sf))
-    msgs = d.get("messages", [])[-5:]
-    lines = [f"📁 Slot {slot} ({len(d.get('messages',[]))} msg — 5 derniers) :"]
+    all_msgs = slot_store.messages(sf)
+    msgs = all_msgs[-5:]
+    lines = [f"📁 Slot {slot} ({len(all_msgs)} msg — 5 derniers) :"]
     for m in msgs:
         ts = m.get("timestamp", "")[:10]
         lines.append(f"  [{ts}] {m.get('content','')[:120]}")
@@ -781,7 +790,7 @@ _handle_reset() {
         for s in 0 $(seq 1 12); do
             [[ $s -gt 0 && "$_has_soc_access" != "true" ]] && continue
             if [[ -f "$user_dir/slot${s}.json" ]]; then
-                rm -f "$user_dir/slot${s}.json"
+                rm -f "$user_dir/slot${s}".{json,jsonl,idx}
                 _cleared+=("$s")
             fi
         done
@@ -798,7 +807,7 @@ _handle_reset() {
             return
         fi
         if [[ -f "$user_dir/slot${slot}.json" ]]; then
-            rm -f "$user_dir/slot${slot}.json"
+            rm -f "$user_dir/slot${slot}".{json,jsonl,idx}
             reply="🗑️ Slot $slot effacé."
         else
             reply="Slot $slot déjà vide."
@@ -12,12 +12,11 @@ import json
 import time
 import hashlib
 import tempfile
-import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
 import observability
 from prompt_safety import wrap_untrusted
-from bro._shared import BRO_IA_PATH, BRO_WATCH_CORE_PATH, COMMAND_INTERPRETATION_MODEL, PYTHON_BIN, _now_iso, _owner_dir, _is_valid_owner_email
+from bro._shared import BRO_IA_PATH, COMMAND_INTERPRETATION_MODEL, PYTHON_BIN, _now_iso, _owner_dir, _is_valid_owner_email, _launch_background
 # Import direct (pas de subprocess) : question.py garde son garde `if __name__
 # == "__main__"` autour de la réinvocation venv, l'import seul ne remplace
 # donc jamais ce process — voir question.py et bro_watch_core.py.
@@ -33,10 +32,7 @@ def _dispatch_identity_update_check(owner_email, content):
     déterministe). Échec silencieux : un problème ici ne doit jamais affecter
     la confirmation de mémorisation déjà renvoyée à l'utilisateur."""
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-identity-check-background", owner_email, content],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-identity-check-background", owner_email, content])
     except Exception as e:
         print(f"[BRO_WATCH] Échec du lancement de l'évaluation identité : {e}")
 
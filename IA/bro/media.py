@@ -16,11 +16,16 @@ import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
 from prompt_safety import wrap_untrusted
-from bro._shared import BRO_IA_PATH, BRO_WATCH_CORE_PATH, PYTHON_BIN, _owner_dir
+from bro._shared import BRO_IA_PATH, PYTHON_BIN, _owner_dir, _launch_background
 from bro.nostr import send_dm_to_owner
 from bro.watch_store import _load_manifest, is_scraper_enabled, store_log
 from bro_url_content import extract_urls
 
+try:
+    import model_residency
+except Exception:   # optimiseur, jamais une dépendance dure
+    model_residency = None
+
 __all__ = ['_IA_IMG_URL_RE', '_extract_image_url', '_describe_image_url', '_call_generator', '_capture_screenshot', '_MEDIA_RUN_TIMEOUT_SEC', '_MEDIA_PROGRESS_MSG', '_dispatch_media_background', '_run_recognition_script', '_run_media_background', '_MEDIA_TAG_HANDLERS', 'SCRAPER_RUN_TIMEOUT_SEC', '_cookie_file_path', '_find_scraper_script', '_SCRAPER_ICONS', 'list_station_scrapers', '_available_scraper_domains', '_extract_scraper_domain', '_run_scraper_now', '_run_scraper_background', 'CRAFT_RUN_TIMEOUT_SEC', 'BADGE_RUN_TIMEOUT_SEC', '_run_craft_background', '_run_badge_background']
 
 
@@ -53,21 +58,42 @@ def _describe_image_url(image_url):
     except Exception:
         return ""
 
+# générateur -> type de travail model_residency (workflow ComfyUI chargé)
+_GENERATOR_KINDS = {
+    "generate_image.sh": "image",
+    "generate_video.sh": "video",
+    "generate_music.sh": "music",
+}
+
+
 def _call_generator(script_name, prompt):
     """Appelle generators/<script_name> avec le prompt.
-    Retourne l'URL produite (stdout) ou None si ComfyUI indisponible."""
+    Retourne l'URL produite (stdout) ou None si ComfyUI indisponible.
+
+    Le générateur ne libère plus la VRAM lui-même quand model_residency
+    suit le travail (COMFYUI_FREE_VRAM=0) : end() ne l'appelle /free que si
+    aucun travail en file n'utilise le même workflow."""
     script = os.path.join(BRO_IA_PATH, "generators", script_name)
     if not os.path.isfile(script):
         return None
+    lease = None
+    if model_residency and script_name in _GENERATOR_KINDS:
+        lease = model_residency.begin(_GENERATOR_KINDS[script_name])
+    url = None
     try:
         result = subprocess.run(
             ["bash", script, prompt],
             capture_output=True, text=True, timeout=300,
+            env=dict(os.environ, COMFYUI_FREE_VRAM="0") if lease else None,
         )
         url = result.stdout.strip()
-        return url if url.startswith("http") else None
+        url = url if url.startswith("http") else None
+        return url
     except Exception:
         return None
+    finally:
+        if lease:
+            model_residency.end(lease, ok=url is not None)
 
 def _capture_screenshot(url, width=1200, height=800):
     """Capture une page web via IA/../tools/page_screenshot.py — le MÊME outil
@@ -127,11 +153,7 @@ def _dispatch_media_background(media_type, owner_email, payload):
     150s) bloquaient auparavant process_incoming_commands directement, avec
     le même risque de boucle de rejeu massive que l'incident du 2026-07-03."""
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-media-background",
-             media_type, owner_email, json.dumps(payload)],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-media-background", media_type, owner_email, json.dumps(payload)])
     except Exception as e:
         return f"⚠️ Échec du lancement : {e}"
     timeout = _MEDIA_RUN_TIMEOUT_SEC.get(media_type, 120)
@@ -466,11 +488,7 @@ def _run_scraper_now(owner_email, domain):
         return f"⚠️ Aucun scraper disponible pour {domain} sur cette station."
 
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-scraper-background",
-             owner_email, domain, script, cookie_file],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-scraper-background", owner_email, domain, script, cookie_file])
     except Exception as e:
         return f"⚠️ Échec du lancement du scraper {domain} : {e}"
     return (f"🚀 Scraper {domain} lancé en arrière-plan — je vous enverrai le résultat "
@@ -17,14 +17,101 @@ import subprocess
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
 from bro._shared import DM_TTL_DAYS, PYTHON_BIN, RELAYS, TOOLS_PATH, _owner_dir, _owner_g1_pubkey, _owner_hex, _owner_nsec
 
-__all__ = ['_natools_encrypt', '_natools_decrypt', 'BRO_ORIGIN_TAG', 'send_dm_to_owner', 'PROCESSED_COMMAND_IDS_DIR', 'PROCESSED_COMMAND_IDS_MAX_AGE_SEC', '_claim_event_id', '_cleanup_old_command_markers', '_fetch_self_dms_since', '_decrypt_self_dm']
+__all__ = ['enable_inprocess_crypto', '_natools_encrypt', '_natools_decrypt', 'BRO_ORIGIN_TAG', 'send_dm_to_owner', 'PROCESSED_COMMAND_IDS_DIR', 'PROCESSED_COMMAND_IDS_MAX_AGE_SEC', '_claim_event_id', '_cleanup_old_command_markers', '_fetch_self_dms_since', '_ack_self_dms', '_decrypt_self_dm', '_decrypt_self_dms']
 
 
 
+# Chiffrement NOSTR en processus (2026-10-18) — activé UNIQUEMENT par le
+# service résident (bro_service.py) : tools/nostr_node_intercom.py et
+# tools/nostr_send_secure_dm.py sont alors chargés une fois comme modules, et
+# déchiffrer/envoyer un DM ne forke plus un interpréteur Python par message.
+# Hors service (CLI, cron), ces modules restent à None et le chemin
+# sous-processus historique ci-dessous s'applique, inchangé.
+_intercom = None
+_secure_dm = None
+_OWNER_PRIV_HEX = {}   # owner_email -> clé privée hex (mémoire du processus uniquement)
+
+def _load_tool_module(name):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, os.path.join(TOOLS_PATH, f"{name}.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def enable_inprocess_crypto():
+    """Charge les modules de chiffrement NOSTR dans ce processus. Lève si
+    une dépendance manque (coincurve, pynostr...) — l'appelant garde alors
+    le chemin sous-processus."""
+    global _intercom, _secure_dm
+    _intercom = _load_tool_module("nostr_node_intercom")
+    _secure_dm = _load_tool_module("nostr_send_secure_dm")
+
+# Déchiffrement des self-DM en processus, service ou non (2026-10-18) :
+# tools/nostr_crypto.py ne dépend que de cryptography/bech32 et garde la clé
+# de conversation (owner, owner) en cache — un lot de self-DM ne coûte plus
+# qu'un ECDH, au lieu d'un `nostr_node_intercom.py decrypt` (interpréteur +
+# ECDH) par message. Si le module n'est pas importable, chemins précédents.
+_nostr_crypto = None
+
+def _nostr_crypto_module():
+    global _nostr_crypto
+    if _nostr_crypto is None:
+        try:
+            _nostr_crypto = _load_tool_module("nostr_crypto")
+        except Exception:
+            _nostr_crypto = False
+    return _nostr_crypto
+
+def _owner_priv_hex(owner_email):
+    priv = _OWNER_PRIV_HEX.get(owner_email)
+    if priv is None:
+        nsec = _owner_nsec(owner_email)
+        if not nsec:
+            return None
+        crypto = _nostr_crypto_module()
+        to_hex = crypto.nsec_to_hex if crypto else _intercom._nsec_to_hex
+        priv = _OWNER_PRIV_HEX[owner_email] = to_hex(nsec)
+    return priv
+
+# natools en processus (2026-10-18) : chiffrement en mémoire et ajout/lecture
+# IPFS par l'API HTTP (natools.encrypt_to_ipfs / decrypt_from_ipfs) — plus de
+# fichiers temporaires, ni de python3 natools.py + ipfs add/get par blob. Le
+# format reste le scellé unique de `natools.py encrypt` : les CID existants et
+# les outils shell restent compatibles. Si natools n'est pas importable
+# (duniterpy/libnacl absents), chemin sous-processus historique ci-dessous.
+# Une fois natools chargé, le repli reste l'exception : jamais après un ajout
+# IPFS parti (un second scellé, re-randomisé, laisserait un CID épinglé
+# orphelin), jamais sur un refus de déchiffrement ni un délai déjà épuisé.
+_natools = None
+
+def _natools_module():
+    global _natools
+    if _natools is None:
+        try:
+            _natools = _load_tool_module("natools")
+        except Exception:
+            _natools = False
+    return _natools
+
+def _owner_dunikey_path(owner_email):
+    for name in (".secret.dunikey", "secret.dunikey"):
+        p = os.path.join(_owner_dir(owner_email), name)
+        if os.path.isfile(p):
+            return p
+    return None
+
 def _natools_encrypt(owner_email, content_bytes):
     pubkey = _owner_g1_pubkey(owner_email)
     if not pubkey:
         return None
+    natools = _natools_module()
+    if natools:
+        # ipfs_add se replie déjà seul sur `ipfs add` si l'API est injoignable :
+        # une erreur ici a pu survenir après l'envoi, pas de second ajout
+        try:
+            return natools.encrypt_to_ipfs(content_bytes, pubkey, timeout=30) or None
+        except Exception:
+            return None
     with tempfile.TemporaryDirectory() as tmp:
         plain = os.path.join(tmp, "data.txt")
         enc = os.path.join(tmp, "data.enc")
@@ -48,14 +135,19 @@ def _natools_encrypt(owner_email, content_bytes):
         return result.stdout.strip() or None
 
 def _natools_decrypt(owner_email, cid):
-    dunikey = None
-    for name in (".secret.dunikey", "secret.dunikey"):
-        p = os.path.join(_owner_dir(owner_email), name)
-        if os.path.isfile(p):
-            dunikey = p
-            break
+    dunikey = _owner_dunikey_path(owner_email)
     if not dunikey:
         return None
+    natools = _natools_module()
+    if natools:
+        try:
+            return natools.decrypt_from_ipfs(cid, natools.get_privkey(dunikey, "pubsec"), timeout=30)
+        except TimeoutError:
+            return None     # 30 s déjà attendus : pas de second `ipfs get` de 30 s
+        except OSError:
+            pass            # IPFS injoignable / en erreur : repli sous-processus ci-dessous
+        except Exception:
+            return None     # déchiffrement refusé (ValueError...) : natools.py échouerait pareil
     with tempfile.TemporaryDirectory() as tmp:
         enc = os.path.join(tmp, "data.enc")
         plain = os.path.join(tmp, "data.txt")
@@ -113,6 +205,15 @@ def send_dm_to_owner(owner_email, message, ttl_days=DM_TTL_DAYS, ttl_seconds=Non
                "--ttl-days", str(ttl_days), "--extra-tags", json.dumps(extra_tags)]
     if len(RELAYS) > 1:
         cmd += ["--extra-relays", ",".join(RELAYS[1:])]
+    if _secure_dm is not None:
+        try:
+            return _secure_dm.send_secure_direct_message(
+                nsec, recipient_hex, message, RELAYS[0],
+                expire_seconds=None if ttl_seconds is not None else int(ttl_days * 86400),
+                extra_tags=extra_tags, extra_relays=RELAYS[1:] or None,
+            )
+        except Exception as e:
+            print(f"[BRO_WATCH] Envoi en processus échoué pour {owner_email} ({e}) — repli sous-processus")
     try:
         proc = subprocess.run(cmd, input=nsec + "\n", capture_output=True, text=True, timeout=20)
         return proc.returncode == 0
@@ -170,17 +271,31 @@ def _cleanup_old_command_markers():
     except Exception:
         pass
 
+# Gestionnaire d'abonnements persistants (bro.subscriptions), positionné par
+# le service BRO résident — None partout ailleurs (interrogation classique).
+_SUBSCRIPTIONS = None
+
 def _fetch_self_dms_since(owner_email, since_ts):
     """Récupère les events kind 4 self-DM (author == #p == propre clé) publiés
     après since_ts, sur tous les relais connus. Dégradation gracieuse (liste
-    vide) si aucun relay n'est joignable."""
-    import asyncio
-    import websockets
+    vide) si aucun relay n'est joignable.
 
+    Sous le service résident, les events arrivent déjà par les abonnements
+    vivants : seuls les relais dont l'abonnement n'est pas à jour sont
+    encore interrogés ici."""
     hex_pk = _owner_hex(owner_email)
     if not hex_pk:
         return []
 
+    relays, pushed = RELAYS, []
+    if _SUBSCRIPTIONS is not None:
+        pushed, relays = _SUBSCRIPTIONS.drain(owner_email)
+        if not relays:
+            return pushed
+
+    import asyncio
+    import websockets
+
     async def _query_relay(relay):
         events = []
         try:
@@ -200,8 +315,8 @@ def _fetch_self_dms_since(owner_email, since_ts):
         return events
 
     async def _query_all():
-        seen, merged = set(), []
-        for relay in RELAYS:
+        seen, merged = {ev["id"] for ev in pushed}, list(pushed)
+        for relay in relays:
             for ev in await _query_relay(relay):
                 if ev["id"] not in seen:
                     seen.add(ev["id"])
@@ -210,7 +325,32 @@ def _fetch_self_dms_since(owner_email, since_ts):
 
     return asyncio.run(_query_all())
 
+def _ack_self_dms(owner_email, events):
+    """Acquitte auprès des abonnements vivants les events traités (sans effet
+    hors service résident) : tant que ce n'est pas fait, drain() les
+    re-livre."""
+    if _SUBSCRIPTIONS is not None:
+        _SUBSCRIPTIONS.ack(owner_email, [ev.get("id") for ev in events])
+
+def _self_dm_text(decrypted):
+    try:
+        envelope = json.loads(decrypted)
+    except (json.JSONDecodeError, ValueError):
+        envelope = {"payload": {"text": decrypted}}
+    return envelope.get("payload", {}).get("text")
+
 def _decrypt_self_dm(owner_email, event):
+    crypto = _nostr_crypto_module()
+    if crypto or _intercom is not None:
+        try:
+            priv_hex = _owner_priv_hex(owner_email)
+            if not priv_hex:
+                return None
+            decrypt_content = crypto.decrypt_content if crypto else _intercom._decrypt_content
+            return _self_dm_text(decrypt_content(event.get("content", ""), priv_hex,
+                                                 event.get("pubkey", "")))
+        except Exception:
+            return None
     nsec = _owner_nsec(owner_email)
     if not nsec:
         return None
@@ -227,3 +367,26 @@ def _decrypt_self_dm(owner_email, event):
         return envelope.get("payload", {}).get("text")
     except Exception:
         return None
+
+def _decrypt_self_dms(owner_email, events):
+    """Lot de self-DM -> {id d'event: texte ou None}. En processus : un seul
+    nostr_crypto.decrypt_events (un ECDH pour tout le lot) ; sinon un
+    _decrypt_self_dm par event."""
+    events = list(events)
+    crypto = _nostr_crypto_module()
+    if crypto:
+        priv_hex = None
+        try:
+            priv_hex = _owner_priv_hex(owner_email)
+        except Exception:
+            pass
+        if not priv_hex:
+            return {ev.get("id"): None for ev in events}
+        texts = []
+        for decrypted in crypto.decrypt_events(events, priv_hex):
+            try:
+                texts.append(_self_dm_text(decrypted) if decrypted is not None else None)
+            except Exception:
+                texts.append(None)
+        return {ev.get("id"): text for ev, text in zip(events, texts)}
+    return {ev.get("id"): _decrypt_self_dm(owner_email, ev) for ev in events}
@@ -16,16 +16,13 @@ import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
 import bro_tools
+import vector_store
 from bro._shared import BRO_IA_PATH
 
-__all__ = ['QDRANT_HOST', 'QDRANT_PORT', 'QDRANT_TOPICS_COLLECTION', 'QDRANT_EMBED_MODEL', 'QDRANT_VECTOR_SIZE', 'SEMANTIC_THRESHOLD', '_qdrant_client', '_qdrant_embed', '_cosine', '_topic_point_id', 'semantic_match', 'QDRANT_INTENT_COLLECTION', 'INTENT_MARGIN_THRESHOLD', 'INTENT_SHARED_NEGATIVES', '_intent_point_id', '_seed_intent_corpus', 'match_intent', 'BRO_MEMORY_SLOT', 'BRO_PERSONA_SLOT', 'PERSONA_RECALL_THRESHOLD', 'QDRANT_NETWORK_COLLECTION', 'NETWORK_RECALL_THRESHOLD', 'MEMORY_RECALL_THRESHOLD', '_memory_slot_file', '_recall_relevant_memories', '_remember_exchange', '_recall_persona', '_recall_network_profile', '_forget_memory']
+__all__ = ['QDRANT_TOPICS_COLLECTION', 'QDRANT_EMBED_MODEL', 'QDRANT_VECTOR_SIZE', 'SEMANTIC_THRESHOLD', '_qdrant_client', '_qdrant_embed', '_cosine', '_topic_point_id', 'semantic_match', 'QDRANT_INTENT_COLLECTION', 'INTENT_MARGIN_THRESHOLD', 'INTENT_SHARED_NEGATIVES', '_intent_point_id', '_seed_intent_corpus', 'INTENT_INDEX_FILE', '_intent_index', '_match_intent_local', 'match_intent', 'BRO_MEMORY_SLOT', 'BRO_PERSONA_SLOT', 'PERSONA_RECALL_THRESHOLD', 'QDRANT_NETWORK_COLLECTION', 'NETWORK_RECALL_THRESHOLD', 'MEMORY_RECALL_THRESHOLD', '_memory_slot_file', '_recall_relevant_memories', '_remember_exchange', '_recall_persona', '_recall_network_profile', '_forget_memory']
 
 
 
-QDRANT_HOST = "localhost"
-
-QDRANT_PORT = 6333
-
 QDRANT_TOPICS_COLLECTION = "bro_watch_topics"
 
 QDRANT_EMBED_MODEL = "nomic-embed-text"
@@ -35,26 +32,17 @@ QDRANT_VECTOR_SIZE = 768
 SEMANTIC_THRESHOLD = 0.70  # calibré empiriquement (nomic-embed-text a un plancher élevé ~0.5-0.6 même hors-sujet)
 
 def _qdrant_client():
-    import warnings
-    from qdrant_client import QdrantClient
-    env_file = os.path.expanduser("~/.zen/ai-company/.env")
-    api_key = None
-    try:
-        with open(env_file) as f:
-            for line in f:
-                if line.startswith("QDRANT_API_KEY="):
-                    api_key = line.strip().split("=", 1)[1]
-    except Exception:
-        pass
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", UserWarning)
-        return QdrantClient(url=f"http://{QDRANT_HOST}:{QDRANT_PORT}",
-                             api_key=api_key, check_compatibility=False)
+    """Client Qdrant/Ollama partagé du processus (vector_store.py) — plus de
+    QdrantClient neuf ni de get_collections à chaque appel (2026-10-18)."""
+    return vector_store
 
 def _qdrant_embed(text):
-    import ollama
-    resp = ollama.embeddings(model=QDRANT_EMBED_MODEL, prompt=text)
-    return resp["embedding"]
+    """Embedding Ollama, servi par embed_cache pour un texte déjà vu
+    (exemples d'intention, mots-clés de sujets) — lève si Ollama échoue."""
+    vec = vector_store.embed(text, QDRANT_EMBED_MODEL)
+    if not vec:
+        raise RuntimeError(f"embedding Ollama indisponible ({vector_store.OLLAMA_URL})")
+    return vec
 
 def _cosine(a, b):
     dot = sum(x * y for x, y in zip(a, b))
@@ -74,31 +62,21 @@ def semantic_match(owner_email, account, channel, entry, text, threshold=SEMANTI
     if not topic_text:
         return False
     try:
-        from qdrant_client.models import Distance, VectorParams, PointStruct
-
         client = _qdrant_client()
-        existing_collections = [c.name for c in client.get_collections().collections]
-        if QDRANT_TOPICS_COLLECTION not in existing_collections:
-            client.create_collection(
-                collection_name=QDRANT_TOPICS_COLLECTION,
-                vectors_config=VectorParams(size=QDRANT_VECTOR_SIZE, distance=Distance.COSINE),
-            )
+        client.ensure_collection(QDRANT_TOPICS_COLLECTION, QDRANT_VECTOR_SIZE)
 
         point_id = _topic_point_id(owner_email, account, channel)
         topic_hash = hashlib.sha256(topic_text.encode()).hexdigest()
 
-        existing = client.retrieve(collection_name=QDRANT_TOPICS_COLLECTION, ids=[point_id],
-                                    with_payload=True, with_vectors=True)
-        if existing and existing[0].payload.get("hash") == topic_hash:
-            topic_vec = existing[0].vector
+        existing = client.retrieve(QDRANT_TOPICS_COLLECTION, [point_id], with_vector=True)
+        if existing and (existing[0].get("payload") or {}).get("hash") == topic_hash:
+            topic_vec = existing[0]["vector"]
         else:
             topic_vec = _qdrant_embed(topic_text)
-            client.upsert(
-                collection_name=QDRANT_TOPICS_COLLECTION,
-                points=[PointStruct(id=point_id, vector=topic_vec,
-                                     payload={"owner": owner_email, "account": account,
-                                              "channel": channel, "hash": topic_hash})]
-            )
+            client.upsert(QDRANT_TOPICS_COLLECTION, [
+                {"id": point_id, "vector": topic_vec,
+                 "payload": {"owner": owner_email, "account": account,
+                             "channel": channel, "hash": topic_hash}}])
 
         text_vec = _qdrant_embed(text)
         score = _cosine(topic_vec, text_vec)
@@ -136,65 +114,137 @@ def _seed_intent_corpus():
     les exemples positifs déclarés sur chaque bro_tools.Tool enregistré.
     Appelé paresseusement au premier match_intent() — pas de coût au
     chargement du module, dégradation silencieuse si Qdrant/Ollama
-    indisponible."""
-    from qdrant_client.models import Distance, VectorParams, PointStruct
-
+    indisponible. Un seul retrieve pour tous les exemples (au lieu d'un par
+    exemple), embeddings des manquants par lots."""
     client = _qdrant_client()
-    existing_collections = [c.name for c in client.get_collections().collections]
-    if QDRANT_INTENT_COLLECTION not in existing_collections:
-        client.create_collection(
-            collection_name=QDRANT_INTENT_COLLECTION,
-            vectors_config=VectorParams(size=QDRANT_VECTOR_SIZE, distance=Distance.COSINE),
-        )
-
-    points = []
-    for target, ex in bro_tools.iter_examples():
-        pid = _intent_point_id("positive", target, ex)
-        existing = client.retrieve(collection_name=QDRANT_INTENT_COLLECTION, ids=[pid])
-        if existing:
-            continue
-        points.append(PointStruct(id=pid, vector=_qdrant_embed(ex),
-                                   payload={"label": "positive", "target": target, "text": ex}))
-    for ex in INTENT_SHARED_NEGATIVES:
-        pid = _intent_point_id("negative", "shared", ex)
-        existing = client.retrieve(collection_name=QDRANT_INTENT_COLLECTION, ids=[pid])
-        if existing:
-            continue
-        points.append(PointStruct(id=pid, vector=_qdrant_embed(ex),
-                                   payload={"label": "negative", "target": "shared", "text": ex}))
+    if not client.ensure_collection(QDRANT_INTENT_COLLECTION, QDRANT_VECTOR_SIZE):
+        raise RuntimeError(f"collection {QDRANT_INTENT_COLLECTION} indisponible")
+
+    rows = [(_intent_point_id("positive", target, ex),
+             {"label": "positive", "target": target, "text": ex})
+            for target, ex in bro_tools.iter_examples()]
+    rows += [(_intent_point_id("negative", "shared", ex),
+              {"label": "negative", "target": "shared", "text": ex})
+             for ex in INTENT_SHARED_NEGATIVES]
+    present = {p["id"] for p in client.retrieve(QDRANT_INTENT_COLLECTION,
+                                                 [pid for pid, _ in rows], with_payload=False)}
+    missing = [(pid, payload) for pid, payload in rows if pid not in present]
+    vecs = client.embed_many([payload["text"] for _, payload in missing], QDRANT_EMBED_MODEL)
+    points = [{"id": pid, "vector": vec, "payload": payload}
+              for (pid, payload), vec in zip(missing, vecs) if vec]
 
     if points:
-        client.upsert(collection_name=QDRANT_INTENT_COLLECTION, points=points)
+        client.upsert(QDRANT_INTENT_COLLECTION, points)
         print(f"[BRO_WATCH] Corpus d'intention : {len(points)} nouvel(le)s exemple(s) indexé(s)")
 
+# Index d'intention local (2026-10-18) : le corpus tient en quelques centaines
+# d'exemples — une matrice NumPy normalisée en mémoire suffit, là où
+# match_intent payait à chaque message un client.retrieve PAR exemple
+# (_seed_intent_corpus), un nouveau QdrantClient et deux query_points.
+# Persisté à côté du registre d'outils (bro_active_tools.json), reconstruit
+# seulement quand le hash des exemples change (outil Arbor activé, exemples
+# ajoutés...). Qdrant reste le repli si NumPy est absent.
+INTENT_INDEX_FILE = os.path.expanduser("~/.zen/flashmem/bro_intent_index.npz")
+
+_INTENT_INDEX = None   # {"hash", "matrix", "positive", "targets"}
+
+def _intent_index():
+    """Matrice L2-normalisée (une ligne par exemple) + masque positif/négatif
+    + cible de chaque ligne. Chargée depuis INTENT_INDEX_FILE si le hash
+    correspond, sinon reconstruite (embeddings servis par embed_cache)."""
+    global _INTENT_INDEX
+    import numpy as np
+
+    rows = [("positive", target, ex) for target, ex in bro_tools.iter_examples()]
+    rows += [("negative", "shared", ex) for ex in INTENT_SHARED_NEGATIVES]
+    corpus_hash = hashlib.sha256(
+        json.dumps([QDRANT_EMBED_MODEL, rows], ensure_ascii=False).encode()
+    ).hexdigest()
+    if _INTENT_INDEX is not None and _INTENT_INDEX["hash"] == corpus_hash:
+        return _INTENT_INDEX
+
+    try:
+        with np.load(INTENT_INDEX_FILE, allow_pickle=False) as data:
+            if str(data["hash"]) == corpus_hash:
+                _INTENT_INDEX = {"hash": corpus_hash, "matrix": data["matrix"],
+                                 "positive": data["positive"],
+                                 "targets": [str(t) for t in data["targets"]]}
+                return _INTENT_INDEX
+    except Exception:
+        pass
+
+    matrix = np.asarray([_qdrant_embed(text) for _, _, text in rows], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    positive = np.asarray([label == "positive" for label, _, _ in rows])
+    targets = [target for _, target, _ in rows]
+    try:
+        os.makedirs(os.path.dirname(INTENT_INDEX_FILE), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(INTENT_INDEX_FILE), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, hash=np.asarray(corpus_hash), matrix=matrix,
+                     positive=positive, targets=np.asarray(targets))
+        os.replace(tmp, INTENT_INDEX_FILE)
+    except Exception as e:
+        print(f"[BRO_WATCH] Index d'intention non persisté : {e}")
+    print(f"[BRO_WATCH] Index d'intention local : {len(rows)} exemple(s) indexé(s)")
+    _INTENT_INDEX = {"hash": corpus_hash, "matrix": matrix,
+                     "positive": positive, "targets": targets}
+    return _INTENT_INDEX
+
+def _match_intent_local(text, margin_threshold=INTENT_MARGIN_THRESHOLD):
+    """Même marge que la voie Qdrant (meilleur positif − meilleur négatif),
+    en UN produit matrice-vecteur sur l'index local — un seul appel réseau,
+    l'embedding du message. Lève ImportError si NumPy est absent."""
+    import numpy as np
+
+    index = _intent_index()
+    positive = index["positive"]
+    if not positive.any():
+        return None
+    vec = np.asarray(_qdrant_embed(text), dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    if not norm:
+        return None
+    scores = index["matrix"] @ (vec / norm)
+    pos_scores = np.where(positive, scores, -np.inf)
+    best = int(np.argmax(pos_scores))
+    best_neg_score = float(scores[~positive].max()) if (~positive).any() else 0.0
+    margin = float(pos_scores[best]) - best_neg_score
+    if margin >= margin_threshold:
+        return index["targets"][best], margin
+    return None
+
 def match_intent(text, margin_threshold=INTENT_MARGIN_THRESHOLD):
     """Route vers un tag système réel par marge sémantique (meilleur positif
     − meilleur négatif partagé) — voir le commentaire d'architecture ci-dessus
     pour la justification de la marge plutôt qu'un seuil absolu. Retourne
-    (target, margin) ou None. Dégradation silencieuse si Qdrant/Ollama
-    indisponible : ne doit jamais bloquer la réponse à l'utilisateur."""
+    (target, margin) ou None. Index local NumPy en priorité, Qdrant en repli.
+    Dégradation silencieuse si Qdrant/Ollama indisponible : ne doit jamais
+    bloquer la réponse à l'utilisateur."""
+    try:
+        return _match_intent_local(text, margin_threshold)
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"[BRO_WATCH] Index d'intention local indisponible, repli Qdrant : {e}")
     try:
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
-
         _seed_intent_corpus()
         client = _qdrant_client()
         text_vec = _qdrant_embed(text)
 
-        pos_hits = client.query_points(
-            collection_name=QDRANT_INTENT_COLLECTION, query=text_vec, limit=1,
-            query_filter=Filter(must=[FieldCondition(key="label", match=MatchValue(value="positive"))]),
-        ).points
-        neg_hits = client.query_points(
-            collection_name=QDRANT_INTENT_COLLECTION, query=text_vec, limit=1,
-            query_filter=Filter(must=[FieldCondition(key="label", match=MatchValue(value="negative"))]),
-        ).points
+        # Meilleur positif et meilleur négatif en UN aller-retour.
+        pos_hits, neg_hits = client.search_batch(QDRANT_INTENT_COLLECTION, [
+            {"vector": text_vec, "limit": 1, "query_filter": client.match_filter(label="positive")},
+            {"vector": text_vec, "limit": 1, "query_filter": client.match_filter(label="negative")},
+        ])
         if not pos_hits:
             return None
         best_pos = pos_hits[0]
-        best_neg_score = neg_hits[0].score if neg_hits else 0.0
-        margin = best_pos.score - best_neg_score
+        best_neg_score = neg_hits[0]["score"] if neg_hits else 0.0
+        margin = best_pos["score"] - best_neg_score
         if margin >= margin_threshold:
-            return best_pos.payload["target"], margin
+            return best_pos["payload"]["target"], margin
         return None
     except Exception as e:
         print(f"[BRO_WATCH] match_intent indisponible : {e}")
@@ -244,32 +294,31 @@ def _remember_exchange(owner_email, text, answer):
     pertinent" au tour suivant, une fausse vérité que le LLM répète docilement
     — même quand le contexte réel (ex: description d'image fraîche) est
     présent dans le MÊME prompt juste après. Mémoriser uniquement ce que
-    l'utilisateur a dit élimine cette boucle de rétroaction. Déclenche le
-    cycle RÊVE (compression épisodique → sémantique) au-delà du seuil.
+    l'utilisateur a dit élimine cette boucle de rétroaction. Au-delà du
+    seuil, met le slot en file RÊVE (compression épisodique → sémantique,
+    faite hors conversation par reve_scheduler.py).
     Dégradation silencieuse : ne doit jamais faire échouer la réponse."""
     try:
         from datetime import datetime
         content = text
         ts = datetime.utcnow().isoformat() + "Z"
 
-        slot_file = _memory_slot_file(owner_email)
-        os.makedirs(os.path.dirname(slot_file), exist_ok=True)
-        if os.path.isfile(slot_file):
-            with open(slot_file, encoding="utf-8") as f:
-                slot_mem = json.load(f)
-        else:
-            slot_mem = {"user_id": owner_email, "slot": BRO_MEMORY_SLOT, "messages": []}
-        slot_mem["messages"].append({"timestamp": ts, "content": content})
-        slot_mem["messages"] = slot_mem["messages"][-200:]
-        with open(slot_file, "w", encoding="utf-8") as f:
-            json.dump(slot_mem, f, indent=2, ensure_ascii=False)
-
         import sys
         sys.path.insert(0, BRO_IA_PATH)
         import memory_manager as mm
+        import reve_scheduler
+        import slot_store
+
+        slot_file = _memory_slot_file(owner_email)
+        # Ajout journalisé (O(1)) : plus de réécriture du JSON entier.
+        n = slot_store.append(
+            slot_file, {"timestamp": ts, "content": content},
+            lambda: {"user_id": owner_email, "slot": BRO_MEMORY_SLOT, "messages": []})
+
         mm.upsert_user_slot(owner_email, BRO_MEMORY_SLOT, content, timestamp=ts)
-        if len(slot_mem["messages"]) >= 170:
-            mm.reve_compress_slot(owner_email, BRO_MEMORY_SLOT, slot_file=slot_file)
+        # RÊVE hors chemin chaud : mise en file, résumé par reve_scheduler.
+        if n >= reve_scheduler.REVE_TRIGGER:
+            reve_scheduler.enqueue(slot_file, n)
     except Exception as e:
         print(f"[BRO_WATCH] Mémoire self-DM indisponible pour {owner_email} : {e}")
 
@@ -299,14 +348,10 @@ def _recall_network_profile(username, limit=1):
     try:
         client = _qdrant_client()
         vec = _qdrant_embed(clean)
-        hits = client.query_points(
-            collection_name=QDRANT_NETWORK_COLLECTION,
-            query=vec,
-            limit=limit,
-            score_threshold=NETWORK_RECALL_THRESHOLD,
-        ).points
+        hits = client.search(QDRANT_NETWORK_COLLECTION, vec, limit=limit,
+                             score_threshold=NETWORK_RECALL_THRESHOLD)
         if hits:
-            return hits[0].payload.get("fiche", "")
+            return (hits[0].get("payload") or {}).get("fiche", "")
     except Exception:
         pass
     return ""
@@ -317,8 +362,10 @@ def _forget_memory(owner_email):
     symétrique au #reset des slots société (bro_dm_daemon.sh)."""
     slot_file = _memory_slot_file(owner_email)
     try:
-        if os.path.isfile(slot_file):
-            os.remove(slot_file)
+        import sys
+        sys.path.insert(0, BRO_IA_PATH)
+        import slot_store
+        slot_store.remove(slot_file)
     except Exception:
         pass
     try:
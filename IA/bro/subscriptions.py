@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+bro.subscriptions — Abonnements NOSTR persistants aux self-DM des propriétaires locaux.
+
+Contexte (2026-10-18) : _fetch_self_dms_since ouvrait un websocket NEUF vers
+chaque relais de RELAYS, l'un après l'autre, envoyait un REQ "since", attendait
+EOSE puis fermait — pour chaque propriétaire, à chaque passage check-commands.
+Soit O(propriétaires × relais) poignées de main par cycle, et une latence de
+commande égale à l'intervalle du cron.
+
+Ici : UNE connexion longue par relais, sur laquelle sont multiplexés les
+filtres kind 4 self-DM (author == #p == clé du propriétaire) de TOUS les
+propriétaires locaux, en abonnements vivants (pas de CLOSE après EOSE). Chaque
+event reçu est rangé dans la file du propriétaire ; _fetch_self_dms_since la
+lit au lieu d'interroger les relais, et le callback on_event permet à l'hôte
+(bro_service.py) de déclencher process_incoming_commands dans la seconde.
+
+Reprise après coupure : le REQ est renvoyé avec since = curseur persistant
+fourni par since_fn (le "last_check" du manifest, avancé par
+process_incoming_commands seulement APRÈS traitement — un event mis en file
+puis perdu dans un crash est donc re-livré ; la déduplication
+_claim_event_id fait le reste). Même logique pour la file en mémoire :
+drain() ne fait que la LIRE, process_incoming_commands ne retire les events
+(ack) qu'une fois le lot traité et last_check sauvé — une exception en cours
+de route les laisse en file pour le passage suivant. Un relais pas encore
+"à jour" (pas d'EOSE
+depuis sa dernière connexion) est signalé par drain() : l'appelant l'interroge
+à l'ancienne, jamais d'event manqué.
+
+Hébergé par le service BRO résident ; hors service, rien ne change.
+"""
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from bro._shared import NOSTR_DIR, _is_valid_owner_email, _owner_hex
+from bro.nostr import BRO_ORIGIN_TAG
+
+__all__ = ['RelaySubscriptionManager', 'local_owner_emails']
+
+log = logging.getLogger(__name__)
+
+OWNER_REFRESH_SEC = 300      # re-scan des comptes locaux (création/roaming)
+SINCE_SKEW_SEC = 60          # marge d'horloge entre relais et station
+RECONNECT_MAX_SEC = 300
+SEEN_PER_OWNER = 512
+
+
+def local_owner_emails():
+    """Comptes MULTIPASS locaux : même critère que bro_dm_daemon.sh
+    (sous-dossier *@* de NOSTR_DIR, clé présente, pas en roaming)."""
+    try:
+        names = sorted(os.listdir(NOSTR_DIR))
+    except OSError:
+        return []
+    return [n for n in names
+            if "@" in n and _is_valid_owner_email(n)
+            and not os.path.exists(os.path.join(NOSTR_DIR, n, ".roaming"))
+            and len(_owner_hex(n)) == 64]
+
+
+class RelaySubscriptionManager:
+    """Une connexion websocket par relais, un abonnement vivant par
+    propriétaire local sur chacune. drain() est appelable depuis n'importe
+    quel thread ; run() tourne dans la boucle asyncio de l'hôte."""
+
+    def __init__(self, relays, since_fn, on_event=None):
+        self.relays = list(relays)
+        self.since_fn = since_fn            # owner_email -> timestamp (curseur persistant)
+        self.on_event = on_event            # owner_email -> None (appelé dans la boucle)
+        self._owners = {}                   # owner_email -> hex
+        self._by_sub = {}                   # id d'abonnement -> owner_email
+        self._queues = {}                   # owner_email -> [event, ...]
+        self._seen = {}                     # owner_email -> deque d'ids (anti-doublon inter-relais)
+        self._live = {r: set() for r in self.relays}   # relais -> propriétaires après EOSE
+        self._sockets = {}                  # relais -> websocket ouvert
+        self._lock = threading.Lock()
+        self._stop = asyncio.Event()
+        self.counters = {"connects": 0, "events": 0, "duplicates": 0, "bot_origin": 0}
+
+    # ── côté consommateur (threads) ───────────────────────────────────────────
+
+    def drain(self, owner_email):
+        """(events, relais_à_interroger) : events en file non encore acquittés
+        (copie — la file n'est PAS vidée, cf. ack), et relais dont
+        l'abonnement n'est pas encore à jour pour ce propriétaire
+        (déconnecté, ou EOSE pas encore reçu)."""
+        with self._lock:
+            events = list(self._queues.get(owner_email, ()))
+            pending = [r for r in self.relays if owner_email not in self._live[r]]
+        return events, pending
+
+    def ack(self, owner_email, event_ids):
+        """Retire de la file les events traités. Par id, pas par nombre : des
+        events arrivés entre drain() et ack() restent en file."""
+        event_ids = set(event_ids)
+        with self._lock:
+            queue = [ev for ev in self._queues.get(owner_email, ())
+                     if ev.get("id") not in event_ids]
+            if queue:
+                self._queues[owner_email] = queue
+            else:
+                self._queues.pop(owner_email, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "owners": len(self._owners),
+                "relays": {r: {"connected": r in self._sockets, "live_owners": len(self._live[r])}
+                           for r in self.relays},
+                "queued": sum(len(q) for q in self._queues.values()),
+                **self.counters,
+            }
+
+    # ── boucle asyncio ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _sub_id(hex_pk):
+        return f"brocmd-{hex_pk[:16]}"
+
+    def _req(self, owner_email, hex_pk):
+        since = max(0, int(self.since_fn(owner_email) or 0) - SINCE_SKEW_SEC)
+        return json.dumps(["REQ", self._sub_id(hex_pk),
+                           {"kinds": [4], "authors": [hex_pk], "#p": [hex_pk],
+                            "since": since, "limit": 50}])
+
+    def _on_message(self, relay, raw):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        if not isinstance(data, list) or len(data) < 2:
+            return
+        owner = self._by_sub.get(data[1])
+        if owner is None:
+            return
+        if data[0] == "EOSE":
+            with self._lock:
+                self._live[relay].add(owner)
+        elif data[0] == "EVENT" and len(data) >= 3:
+            ev = data[2]
+            # Réponses de BRO lui-même : jamais des commandes (cf. filtre
+            # anti-boucle de process_incoming_commands) — ne doivent pas
+            # déclencher un passage à chaque réponse envoyée.
+            if list(BRO_ORIGIN_TAG) in ev.get("tags", []):
+                self.counters["bot_origin"] += 1
+                return
+            with self._lock:
+                seen = self._seen.setdefault(owner, deque(maxlen=SEEN_PER_OWNER))
+                if ev.get("id") in seen:
+                    self.counters["duplicates"] += 1
+                    return
+                seen.append(ev.get("id"))
+                self._queues.setdefault(owner, []).append(ev)
+                self.counters["events"] += 1
+            if self.on_event:
+                try:
+                    self.on_event(owner)
+                except Exception as e:
+                    log.warning(f"on_event({owner}) en erreur : {e}")
+
+    async def _relay_loop(self, relay):
+        import websockets
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(relay, open_timeout=10, ping_interval=30,
+                                              max_size=4 * 1024 * 1024) as ws:
+                    self.counters["connects"] += 1
+                    delay = 1
+                    with self._lock:
+                        self._sockets[relay] = ws
+                        owners = dict(self._owners)
+                    for email, hex_pk in owners.items():
+                        await ws.send(self._req(email, hex_pk))
+                    log.info(f"{relay} : {len(owners)} abonnement(s) self-DM actifs")
+                    async for raw in ws:
+                        self._on_message(relay, raw)
+            except Exception as e:
+                log.warning(f"{relay} : connexion perdue ({e}) — reconnexion dans {delay}s")
+            finally:
+                with self._lock:
+                    self._sockets.pop(relay, None)
+                    self._live[relay].clear()
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, RECONNECT_MAX_SEC)
+
+    async def refresh_owners(self):
+        """Aligne les abonnements sur les comptes locaux actuels."""
+        current = {e: _owner_hex(e) for e in local_owner_emails()}
+        with self._lock:
+            added = {e: h for e, h in current.items() if self._owners.get(e) != h}
+            removed = {e: h for e, h in self._owners.items() if e not in current}
+            self._owners = current
+            self._by_sub = {self._sub_id(h): e for e, h in current.items()}
+            for email in removed:
+                self._queues.pop(email, None)
+                self._seen.pop(email, None)
+                for live in self._live.values():
+                    live.discard(email)
+            sockets = list(self._sockets.values())
+        for ws in sockets:
+            try:
+                for email, hex_pk in removed.items():
+                    await ws.send(json.dumps(["CLOSE", self._sub_id(hex_pk)]))
+                for email, hex_pk in added.items():
+                    await ws.send(self._req(email, hex_pk))
+            except Exception:
+                pass    # la reconnexion ré-abonnera tout le monde
+
+    async def run(self):
+        await self.refresh_owners()
+        tasks = [asyncio.create_task(self._relay_loop(r)) for r in self.relays]
+        try:
+            while not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=OWNER_REFRESH_SEC)
+                except asyncio.TimeoutError:
+                    await self.refresh_owners()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        self._stop.set()
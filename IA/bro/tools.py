@@ -12,7 +12,6 @@ import json
 import time
 import hashlib
 import tempfile
-import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # IA/
 import bro_tools
@@ -21,7 +20,7 @@ try:
     import bro_user_level
 except Exception:
     bro_user_level = None
-from bro._shared import BRO_IA_PATH, BRO_WATCH_CORE_PATH, RELAYS, _now_iso, _owner_hex
+from bro._shared import BRO_IA_PATH, RELAYS, _now_iso, _owner_hex, _launch_background
 from bro.media import BADGE_RUN_TIMEOUT_SEC, CRAFT_RUN_TIMEOUT_SEC, _available_scraper_domains, _extract_scraper_domain, _run_scraper_now
 from bro.identity import _dispatch_identity_update_check, list_preferences_history, rollback_preferences
 from bro.nostr import send_dm_to_owner
@@ -298,24 +297,20 @@ def _persist_slot_content(owner_email, slot, content):
     try:
         from datetime import datetime
         ts = datetime.utcnow().isoformat() + "Z"
-        slot_file = _generic_slot_file(owner_email, slot)
-        os.makedirs(os.path.dirname(slot_file), exist_ok=True)
-        if os.path.isfile(slot_file):
-            with open(slot_file, encoding="utf-8") as f:
-                slot_mem = json.load(f)
-        else:
-            slot_mem = {"user_id": owner_email, "slot": slot, "messages": []}
-        slot_mem["messages"].append({"timestamp": ts, "content": content})
-        slot_mem["messages"] = slot_mem["messages"][-200:]
-        with open(slot_file, "w", encoding="utf-8") as f:
-            json.dump(slot_mem, f, indent=2, ensure_ascii=False)
-
         import sys
         sys.path.insert(0, BRO_IA_PATH)
         import memory_manager as mm
+        import reve_scheduler
+        import slot_store
+
+        slot_file = _generic_slot_file(owner_email, slot)
+        n = slot_store.append(
+            slot_file, {"timestamp": ts, "content": content},
+            lambda: {"user_id": owner_email, "slot": slot, "messages": []})
+
         mm.upsert_user_slot(owner_email, slot, content, timestamp=ts)
-        if len(slot_mem["messages"]) >= 170:
-            mm.reve_compress_slot(owner_email, slot, slot_file=slot_file)
+        if n >= reve_scheduler.REVE_TRIGGER:
+            reve_scheduler.enqueue(slot_file, n)
         return True
     except Exception as e:
         print(f"[BRO_WATCH] #rec indisponible pour {owner_email} slot {slot} : {e}")
@@ -324,8 +319,10 @@ def _persist_slot_content(owner_email, slot, content):
 def _format_slot_summary(owner_email, slot, limit=5):
     slot_file = _generic_slot_file(owner_email, slot)
     try:
-        with open(slot_file, encoding="utf-8") as f:
-            messages = json.load(f).get("messages", [])
+        import sys
+        sys.path.insert(0, BRO_IA_PATH)
+        import slot_store
+        messages = slot_store.messages(slot_file)
     except Exception:
         return None
     if not messages:
@@ -336,8 +333,10 @@ def _format_slot_summary(owner_email, slot, limit=5):
 def _clear_slot(owner_email, slot):
     slot_file = _generic_slot_file(owner_email, slot)
     try:
-        if os.path.isfile(slot_file):
-            os.remove(slot_file)
+        import sys
+        sys.path.insert(0, BRO_IA_PATH)
+        import slot_store
+        slot_store.remove(slot_file)
     except Exception:
         pass
     try:
@@ -518,10 +517,7 @@ def _tool_craft(owner_email, text):
     if not url:
         return "⚠️ Usage : #craft <url>  ex: #craft https://instructables.com/Arduino-TV-B-Gone/"
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-craft-background", owner_email, url],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-craft-background", owner_email, url])
     except Exception as e:
         return f"⚠️ Échec du lancement de l'analyse : {e}"
     return f"⏳ Analyse IA en cours pour : {url} — je vous enverrai le résultat sous {CRAFT_RUN_TIMEOUT_SEC}s."
@@ -535,10 +531,7 @@ def _tool_badge(owner_email, text):
     if not skill:
         return "⚠️ Usage : #badge <compétence>  ex: #badge docker"
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-badge-background", owner_email, skill],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-badge-background", owner_email, skill])
     except Exception as e:
         return f"⚠️ Échec du lancement de la génération : {e}"
     return (f"🎨 Génération du badge '{skill}'… Cela peut prendre jusqu'à {BADGE_RUN_TIMEOUT_SEC}s (ComfyUI) — "
@@ -570,10 +563,7 @@ def _notify_captain_skill_contribution(owner_email, skill, content):
     confirmation déjà renvoyée au contributeur, même raison structurelle
     que _dispatch_identity_update_check (self-DM peut prendre jusqu'à 20s)."""
     try:
-        subprocess.Popen(
-            ["python3", BRO_WATCH_CORE_PATH, "run-skill-notify-background", owner_email, skill, content],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-skill-notify-background", owner_email, skill, content])
     except Exception as e:
         print(f"[BRO_WATCH] Échec notification capitaine (contribution skill) : {e}")
 
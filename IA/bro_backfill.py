@@ -27,6 +27,9 @@ import hashlib
 import argparse
 import subprocess
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import vector_store
+
 BRO_IA_PATH  = os.path.expanduser("~/.zen/Astroport.ONE/IA")
 TOOLS_PATH   = os.path.expanduser("~/.zen/Astroport.ONE/tools")
 NOSTR_DIR    = os.path.expanduser("~/.zen/game/nostr")
@@ -42,8 +45,6 @@ PYTHON_BIN = (os.path.expanduser("~/.astro/bin/python3")
 QDRANT_NETWORK_COLLECTION = "uplanet_network"
 QDRANT_EMBED_MODEL        = "nomic-embed-text"
 QDRANT_VECTOR_SIZE        = 768
-QDRANT_HOST               = "localhost"
-QDRANT_PORT               = 6333
 
 BRO_PERSONA_SLOT = 14
 DEFAULT_RELAY    = "wss://relay.copylaradio.com"
@@ -86,40 +87,16 @@ def _question(prompt, dry_run=False):
 
 # ─── Qdrant ───────────────────────────────────────────────────────────────────
 
-def _qdrant_client():
-    import warnings
-    from qdrant_client import QdrantClient
-    env_file = os.path.expanduser("~/.zen/ai-company/.env")
-    api_key = None
-    try:
-        with open(env_file) as f:
-            for line in f:
-                if line.startswith("QDRANT_API_KEY="):
-                    api_key = line.strip().split("=", 1)[1]
-    except Exception:
-        pass
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        return QdrantClient(
-            url=f"http://{QDRANT_HOST}:{QDRANT_PORT}",
-            api_key=api_key, check_compatibility=False,
-        )
-
-
 def _embed(text):
-    import ollama
-    return ollama.embeddings(model=QDRANT_EMBED_MODEL, prompt=text)["embedding"]
+    vec = vector_store.embed(text, QDRANT_EMBED_MODEL)
+    if not vec:
+        raise RuntimeError(f"embedding Ollama indisponible ({vector_store.OLLAMA_URL})")
+    return vec
 
 
 def _ensure_network_collection():
-    from qdrant_client.models import Distance, VectorParams
-    client = _qdrant_client()
-    existing = [c.name for c in client.get_collections().collections]
-    if QDRANT_NETWORK_COLLECTION not in existing:
-        client.create_collection(
-            collection_name=QDRANT_NETWORK_COLLECTION,
-            vectors_config=VectorParams(size=QDRANT_VECTOR_SIZE, distance=Distance.COSINE),
-        )
+    if not vector_store.ensure_collection(QDRANT_NETWORK_COLLECTION, QDRANT_VECTOR_SIZE):
+        raise RuntimeError(f"collection {QDRANT_NETWORK_COLLECTION} indisponible")
 
 
 # ─── 1. Fetch own NOSTR posts + reaction counts ────────────────────────────
@@ -280,18 +257,14 @@ def _persist_network_profile(handle, fiche, dry_run):
                   indent=2, ensure_ascii=False)
 
     try:
-        from qdrant_client.models import PointStruct
         _ensure_network_collection()
-        client = _qdrant_client()
         point_id = int(hashlib.sha256(f"{handle}@nostr".encode()).hexdigest()[:15], 16) % (2 ** 63)
-        client.upsert(
-            collection_name=QDRANT_NETWORK_COLLECTION,
-            points=[PointStruct(
-                id=point_id,
-                vector=_embed(f"{handle} (nostr) : {fiche}"),
-                payload={"handle": handle, "platform": "nostr", "fiche": fiche},
-            )],
-        )
+        if not vector_store.upsert(QDRANT_NETWORK_COLLECTION, [{
+                "id": point_id,
+                "vector": _embed(f"{handle} (nostr) : {fiche}"),
+                "payload": {"handle": handle, "platform": "nostr", "fiche": fiche},
+        }]):
+            raise RuntimeError("upsert refusé")
         print(f"[BACKFILL] {handle}@nostr vectorisé dans Qdrant.")
     except Exception as e:
         print(f"[BACKFILL] Qdrant uplanet_network indisponible : {e}")
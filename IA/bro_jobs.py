@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+bro_jobs.py — File de travaux BRO persistante (SQLite) + worker résident.
+
+Contexte (2026-10-18) : _dispatch_media_background, _run_scraper_now,
+_tool_craft, _tool_badge, _dispatch_conversational_reply (et les tâches #rec)
+lançaient chacun un `python3 bro_watch_core.py run-*-background` détaché —
+sans plafond de concurrence, sans visibilité, sans déduplication. Une rafale
+de #image ou de #plant démarrait une douzaine de processus lourds (imports
+qdrant_client/ollama/question.py à chaque fois, ComfyUI sollicité en
+parallèle) sur une petite station.
+
+Ici :
+  - submit(argv) enregistre la sous-commande dans ~/.zen/tmp/bro_jobs.sqlite
+    (une ligne, aucun fork) et réveille le worker (SIGUSR1) ;
+  - chaque travail a un type (media:image, scraper, conversation...) et une
+    classe de ressource plafonnée (CLASS_CAPS : gpu=1 — ComfyUI, une
+    génération à la fois —, recognition=4 — PlantNet/inventaire —, ...),
+    une priorité (conversation d'abord, scrapers en dernier) et une clé de
+    déduplication : la même demande déjà en file ou en cours est coalescée ;
+  - UN worker résident importe bro_watch_core une fois, puis exécute chaque
+    travail dans un enfant forké (imports déjà chauds, mais tuable) ; au-delà
+    du délai annoncé à l'utilisateur (_MEDIA_RUN_TIMEOUT_SEC,
+    SCRAPER_RUN_TIMEOUT_SEC, ...) + KILL_GRACE_SEC, le groupe de processus
+    de l'enfant est tué (générateurs compris).
+
+Même principe que bro_service.py : un OPTIMISATEUR, jamais une dépendance
+dure. Worker absent ou base illisible → submit() retourne None et l'appelant
+lance le sous-processus détaché historique (bro._shared._launch_background).
+Le service BRO démarre le worker s'il ne tourne pas (BRO_JOBS=0 l'en
+empêche).
+
+Usage :
+    python3 bro_jobs.py                   # worker au premier plan
+    python3 bro_jobs.py --daemon          # worker détaché
+    python3 bro_jobs.py --stats           # compteurs par état / type
+    python3 bro_jobs.py --list [ÉTAT]     # derniers travaux (queued, running, ...)
+"""
+
+if __name__ == "__main__":
+    # Auto-reinvocation dans le venv ~/.astro/ (le worker importe
+    # bro_watch_core) — gardée par __name__ : bro._shared importe ce module
+    # depuis le chemin chaud, l'import ne doit jamais remplacer l'appelant.
+    import sys as _sys
+    import os as _os
+    _venv_python = _os.path.expanduser("~/.astro/bin/python3")
+    if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+        _os.execv(_venv_python, [_venv_python] + _sys.argv)
+    del _sys, _os
+
+import os
+import sys
+import json
+import time
+import select
+import signal
+import sqlite3
+import hashlib
+import logging
+import traceback
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TMP_DIR  = os.path.expanduser("~/.zen/tmp")
+QUEUE_DB = os.path.join(TMP_DIR, "bro_jobs.sqlite")
+PID_FILE = os.path.join(TMP_DIR, "bro_jobs.pid")
+LOG_FILE = os.path.join(TMP_DIR, "bro_jobs.log")
+
+# Plafonds par classe de ressource — surchargeables : BRO_JOBS_CAPS="gpu=1,llm=3"
+CLASS_CAPS = {"gpu": 1, "recognition": 4, "tts": 1, "browser": 2,
+              "llm": 2, "scraper": 2, "notify": 4}
+DEFAULT_TIMEOUT_SEC = 300   # conversation, #rec : pas de délai annoncé
+KILL_GRACE_SEC = 30         # marge au-delà du délai annoncé avant de tuer
+TERM_GRACE_SEC = 5          # SIGTERM -> SIGKILL
+POLL_SEC = 2
+KEEP_SEC = 7 * 86400        # travaux terminés conservés pour --stats/--list
+MAX_ATTEMPTS = 2            # reprise d'un travail interrompu par un arrêt brutal du worker
+
+# sous-commande -> (type, classe, priorité) ; plus petite priorité = servie d'abord
+_COMMAND_JOBS = {
+    "run-conversation-background":   ("conversation", "llm", 0),
+    "run-skill-notify-background":   ("skill-notify", "notify", 1),
+    "run-craft-background":          ("craft", "llm", 3),
+    "run-badge-background":          ("badge", "gpu", 3),
+    "run-identity-check-background": ("identity-check", "llm", 4),
+    "run-scraper-background":        ("scraper", "scraper", 5),
+}
+_MEDIA_JOBS = {
+    "tts": ("tts", 1), "plantnet": ("recognition", 2), "inventory": ("recognition", 2),
+    "screenshot": ("browser", 2), "image": ("gpu", 3), "video": ("gpu", 3), "music": ("gpu", 3),
+}
+
+ACTIVE_STATES = ("queued", "running")
+
+log = logging.getLogger("bro_jobs")
+
+
+def _caps():
+    caps = dict(CLASS_CAPS)
+    for item in os.environ.get("BRO_JOBS_CAPS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            caps[name.strip()] = max(1, int(value))
+    return caps
+
+
+def classify(argv):
+    """(type, classe, priorité) d'une sous-commande run-*-background, ou None
+    si elle n'est pas prise en charge par la file."""
+    if not argv:
+        return None
+    if argv[0] == "run-media-background":
+        if len(argv) < 4 or argv[1] not in _MEDIA_JOBS:
+            return None
+        klass, priority = _MEDIA_JOBS[argv[1]]
+        return f"media:{argv[1]}", klass, priority
+    return _COMMAND_JOBS.get(argv[0])
+
+
+def _connect():
+    """Nouvelle connexion à chaque opération : jamais de connexion SQLite
+    héritée à travers un fork du worker."""
+    os.makedirs(TMP_DIR, exist_ok=True)
+    conn = sqlite3.connect(QUEUE_DB, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL, klass TEXT NOT NULL, priority INTEGER NOT NULL,
+        argv TEXT NOT NULL, dedup_key TEXT NOT NULL,
+        state TEXT NOT NULL DEFAULT 'queued',
+        created REAL NOT NULL, started REAL, finished REAL,
+        pid INTEGER, timeout_sec INTEGER, exit_code INTEGER,
+        attempts INTEGER NOT NULL DEFAULT 0, coalesced INTEGER NOT NULL DEFAULT 0)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_pick ON jobs(state, priority, id)")
+    # Une seule occurrence active par clé : la base elle-même fait la coalescence.
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key ON jobs(dedup_key) "
+                 "WHERE state IN ('queued', 'running')")
+    return conn
+
+
+def worker_pid():
+    """PID du worker résident s'il tourne, sinon None."""
+    try:
+        with open(PID_FILE) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+def submit(argv, priority=None):
+    """Met la sous-commande `argv` (["run-media-background", "image", email,
+    payload_json], ...) en file. Retourne l'id du travail — celui du travail
+    identique déjà actif si la demande est coalescée —, ou None si la file
+    n'est pas utilisable (worker arrêté, sous-commande inconnue, base en
+    erreur) : l'appelant lance alors le sous-processus détaché historique."""
+    job = classify(argv)
+    pid = worker_pid()
+    if job is None or pid is None or os.environ.get("BRO_JOBS") == "0":
+        return None
+    kind, klass, default_priority = job
+    raw = json.dumps(list(argv), ensure_ascii=False)
+    key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    try:
+        conn = _connect()
+        try:
+            try:
+                job_id = conn.execute(
+                    "INSERT INTO jobs (kind, klass, priority, argv, dedup_key, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, klass, default_priority if priority is None else priority,
+                     raw, key, time.time())).lastrowid
+            except sqlite3.IntegrityError:
+                conn.execute("UPDATE jobs SET coalesced = coalesced + 1 "
+                             "WHERE dedup_key = ? AND state IN ('queued', 'running')", (key,))
+                row = conn.execute("SELECT id FROM jobs WHERE dedup_key = ? "
+                                   "AND state IN ('queued', 'running')", (key,)).fetchone()
+                if row is None:     # terminé entre-temps : nouvelle demande
+                    return submit(argv, priority)
+                return row["id"]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        log.warning(f"File de travaux indisponible : {e}")
+        return None
+    try:
+        os.kill(pid, signal.SIGUSR1)
+    except OSError:
+        pass                        # relevé au prochain POLL_SEC
+    return job_id
+
+
+def run_background(bwc, argv):
+    """Exécute une sous-commande run-*-background avec le module
+    bro_watch_core déjà importé — même dispatch que le bloc __main__ de
+    bro_watch_core.py (partagé avec bro_service.run_cli)."""
+    cmd, args = argv[0], argv[1:]
+    if cmd == "run-conversation-background":
+        bwc._run_conversation_background(args[0], json.loads(args[1]))
+    elif cmd == "run-media-background":
+        bwc._run_media_background(args[0], args[1], json.loads(args[2]))
+    elif cmd == "run-scraper-background":
+        bwc._run_scraper_background(*args[:4])
+    elif cmd == "run-craft-background":
+        bwc._run_craft_background(args[0], args[1])
+    elif cmd == "run-badge-background":
+        bwc._run_badge_background(args[0], args[1])
+    elif cmd == "run-identity-check-background":
+        bwc._check_and_update_identity(args[0], args[1])
+    elif cmd == "run-skill-notify-background":
+        bwc._run_skill_notify_background(args[0], args[1], args[2])
+    else:
+        raise ValueError(f"sous-commande inconnue : {cmd}")
+
+
+def job_timeout(bwc, kind):
+    """Délai annoncé à l'utilisateur pour ce type de travail."""
+    if kind.startswith("media:"):
+        return bwc._MEDIA_RUN_TIMEOUT_SEC.get(kind.split(":", 1)[1], 120)
+    return {
+        "scraper": getattr(bwc, "SCRAPER_RUN_TIMEOUT_SEC", DEFAULT_TIMEOUT_SEC),
+        "craft": getattr(bwc, "CRAFT_RUN_TIMEOUT_SEC", DEFAULT_TIMEOUT_SEC),
+        "badge": getattr(bwc, "BADGE_RUN_TIMEOUT_SEC", DEFAULT_TIMEOUT_SEC),
+    }.get(kind, DEFAULT_TIMEOUT_SEC)
+
+
+def stats():
+    """Compteurs de la file : par état, par type actif, demandes coalescées."""
+    conn = _connect()
+    try:
+        by_state = {r["state"]: r["n"] for r in conn.execute(
+            "SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")}
+        active = {}
+        for r in conn.execute("SELECT kind, state, COUNT(*) AS n FROM jobs "
+                              "WHERE state IN ('queued', 'running') GROUP BY kind, state"):
+            active.setdefault(r["kind"], {})[r["state"]] = r["n"]
+        coalesced = conn.execute("SELECT COALESCE(SUM(coalesced), 0) FROM jobs").fetchone()[0]
+        durations = {r["kind"]: round(r["avg"], 1) for r in conn.execute(
+            "SELECT kind, AVG(finished - started) AS avg FROM jobs "
+            "WHERE state = 'done' GROUP BY kind")}
+    finally:
+        conn.close()
+    try:
+        import model_residency
+        residency = model_residency.stats()
+    except Exception as e:
+        residency = {"error": str(e)}
+    return {"worker_pid": worker_pid(), "caps": _caps(), "states": by_state,
+            "active": active, "coalesced": coalesced, "avg_duration_sec": durations,
+            "model_residency": residency}
+
+
+def pending_kinds():
+    """[(type, état)] des travaux actifs — en cours d'abord, puis la file par
+    priorité — hors le travail courant (BRO_JOB_ID, posé dans l'enfant) :
+    model_residency en déduit les modèles à garder ou précharger."""
+    own = int(os.environ.get("BRO_JOB_ID") or 0)
+    conn = _connect()
+    try:
+        return [(r["kind"], r["state"]) for r in conn.execute(
+            "SELECT kind, state FROM jobs WHERE state IN ('queued', 'running') AND id != ? "
+            "ORDER BY state = 'queued', priority, id", (own,))]
+    finally:
+        conn.close()
+
+
+def list_jobs(state=None, limit=20):
+    conn = _connect()
+    try:
+        if state:
+            rows = conn.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id DESC LIMIT ?",
+                                (state, limit))
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+class JobWorker:
+    """Boucle mono-thread : réclame les travaux en file dans la limite des
+    plafonds de classe, forke un enfant par travail, récolte les enfants et
+    tue ceux qui dépassent leur délai."""
+
+    def __init__(self, caps=None):
+        # Les replis éventuels des travaux (Popen d'une sous-commande)
+        # s'exécutent localement, jamais relayés au service BRO.
+        os.environ["BRO_SERVICE_BYPASS"] = "1"
+        import bro_watch_core as bwc
+        import bro.nostr
+        self.bwc = bwc
+        try:
+            bro.nostr.enable_inprocess_crypto()
+        except Exception as e:
+            log.warning(f"Chiffrement en processus indisponible, repli sous-processus : {e}")
+        self.caps = caps or _caps()
+        self.children = {}          # pid -> {"id", "klass", "deadline", "term_at"}
+        self._stop = False
+        self._last_purge = 0
+
+    # ── file ─────────────────────────────────────────────────────────────────
+
+    def _recover(self):
+        """Travaux 'running' d'un worker précédent arrêté brutalement : remis
+        en file (MAX_ATTEMPTS au plus), sinon marqués en échec."""
+        conn = _connect()
+        try:
+            conn.execute("UPDATE jobs SET state = 'failed', finished = ? "
+                         "WHERE state = 'running' AND attempts >= ?", (time.time(), MAX_ATTEMPTS))
+            n = conn.execute("UPDATE jobs SET state = 'queued', pid = NULL "
+                             "WHERE state = 'running'").rowcount
+        finally:
+            conn.close()
+        if n:
+            log.info(f"{n} travail(aux) interrompu(s) remis en file")
+
+    def _claim(self):
+        """Prochains travaux exécutables, par priorité puis ancienneté."""
+        running = {}
+        for child in self.children.values():
+            running[child["klass"]] = running.get(child["klass"], 0) + 1
+        claimed = []
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in conn.execute("SELECT id, kind, klass, argv FROM jobs WHERE state = 'queued' "
+                                    "ORDER BY priority, id").fetchall():
+                if running.get(row["klass"], 0) >= self.caps.get(row["klass"], 1):
+                    continue
+                running[row["klass"]] = running.get(row["klass"], 0) + 1
+                timeout = job_timeout(self.bwc, row["kind"])
+                conn.execute("UPDATE jobs SET state = 'running', started = ?, timeout_sec = ?, "
+                             "attempts = attempts + 1 WHERE id = ?",
+                             (time.time(), timeout, row["id"]))
+                claimed.append((dict(row), timeout))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return claimed
+
+    def _finish(self, job_id, state, exit_code=None):
+        conn = _connect()
+        try:
+            conn.execute("UPDATE jobs SET state = ?, finished = ?, exit_code = ? WHERE id = ?",
+                         (state, time.time(), exit_code, job_id))
+        finally:
+            conn.close()
+
+    def _purge(self):
+        if time.time() - self._last_purge < 3600:
+            return
+        self._last_purge = time.time()
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM jobs WHERE state NOT IN ('queued', 'running') "
+                         "AND finished < ?", (time.time() - KEEP_SEC,))
+        finally:
+            conn.close()
+
+    # ── enfants ──────────────────────────────────────────────────────────────
+
+    def _spawn(self, job, timeout):
+        argv = json.loads(job["argv"])
+        pid = os.fork()
+        if pid == 0:
+            rc = 0
+            try:
+                os.setsid()     # groupe propre : les générateurs lancés sont tués avec lui
+                signal.set_wakeup_fd(-1)
+                for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGCHLD):
+                    signal.signal(sig, signal.SIG_DFL)
+                os.environ["BRO_JOB_ID"] = str(job["id"])
+                run_background(self.bwc, argv)
+            except BaseException:
+                traceback.print_exc()
+                rc = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(rc)
+        conn = _connect()
+        try:
+            conn.execute("UPDATE jobs SET pid = ? WHERE id = ?", (pid, job["id"]))
+        finally:
+            conn.close()
+        self.children[pid] = {"id": job["id"], "kind": job["kind"], "klass": job["klass"],
+                              "deadline": time.monotonic() + timeout + KILL_GRACE_SEC,
+                              "term_at": None}
+        log.info(f"#{job['id']} {job['kind']} démarré (pid {pid}, délai {timeout}s)")
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            child = self.children.pop(pid, None)
+            if child is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if child["term_at"] is not None:
+                state = "timeout"
+            else:
+                state = "done" if code == 0 else "failed"
+            self._finish(child["id"], state, code)
+            log.info(f"#{child['id']} {child['kind']} : {state} (code {code})")
+
+    def _kill_group(self, pid, sig):
+        try:
+            os.killpg(pid, sig)
+        except OSError:
+            pass
+
+    def _enforce_timeouts(self):
+        now = time.monotonic()
+        for pid, child in self.children.items():
+            if child["term_at"] is None and now >= child["deadline"]:
+                log.warning(f"#{child['id']} {child['kind']} : délai dépassé — arrêt")
+                child["term_at"] = now
+                self._kill_group(pid, signal.SIGTERM)
+            elif child["term_at"] is not None and now - child["term_at"] >= TERM_GRACE_SEC:
+                self._kill_group(pid, signal.SIGKILL)
+
+    def _prewarm(self, kinds):
+        """Précharge le modèle des travaux qui démarrent, en sous-processus :
+        le chargement recouvre le démarrage de l'enfant (téléchargement de
+        l'image, imports) au lieu de le suivre."""
+        try:
+            import model_residency
+            if model_residency.wants_prewarm(kinds):
+                model_residency.prewarm(background=True)
+        except Exception as e:
+            log.warning(f"préchargement ignoré : {e}")
+
+    # ── boucle ───────────────────────────────────────────────────────────────
+
+    def _on_stop(self, signum, frame):
+        self._stop = True
+
+    def run(self):
+        os.makedirs(TMP_DIR, exist_ok=True)
+        with open(PID_FILE, "w") as f:
+            f.write(str(os.getpid()))
+        rfd, wfd = os.pipe()
+        os.set_blocking(rfd, False)
+        os.set_blocking(wfd, False)
+        signal.set_wakeup_fd(wfd)
+        # Gestionnaires Python (même vides) requis pour que SIGUSR1 (submit)
+        # et SIGCHLD (fin d'un enfant) réveillent le select ci-dessous.
+        signal.signal(signal.SIGUSR1, lambda *_: None)
+        signal.signal(signal.SIGCHLD, lambda *_: None)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        self._recover()
+        log.info(f"Worker démarré (pid {os.getpid()}, plafonds {self.caps}) — file {QUEUE_DB}")
+        try:
+            while not self._stop or self.children:
+                self._reap()
+                self._enforce_timeouts()
+                if not self._stop:
+                    claimed = self._claim()
+                    for job, timeout in claimed:
+                        self._spawn(job, timeout)
+                    if claimed:
+                        self._prewarm([job["kind"] for job, _ in claimed])
+                    self._purge()
+                try:
+                    select.select([rfd], [], [], POLL_SEC if not self._stop else 1)
+                    os.read(rfd, 4096)
+                except (BlockingIOError, InterruptedError):
+                    pass
+        finally:
+            try:
+                if worker_pid() == os.getpid():
+                    os.remove(PID_FILE)
+            except OSError:
+                pass
+        log.info("Worker arrêté")
+
+
+def start_daemon():
+    """Lance le worker détaché s'il ne tourne pas déjà ; retourne son PID."""
+    pid = worker_pid()
+    if pid:
+        return pid
+    os.makedirs(TMP_DIR, exist_ok=True)
+    with open(LOG_FILE, "a") as f:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdout=f, stderr=f, start_new_session=True,
+        )
+    return proc.pid
+
+
+def main():
+    if "--stats" in sys.argv:
+        print(json.dumps(stats(), indent=2))
+        sys.exit(0)
+    if "--list" in sys.argv:
+        i = sys.argv.index("--list")
+        state = sys.argv[i + 1] if len(sys.argv) > i + 1 else None
+        for job in list_jobs(state):
+            argv = json.loads(job["argv"])
+            print(f"#{job['id']:<6} {job['state']:<8} {job['kind']:<16} p{job['priority']} "
+                  f"×{job['coalesced'] + 1} {' '.join(argv[1:3])}")
+        sys.exit(0)
+    if "--daemon" in sys.argv:
+        pid = worker_pid()
+        if pid:
+            print(f"Déjà en cours (PID {pid}) — arrêt.")
+            sys.exit(0)
+        print(f"Worker lancé (PID {start_daemon()}) — logs : {LOG_FILE}")
+        sys.exit(0)
+    if worker_pid():
+        print("Un worker tourne déjà.")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [bro_jobs] %(message)s")
+    JobWorker().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,7 @@ import argparse
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import bro_watch_core as bwc
 import memory_manager as mm
+import slot_store
 
 NOSTR_DIR = os.path.expanduser("~/.zen/game/nostr")
 FLASHMEM_DIR = os.path.expanduser("~/.zen/flashmem")
@@ -128,8 +129,7 @@ def cmd_status(args):
     total_msgs = 0
     for f in slot_files:
         try:
-            data = json.load(open(f, encoding="utf-8"))
-            total_msgs += len(data.get("messages", []))
+            total_msgs += slot_store.count(f)
         except Exception:
             pass
     _log(f"  Flashmem             : {len(slot_files)} slot(s), {total_msgs} message(s)")
@@ -207,7 +207,7 @@ def cmd_reset_bro(args):
     for f in slot_files:
         actions.append(f"flashmem : {f}")
         if apply_:
-            os.remove(f)
+            slot_store.remove(f)
 
     # 3. Mémoire sémantique (Qdrant memory_{hex}) — collection dédiée à cet
     # utilisateur, couvre tous les slots (0-13) en une fois.
@@ -273,6 +273,14 @@ def cmd_reset_node(args):
         else:
             _log(f"  · qdrant : {cname} n'existe pas encore (sera créée à la reconstruction)")
 
+    # Index d'intention local (bro.rag._intent_index) : même dérivation depuis
+    # bro_tools — supprimé ici, reconstruit au prochain match_intent().
+    if os.path.isfile(bwc.INTENT_INDEX_FILE):
+        _log(f"  {'✅' if apply_ else '·'} index d'intention local : {bwc.INTENT_INDEX_FILE} "
+             f"(reconstruit au prochain message)")
+        if apply_:
+            os.remove(bwc.INTENT_INDEX_FILE)
+
     if apply_:
         # Ne jamais laisser la collection supprimée sans tentative de
         # reconstruction : une exception ici (Qdrant/Ollama tombé pile après
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+bro_service.py — Service BRO résident (asyncio, socket Unix locale).
+
+Garde chauds, dans UN seul processus, tout ce que chaque invocation CLI de
+bro_watch_core.py repayait : imports qdrant_client/ollama/question.py,
+RELAYS (_load_relays, qui forke `bash -c "source my.sh"`), clés des
+propriétaires, et le chiffrement NOSTR (nostr_node_intercom /
+nostr_send_secure_dm chargés en module — plus un fork par DM déchiffré ni
+par réponse envoyée, cf. bro.nostr.enable_inprocess_crypto).
+
+Les travaux tournent dans un pool borné de BRO_SERVICE_WORKERS threads ; au-
+delà de BRO_SERVICE_MAX_QUEUE travaux en attente, le service répond "busy"
+et le client exécute localement (jamais de requête perdue). check-commands
+est sérialisé par propriétaire (même garantie que le flock de
+bro_dm_daemon.sh, qui reste en place).
+
+Commandes en temps réel : le service tient aussi les abonnements NOSTR
+persistants aux self-DM de tous les comptes locaux (bro.subscriptions) —
+un message du propriétaire déclenche process_incoming_commands dans la
+seconde, sans attendre le prochain check-commands. BRO_SUBSCRIPTIONS=0 les
+désactive.
+
+Compression RÊVE : le chemin chaud ne fait que mettre en file les mémoires
+pleines (reve_scheduler.enqueue) ; le service lance reve_scheduler.run()
+dès qu'il est resté BRO_REVE_IDLE_SEC sans travail, et interrompt la passe
+si une conversation arrive. BRO_REVE=0 la désactive (20h12 s'en charge).
+
+Travaux de fond (run-*-background) : le service démarre le worker résident
+bro_jobs.py s'il ne tourne pas et lui confie ces sous-commandes (plafonds
+par type, priorités, coalescence) ; le pool de threads ci-dessus ne les
+exécute plus qu'en repli. BRO_JOBS=0 garde l'ancien comportement.
+
+Protocole et client : bro_service_client.py. La CLI de bro_watch_core.py
+relaie automatiquement ses sous-commandes (check-commands, run-*-background,
+is-enabled, describe-tools) quand ce service écoute.
+
+Lancement :
+    python3 bro_service.py                # avant-plan (Ctrl+C pour arrêter)
+    python3 bro_service.py --daemon       # arrière-plan détaché
+    python3 bro_service.py --stats        # compteurs du service en cours
+"""
+
+# Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
+import sys as _sys
+import os as _os
+_venv_python = _os.path.expanduser("~/.astro/bin/python3")
+if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+    _os.execv(_venv_python, [_venv_python] + _sys.argv)
+del _sys, _os
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bro_service_client import SOCKET_PATH, BACKGROUND_COMMANDS, SYNC_COMMANDS, try_call
+import bro_jobs
+import vector_store
+
+WORKERS   = int(os.environ.get("BRO_SERVICE_WORKERS", "4"))
+MAX_QUEUE = int(os.environ.get("BRO_SERVICE_MAX_QUEUE", "32"))
+REVE_IDLE_SEC = int(os.environ.get("BRO_REVE_IDLE_SEC", "120"))
+REVE_POLL_SEC = 30
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [bro_service] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+
+class BroService:
+    """Exécute les sous-commandes de bro_watch_core.py en processus, dans un
+    pool de threads borné."""
+
+    def __init__(self, workers=WORKERS, max_queue=MAX_QUEUE):
+        # Les replis éventuels (Popen d'une sous-commande depuis ce
+        # processus) doivent s'exécuter localement, jamais revenir ici.
+        os.environ["BRO_SERVICE_BYPASS"] = "1"
+        import bro_watch_core as bwc
+        import bro.nostr
+        self.bwc = bwc
+        try:
+            bro.nostr.enable_inprocess_crypto()
+        except Exception as e:
+            log.warning(f"Chiffrement en processus indisponible, repli sous-processus : {e}")
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bro")
+        self.max_queue = max_queue
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._owner_locks = {}
+        self._owner_locks_lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {"done": 0, "failed": 0, "rejected": 0, "skipped": 0}
+        self.subscriptions = None
+        self._live_rerun = {}           # email -> nouvel event arrivé pendant le passage
+        self._last_activity = time.monotonic()
+        self._reve_stop = threading.Event()
+        self._reve_thread = None
+        self.reve_last = None           # métriques de la dernière passe RÊVE
+
+    # ── sous-commandes ────────────────────────────────────────────────────────
+
+    def _owner_lock(self, email):
+        with self._owner_locks_lock:
+            return self._owner_locks.setdefault(email, threading.Lock())
+
+    def _check_commands(self, email, wait=False):
+        lock = self._owner_lock(email)
+        if not lock.acquire(blocking=wait):
+            with self._pending_lock:
+                self.counters["skipped"] += 1
+            return f"check-commands déjà en cours pour {email} — passe son tour"
+        try:
+            self.bwc.process_incoming_commands(email)
+        finally:
+            lock.release()
+        return ""
+
+    # ── abonnements temps réel ────────────────────────────────────────────────
+
+    def _command_cursor(self, email):
+        """Curseur persistant des abonnements : le last_check du manifest."""
+        return (self.bwc._load_manifest(email)
+                .get(self.bwc.COMMAND_LAST_CHECK_KEY, {}).get("last_check", 0))
+
+    def _on_owner_event(self, email):
+        """Nouvel event self-DM : un seul passage en file par propriétaire,
+        relancé s'il en arrive d'autres pendant qu'il tourne."""
+        with self._pending_lock:
+            if email in self._live_rerun:
+                self._live_rerun[email] = True
+                return
+            self._live_rerun[email] = False
+        if self.submit(self._live_check, email) is None:
+            with self._pending_lock:
+                self._live_rerun.pop(email, None)   # file pleine : le prochain check-commands videra la file
+
+    def _live_check(self, email):
+        while True:
+            self._check_commands(email, wait=True)
+            with self._pending_lock:
+                if not self._live_rerun.get(email):
+                    self._live_rerun.pop(email, None)
+                    return
+                self._live_rerun[email] = False
+
+    def start_subscriptions(self):
+        if os.environ.get("BRO_SUBSCRIPTIONS", "1") == "0":
+            return None
+        try:
+            import websockets  # noqa: F401
+            import bro.nostr
+            from bro.subscriptions import RelaySubscriptionManager
+        except ImportError as e:
+            log.warning(f"Abonnements temps réel indisponibles ({e}) — interrogation classique")
+            return None
+        self.subscriptions = RelaySubscriptionManager(
+            self.bwc.RELAYS, self._command_cursor, on_event=self._on_owner_event)
+        bro.nostr._SUBSCRIPTIONS = self.subscriptions
+        return self.subscriptions
+
+    # ── RÊVE en période d'inactivité ──────────────────────────────────────────
+
+    def _idle(self):
+        with self._pending_lock:
+            return (self._pending == 0
+                    and time.monotonic() - self._last_activity >= REVE_IDLE_SEC)
+
+    def _reve_loop(self):
+        import reve_scheduler
+        while not self._reve_stop.wait(REVE_POLL_SEC):
+            if not reve_scheduler.queue_pending() or not self._idle():
+                continue
+            try:
+                # Interrompue dès qu'un travail arrive : le reste retourne en file.
+                self.reve_last = reve_scheduler.run(
+                    should_continue=lambda: self._pending == 0 and not self._reve_stop.is_set(),
+                    mode="idle")
+                log.info(f"RÊVE : {self.reve_last['compressed']}/{self.reve_last['jobs']} "
+                         f"mémoire(s) compressée(s) en {self.reve_last['duration_sec']}s")
+            except Exception as e:
+                log.warning(f"Passe RÊVE en erreur : {e}")
+
+    def start_reve(self):
+        if os.environ.get("BRO_REVE", "1") == "0":
+            return
+        self._reve_thread = threading.Thread(target=self._reve_loop, name="reve", daemon=True)
+        self._reve_thread.start()
+
+    def stop_reve(self):
+        self._reve_stop.set()
+        if self._reve_thread:
+            self._reve_thread.join()
+
+    def run_cli(self, argv):
+        """Même dispatch que le bloc __main__ de bro_watch_core.py (arguments
+        déjà validés par bro_service_client.forward_cli). Retourne la sortie
+        texte à afficher côté client."""
+        bwc = self.bwc
+        cmd, args = argv[0], argv[1:]
+        if cmd == "check-commands":
+            return self._check_commands(args[0])
+        if cmd == "is-enabled":
+            return "true" if bwc.is_scraper_enabled(args[0], args[1]) else "false"
+        if cmd == "describe-tools":
+            return bwc._bro_capabilities_description(args[0] if args else "")
+        bro_jobs.run_background(bwc, argv)
+        return ""
+
+    def decrypt(self, email, event):
+        return self.bwc._decrypt_self_dm(email, event)
+
+    def send(self, email, message, ttl_days=1, ttl_seconds=None):
+        return self.bwc.send_dm_to_owner(email, message, ttl_days=ttl_days,
+                                         ttl_seconds=ttl_seconds)
+
+    # ── file d'exécution ──────────────────────────────────────────────────────
+
+    def _run_tracked(self, fn, *args):
+        outcome = "failed"
+        try:
+            result = fn(*args)
+            outcome = "done"
+            return result
+        except Exception as e:
+            log.warning(f"{getattr(fn, '__name__', fn)} en erreur : {e}")
+            raise
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+                self.counters[outcome] += 1
+                self._last_activity = time.monotonic()
+
+    def submit(self, fn, *args):
+        """Met `fn(*args)` en file ; None si la file est pleine (le client
+        exécute alors localement)."""
+        with self._pending_lock:
+            if self._pending >= self.max_queue:
+                self.counters["rejected"] += 1
+                return None
+            self._pending += 1
+        return self.pool.submit(self._run_tracked, fn, *args)
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "uptime_sec": int(time.time() - self.started_at),
+            "workers": self.pool._max_workers,
+            "pending": self._pending,
+            "max_queue": self.max_queue,
+            "relays": list(self.bwc.RELAYS),
+            "subscriptions": self.subscriptions.stats() if self.subscriptions else None,
+            "reve_last": self.reve_last,
+            "jobs_worker": bro_jobs.worker_pid(),
+            "vector_store": vector_store.metrics(),
+            **self.counters,
+        }
+
+    async def handle(self, request):
+        op = request.get("op")
+        if op == "stats":
+            return {"ok": True, "output": json.dumps(self.stats())}
+        if op == "cli":
+            argv = request.get("argv") or []
+            if not argv or argv[0] not in BACKGROUND_COMMANDS and argv[0] not in SYNC_COMMANDS:
+                return {"ok": False, "error": "sous-commande non prise en charge"}
+            if argv[0] in BACKGROUND_COMMANDS and bro_jobs.submit(argv) is not None:
+                return {"ok": True, "queued": True}
+            fut = self.submit(self.run_cli, argv)
+            if fut is None:
+                return {"ok": False, "error": "busy"}
+            if argv[0] in BACKGROUND_COMMANDS:
+                return {"ok": True, "queued": True}
+            output = await asyncio.wrap_future(fut)
+            return {"ok": True, "output": output}
+        if op == "decrypt":
+            fut = self.submit(self.decrypt, request.get("email", ""), request.get("event") or {})
+            if fut is None:
+                return {"ok": False, "error": "busy"}
+            text = await asyncio.wrap_future(fut)
+            return {"ok": text is not None, "output": text}
+        if op == "send":
+            fut = self.submit(self.send, request.get("email", ""), request.get("message", ""),
+                              request.get("ttl_days", 1), request.get("ttl_seconds"))
+            if fut is None:
+                return {"ok": False, "error": "busy"}
+            return {"ok": bool(await asyncio.wrap_future(fut))}
+        return {"ok": False, "error": f"op inconnue : {op}"}
+
+
+async def _serve(service):
+    async def _client(reader, writer):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                resp = await service.handle(json.loads(line))
+            except Exception as e:
+                resp = {"ok": False, "error": str(e)}
+            writer.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    os.makedirs(os.path.dirname(SOCKET_PATH), exist_ok=True)
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+    server = await asyncio.start_unix_server(_client, path=SOCKET_PATH, limit=16 * 1024 * 1024)
+    os.chmod(SOCKET_PATH, 0o600)  # socket locale, propriétaire uniquement
+    log.info(f"Service démarré, écoute sur {SOCKET_PATH} "
+             f"(workers={service.pool._max_workers}, file max={service.max_queue})")
+
+    subs = service.start_subscriptions()
+    subs_task = asyncio.create_task(subs.run()) if subs else None
+    service.start_reve()
+    if os.environ.get("BRO_JOBS", "1") != "0":
+        log.info(f"Worker de travaux bro_jobs.py : PID {bro_jobs.start_daemon()}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    async with server:
+        await stop.wait()
+    log.info("Arrêt demandé — attente des travaux en cours...")
+    if subs_task:
+        subs.stop()
+        await subs_task
+    await asyncio.to_thread(service.stop_reve)
+    service.pool.shutdown(wait=True, cancel_futures=True)
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+
+
+def run_server():
+    asyncio.run(_serve(BroService()))
+
+
+def main():
+    if "--stats" in sys.argv:
+        resp = try_call({"op": "stats"}, timeout=5)
+        if not resp:
+            print("Service BRO non démarré.")
+            sys.exit(1)
+        print(json.dumps(json.loads(resp.get("output") or "{}"), indent=2))
+        sys.exit(0)
+    if "--daemon" in sys.argv:
+        log_dir = os.path.expanduser("~/.zen/tmp")
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, "bro_service.log")
+        pid_file = os.path.join(log_dir, "bro_service.pid")
+        if os.path.exists(pid_file):
+            try:
+                old_pid = int(open(pid_file).read().strip())
+                os.kill(old_pid, 0)
+                print(f"Déjà en cours (PID {old_pid}) — arrêt.")
+                sys.exit(0)
+            except (ProcessLookupError, ValueError, OSError):
+                pass
+        import subprocess
+        with open(log_file, "a") as f:
+            proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__)],
+                stdout=f, stderr=f, start_new_session=True,
+            )
+        with open(pid_file, "w") as f:
+            f.write(str(proc.pid))
+        print(f"Service lancé (PID {proc.pid}) — logs : {log_file}")
+        sys.exit(0)
+    run_server()
+
+
+if __name__ == "__main__":
+    main()
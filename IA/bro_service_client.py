@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+bro_service_client.py — Protocole partagé + aide client pour le service BRO
+résident (bro_service.py).
+
+Contexte : bro_watch_core.py est lancé comme une CLI (check-commands,
+run-conversation-background, run-media-background...). Chaque invocation
+ré-importait qdrant_client/ollama/question.py, relançait _load_relays() (donc
+un `bash -c "source my.sh"` dès l'import), forkait nostr_node_intercom.py
+pour déchiffrer chaque DM et nostr_send_secure_dm.py pour chaque réponse.
+Le service résident garde tout ça chaud dans UN processus ; ce module-ci
+reste volontairement en stdlib pure (importé tout en haut de
+bro_watch_core.py, AVANT les imports lourds) pour que la CLI devienne un
+client mince qui transmet sa sous-commande par socket Unix.
+
+Même principe que tools/nostr_connection_pool.py : le service est un pur
+OPTIMISATEUR, jamais une dépendance dure. Service absent, arrêté, saturé ou
+sous-commande non prise en charge → forward_cli() retourne None et
+bro_watch_core.py s'exécute localement, comportement historique inchangé.
+
+Protocole (une requête JSON par ligne, une par connexion cliente) :
+  Requête  : {"op": "cli", "argv": ["check-commands", "email"]}
+             {"op": "decrypt", "email": "...", "event": {...}}
+             {"op": "send", "email": "...", "message": "...", "ttl_days": 1, "ttl_seconds": null}
+             {"op": "stats"}
+  Réponse  : {"ok": true|false, "output": "...", "queued": bool, "error": "..."}
+"""
+
+import os
+import json
+import socket
+
+SOCKET_PATH = os.path.expanduser("~/.zen/tmp/bro_service.sock")
+CONNECT_TIMEOUT_SEC = 2
+SYNC_TIMEOUT_SEC = 600      # check-commands : attend la fin réelle (cf. flock de bro_dm_daemon.sh)
+ASYNC_TIMEOUT_SEC = 5       # run-*-background : réponse immédiate ("mis en file")
+
+# Sous-commandes CLI relayables → nombre minimal d'arguments après la
+# sous-commande. Les tâches de fond sont acquittées dès leur mise en file ;
+# les synchrones attendent le résultat (et sa sortie texte éventuelle).
+BACKGROUND_COMMANDS = {
+    "run-conversation-background": 2,
+    "run-media-background": 3,
+    "run-scraper-background": 4,
+    "run-craft-background": 2,
+    "run-badge-background": 2,
+    "run-identity-check-background": 2,
+    "run-skill-notify-background": 3,
+}
+SYNC_COMMANDS = {
+    "check-commands": 1,
+    "is-enabled": 2,
+    "describe-tools": 0,
+}
+
+
+def _recv_line(sock, max_bytes=16 * 1024 * 1024):
+    buf = b""
+    while b"\n" not in buf and len(buf) < max_bytes:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    return buf.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+
+
+def try_call(request: dict, timeout: float = SYNC_TIMEOUT_SEC):
+    """Envoie `request` au service et retourne sa réponse (dict), ou None si
+    le service est indisponible — l'appelant DOIT alors retomber sur son
+    exécution locale."""
+    if not os.path.exists(SOCKET_PATH):
+        return None
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT_SEC)
+        sock.connect(SOCKET_PATH)
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        raw = _recv_line(sock)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+    finally:
+        if sock:
+            try:
+                sock.close()
+            except Exception:
+                pass
+
+
+def forward_cli(argv: list):
+    """Relaie une invocation `bro_watch_core.py <argv>` au service. Retourne
+    le code de sortie à utiliser si le service l'a prise en charge, None
+    sinon (service absent/saturé, sous-commande locale uniquement,
+    BRO_SERVICE_BYPASS=1 — positionné par le service lui-même pour ses
+    propres replis)."""
+    if not argv or os.environ.get("BRO_SERVICE_BYPASS") == "1":
+        return None
+    cmd = argv[0]
+    if cmd in BACKGROUND_COMMANDS:
+        if len(argv) - 1 < BACKGROUND_COMMANDS[cmd]:
+            return None
+        resp = try_call({"op": "cli", "argv": argv}, timeout=ASYNC_TIMEOUT_SEC)
+    elif cmd in SYNC_COMMANDS:
+        if len(argv) - 1 < SYNC_COMMANDS[cmd]:
+            return None
+        resp = try_call({"op": "cli", "argv": argv}, timeout=SYNC_TIMEOUT_SEC)
+    else:
+        return None
+    if not resp or resp.get("error") == "busy":
+        return None
+    if resp.get("output"):
+        print(resp["output"])
+    return 0 if resp.get("ok") else 1
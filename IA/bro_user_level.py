@@ -11,9 +11,21 @@ Niveaux :
   5  capitaine    : accès complet (astroport_captain)
 
 Usage : python3 bro_user_level.py <sender_hex> [relay_url]
+        python3 bro_user_level.py --prefetch [relay_url]   # préchauffe le cache atom4love
 Output : JSON sur stdout — {"level": N, "email": "...", "contract_status": "...", "atom4love": bool}
 
-Atom4love cache : ~/.zen/tmp/bro_level/<sender_hex>.a4l (TTL 3600s)
+Atom4love cache : ~/.zen/tmp/bro_level/atom4love.json (TTL 3600s, tous les hex)
+
+Vérification atom4love groupée (2026-10-18) : chaque défaut de cache ouvrait
+son propre websocket (jusqu'à 8 s) et écrivait un petit <hex>.a4l — au
+redémarrage à froid du daemon DM, des dizaines d'utilisateurs payaient
+chacun une poignée de main. check_atom4love_many() interroge N pubkeys en UN
+REQ (authors:[...], A4L_BATCH auteurs par filtre), via la connexion de
+lecture du daemon de pool NOSTR (tools/nostr_connection_pool.py) s'il
+écoute, sinon une seule connexion directe ; les résultats vont dans un cache
+unique. prefetch_atom4love() le préchauffe pour tous les comptes locaux et
+les expéditeurs vus récemment (lancé en tâche de fond au démarrage du
+daemon DM).
 """
 
 # Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
@@ -27,12 +39,21 @@ import sys
 import os
 import json
 import time
+import fcntl
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+import identity_index
 
 HOME = os.path.expanduser("~")
 NOSTR_DIR  = os.path.join(HOME, ".zen", "game", "nostr")
 CACHE_DIR  = os.path.join(HOME, ".zen", "tmp", "bro_level")
+A4L_CACHE  = os.path.join(CACHE_DIR, "atom4love.json")
 A4L_TTL    = 3600   # 1h cache atom4love
+A4L_BATCH  = 200    # auteurs par filtre REQ
+A4L_WAIT   = 8      # délai max d'une requête relais (secondes)
 LEVEL_TTL  = 300    # 5 min cache niveau global
+PEER_RECENT_SEC = 86400   # expéditeurs "connus" : vus (cache niveau) dans les dernières 24h
 
 # Correspondance contract_status → niveau de base
 # Les 4 statuts "contributor" (trésorerie/R&D/actifs/infrastructure) sont des
@@ -58,41 +79,24 @@ _CONTRACT_LEVEL = {
 # ── Résolution email ─────────────────────────────────────────────────────────
 
 def resolve_email(sender_hex: str) -> str:
-    """Cherche l'email associé au hex dans ~/.zen/game/nostr/*/HEX."""
-    if not os.path.isdir(NOSTR_DIR):
-        return ""
-    for entry in os.scandir(NOSTR_DIR):
-        if not entry.is_dir():
-            continue
-        hex_path = os.path.join(entry.path, "HEX")
-        try:
-            with open(hex_path) as f:
-                if f.read().strip() == sender_hex:
-                    return entry.name
-        except OSError:
-            continue
-    return ""
+    """Email associé au hex (~/.zen/game/nostr/*/HEX), via identity_index —
+    plus de parcours de tous les comptes à chaque recherche."""
+    return identity_index.resolve_email(sender_hex, love=False)
 
 
 # ── DID cache ────────────────────────────────────────────────────────────────
 
 def get_contract_status(email: str) -> str:
-    """Lit .metadata.contractStatus dans did.json.cache. Retourne '' si absent."""
-    did_path = os.path.join(NOSTR_DIR, email, "did.json.cache")
-    try:
-        with open(did_path) as f:
-            did = json.load(f)
-        return did.get("metadata", {}).get("contractStatus", "") or ""
-    except (OSError, json.JSONDecodeError):
-        return ""
+    """.metadata.contractStatus de did.json.cache (indexé). '' si absent."""
+    return identity_index.field(email, "contract_status")
 
 
 def is_society_active(email: str) -> bool:
     """Vérifie que U.SOCIETY.end n'est pas expiré (format YYYY-MM-DD)."""
-    end_path = os.path.join(NOSTR_DIR, email, "U.SOCIETY.end")
+    end_str = identity_index.field(email, "society_end")
+    if not end_str:
+        return True  # si pas de fichier expiry, on fait confiance au DID
     try:
-        with open(end_path) as f:
-            end_str = f.read().strip()
         if end_str == "9999-12-31":
             return True
         end_ts = time.mktime(time.strptime(end_str, "%Y-%m-%d"))
@@ -103,30 +107,31 @@ def is_society_active(email: str) -> bool:
 
 # ── Atom4love via relay ───────────────────────────────────────────────────────
 
-def _a4l_cache_path(sender_hex: str) -> str:
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    return os.path.join(CACHE_DIR, f"{sender_hex}.a4l")
-
-
-def _a4l_from_cache(sender_hex: str) -> tuple:
-    """Retourne (found: bool, ts: float) depuis le cache disque, ou (None, 0) si expiré/absent."""
-    p = _a4l_cache_path(sender_hex)
+def _a4l_load() -> dict:
+    """Cache consolidé {hex: [found, ts]} ; {} si absent ou illisible."""
     try:
-        age = time.time() - os.path.getmtime(p)
-        if age > A4L_TTL:
-            return None, 0
-        with open(p) as f:
+        with open(A4L_CACHE) as f:
             data = json.load(f)
-        return data.get("found", False), data.get("ts", 0)
+        return data if isinstance(data, dict) else {}
     except (OSError, json.JSONDecodeError):
-        return None, 0
+        return {}
 
 
-def _a4l_write_cache(sender_hex: str, found: bool):
-    p = _a4l_cache_path(sender_hex)
+def _a4l_store(results: dict):
+    """Fusionne {hex: found} dans le cache (verrou + remplacement atomique :
+    plusieurs bro_user_level.py tournent en parallèle) et purge l'expiré."""
+    now = time.time()
     try:
-        with open(p, "w") as f:
-            json.dump({"found": found, "ts": time.time()}, f)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(A4L_CACHE + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            data = {h: v for h, v in _a4l_load().items()
+                    if isinstance(v, list) and len(v) == 2 and now - v[1] <= A4L_TTL}
+            data.update({h: [bool(found), now] for h, found in results.items()})
+            tmp = f"{A4L_CACHE}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, A4L_CACHE)
     except OSError:
         pass
 
@@ -143,56 +148,118 @@ def _verify_a4l_proof(sender_hex: str, event: dict) -> bool:
     return bool(proof)
 
 
-def check_atom4love(sender_hex: str, relay_url: str) -> bool:
-    """
-    Requête le relay pour Kind 30078 d=atom4love de sender_hex.
-    Valide le a4l_proof. Met en cache le résultat.
-    """
-    cached, _ = _a4l_from_cache(sender_hex)
-    if cached is not None:
-        return cached
+def _a4l_filters(hexes: list) -> list:
+    return [{"kinds": [30078], "authors": hexes[i:i + A4L_BATCH], "#d": ["atom4love"],
+             "limit": 3 * len(hexes[i:i + A4L_BATCH])}
+            for i in range(0, len(hexes), A4L_BATCH)]
+
 
-    found = False
+def _query_relay(relay_url: str, filters: list):
+    """(events, eose) pour un REQ multi-filtres — connexion pool si le daemon
+    écoute, sinon UNE connexion directe. None si le relais est injoignable."""
+    try:
+        from nostr_connection_pool import try_query_via_pool
+        pooled = try_query_via_pool(relay_url, filters, timeout=A4L_WAIT)
+        if pooled is not None:
+            return pooled
+    except ImportError:
+        pass
     try:
         import websocket
-        ws = websocket.create_connection(relay_url, timeout=8)
-        sub_id = f"a4l_{sender_hex[:8]}"
-        req = json.dumps(["REQ", sub_id, {
-            "kinds": [30078],
-            "authors": [sender_hex],
-            "#d": ["atom4love"],
-            "limit": 3,
-        }])
-        ws.send(req)
-        deadline = time.time() + 8
+        ws = websocket.create_connection(relay_url, timeout=A4L_WAIT)
+    except Exception:
+        return None
+    sub_id = f"a4l_{os.getpid()}"
+    events, eose = [], False
+    try:
+        ws.send(json.dumps(["REQ", sub_id, *filters]))
+        deadline = time.time() + A4L_WAIT
         while time.time() < deadline:
             try:
-                ws.settimeout(2.0)
-                msg = ws.recv()
-                data = json.loads(msg)
-                if isinstance(data, list):
-                    if data[0] == "EVENT" and len(data) >= 3:
-                        ev = data[2]
-                        if _verify_a4l_proof(sender_hex, ev):
-                            found = True
-                            break
-                    elif data[0] == "EOSE":
-                        break
+                ws.settimeout(max(0.5, deadline - time.time()))
+                data = json.loads(ws.recv())
             except websocket.WebSocketTimeoutException:
                 break
             except Exception:
                 break
+            if not isinstance(data, list) or len(data) < 2 or data[1] != sub_id:
+                continue
+            if data[0] == "EVENT" and len(data) >= 3:
+                events.append(data[2])
+            elif data[0] in ("EOSE", "CLOSED"):
+                eose = data[0] == "EOSE"
+                break
         try:
             ws.send(json.dumps(["CLOSE", sub_id]))
+        except Exception:
+            pass
+    finally:
+        try:
             ws.close()
         except Exception:
             pass
-    except Exception:
-        # Relay indisponible → on ne pénalise pas l'utilisateur : retourner False sans cache
-        return False
+    return events, eose
+
+
+def check_atom4love_many(sender_hexes, relay_url: str, use_cache: bool = True) -> dict:
+    """{hex: bool} pour plusieurs expéditeurs : cache d'abord, puis UN REQ
+    relais pour tous les manquants. Relais injoignable → False sans mise en
+    cache (on ne pénalise pas l'utilisateur) ; sans EOSE, seuls les profils
+    trouvés sont mis en cache."""
+    hexes = list(dict.fromkeys(h for h in sender_hexes if h))
+    results = {}
+    if use_cache:
+        cache, now = _a4l_load(), time.time()
+        for h in hexes:
+            entry = cache.get(h)
+            if isinstance(entry, list) and len(entry) == 2 and now - entry[1] <= A4L_TTL:
+                results[h] = bool(entry[0])
+    missing = [h for h in hexes if h not in results]
+    if not missing:
+        return results
+    reply = _query_relay(relay_url, _a4l_filters(missing))
+    if reply is None:
+        results.update({h: False for h in missing})
+        return results
+    events, eose = reply
+    wanted = set(missing)
+    found = {ev.get("pubkey") for ev in events
+             if isinstance(ev, dict) and ev.get("pubkey") in wanted
+             and _verify_a4l_proof(ev.get("pubkey"), ev)}
+    fetched = {h: h in found for h in missing}
+    _a4l_store(fetched if eose else {h: True for h in found})
+    results.update(fetched)
+    return results
 
-    _a4l_write_cache(sender_hex, found)
-    return found
+
+def check_atom4love(sender_hex: str, relay_url: str) -> bool:
+    """
+    Requête le relay pour Kind 30078 d=atom4love de sender_hex.
+    Valide le a4l_proof. Met en cache le résultat.
+    """
+    return check_atom4love_many([sender_hex], relay_url)[sender_hex]
+
+
+def _recent_peer_hexes() -> list:
+    """Expéditeurs vus récemment par cette station (cache de niveau)."""
+    peers = []
+    try:
+        now = time.time()
+        for entry in os.scandir(CACHE_DIR):
+            if entry.name.endswith(".level") and now - entry.stat().st_mtime <= PEER_RECENT_SEC:
+                peers.append(entry.name[:-len(".level")])
+    except OSError:
+        pass
+    return peers
+
+
+def prefetch_atom4love(relay_url: str, extra_hexes=None) -> dict:
+    """Préchauffe le cache atom4love pour tous les MULTIPASS locaux, les
+    expéditeurs récents et `extra_hexes`, en un seul aller-retour relais
+    (seuls les hex absents ou expirés sont interrogés)."""
+    hexes = list(identity_index.members("hex")) + _recent_peer_hexes() + list(extra_hexes or [])
+    hexes = [h for h in dict.fromkeys(hexes) if len(h) == 64]
+    return check_atom4love_many(hexes, relay_url)
 
 
 # ── Niveau global ─────────────────────────────────────────────────────────────
@@ -278,6 +345,12 @@ if __name__ == "__main__":
         print('{"level": 0, "error": "usage: bro_user_level.py <sender_hex> [relay_url]"}')
         sys.exit(1)
 
+    if sys.argv[1] == "--prefetch":
+        relay_url = sys.argv[2].strip() if len(sys.argv) >= 3 else "ws://127.0.0.1:7777"
+        results = prefetch_atom4love(relay_url)
+        print(json.dumps({"checked": len(results), "atom4love": sum(results.values())}))
+        sys.exit(0)
+
     sender_hex = sys.argv[1].strip().lower()
     relay_url  = sys.argv[2].strip() if len(sys.argv) >= 3 else "ws://127.0.0.1:7777"
 
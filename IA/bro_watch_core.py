@@ -54,6 +54,17 @@ import tempfile
 import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Client mince (2026-10-18) : si le service BRO résident (bro_service.py)
+# écoute, la sous-commande lui est relayée AVANT les imports lourds
+# ci-dessous (qdrant_client, ollama, question.py, _load_relays...) — sinon
+# exécution locale, comportement historique inchangé.
+if __name__ == "__main__":
+    import bro_service_client
+    _forwarded_rc = bro_service_client.forward_cli(sys.argv[1:])
+    if _forwarded_rc is not None:
+        sys.exit(_forwarded_rc)
+
 import bro_tools
 import observability
 import algorithm_planner as aplan
@@ -1359,10 +1370,7 @@ def _dispatch_conversational_reply(owner_email, text, img_url=None):
     mode d'appel change."""
     try:
         payload = json.dumps({"text": text, "img_url": img_url or ""})
-        subprocess.Popen(
-            ["python3", os.path.abspath(__file__), "run-conversation-background", owner_email, payload],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
-        )
+        _launch_background(["run-conversation-background", owner_email, payload])
     except Exception as e:
         print(f"[BRO_WATCH] Échec du lancement de la réponse conversationnelle : {e}")
         return "🤔 Je n'ai pas pu traiter votre message, réessayez."
@@ -1501,7 +1509,17 @@ def process_incoming_commands(owner_email):
     skipped_bot_origin = 0
     skipped_decrypt_fail = 0
     skipped_dedup = 0
-    for ev in sorted(events, key=lambda e: e.get("created_at", 0)):
+    events = sorted(events, key=lambda e: e.get("created_at", 0))
+    # Déchiffrement en lot (2026-10-18) : une clé de conversation pour tous
+    # les self-DM du propriétaire (_decrypt_self_dms) ; les events sans id
+    # ou absents du lot repassent par _decrypt_self_dm.
+    try:
+        texts = _decrypt_self_dms(owner_email, [
+            ev for ev in events
+            if ev.get("id") and list(BRO_ORIGIN_TAG) not in ev.get("tags", [])])
+    except Exception:
+        texts = {}
+    for ev in events:
         # Filtre anti-boucle PRIMAIRE : tag structurel BRO_ORIGIN_TAG sur
         # l'event brut, avant tout déchiffrement — ne dépend pas du contenu,
         # ne peut pas confondre un vrai message utilisateur avec une réponse
@@ -1512,7 +1530,7 @@ def process_incoming_commands(owner_email):
             continue
         ev_id = ev.get("id")
         try:
-            text = _decrypt_self_dm(owner_email, ev)
+            text = texts[ev_id] if ev_id in texts else _decrypt_self_dm(owner_email, ev)
             if not text or text.strip().startswith(BOT_REPLY_MARKERS):
                 skipped_decrypt_fail += 1
                 continue  # échec de déchiffrement, ou repli pour events sans le tag (legacy)
@@ -1546,6 +1564,9 @@ def process_incoming_commands(owner_email):
     manifest = _load_manifest(owner_email)
     manifest.setdefault(COMMAND_LAST_CHECK_KEY, {})["last_check"] = now_ts
     _save_manifest(owner_email, manifest)
+    # Seulement maintenant : une exception plus haut laisse les events dans la
+    # file des abonnements, re-livrés au passage suivant.
+    _ack_self_dms(owner_email, events)
 
     if handled:
         print(f"[BRO_WATCH] {handled} commande(s) traitée(s) pour {owner_email}.")
@@ -27,6 +27,12 @@ import json
 import subprocess
 import socket
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+try:
+    import model_residency
+except Exception:   # optimiseur, jamais une dépendance dure
+    model_residency = None
+
 HOME_DIR = os.path.expanduser("~")
 
 
@@ -218,11 +224,14 @@ def describe_image_from_ipfs(image_source, ollama_model="llama3.2-vision:11b", o
         if not output_json:
             print(f"Sending image data to remote Ollama model '{ollama_model}'...")
 
+        lease = model_residency.begin("describe", ollama_model) if model_residency else None
+
         def _ollama_chat():
             return ollama.chat(
                 model=ollama_model,
                 messages=[{'role': 'user', 'content': prompt, 'images': [image_bytes]}],
-                options={'repeat_penalty': 1.4, 'num_predict': 600, 'temperature': 0.3}
+                options={'repeat_penalty': 1.4, 'num_predict': 600, 'temperature': 0.3},
+                **(model_residency.chat_options(lease) if lease else {})
             )
 
         # Retry once if connection is reset (tunnel may have dropped)
@@ -241,6 +250,9 @@ def describe_image_from_ipfs(image_source, ollama_model="llama3.2-vision:11b", o
                 ai_response = _ollama_chat()
             else:
                 raise
+        finally:
+            if lease:
+                model_residency.end(lease)
 
         description = _deduplicate_sentences(ai_response['message']['content'])
         if not output_json:
@@ -23,31 +23,19 @@ import os
 import sys
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import vector_store
+
 # ─────────────────────────────────────────────────────────────────────────────
-# Configuration & Secrets
+# Configuration & Secrets — centralisés dans vector_store.py (clé API Qdrant
+# auto-détectée dans ~/.zen/ai-company/.env, pool HTTP partagé)
 # ─────────────────────────────────────────────────────────────────────────────
-OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", vector_store.OLLAMA_URL)
+if "://" not in OLLAMA_HOST:                 # convention du client ollama : "hôte:port"
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
 EMBED_MODEL = "nomic-embed-text"
-QDRANT_URL  = os.environ.get("QDRANT_URL", "http://localhost:6333")
-
-# Auto-détection de la clé API Qdrant
-QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY")
-AI_ENV = os.path.expanduser("~/.zen/ai-company/.env")
-
-if not QDRANT_API_KEY and os.path.exists(AI_ENV):
-    try:
-        with open(AI_ENV, "r") as f:
-            for line in f:
-                if "QDRANT_API_KEY=" in line:
-                    QDRANT_API_KEY = line.split("=", 1)[1].strip().strip('"').strip("'")
-    except Exception:
-        pass
-
-def _qdrant_headers():
-    headers = {"Content-Type": "application/json"}
-    if QDRANT_API_KEY:
-        headers["api-key"] = QDRANT_API_KEY
-    return headers
+QDRANT_URL  = vector_store.QDRANT_URL
+QDRANT_API_KEY = vector_store.QDRANT_API_KEY or None
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Imports conditionnels
@@ -58,12 +46,6 @@ try:
 except ImportError:
     _OLLAMA_OK = False
 
-try:
-    import requests as _requests
-    _REQUESTS_OK = True
-except ImportError:
-    _REQUESTS_OK = False
-
 # ─────────────────────────────────────────────────────────────────────────────
 # Fonctions de base
 # ─────────────────────────────────────────────────────────────────────────────
@@ -79,87 +61,55 @@ def _ensure_model(model: str = EMBED_MODEL):
     except Exception: return False
 
 def get_embedding(text: str, model: str = EMBED_MODEL) -> list:
-    if not _OLLAMA_OK:
-        print("  [embed] ollama non installé — pip install ollama", file=sys.stderr)
-        return []
     text = text.strip()[:8000]
     if not text: return []
-    try:
-        resp = _ollama.embeddings(model=model, prompt=text)
-        return resp.get("embedding", [])
-    except Exception as e:
-        if "not found" in str(e).lower() and _ensure_model(model):
-            try:
-                resp = _ollama.embeddings(model=model, prompt=text)
-                return resp.get("embedding", [])
-            except: pass
-        return []
+    vec = vector_store.embed(text, model, OLLAMA_HOST)
+    if not vec and _ensure_model(model):
+        # Modèle absent au premier appel : tiré par _ensure_model, on réessaie
+        vec = vector_store.embed(text, model, OLLAMA_HOST)
+    return vec
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Qdrant Logic
+# Qdrant Logic (client partagé vector_store : collections connues mises en
+# cache, plus de GET de collection à chaque indexation)
 # ─────────────────────────────────────────────────────────────────────────────
 
 def qdrant_available() -> bool:
-    if not _REQUESTS_OK: return False
     try:
-        r = _requests.get(f"{QDRANT_URL}/health", headers=_qdrant_headers(), timeout=1)
-        return r.status_code == 200
+        status, _ = vector_store.request("GET", f"{QDRANT_URL}/healthz", timeout=1)
+        return status == 200
     except Exception: return False
 
 def qdrant_ensure_collection(collection: str, vector_size: int = 768) -> bool:
-    if not _REQUESTS_OK: return False
-    headers = _qdrant_headers()
-    try:
-        r = _requests.get(f"{QDRANT_URL}/collections/{collection}", headers=headers, timeout=2)
-        if r.status_code == 200: return True
-        payload = {"vectors": {"size": vector_size, "distance": "Cosine"}}
-        r = _requests.put(f"{QDRANT_URL}/collections/{collection}", json=payload, headers=headers, timeout=5)
-        return r.status_code in (200, 201)
-    except Exception: return False
+    return vector_store.ensure_collection(collection, vector_size)
 
 def qdrant_index(collection: str, point_id: int, text: str,
                  payload: dict = None, model: str = EMBED_MODEL,
                  language: str = None, vector: list = None) -> bool:
     """Indexation avec support optionnel d'un vecteur déjà calculé."""
-    if not _REQUESTS_OK: return False
-    
     # Utiliser le vecteur fourni ou le calculer
     v = vector if vector else get_embedding(text, model)
     if not v: return False
 
-    qdrant_ensure_collection(collection, len(v))
+    if not qdrant_ensure_collection(collection, len(v)): return False
     
     if language:
         payload = payload or {}
         payload["language"] = language
 
-    data = {"points": [{"id": point_id, "vector": v, "payload": payload or {}}]}
-    try:
-        r = _requests.put(f"{QDRANT_URL}/collections/{collection}/points", 
-                          json=data, headers=_qdrant_headers(), timeout=10)
-        return r.status_code in (200, 206)
-    except Exception: return False
+    return vector_store.upsert(collection, [{"id": point_id, "vector": v, "payload": payload or {}}]) == 1
 
 def qdrant_search(collection: str, query: str, top: int = 5,
                   score_threshold: float = 0.65,
                   model: str = EMBED_MODEL,
                   filter_language: str = None) -> list:
-    if not _REQUESTS_OK: return []
     v = get_embedding(query, model)
     if not v: return []
 
-    qdrant_ensure_collection(collection, len(v))
-    payload_data = {"vector": v, "limit": top, "with_payload": True, "score_threshold": score_threshold}
-
-    if filter_language:
-        payload_data["filter"] = {"must": [{"key": "language", "match": {"value": filter_language}}]}
-    
-    try:
-        r = _requests.post(f"{QDRANT_URL}/collections/{collection}/points/search", 
-                           json=payload_data, headers=_qdrant_headers(), timeout=10)
-        if r.status_code == 200: return r.json().get("result", [])
-    except Exception: pass
-    return []
+    if not qdrant_ensure_collection(collection, len(v)): return []
+    query_filter = vector_store.match_filter(language=filter_language) if filter_language else None
+    return vector_store.search(collection, v, limit=top, score_threshold=score_threshold,
+                               query_filter=query_filter, timeout=10)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CLI
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+embed_cache.py — Cache disque des embeddings, adressé par contenu (model, sha256(texte)).
+
+Contexte : le même texte était ré-embedé en boucle par tous les écrivains
+Qdrant du projet — embed.py::get_embedding, memory_manager._embed,
+bro/rag._qdrant_embed, skill_qdrant._embed, admin/ia_db/codebase_index et
+knowledge_index::get_embedding. Exemples d'intention (_seed_intent_corpus),
+chaînes de mots-clés de semantic_match, fichiers inchangés du ré-index
+quotidien : autant d'appels Ollama pour un vecteur déjà connu. Un embedding
+est une fonction pure de (modèle, texte) : il peut être mis en cache à vie.
+
+Format (un couple de fichiers par modèle, ~/.zen/flashmem/embed_cache/) :
+  <modèle>.idx — en-tête (magic, dim, capacité, nombre d'entrées, génération)
+                 puis une table fixe de `capacité` enregistrements (sha256 32 octets +
+                 date du dernier accès float64) — enregistrement i ↔ slot i
+  <modèle>.f32 — tableau float32 [capacité × dim], préalloué et mmap'é
+
+Aucune réécriture de fichier : une lecture est un accès mmap, un ajout écrit
+un slot en place. Éviction LRU approchée (échantillon de EVICT_SAMPLE slots,
+le plus ancien est remplacé — même principe que Redis) une fois la capacité
+atteinte ; capacité dérivée de EMBED_CACHE_MAX_MB à la création. Les ajouts
+sont sérialisés entre processus par flock (daemon BRO + cron en parallèle) ;
+une lecture prend le verrou partagé, ne réécrit que la date d'accès de
+l'enregistrement, et recharge la table quand la génération de l'en-tête a
+bougé (slot ajouté ou recyclé par un autre processus). Un ajout vide
+l'enregistrement avant d'écrire le vecteur : un slot n'est jamais associé à
+un sha256 dont il ne contient pas le vecteur.
+
+Stdlib uniquement (comme memory_manager.py) : aucune dépendance numpy.
+Désactivable par EMBED_CACHE=0. Toute erreur d'E/S dégrade en "pas de cache",
+jamais en échec de l'appelant.
+
+Usage bash :
+  python3 embed_cache.py stats
+  python3 embed_cache.py clear [--model nomic-embed-text]
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import fcntl
+import random
+import struct
+import hashlib
+import threading
+from array import array
+
+CACHE_DIR    = os.environ.get("EMBED_CACHE_DIR",
+                              os.path.expanduser("~/.zen/flashmem/embed_cache"))
+CACHE_MAX_MB = int(os.environ.get("EMBED_CACHE_MAX_MB", "256"))
+ENABLED      = os.environ.get("EMBED_CACHE", "1") != "0"
+EVICT_SAMPLE = 32
+
+_MAGIC   = b"EMBC0001"
+_HEADER  = struct.Struct("<8sIII")   # magic, dim, capacity, count
+_HDR_LEN = 64                         # en-tête paddé (extensible)
+_GEN     = struct.Struct("<Q")       # génération, dans le padding de l'en-tête
+_GEN_OFF = _HEADER.size               # (0 pour un index antérieur : compatible)
+_RECORD  = struct.Struct("<32sd")    # sha256, last_used
+_TS_OFF  = 32                         # date d'accès dans l'enregistrement
+_EMPTY   = b"\0" * 32
+
+
+def _safe_name(model: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in model)[:80]
+
+
+class EmbeddingCache:
+    """Cache d'un modèle d'embedding. La dimension est fixée par le premier
+    vecteur stocké (un vecteur d'une autre dimension n'est jamais mis en
+    cache — changement de modèle sous le même nom)."""
+
+    def __init__(self, model: str, directory: str = CACHE_DIR,
+                 max_mb: int = CACHE_MAX_MB):
+        self.model = model
+        self.max_mb = max_mb
+        base = os.path.join(directory, _safe_name(model))
+        self.idx_path = base + ".idx"
+        self.vec_path = base + ".f32"
+        self.lock_path = base + ".lock"
+        os.makedirs(directory, exist_ok=True)
+        self.dim = 0
+        self.capacity = 0
+        self._slots: dict = {}          # sha256 → slot
+        self._gen = -1                  # génération de l'index reflétée par _slots
+        self._idx = self._vec = None
+        self._lock = None               # fd du fichier verrou (flock)
+        self._mutex = threading.Lock()
+        self.hits = self.misses = 0
+        if os.path.isfile(self.idx_path) and os.path.isfile(self.vec_path):
+            self._open()
+
+    # ── fichiers ──────────────────────────────────────────────────────────────
+
+    def _open(self) -> None:
+        with open(self.idx_path, "r+b") as f:
+            self._idx = mmap.mmap(f.fileno(), 0)
+        magic, dim, capacity, _count = _HEADER.unpack_from(self._idx, 0)
+        if magic != _MAGIC or len(self._idx) != _HDR_LEN + capacity * _RECORD.size:
+            raise ValueError(f"index corrompu : {self.idx_path}")
+        with open(self.vec_path, "r+b") as f:
+            self._vec = mmap.mmap(f.fileno(), 0)
+        self.dim, self.capacity = dim, capacity
+        self._reload_slots()
+
+    def _reload_slots(self) -> None:
+        self._gen = self._generation()
+        slots = {}
+        for i in range(self._count()):
+            digest, _ = _RECORD.unpack_from(self._idx, _HDR_LEN + i * _RECORD.size)
+            if digest != _EMPTY:
+                slots[digest] = i
+        self._slots = slots
+
+    def _create(self, dim: int) -> None:
+        capacity = max(16, (self.max_mb << 20) // (dim * 4 + _RECORD.size))
+        with open(self.vec_path, "wb") as f:
+            f.truncate(capacity * dim * 4)      # fichier creux, pas d'écriture réelle
+        with open(self.idx_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, dim, capacity, 0).ljust(_HDR_LEN, b"\0"))
+            f.truncate(_HDR_LEN + capacity * _RECORD.size)
+        self._open()
+
+    def _count(self) -> int:
+        return _HEADER.unpack_from(self._idx, 0)[3]
+
+    def _set_count(self, n: int) -> None:
+        struct.pack_into("<I", self._idx, 16, n)
+
+    def _generation(self) -> int:
+        return _GEN.unpack_from(self._idx, _GEN_OFF)[0]
+
+    def _sync_slots(self) -> None:
+        """Sous flock : recharge la table si un autre processus l'a modifiée."""
+        if self._generation() != self._gen:
+            self._reload_slots()
+
+    def _flock(self, mode) -> None:
+        if self._lock is None:
+            self._lock = open(self.lock_path, "a")
+        fcntl.flock(self._lock, mode)
+
+    def _unlock(self) -> None:
+        fcntl.flock(self._lock, fcntl.LOCK_UN)
+
+    # ── lecture / écriture ────────────────────────────────────────────────────
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _read(self, digest: bytes):
+        slot = self._slots.get(digest)
+        if slot is None:
+            return None
+        off = _HDR_LEN + slot * _RECORD.size
+        stored, _ = _RECORD.unpack_from(self._idx, off)
+        if stored != digest:            # slot vidé ou recyclé
+            self._slots.pop(digest, None)
+            return None
+        # Date d'accès seule : le sha256 n'est jamais réécrit par une lecture
+        struct.pack_into("<d", self._idx, off + _TS_OFF, time.time())
+        vec = array("f")
+        start = slot * self.dim * 4
+        vec.frombytes(self._vec[start:start + self.dim * 4])
+        return vec.tolist()
+
+    def get(self, text: str):
+        """Vecteur en cache pour `text`, ou None."""
+        with self._mutex:
+            if self._idx is None:
+                if not os.path.isfile(self.idx_path):   # créé depuis par un autre processus ?
+                    return None
+                self._open()
+            self._flock(fcntl.LOCK_SH)      # pas d'ajout concurrent pendant la lecture
+            try:
+                self._sync_slots()
+                vec = self._read(self.key(text))
+            finally:
+                self._unlock()
+        if vec is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return vec
+
+    def put(self, text: str, vec: list) -> None:
+        if not vec:
+            return
+        digest = self.key(text)
+        with self._mutex:
+            self._flock(fcntl.LOCK_EX)
+            try:
+                self._put(digest, vec)
+            finally:
+                self._unlock()
+
+    def _put(self, digest: bytes, vec: list) -> None:
+        if self._idx is None:
+            if os.path.isfile(self.idx_path):
+                self._open()
+            else:
+                self._create(len(vec))
+        if len(vec) != self.dim:
+            return
+        self._sync_slots()
+        if digest in self._slots:
+            return
+        count = self._count()
+        if count < self.capacity:
+            slot = count
+            self._set_count(count + 1)
+        else:
+            slot = self._evict_slot()
+        off = _HDR_LEN + slot * _RECORD.size
+        old, _ = _RECORD.unpack_from(self._idx, off)
+        self._slots.pop(old, None)
+        # Vider l'enregistrement AVANT le vecteur, puis le sha256 en dernier
+        _RECORD.pack_into(self._idx, off, _EMPTY, 0.0)
+        start = slot * self.dim * 4
+        self._vec[start:start + self.dim * 4] = array("f", vec).tobytes()
+        _RECORD.pack_into(self._idx, off, digest, time.time())
+        self._gen = self._generation() + 1
+        _GEN.pack_into(self._idx, _GEN_OFF, self._gen)
+        self._slots[digest] = slot
+
+    def _evict_slot(self) -> int:
+        """LRU approché : le slot le moins récemment lu parmi un échantillon."""
+        best, best_ts = 0, float("inf")
+        for slot in random.sample(range(self.capacity), min(EVICT_SAMPLE, self.capacity)):
+            _, ts = _RECORD.unpack_from(self._idx, _HDR_LEN + slot * _RECORD.size)
+            if ts < best_ts:
+                best, best_ts = slot, ts
+        return best
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model, "dim": self.dim, "capacity": self.capacity,
+            "entries": self._count() if self._idx is not None else 0,
+            "hits": self.hits, "misses": self.misses,
+            "size_mb": round(sum(os.path.getsize(p) for p in (self.idx_path, self.vec_path)
+                                 if os.path.isfile(p)) / (1 << 20), 1),
+        }
+
+
+_CACHES: dict = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(model: str):
+    """Cache du modèle, partagé par tout le processus — None si désactivé ou
+    si le répertoire n'est pas utilisable (l'appelant embede alors sans cache)."""
+    if not ENABLED:
+        return None
+    with _CACHES_LOCK:
+        if model not in _CACHES:
+            try:
+                _CACHES[model] = EmbeddingCache(model)
+            except Exception as e:
+                print(f"[embed_cache] ⚠️ cache indisponible pour {model} : {e}", file=sys.stderr)
+                _CACHES[model] = None
+        return _CACHES[model]
+
+
+def cached_embed_many(texts: list, model: str, embed_fn) -> list:
+    """Embeddings de `texts` via le cache : seuls les textes jamais vus sont
+    passés (en un seul appel) à embed_fn(liste) → liste de vecteurs alignée.
+    Les vecteurs vides/None retournés par embed_fn ne sont pas mis en cache."""
+    cache = get_cache(model)
+    if cache is None:
+        return embed_fn(list(texts))
+    out = []
+    missing: dict = {}                  # texte → positions (doublons embedés une fois)
+    for i, t in enumerate(texts):
+        try:
+            vec = cache.get(t)
+        except Exception:
+            vec = None
+        out.append(vec)
+        if vec is None:
+            missing.setdefault(t, []).append(i)
+    if missing:
+        todo = list(missing)
+        for t, vec in zip(todo, embed_fn(todo)):
+            for i in missing[t]:
+                out[i] = vec
+            if vec:
+                try:
+                    cache.put(t, vec)
+                except Exception as e:
+                    print(f"[embed_cache] ⚠️ écriture impossible : {e}", file=sys.stderr)
+    return out
+
+
+def cached_embed(text: str, model: str, embed_fn) -> list:
+    """Variante un-texte de cached_embed_many : embed_fn(texte) → vecteur."""
+    return cached_embed_many([text], model, lambda ts: [embed_fn(ts[0])])[0]
+
+
+# ──────────────────────────── CLI ─────────────────────────────────────────────
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Cache disque des embeddings Ollama")
+    sub = p.add_subparsers(dest="cmd")
+    sub.add_parser("stats")
+    pc = sub.add_parser("clear")
+    pc.add_argument("--model", default=None, help="Un seul modèle (défaut : tous)")
+    args = p.parse_args()
+
+    models = sorted({f.rsplit(".", 1)[0] for f in os.listdir(CACHE_DIR)
+                     if f.endswith(".idx")}) if os.path.isdir(CACHE_DIR) else []
+    if args.cmd == "stats":
+        print(json.dumps([EmbeddingCache(m).stats() for m in models], indent=2))
+    elif args.cmd == "clear":
+        for m in models:
+            if args.model and _safe_name(args.model) != m:
+                continue
+            for ext in (".idx", ".f32", ".lock"):
+                try:
+                    os.remove(os.path.join(CACHE_DIR, m + ext))
+                except FileNotFoundError:
+                    pass
+            print(f"cache {m} supprimé")
+    else:
+        p.print_help()
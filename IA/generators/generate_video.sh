@@ -323,7 +323,13 @@ get_video_result() {
 
 # Function to free VRAM after generation (switch to lowram mode)
 # This calls the ComfyUI /free endpoint to release GPU memory
+# COMFYUI_FREE_VRAM=0 : model_residency.py (bro/media._call_generator) garde
+# le workflow résident et décide lui-même de /free selon la file de travaux.
 free_vram() {
+    if [ "${COMFYUI_FREE_VRAM:-1}" = "0" ]; then
+        echo "VRAM kept (model_residency)" >&2
+        return 0
+    fi
     echo "Freeing VRAM (lowram mode)..." >&2
     local response
     response=$(curl -s -X POST "$COMFYUI_URL/free" -H "Content-Type: application/json" -d '{"unload_models": true, "free_memory": true}' 2>/dev/null)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+identity_index.py — Index des identités locales (~/.zen/game/nostr/*/).
+
+Contexte (2026-10-18) : bro_user_level.resolve_email ouvrait TOUS les
+~/.zen/game/nostr/*/HEX à chaque recherche, N2_Economics.local_members faisait
+de même pour HEX_LOVE, bro_common_lib.sh::bro_resolve_email lançait jusqu'à
+quatre `grep -rl` sur l'arborescence, et _owner_hex / _owner_g1_pubkey /
+memory_manager._user_hex relisaient leurs fichiers à chaque appel. Avec des
+centaines de MULTIPASS, ces parcours linéaires se répétaient à chaque
+message entrant.
+
+Ici, UN index par compte (sous-dossier de NOSTR_DIR) :
+    email -> HEX, HEX_LOVE, G1PUBNOSTR, pub de .secret.dunikey,
+             contractStatus (did.json.cache), U.SOCIETY.end
+avec des tables inverses HEX / HEX_LOVE / G1PUB -> email. Persisté dans
+~/.zen/tmp/identity_index.sqlite (tables indexées, lisibles par un nouveau
+processus sans relire les comptes) et gardé en mémoire dans le processus.
+
+Invalidation par mtimes, sans inotify (stdlib pure) : chaque compte porte la
+signature des mtime_ns de son dossier et des fichiers indexés ; une
+revalidation ne fait que des stat() et ne relit que les comptes dont la
+signature a changé. Elle a lieu au plus toutes les CHECK_SEC secondes, ou
+immédiatement si le mtime de NOSTR_DIR a bougé (compte créé ou supprimé).
+Une réécriture sur place d'un fichier d'un compte existant (did.json.cache)
+est donc vue sous CHECK_SEC. Une fiche demandée par email (account, field,
+hex_of...) ne revalide que CE compte — ses 8 stat() — et ne lit que sa
+ligne dans la base : le parcours complet est réservé aux recherches
+inverses (email_for, members), seules à en avoir besoin.
+
+Usage (scripts shell) :
+    python3 identity_index.py email HEX [--no-love]   # email du HEX (puis HEX_LOVE)
+    python3 identity_index.py get EMAIL [CHAMP]         # fiche JSON, ou un champ
+    python3 identity_index.py members [hex|hex_love|g1pub]
+    python3 identity_index.py rebuild
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+NOSTR_DIR  = os.path.expanduser("~/.zen/game/nostr")
+INDEX_DB   = os.path.expanduser("~/.zen/tmp/identity_index.sqlite")
+CHECK_SEC  = 5
+
+# Fichiers lus par compte — leurs mtimes forment la signature du compte.
+_FILES = ("HEX", "HEX_LOVE", "G1PUBNOSTR", ".secret.dunikey", "secret.dunikey",
+          "did.json.cache", "U.SOCIETY.end")
+_KEY_FIELDS = ("hex", "hex_love", "g1pub")
+_COLUMNS = ("email", "hex", "hex_love", "g1pub", "dunikey_pub",
+            "contract_status", "society_end", "sig")
+_MAX_READ = 4096
+
+
+def _read_small(path):
+    try:
+        with open(path, errors="replace") as f:
+            return f.read(_MAX_READ).strip()
+    except OSError:
+        return ""
+
+
+def _signature(path):
+    sig = []
+    for name in ("",) + _FILES:
+        try:
+            sig.append(os.stat(os.path.join(path, name)).st_mtime_ns)
+        except OSError:
+            sig.append(0)
+    return ",".join(map(str, sig))
+
+
+def _read_account(email, path, sig):
+    dunikey_pub = ""
+    for name in (".secret.dunikey", "secret.dunikey"):
+        for line in _read_small(os.path.join(path, name)).splitlines():
+            if line.startswith("pub:"):
+                dunikey_pub = line.split(":", 1)[1].strip()
+                break
+        if dunikey_pub:
+            break
+    contract_status = ""
+    try:
+        with open(os.path.join(path, "did.json.cache")) as f:
+            contract_status = json.load(f).get("metadata", {}).get("contractStatus", "") or ""
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {
+        "email": email,
+        "hex": _read_small(os.path.join(path, "HEX")),
+        "hex_love": _read_small(os.path.join(path, "HEX_LOVE")),
+        "g1pub": _read_small(os.path.join(path, "G1PUBNOSTR")),
+        "dunikey_pub": dunikey_pub,
+        "contract_status": contract_status,
+        "society_end": _read_small(os.path.join(path, "U.SOCIETY.end")),
+        "sig": sig,
+    }
+
+
+class IdentityIndex:
+    """Index en mémoire adossé à la base SQLite ; sûr entre threads."""
+
+    def __init__(self, nostr_dir=NOSTR_DIR, db_path=INDEX_DB):
+        self.nostr_dir = nostr_dir
+        self.db_path = db_path
+        self._rows = {}
+        self._by = {f: {} for f in _KEY_FIELDS}
+        self._dir_mtime = None
+        self._checked_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # ── persistance ──────────────────────────────────────────────────────────
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS accounts (email TEXT PRIMARY KEY, hex TEXT, "
+                     "hex_love TEXT, g1pub TEXT, dunikey_pub TEXT, contract_status TEXT, "
+                     "society_end TEXT, sig TEXT)")
+        for field in _KEY_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS accounts_{field} ON accounts({field})")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return conn
+
+    def _load(self):
+        """Reprend l'état persisté (nouveau processus) ; base absente ou
+        illisible -> index vide, reconstruit à la revalidation."""
+        self._loaded = True
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM accounts").fetchall()
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+        self._rows = {r[0]: dict(zip(_COLUMNS, r)) for r in rows}
+        self._rebuild_reverse()
+        if meta.get("nostr_dir") == self.nostr_dir:
+            self._dir_mtime = int(meta.get("dir_mtime") or 0) or None
+            self._checked_at = float(meta.get("checked_at") or 0)
+
+    def _load_one(self, email):
+        """Ligne persistée d'un seul compte (processus neuf, index pas encore
+        chargé) ; None si absente ou base illisible."""
+        try:
+            conn = self._connect()
+            try:
+                r = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM accounts WHERE email = ?",
+                                 (email,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return dict(zip(_COLUMNS, r)) if r else None
+
+    def _save(self, changed, removed, meta=True):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("DELETE FROM accounts WHERE email = ?", [(e,) for e in removed])
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO accounts ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    [tuple(r[c] for c in _COLUMNS) for r in changed])
+                if meta:
+                    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                        ("nostr_dir", self.nostr_dir), ("dir_mtime", str(self._dir_mtime or 0)),
+                        ("checked_at", str(self._checked_at))])
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass    # l'index en mémoire reste valide ; la base sera réécrite au prochain changement
+
+    def _rebuild_reverse(self):
+        by = {f: {} for f in _KEY_FIELDS}
+        # Dossiers nommés comme un email réel d'abord (même préférence que
+        # bro_resolve_email) : un alias CAPTAIN/ portant le même HEX ne doit
+        # jamais masquer le compte réel.
+        for email in sorted(self._rows, key=lambda e: ("@" not in e, e)):
+            row = self._rows[email]
+            for field in _KEY_FIELDS:
+                if row[field]:
+                    by[field].setdefault(row[field], email)
+        self._by = by
+
+    # ── revalidation ─────────────────────────────────────────────────────────
+
+    def _dir_stat(self):
+        try:
+            return os.stat(self.nostr_dir).st_mtime_ns
+        except OSError:
+            return 0
+
+    def refresh(self, force=False):
+        """Aligne l'index sur le disque si nécessaire ; retourne le nombre de
+        comptes relus ou supprimés."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            dir_mtime = self._dir_stat()
+            if (not force and dir_mtime == self._dir_mtime
+                    and time.time() - self._checked_at < CHECK_SEC):
+                return 0
+            seen, changed = set(), []
+            try:
+                entries = list(os.scandir(self.nostr_dir))
+            except OSError:
+                entries = []
+            for entry in entries:
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                seen.add(entry.name)
+                sig = _signature(entry.path)
+                old = self._rows.get(entry.name)
+                if force or old is None or old["sig"] != sig:
+                    changed.append(_read_account(entry.name, entry.path, sig))
+            removed = [e for e in self._rows if e not in seen]
+            for email in removed:
+                del self._rows[email]
+            for row in changed:
+                self._rows[row["email"]] = row
+            if changed or removed:
+                self._rebuild_reverse()
+            self._dir_mtime = dir_mtime
+            self._checked_at = time.time()
+            # checked_at toujours persisté : sinon chaque processus neuf
+            # refait le parcours complet dès que CHECK_SEC sont écoulées.
+            self._save(changed, removed)
+            return len(changed) + len(removed)
+
+    # ── lecture ──────────────────────────────────────────────────────────────
+
+    def email_for(self, field, value):
+        self.refresh()
+        return self._by[field].get((value or "").strip(), "")
+
+    def account(self, email):
+        """Fiche d'un compte, revalidée par la seule signature de son dossier."""
+        if not email or "/" in email or email in (".", ".."):
+            return None
+        path = os.path.join(self.nostr_dir, email)
+        sig = _signature(path)
+        if sig.startswith("0,"):
+            return None         # dossier absent ; le parcours complet retirera la fiche
+        with self._lock:
+            row = self._rows.get(email)
+            if row is None and not self._loaded:
+                row = self._load_one(email)
+            if row is None or row["sig"] != sig:
+                old = row
+                row = _read_account(email, path, sig)
+                self._rows[email] = row
+                if self._loaded and (old is None
+                                     or any(old[f] != row[f] for f in _KEY_FIELDS)):
+                    self._rebuild_reverse()
+                self._save([row], [], meta=False)   # l'état du parcours complet est inchangé
+            elif email not in self._rows:
+                self._rows[email] = row
+            return dict(row)
+
+    def members(self, field):
+        self.refresh()
+        return dict(self._by[field])
+
+
+_INDEX = IdentityIndex()
+
+
+def refresh(force=False):
+    return _INDEX.refresh(force)
+
+
+def resolve_email(pubkey_hex, love=True):
+    """Email local du HEX (MULTIPASS), puis — si love — du HEX_LOVE ; '' si
+    inconnu sur cette station."""
+    email = _INDEX.email_for("hex", pubkey_hex)
+    if not email and love:
+        email = _INDEX.email_for("hex_love", pubkey_hex)
+    return email
+
+
+def email_for_g1pub(g1pub):
+    return _INDEX.email_for("g1pub", g1pub)
+
+
+def account(email):
+    """Fiche indexée du compte (dict) ou None si le dossier n'existe pas."""
+    return _INDEX.account(email)
+
+
+def field(email, name, default=""):
+    row = _INDEX.account(email)
+    return (row or {}).get(name) or default
+
+
+def hex_of(email):
+    return field(email, "hex")
+
+
+def hex_love_of(email):
+    return field(email, "hex_love")
+
+
+def members(name="hex"):
+    """Mapping valeur -> email pour tous les comptes où le champ est renseigné."""
+    return _INDEX.members(name)
+
+
+def main(argv):
+    if len(argv) >= 2 and argv[0] == "email":
+        print(resolve_email(argv[1], love="--no-love" not in argv))
+        return 0
+    if len(argv) >= 2 and argv[0] == "get":
+        row = account(argv[1])
+        if row is None:
+            return 1
+        row.pop("sig", None)
+        print(row.get(argv[2], "") if len(argv) > 2 else json.dumps(row, ensure_ascii=False))
+        return 0
+    if argv and argv[0] == "members":
+        name = argv[1] if len(argv) > 1 else "hex"
+        if name not in _KEY_FIELDS:
+            print(f"champ inconnu : {name}", file=sys.stderr)
+            return 2
+        for value, email in sorted(members(name).items(), key=lambda kv: kv[1]):
+            print(f"{value} {email}")
+        return 0
+    if argv and argv[0] == "rebuild":
+        print(f"{refresh(force=True)} compte(s) indexé(s)")
+        return 0
+    print(__doc__.split("Usage (scripts shell) :", 1)[1].rstrip(), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -18,6 +18,15 @@ Cycle ÉVEIL/RÊVE :
   Ollama résume les anciennes en une entrée [RÊVE] compacte (compression lossy).
   Les REVE_KEEP entrées les plus récentes sont préservées telles quelles.
   Le résumé est ré-embedé et upserted dans Qdrant pour rester requêtable.
+  Le chemin chaud ne résume plus lui-même : il met le fichier en file et
+  reve_scheduler.py compresse hors conversation (service BRO inactif, 20h12).
+
+Transport :
+  vector_store.py  — client Qdrant/Ollama partagé par tout IA/ (pool
+                     keep-alive, réessais, cache des collections, métriques) ;
+                     _curl() n'en est plus qu'un alias
+  embed_many()     — embeddings par lots via Ollama /api/embed (multi-input)
+  upsert_user_slot_bulk() / upsert_geo_bulk() — un PUT /points par lot
 
 Partage inter-node des skills :
   skill_hash()     — hash SHA256 du fichier skill local (clé de conflit)
@@ -37,16 +46,18 @@ Usage bash :
   python3 memory_manager.py slot-counts  --user-id email --slots 0 13 14 15
   python3 memory_manager.py reve-geo     --lat 43.6 --lon 1.4
   python3 memory_manager.py skill-hash   --skill devops
-  python3 memory_manager.py backup       --output /tmp/qdrant_backup.json
+  python3 memory_manager.py backup       --output /tmp/qdrant_backup.tar [--since 2026-10-01]
+  python3 memory_manager.py restore      --input /tmp/qdrant_backup.tar
 """
 
-import os, sys, hashlib, json
-import urllib.request
-import urllib.error
+import os, sys, hashlib, json, struct, tarfile, tempfile, time
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import observability
+import slot_store
+import identity_index
+import vector_store
 
 # ── Venv ~/.astro ──────────────────────────────────────────────────────────────
 _venv = os.path.expanduser("~/.astro")
@@ -56,31 +67,12 @@ if os.path.exists(_venv):
     if os.path.exists(_sp):
         sys.path.insert(0, _sp)
 
-def _load_qdrant_api_key() -> str:
-    """Env var en priorité, sinon ~/.zen/ai-company/.env (même repli que
-    bro_watch_core.py::_qdrant_client — Qdrant refuse toute requête sans clé
-    dès que la stack IA a été installée avec authentification)."""
-    key = os.environ.get("QDRANT_API_KEY", "")
-    if key:
-        return key
-    env_file = os.path.expanduser("~/.zen/ai-company/.env")
-    try:
-        with open(env_file) as f:
-            for line in f:
-                if line.startswith("QDRANT_API_KEY="):
-                    return line.strip().split("=", 1)[1]
-    except Exception:
-        pass
-    return ""
-
-
-# ── Configuration (overridable via env) ──────────────────────────────────────
-QDRANT_URL     = os.environ.get("QDRANT_URL",     "http://127.0.0.1:6333")
-QDRANT_API_KEY = _load_qdrant_api_key()
-OLLAMA_URL     = os.environ.get("OLLAMA_URL",     "http://127.0.0.1:11434")
-EMBED_MODEL    = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+# ── Configuration (overridable via env, cf. vector_store.py) ─────────────────
+QDRANT_URL     = vector_store.QDRANT_URL
+OLLAMA_URL     = vector_store.OLLAMA_URL
+EMBED_MODEL    = vector_store.EMBED_MODEL
 OLLAMA_MODEL   = os.environ.get("OLLAMA_MODEL",       "llama3.2")
-VECTOR_SIZE    = int(os.environ.get("OLLAMA_EMBED_DIM", "768"))
+VECTOR_SIZE    = vector_store.VECTOR_SIZE
 
 # Seuil de compression : ~2-3 mois d'activité quotidienne avant premier RÊVE
 # Après RÊVE : [1 résumé] + [80 récents] = 81 → prochain RÊVE à 150 de nouveau
@@ -96,10 +88,9 @@ GEO_DIR        = os.path.join(FLASHMEM_BASE, "uplanet_memory")
 
 def _user_hex(user_id: str) -> str:
     """Dérive les 16 premiers chars du HEX du MULTIPASS, ou MD5 de l'email."""
-    hex_file = os.path.expanduser(f"~/.zen/game/nostr/{user_id}/HEX")
-    if os.path.isfile(hex_file):
-        with open(hex_file) as f:
-            return f.read().strip()[:16]
+    hex_pk = identity_index.hex_of(user_id)
+    if hex_pk:
+        return hex_pk[:16]
     return hashlib.md5(user_id.encode()).hexdigest()[:16]
 
 
@@ -127,49 +118,23 @@ def _season(timestamp: str) -> str:
     return "automne"
 
 
-def _auth_headers() -> dict:
-    if QDRANT_API_KEY:
-        return {"api-key": QDRANT_API_KEY}
-    return {}
+def _curl(method: str, url: str, payload: dict = None) -> dict:
+    """Appel JSON via la couche partagée vector_store (pool keep-alive,
+    réessais, métriques) — {} sur toute panne, détail sur stderr. Gardé comme
+    point d'entrée unique des appels bruts de ce fichier et de
+    bro_node_reset.py."""
+    return vector_store.curl(method, url, payload)
 
 
-def _curl(method: str, url: str, payload: dict = None) -> dict:
-    """Appel HTTP via urllib.request (stdlib) — plus de subprocess curl
-    (2026-07-06) : évitait la dépendance qdrant_client, mais forker/exec un
-    binaire externe à chaque appel (Qdrant ET Ollama, potentiellement
-    plusieurs fois par message) est plus lourd et moins fiable qu'un appel
-    HTTP natif Python (gestion des timeouts/erreurs sans parsing de code
-    retour + stderr). Même pattern que admin/ia_db/codebase_index.py.
-
-    Échec BRUYANT sur stderr (toute panne — Qdrant down, Ollama down, auth
-    invalide, timeout — remonte jusqu'à upsert_geo/upsert_user_slot puis
-    short_memory.py avec un détail exploitable dans les logs, jamais avalée
-    en silence)."""
-    headers = {"Content-Type": "application/json"}
-    headers.update(_auth_headers())
-    data = json.dumps(payload).encode("utf-8") if payload is not None else None
-    req = urllib.request.Request(url, data=data, headers=headers, method=method.upper())
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            body = resp.read()
-            return json.loads(body) if body.strip() else {}
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode("utf-8", errors="replace")[:200]
-        print(f"[memory_manager] ⚠️ Échec {method} {url} (HTTP {e.code}) : {detail or '(pas de corps)'}",
-              file=sys.stderr)
-        return {}
-    except urllib.error.URLError as e:
-        print(f"[memory_manager] ⚠️ Échec {method} {url} : {e.reason}", file=sys.stderr)
-        return {}
-    except Exception as e:
-        print(f"[memory_manager] ⚠️ Échec {method} {url} : {e}", file=sys.stderr)
-        return {}
+def embed_many(texts: list) -> list:
+    """Embeddings d'une liste de textes par lots Ollama /api/embed, servis par
+    embed_cache (vector_store.embed_many) — liste alignée sur `texts`, [] pour
+    un texte vide ou un échec."""
+    return vector_store.embed_many(texts, EMBED_MODEL, OLLAMA_URL)
 
 
 def _embed(text: str) -> list:
-    r = _curl("POST", f"{OLLAMA_URL}/api/embeddings",
-              {"model": EMBED_MODEL, "prompt": text})
-    return r.get("embedding", [])
+    return embed_many([text])[0]
 
 
 def _qdrant_available() -> bool:
@@ -180,19 +145,15 @@ def _qdrant_available() -> bool:
 # ──────────────────────────── collections ─────────────────────────────────────
 
 def ensure_collection(name: str, size: int = VECTOR_SIZE):
-    """Crée la collection si elle n'existe pas (idempotent).
+    """Crée la collection si elle n'existe pas (idempotent) — existence
+    mémorisée par vector_store : un seul GET par collection et par processus,
+    plus de 409 bruyant sur une collection déjà là."""
+    vector_store.ensure_collection(name, size)
+
 
-    Vérifie d'abord son existence (GET) plutôt que de foncer sur un PUT à
-    chaque appel : Qdrant répond HTTP 409 sur un PUT "create" d'une collection
-    déjà là, que _curl logue bruyamment sur stderr par design (jamais avaler
-    une vraie panne en silence) — dans le cas ultra-majoritaire (collection
-    déjà créée depuis longtemps), ce 409 n'est qu'un faux positif qui pollue
-    les logs à CHAQUE upsert/search, sans jamais rien signaler d'utile."""
-    existing = _curl("GET", f"{QDRANT_URL}/collections/{name}")
-    if existing.get("result"):
-        return
-    _curl("PUT", f"{QDRANT_URL}/collections/{name}",
-          {"vectors": {"size": size, "distance": "Cosine"}})
+def _put_points(collection: str, points: list) -> int:
+    """PUT /points par lots — nombre de points acceptés par Qdrant."""
+    return vector_store.upsert(collection, points)
 
 
 def ensure_all_collections(user_ids: list = None):
@@ -209,28 +170,43 @@ def ensure_all_collections(user_ids: list = None):
 def upsert_geo(lat: str, lon: str, content: str, pubkey: str = "",
                timestamp: str = None, event_id: str = "", importance: int = 1) -> bool:
     """Upsert un message géolocalisé dans la collection uplanet_geo."""
-    if not content.strip():
-        return False
-    vec = _embed(content)
-    if not vec:
-        return False
-    ts     = timestamp or datetime.utcnow().isoformat() + "Z"
-    doc_id = _stable_id(lat, lon, ts, pubkey)
-    ensure_collection("uplanet_geo")
-    r = _curl("PUT", f"{QDRANT_URL}/collections/uplanet_geo/points", {
-        "points": [{
-            "id": doc_id,
+    return upsert_geo_bulk(lat, lon, [{
+        "content": content, "pubkey": pubkey, "timestamp": timestamp,
+        "event_id": event_id, "importance": importance,
+    }]) == 1
+
+
+def upsert_geo_bulk(lat: str, lon: str, entries: list) -> int:
+    """Upsert plusieurs messages d'une même coordonnée : un appel /api/embed
+    et un PUT /points par lot au lieu de deux allers-retours par message.
+    entries: [{"content", "pubkey", "timestamp", "event_id", "importance"}]
+    (seul content est obligatoire). Retourne le nombre de points upsertés —
+    les entrées vides ou non embedées sont comptées comme échecs."""
+    entries = [e for e in entries or [] if (e.get("content") or "").strip()]
+    if not entries:
+        return 0
+    vecs = embed_many([e["content"] for e in entries])
+    points = []
+    for e, vec in zip(entries, vecs):
+        if not vec:
+            continue
+        ts     = e.get("timestamp") or datetime.utcnow().isoformat() + "Z"
+        pubkey = e.get("pubkey", "")
+        points.append({
+            "id": _stable_id(lat, lon, ts, pubkey),
             "vector": vec,
             "payload": {
                 "latitude": lat, "longitude": lon,
                 "coord_key": f"{lat}_{lon}",
-                "pubkey": pubkey, "event_id": event_id,
-                "content": content, "timestamp": ts,
-                "season": _season(ts), "importance": importance,
+                "pubkey": pubkey, "event_id": e.get("event_id", ""),
+                "content": e["content"], "timestamp": ts,
+                "season": _season(ts), "importance": e.get("importance", 1),
             }
-        }]
-    })
-    return bool(r)
+        })
+    if not points:
+        return 0
+    ensure_collection("uplanet_geo")
+    return _put_points("uplanet_geo", points)
 
 
 def search_geo(lat: str, lon: str, query: str, limit: int = 5,
@@ -261,28 +237,41 @@ def upsert_user_slot(user_id: str, slot: int, content: str,
     importance : 1 pour un message individuel ; passer le nombre de messages
     condensés pour un résumé RÊVE (cf. reve_compress_slot), afin qu'un souvenir
     qui en synthétise beaucoup pèse plus qu'un message isolé."""
-    if not content.strip():
-        return False
-    vec = _embed(content)
-    if not vec:
-        return False
-    cname  = f"memory_{_user_hex(user_id)}"
-    ts     = timestamp or datetime.utcnow().isoformat() + "Z"
-    doc_id = _stable_id(user_id, ts)
-    ensure_collection(cname)
-    r = _curl("PUT", f"{QDRANT_URL}/collections/{cname}/points", {
-        "points": [{
-            "id": doc_id,
+    return upsert_user_slot_bulk(user_id, slot, [{
+        "content": content, "timestamp": timestamp,
+        "event_id": event_id, "importance": importance,
+    }]) == 1
+
+
+def upsert_user_slot_bulk(user_id: str, slot: int, entries: list) -> int:
+    """Version par lots d'upsert_user_slot (rattrapage RÊVE, imports) : un
+    appel /api/embed et un PUT /points par lot. entries: [{"content",
+    "timestamp", "event_id", "importance"}] (seul content est obligatoire).
+    Retourne le nombre de points upsertés."""
+    entries = [e for e in entries or [] if (e.get("content") or "").strip()]
+    if not entries:
+        return 0
+    vecs = embed_many([e["content"] for e in entries])
+    points = []
+    for e, vec in zip(entries, vecs):
+        if not vec:
+            continue
+        ts = e.get("timestamp") or datetime.utcnow().isoformat() + "Z"
+        points.append({
+            "id": _stable_id(user_id, ts),
             "vector": vec,
             "payload": {
                 "user_id": user_id, "slot": slot,
-                "content": content, "timestamp": ts,
-                "event_id": event_id, "source": "nostr_rec",
-                "season": _season(ts), "importance": importance,
+                "content": e["content"], "timestamp": ts,
+                "event_id": e.get("event_id", ""), "source": "nostr_rec",
+                "season": _season(ts), "importance": e.get("importance", 1),
             }
-        }]
-    })
-    return bool(r)
+        })
+    if not points:
+        return 0
+    cname = f"memory_{_user_hex(user_id)}"
+    ensure_collection(cname)
+    return _put_points(cname, points)
 
 
 def _delete_points(collection: str, ids: list) -> bool:
@@ -514,19 +503,16 @@ def upsert_skill(skill: str, content: str, npub: str = "",
     ensure_collection("station_skills")
     content_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
     doc_id = _stable_id(skill, content[:80])
-    r = _curl("PUT", f"{QDRANT_URL}/collections/station_skills/points", {
-        "points": [{
-            "id": doc_id,
-            "vector": vec,
-            "payload": {
-                "skill": skill, "content": content,
-                "content_hash": content_hash,
-                "npub": npub, "node_id": node_id,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-            }
-        }]
-    })
-    return bool(r)
+    return _put_points("station_skills", [{
+        "id": doc_id,
+        "vector": vec,
+        "payload": {
+            "skill": skill, "content": content,
+            "content_hash": content_hash,
+            "npub": npub, "node_id": node_id,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        }
+    }]) == 1
 
 
 def skill_hash(skill: str) -> str:
@@ -550,6 +536,45 @@ def skill_content(skill: str) -> str:
 
 # ──────────────────── RÊVE : compression mémorielle ───────────────────────────
 
+# Les JSON de mémoire (slot*.json, uplanet_memory/*.json) sont alimentés par
+# le chemin chaud (short_memory.py, bro/rag.py, bro/tools.py) PENDANT qu'un
+# RÊVE résume en arrière-plan (reve_scheduler.py) : lecture et réécriture
+# passent par slot_store (journal + instantané, sous son verrou).
+
+def _read_memory_json(path: str):
+    """Vue fusionnée d'une mémoire (instantané + journal), None si absente."""
+    return slot_store.load(path)
+
+
+def _msg_key(m: dict) -> tuple:
+    return (m.get("timestamp"), m.get("event_id", ""), m.get("content", ""))
+
+
+def _reve_rewrite(path: str, summary_entry: dict, to_compress: list) -> bool:
+    """Remplace `to_compress` par `summary_entry` dans la mémoire, sous
+    verrou. Relit la mémoire au lieu de réécrire l'instantané d'avant le
+    résumé : les messages arrivés pendant l'appel LLM sont conservés, et ceux
+    que la fenêtre glissante a déjà écartés ne reviennent pas."""
+    done = {_msg_key(m) for m in to_compress}
+
+    def _replace(data):
+        kept = [m for m in data.get("messages", []) if _msg_key(m) not in done]
+        data["messages"] = [summary_entry] + kept
+        return data
+
+    return slot_store.rewrite(path, _replace)
+
+
+def _reve_purge(collection: str, ids: list, pending_deletes: dict = None) -> bool:
+    """Purge des vecteurs remplacés par un résumé, ou mise en attente dans
+    `pending_deletes` (collection -> ids) : l'ordonnanceur les supprime
+    ensuite par gros lots, une fois pour toute la passe."""
+    if pending_deletes is not None:
+        pending_deletes.setdefault(collection, []).extend(ids)
+        return True
+    return _delete_points(collection, ids)
+
+
 def _ollama_summarize(text: str, activity: str = "", max_tokens: int = 200) -> str:
     """Résume un bloc de messages via Ollama — cœur du cycle RÊVE. `activity`
     (digest structuré de observability.py, voir reve_compress_slot) permet au
@@ -576,27 +601,32 @@ def _ollama_summarize(text: str, activity: str = "", max_tokens: int = 200) -> s
 
 
 def reve_compress_slot(user_id: str, slot: int,
-                       slot_file: str = None) -> bool:
+                       slot_file: str = None, stats: dict = None,
+                       pending_deletes: dict = None) -> bool:
     """
     Déclenche la compression RÊVE pour un slot si >= REVE_THRESHOLD entrées.
     Résume les anciennes en [RÊVE] + conserve les REVE_KEEP plus récentes.
     Retourne True si compression effectuée.
+
+    stats : dict complété avec les compteurs de la passe (messages
+    compressés, rattrapés, durée du résumé) — cf. reve_scheduler.py.
+    pending_deletes : si fourni, les IDs Qdrant à purger y sont ajoutés au
+    lieu d'être supprimés ici (voir _reve_purge).
     """
     if not slot_file:
         slot_file = os.path.expanduser(
             f"~/.zen/flashmem/{user_id}/slot{slot}.json")
-    if not os.path.isfile(slot_file):
+    if stats is None:
+        stats = {}
+    data = _read_memory_json(slot_file)
+    if data is None:
         return False
 
-    with open(slot_file, encoding="utf-8") as f:
-        data = json.load(f)
-
     msgs = data.get("messages", [])
     if len(msgs) < REVE_THRESHOLD:
         return False
 
     to_compress = msgs[:-REVE_KEEP]
-    recent      = msgs[-REVE_KEEP:]
 
     # Sécurité anti-perte (2026-07-06) : to_compress est sur le point d'être
     # PURGÉ du JSON ci-dessous — s'il contient un message jamais synchronisé
@@ -609,12 +639,11 @@ def reve_compress_slot(user_id: str, slot: int,
     if unsynced:
         print(f"[memory_manager] 🔄 RÊVE : rattrapage de {len(unsynced)} message(s) "
               f"jamais synchronisés avant compression ({user_id}, slot {slot})")
-        failed = sum(
-            0 if upsert_user_slot(user_id, slot, m.get("content", ""),
-                                   timestamp=m.get("timestamp"), event_id=m.get("event_id", ""))
-            else 1
+        failed = len(unsynced) - upsert_user_slot_bulk(user_id, slot, [
+            {"content": m.get("content", ""), "timestamp": m.get("timestamp"),
+             "event_id": m.get("event_id", "")}
             for m in unsynced
-        )
+        ])
         if failed:
             print(f"[memory_manager] ❌ RÊVE abandonné pour {user_id}/slot{slot} : "
                   f"{failed}/{len(unsynced)} message(s) toujours non synchronisés après "
@@ -622,6 +651,7 @@ def reve_compress_slot(user_id: str, slot: int,
             observability.log_event(user_id, "reve_compression", "abort_unsynced",
                                      success=False, extra={"failed": failed, "total": len(unsynced)})
             return False
+        stats["catchup"] = stats.get("catchup", 0) + len(unsynced)
         print(f"[memory_manager] ✅ RÊVE : rattrapage réussi pour {len(unsynced)} message(s)")
 
     block = "\n".join(
@@ -633,7 +663,9 @@ def reve_compress_slot(user_id: str, slot: int,
         since_ts=to_compress[0].get("timestamp") if to_compress else None,
         until_ts=to_compress[-1].get("timestamp") if to_compress else None,
     )
+    t0 = time.monotonic()
     summary = _ollama_summarize(block, activity_block)
+    stats["summarize_sec"] = stats.get("summarize_sec", 0.0) + time.monotonic() - t0
     if not summary:
         return False
 
@@ -656,9 +688,9 @@ def reve_compress_slot(user_id: str, slot: int,
         summary_entry["latitude"]  = to_compress[-1]["latitude"]
         summary_entry["longitude"] = to_compress[-1]["longitude"]
 
-    data["messages"] = [summary_entry] + recent
-    with open(slot_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if not _reve_rewrite(slot_file, summary_entry, to_compress):
+        return False
+    stats["compressed"] = stats.get("compressed", 0) + len(to_compress)
 
     upsert_user_slot(user_id, slot, summary_entry["content"], timestamp=ts_now,
                      importance=len(to_compress))
@@ -670,30 +702,31 @@ def reve_compress_slot(user_id: str, slot: int,
     old_ids = [_stable_id(user_id, m.get("timestamp"))
                for m in to_compress if m.get("timestamp")]
     cname = f"memory_{_user_hex(user_id)}"
-    if not _delete_points(cname, old_ids):
+    if not _reve_purge(cname, old_ids, pending_deletes):
         print(f"[memory_manager] ⚠️ RÊVE : {len(old_ids)} vecteur(s) compressé(s) "
               f"non purgés de Qdrant pour {user_id}/slot{slot} (orphelins, sans impact "
               f"fonctionnel — nettoyage différé).")
     return True
 
 
-def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
-    """Déclenche la compression RÊVE pour la mémoire géo d'une coordonnée."""
+def reve_compress_geo(lat: str, lon: str, geo_file: str = None,
+                      stats: dict = None, pending_deletes: dict = None) -> bool:
+    """Déclenche la compression RÊVE pour la mémoire géo d'une coordonnée
+    (stats / pending_deletes : cf. reve_compress_slot)."""
     if not geo_file:
         coord_key = f"{lat}_{lon}".replace(".", "_").replace("-", "m")
         geo_file  = os.path.join(GEO_DIR, f"{coord_key}.json")
-    if not os.path.isfile(geo_file):
+    if stats is None:
+        stats = {}
+    data = _read_memory_json(geo_file)
+    if data is None:
         return False
 
-    with open(geo_file, encoding="utf-8") as f:
-        data = json.load(f)
-
     msgs = data.get("messages", [])
     if len(msgs) < REVE_THRESHOLD:
         return False
 
     to_compress = msgs[:-REVE_KEEP]
-    recent      = msgs[-REVE_KEEP:]
 
     # Sécurité anti-perte — même garde que reve_compress_slot (voir son
     # commentaire) : jamais de purge JSON d'un message pas encore confirmé
@@ -702,12 +735,11 @@ def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
     if unsynced:
         print(f"[memory_manager] 🔄 RÊVE géo : rattrapage de {len(unsynced)} message(s) "
               f"jamais synchronisés avant compression ({lat}, {lon})")
-        failed = sum(
-            0 if upsert_geo(lat, lon, m.get("content", ""), m.get("pubkey", ""),
-                             timestamp=m.get("timestamp"), event_id=m.get("event_id", ""))
-            else 1
+        failed = len(unsynced) - upsert_geo_bulk(lat, lon, [
+            {"content": m.get("content", ""), "pubkey": m.get("pubkey", ""),
+             "timestamp": m.get("timestamp"), "event_id": m.get("event_id", "")}
             for m in unsynced
-        )
+        ])
         if failed:
             print(f"[memory_manager] ❌ RÊVE géo abandonné pour ({lat}, {lon}) : "
                   f"{failed}/{len(unsynced)} message(s) toujours non synchronisés après "
@@ -716,13 +748,16 @@ def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
                                      success=False, extra={"failed": failed, "total": len(unsynced),
                                                             "lat": lat, "lon": lon})
             return False
+        stats["catchup"] = stats.get("catchup", 0) + len(unsynced)
         print(f"[memory_manager] ✅ RÊVE géo : rattrapage réussi pour {len(unsynced)} message(s)")
 
     block = "\n".join(
         f"[{m.get('timestamp', '')[:10]}] {m.get('content', '')}"
         for m in to_compress
     )
+    t0 = time.monotonic()
     summary = _ollama_summarize(block)
+    stats["summarize_sec"] = stats.get("summarize_sec", 0.0) + time.monotonic() - t0
     if not summary:
         return False
 
@@ -735,9 +770,9 @@ def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
         "season":    _season(to_compress[-1].get("timestamp", ts_now)) if to_compress else _season(ts_now),
         "importance": len(to_compress),
     }
-    data["messages"] = [summary_entry] + recent
-    with open(geo_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if not _reve_rewrite(geo_file, summary_entry, to_compress):
+        return False
+    stats["compressed"] = stats.get("compressed", 0) + len(to_compress)
 
     upsert_geo(lat, lon, summary_entry["content"], timestamp=ts_now, importance=len(to_compress))
 
@@ -745,7 +780,7 @@ def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
     # reve_compress_slot (voir son commentaire).
     old_ids = [_stable_id(lat, lon, m.get("timestamp"), m.get("pubkey", ""))
                for m in to_compress if m.get("timestamp")]
-    if not _delete_points("uplanet_geo", old_ids):
+    if not _reve_purge("uplanet_geo", old_ids, pending_deletes):
         print(f"[memory_manager] ⚠️ RÊVE géo : {len(old_ids)} vecteur(s) compressé(s) "
               f"non purgés de Qdrant pour ({lat}, {lon}) (orphelins, sans impact "
               f"fonctionnel — nettoyage différé).")
@@ -754,79 +789,274 @@ def reve_compress_geo(lat: str, lon: str, geo_file: str = None) -> bool:
 
 # ──────────────────────────── backup export ───────────────────────────────────
 
-def backup_collections(output_path: str) -> bool:
+# Format vectoriel (2026-10-18) : l'export payload-only obligeait la
+# restauration à ré-embeder chaque point via Ollama, un appel HTTP par point
+# — des heures de GPU/CPU pour une station active. Le backup est désormais
+# une archive tar (un seul fichier : gzip + natools + ipfs add inchangés dans
+# qdrant_backup.sh) contenant, écrits au fil du scroll :
+#   manifest.json        — date, modèle d'embedding, "since", et par
+#                          collection : dimension, distance, nombre de points
+#   <collection>.npy     — float32 [n, dim], ligne i = vecteur du point i
+#   <collection>.jsonl   — ligne i = {"id", "payload"} du point i
+# Les .npy sont lisibles par numpy.load, mais rien ici n'en dépend.
+BACKUP_FORMAT    = "qdrant-vectors/1"
+BACKUP_PAGE      = 256      # points par page de scroll
+RESTORE_BATCH    = 512      # points par PUT à la restauration
+_NPY_HEADER_LEN  = 128      # en-tête .npy réservé, complété une fois n connu
+_TIME_KEYS       = ("timestamp", "created_at", "mtime")
+
+
+def _npy_header(n: int, dim: int) -> bytes:
+    """En-tête NPY v1.0 de taille fixe _NPY_HEADER_LEN (forme patchée en fin
+    d'écriture, sans réécrire les données)."""
+    desc = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (n, dim)
+    pad = _NPY_HEADER_LEN - 10 - len(desc) - 1
+    return b"\x93NUMPY\x01\x00" + (_NPY_HEADER_LEN - 10).to_bytes(2, "little") \
+        + desc.encode("latin1") + b" " * pad + b"\n"
+
+
+def _point_time(payload: dict):
+    """Horodatage d'un payload en secondes UNIX (ISO "timestamp" ou epoch
+    "created_at"/"mtime"), None si absent."""
+    for key in _TIME_KEYS:
+        value = payload.get(key)
+        if value in (None, ""):
+            continue
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def _collection_params(col: str) -> dict:
+    """{"size", "distance"} du vecteur (non nommé) de la collection, {} sinon."""
+    info = _curl("GET", f"{QDRANT_URL}/collections/{col}")
+    vectors = info.get("result", {}).get("config", {}).get("params", {}).get("vectors", {})
+    return vectors if isinstance(vectors, dict) and "size" in vectors else {}
+
+
+def _scroll_pages(col: str, with_vector: bool, page: int = BACKUP_PAGE):
+    """Pages successives de points d'une collection, dans l'ordre du scroll.
+    Une page en échec lève RuntimeError : _curl rend {} sur panne, et s'arrêter
+    là produirait une archive tronquée déclarée réussie (2026-10-18)."""
+    offset = None
+    while True:
+        body: dict = {"limit": page, "with_payload": True, "with_vector": with_vector}
+        if offset is not None:
+            body["offset"] = offset
+        result = _curl("POST", f"{QDRANT_URL}/collections/{col}/points/scroll", body).get("result")
+        if not isinstance(result, dict):
+            raise RuntimeError(f"scroll {col} en échec (offset {offset})")
+        yield result.get("points", [])
+        offset = result.get("next_page_offset")
+        if offset is None:
+            break
+
+
+def _changed_pages(col: str, since_ts: float):
+    """Pages de points modifiés depuis `since_ts` : scroll payload seul, puis
+    vecteurs des seuls points retenus (GET par ids). Un point sans horodatage
+    est toujours retenu — on ne peut pas prouver qu'il est ancien."""
+    for points in _scroll_pages(col, with_vector=False):
+        ids = []
+        for pt in points:
+            ts = _point_time(pt.get("payload") or {})
+            if ts is None or ts >= since_ts:
+                ids.append(pt["id"])
+        if ids:
+            result = _curl("POST", f"{QDRANT_URL}/collections/{col}/points",
+                           {"ids": ids, "with_payload": True, "with_vector": True}).get("result")
+            if not isinstance(result, list):
+                raise RuntimeError(f"lecture de {len(ids)} point(s) de {col} en échec")
+            yield result
+
+
+def _export_collection(col: str, workdir: str, since_ts: float = None) -> dict:
+    params = _collection_params(col)
+    dim = params.get("size", 0)
+    npy_path = os.path.join(workdir, f"{col}.npy")
+    n = 0
+    with open(npy_path, "wb") as vec_f, \
+         open(os.path.join(workdir, f"{col}.jsonl"), "w", encoding="utf-8") as meta_f:
+        vec_f.write(_npy_header(0, dim))
+        pages = _changed_pages(col, since_ts) if since_ts is not None else _scroll_pages(col, True)
+        for points in pages:
+            for pt in points:
+                vec = pt.get("vector")
+                line = {"id": pt["id"], "payload": pt.get("payload") or {}}
+                if isinstance(vec, list) and len(vec) == dim:
+                    vec_f.write(struct.pack(f"<{dim}f", *vec))
+                else:
+                    # Vecteurs nommés / dimension inattendue : gardés en ligne
+                    vec_f.write(bytes(4 * dim))
+                    line["vector"] = vec
+                meta_f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                n += 1
+        vec_f.seek(0)
+        vec_f.write(_npy_header(n, dim))
+    return {"dim": dim, "distance": params.get("distance", "Cosine"), "count": n,
+            "model": EMBED_MODEL}
+
+
+def backup_collections(output_path: str, since: str = None,
+                       collections_filter: list = None, vectors: bool = True) -> bool:
     """
-    Exporte toutes les collections Qdrant (payloads, sans vecteurs) en JSON.
+    Exporte les collections Qdrant — vecteurs compris (archive tar, cf.
+    BACKUP_FORMAT) ; vectors=False garde l'ancien JSON payload-only.
+    since (ISO-8601) : backup incrémental, seuls les points horodatés depuis
+    (à rejouer par-dessus un backup complet — les suppressions ne sont pas
+    propagées).
     Prêt pour chiffrement SSSS + ipfs add + kind 30078.
     """
     r = _curl("GET", f"{QDRANT_URL}/collections")
-    cols = [c["name"] for c in r.get("result", {}).get("collections", [])]
+    cols = [c["name"] for c in r.get("result", {}).get("collections", [])
+            if not collections_filter or c["name"] in collections_filter]
     if not cols:
         return False
 
-    backup = {
+    if not vectors:
+        try:
+            backup = {
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "qdrant_url": QDRANT_URL,
+                "collections": {col: [pt for page in _scroll_pages(col, False) for pt in page]
+                                for col in cols},
+            }
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(backup, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"[memory_manager] ❌ backup : {e}", file=sys.stderr)
+            return False
+
+    since_ts = None
+    if since:
+        since_ts = _point_time({"timestamp": since})
+        if since_ts is None:
+            print(f"[memory_manager] ❌ --since invalide : {since}", file=sys.stderr)
+            return False
+    manifest = {
+        "format": BACKUP_FORMAT,
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "qdrant_url": QDRANT_URL,
-        "collections": {}
+        "embed_model": EMBED_MODEL,
+        "since": since,
+        "collections": {},
     }
-
-    for col in cols:
-        points: list = []
-        offset = None
-        while True:
-            url  = f"{QDRANT_URL}/collections/{col}/points/scroll"
-            body: dict = {"limit": 250, "with_payload": True, "with_vector": False}
-            if offset:
-                body["offset"] = offset
-            resp   = _curl("POST", url, body)
-            result = resp.get("result", {})
-            batch  = result.get("points", [])
-            points.extend(batch)
-            offset = result.get("next_page_offset")
-            if not offset:
-                break
-        backup["collections"][col] = points
-
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(backup, f, ensure_ascii=False)
+        with tempfile.TemporaryDirectory(prefix="qdrant_backup_") as workdir:
+            for col in cols:
+                manifest["collections"][col] = _export_collection(col, workdir, since_ts)
+                print(f"  {col}: {manifest['collections'][col]['count']} points exportés",
+                      file=sys.stderr)
+            with open(os.path.join(workdir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            tmp_out = output_path + ".part"
+            with tarfile.open(tmp_out, "w") as tar:
+                tar.add(os.path.join(workdir, "manifest.json"), arcname="manifest.json")
+                for col in cols:
+                    tar.add(os.path.join(workdir, f"{col}.npy"), arcname=f"{col}.npy")
+                    tar.add(os.path.join(workdir, f"{col}.jsonl"), arcname=f"{col}.jsonl")
+            os.replace(tmp_out, output_path)
         return True
-    except Exception:
+    except Exception as e:
+        print(f"[memory_manager] ❌ backup : {e}", file=sys.stderr)
         return False
 
 
 # ──────────────────────────── restore ────────────────────────────────────────
 
+def _restore_points(coll_name: str, points, reembed: bool) -> int:
+    """Upsert par lots de RESTORE_BATCH ; reembed=True : vecteurs recalculés
+    depuis payload["content"] (embed_many, par lots), points sans contenu
+    ignorés."""
+    ok, batch = 0, []
+
+    def flush():
+        nonlocal ok
+        if reembed:
+            vecs = embed_many([pt["payload"].get("content", "") for pt in batch])
+            ready = [dict(pt, vector=v) for pt, v in zip(batch, vecs) if v]
+        else:
+            ready = batch
+        for start in range(0, len(ready), RESTORE_BATCH):
+            chunk = ready[start:start + RESTORE_BATCH]
+            if _curl("PUT", f"{QDRANT_URL}/collections/{coll_name}/points", {"points": chunk}):
+                ok += len(chunk)
+        batch.clear()
+
+    for pt in points:
+        if reembed and not (pt.get("payload") or {}).get("content"):
+            continue
+        batch.append(pt)
+        if len(batch) >= RESTORE_BATCH:
+            flush()
+    if batch:
+        flush()
+    return ok
+
+
+def _iter_archive_points(tar, coll_name: str, dim: int):
+    """Points d'une collection de l'archive, lus en flux (.npy ligne à ligne
+    en parallèle du .jsonl)."""
+    vec_f = tar.extractfile(f"{coll_name}.npy")
+    meta_f = tar.extractfile(f"{coll_name}.jsonl")
+    magic = vec_f.read(10)
+    vec_f.read(int.from_bytes(magic[8:10], "little"))
+    row = struct.Struct(f"<{dim}f")
+    for line in meta_f:
+        rec = json.loads(line)
+        vec = list(row.unpack(vec_f.read(row.size))) if dim else []
+        yield {"id": rec["id"], "vector": rec.get("vector", vec),
+               "payload": rec.get("payload") or {}}
+
+
 def restore_collections(input_path: str,
                         collections_filter: list = None) -> dict:
     """
-    Restaure les collections depuis un backup payload-only (sans vecteurs).
-    Re-embedd chaque entrée via Ollama — indépendant du modèle utilisé lors du backup.
-    Retourne un dict {collection: {"total": N, "restored": M}}.
+    Restaure les collections depuis un backup.
+    Archive vectorielle : upsert massif par lots, AUCUN appel d'embedding —
+    sauf si le modèle enregistré diffère de EMBED_MODEL, ou si la collection
+    cible existe avec une autre dimension : ré-embedding (par lots) du
+    payload "content". Ancien JSON payload-only : ré-embedding par lots.
+    Retourne un dict {collection: {"total": N, "restored": M, "reembedded": bool}}.
     """
+    stats: dict = {}
+    if tarfile.is_tarfile(input_path):
+        with tarfile.open(input_path, "r") as tar:
+            manifest = json.load(tar.extractfile("manifest.json"))
+            if manifest.get("format") != BACKUP_FORMAT:
+                raise ValueError(f"format de backup inconnu : {manifest.get('format')}")
+            for coll_name, info in manifest.get("collections", {}).items():
+                if collections_filter and coll_name not in collections_filter:
+                    continue
+                dim = info.get("dim", 0)
+                existing = _collection_params(coll_name).get("size")
+                reembed = (info.get("model", manifest.get("embed_model")) != EMBED_MODEL
+                           or not dim or (existing not in (None, dim)))
+                if existing is None:
+                    size = VECTOR_SIZE if reembed else dim
+                    _curl("PUT", f"{QDRANT_URL}/collections/{coll_name}",
+                          {"vectors": {"size": size, "distance": info.get("distance", "Cosine")}})
+                ok = _restore_points(coll_name, _iter_archive_points(tar, coll_name, dim), reembed)
+                stats[coll_name] = {"total": info.get("count", 0), "restored": ok,
+                                    "reembedded": reembed}
+                print(f"  {coll_name}: {ok}/{info.get('count', 0)} points restaurés"
+                      f"{' (ré-embedés)' if reembed else ''}", file=sys.stderr)
+        return stats
+
     with open(input_path, encoding="utf-8") as f:
         backup = json.load(f)
-
-    stats: dict = {}
     for coll_name, points in backup.get("collections", {}).items():
         if collections_filter and coll_name not in collections_filter:
             continue
         ensure_collection(coll_name)
-        ok = 0
-        for point in points:
-            payload = point.get("payload", {})
-            content = payload.get("content", "")
-            if not content:
-                continue
-            vec = _embed(content)
-            if not vec:
-                continue
-            r = _curl("PUT", f"{QDRANT_URL}/collections/{coll_name}/points", {
-                "points": [{"id": point["id"], "vector": vec, "payload": payload}]
-            })
-            if r:
-                ok += 1
-        stats[coll_name] = {"total": len(points), "restored": ok}
+        ok = _restore_points(coll_name, ({"id": pt["id"], "payload": pt.get("payload") or {}}
+                                         for pt in points), reembed=True)
+        stats[coll_name] = {"total": len(points), "restored": ok, "reembedded": True}
         print(f"  {coll_name}: {ok}/{len(points)} points restaurés",
               file=sys.stderr)
     return stats
@@ -915,10 +1145,15 @@ if __name__ == "__main__":
     psh.add_argument("--skill", required=True)
 
     pbk = sub.add_parser("backup")
-    pbk.add_argument("--output", required=True)
+    pbk.add_argument("--output",      required=True)
+    pbk.add_argument("--since",       default=None,
+                     help="Backup incrémental : points horodatés depuis (ISO-8601)")
+    pbk.add_argument("--collections", nargs="*",  help="Filtrer sur ces collections")
+    pbk.add_argument("--payload-only", action="store_true",
+                     help="Ancien format JSON sans vecteurs (ré-embedding à la restauration)")
 
     prt = sub.add_parser("restore")
-    prt.add_argument("--input",       required=True, help="Fichier backup JSON")
+    prt.add_argument("--input",       required=True, help="Archive de backup (ou ancien JSON)")
     prt.add_argument("--collections", nargs="*",     help="Filtrer sur ces collections")
 
     psr = sub.add_parser("search-geo")
@@ -1004,7 +1239,9 @@ if __name__ == "__main__":
         print(skill_hash(args.skill))
 
     elif args.cmd == "backup":
-        ok = backup_collections(args.output)
+        ok = backup_collections(args.output, since=args.since,
+                                collections_filter=args.collections,
+                                vectors=not args.payload_only)
         sys.exit(0 if ok else 1)
 
     elif args.cmd == "restore":
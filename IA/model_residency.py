@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+model_residency.py — Résidence des modèles GPU (Ollama + ComfyUI) pour les
+générateurs et la vision BRO.
+
+Contexte (2026-10-18) : bro/media._call_generator (generate_image.sh,
+generate_video.sh, generate_music.sh) et les appels vision
+(describe_image.describe_image_from_ipfs, a_quoi_ca_sert._ollama_vision)
+payaient souvent un chargement à froid : un travail de 10 s en prenait 60
+ou plus. Pire, generate_image.sh / generate_video.sh appelaient /free après
+CHAQUE génération — deux #image à la suite rechargeaient Flux deux fois — et
+le modèle vision d'Ollama expirait (keep_alive par défaut, 5 min) ou se
+faisait évincer par ComfyUI juste avant le #inventaire suivant.
+
+Ici, un gestionnaire de résidence partagé par tous les processus :
+  - MODEL_FOR_KIND associe chaque type de travail (types bro_jobs :
+    media:image, badge, media:inventory... et appels directs : describe,
+    identify) à un (backend, modèle) ;
+  - begin(kind) avant le travail : chaud ou froid, keep_alive à transmettre
+    à Ollama (KEEP_ALIVE_SEC si un autre travail en file utilise le même
+    modèle) ; end(lease) après : le modèle reste résident si un travail en
+    file (bro_jobs.pending_kinds) en a besoin, sinon il est libéré — /free
+    pour ComfyUI, keep_alive 0 pour Ollama quand un travail ComfyUI attend
+    la VRAM ;
+  - prewarm() précharge le prochain modèle de la file (Ollama : POST
+    /api/generate sans prompt, avec keep_alive) ; le worker bro_jobs
+    l'appelle en arrière-plan dès qu'il démarre des travaux, le chargement
+    recouvre le téléchargement de l'image et les imports de l'enfant ;
+  - modèles résidents observés (Ollama /api/ps) ou suivis (ComfyUI n'expose
+    pas ses modèles chargés), compteurs par modèle : chargements à froid,
+    hits chauds, préchargements (utiles ou perdus), évictions, expirations,
+    libérations, durée moyenne chaud/froid — dans
+    ~/.zen/tmp/model_residency.json (flock + écriture atomique).
+
+ComfyUI n'a pas d'API de préchargement : « garder » y veut dire ne pas
+appeler /free (COMFYUI_FREE_VRAM=0 transmis aux générateurs). Le TTS
+(generate_speech.sh -> Orpheus, serveur dédié) n'est pas géré.
+
+Même principe que bro_jobs.py : un OPTIMISATEUR, jamais une dépendance
+dure. MODEL_RESIDENCY=0, module absent ou backend injoignable -> begin()
+retourne None et chaque appelant garde son comportement historique
+(générateurs qui libèrent la VRAM, keep_alive par défaut d'Ollama).
+
+MockBackend / MockGPU simulent une VRAM partagée sur CPU (tailles, temps de
+chargement, éviction LRU, expiration keep_alive) : `simulate` compare la
+politique de résidence à l'historique « /free après chaque travail » sans
+GPU.
+
+Usage :
+    python3 model_residency.py --stats             # compteurs par modèle
+    python3 model_residency.py status              # modèles résidents
+    python3 model_residency.py prewarm [TYPE...]   # précharge (défaut : file bro_jobs)
+    python3 model_residency.py free [ollama|comfyui]
+    python3 model_residency.py simulate [N] [GRAINE]   # backend mock, sans GPU
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import fcntl
+import random
+import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ENABLED        = os.environ.get("MODEL_RESIDENCY", "1") != "0"
+STATE_FILE     = os.path.expanduser("~/.zen/tmp/model_residency.json")
+COMFYUI_URL    = os.environ.get("COMFYUI_URL", "http://127.0.0.1:8188").rstrip("/")
+VISION_MODEL   = os.environ.get("BRO_VISION_MODEL", "llama3.2-vision:11b")
+KEEP_ALIVE_SEC = int(os.environ.get("MODEL_RESIDENCY_KEEP_SEC", "900"))
+LOAD_TIMEOUT   = 180       # chargement d'un modèle 11B depuis le disque
+PREWARM_COOLDOWN_SEC = 30  # pas deux préchargements du même modèle dans cet intervalle
+HISTORY = 50
+
+# type de travail -> (backend, modèle). Les workflows ComfyUI tiennent lieu
+# de nom de modèle : chacun charge son propre jeu de poids.
+MODEL_FOR_KIND = {
+    "image":     ("comfyui", "FluxImage"),
+    "badge":     ("comfyui", "FluxImage"),
+    "video":     ("comfyui", "video_wan2_2_5B_ti2v"),
+    "music":     ("comfyui", "audio_ace_step_1_t2m"),
+    "inventory": ("ollama", VISION_MODEL),
+    "describe":  ("ollama", VISION_MODEL),
+    "identify":  ("ollama", VISION_MODEL),
+}
+
+_COUNTERS = ("uses", "warm", "cold", "preloads", "preload_hits", "preload_wasted",
+             "evictions", "expirations", "unloads", "kept")
+
+
+def model_for(kind):
+    """(backend, modèle) d'un type de travail ("media:image" ou "image"),
+    ou None s'il ne dépend d'aucun modèle géré."""
+    if not kind:
+        return None
+    return MODEL_FOR_KIND.get(kind.split(":", 1)[-1])
+
+
+def _norm(model):
+    return model if ":" in model else f"{model}:latest"
+
+
+def _parse_ts(value):
+    """expires_at d'Ollama ("2026-10-18T14:38:31.837531234+02:00") -> epoch."""
+    if not value:
+        return None
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+# ─────────────────────────────── backends ─────────────────────────────────────
+
+class OllamaBackend:
+    """Modèles observés via /api/ps, chargés/déchargés via keep_alive."""
+
+    name = "ollama"
+    preload = True
+
+    def __init__(self, url=None):
+        import vector_store
+        self._vs = vector_store
+        self.url = (url or vector_store.OLLAMA_URL).rstrip("/")
+
+    def loaded(self):
+        """{modèle: expiration epoch} ; lève si Ollama est injoignable."""
+        status, body = self._vs.request("GET", f"{self.url}/api/ps", timeout=5)
+        if status >= 400:
+            raise OSError(f"HTTP {status}")
+        models = json.loads(body or b"{}").get("models") or []
+        return {_norm(m.get("name") or m.get("model", "")): _parse_ts(m.get("expires_at"))
+                for m in models}
+
+    def load(self, model, keep_alive_sec):
+        status, _ = self._vs.request("POST", f"{self.url}/api/generate",
+                                     {"model": model, "keep_alive": f"{int(keep_alive_sec)}s"},
+                                     timeout=LOAD_TIMEOUT)
+        return status < 400
+
+    def unload(self, model):
+        status, _ = self._vs.request("POST", f"{self.url}/api/generate",
+                                     {"model": model, "keep_alive": 0}, timeout=30)
+        return status < 400
+
+
+class ComfyUIBackend:
+    """Pas d'introspection ni de préchargement : la résidence est suivie par
+    le gestionnaire, /free décharge tout."""
+
+    name = "comfyui"
+    preload = False
+
+    def __init__(self, url=COMFYUI_URL):
+        import vector_store
+        self._vs = vector_store
+        self.url = url.rstrip("/")
+
+    def loaded(self):
+        return None
+
+    def load(self, model, keep_alive_sec):
+        return False
+
+    def unload(self, model=None):
+        status, _ = self._vs.request("POST", f"{self.url}/free",
+                                     {"unload_models": True, "free_memory": True}, timeout=30)
+        return status < 400
+
+
+class MockGPU:
+    """VRAM simulée partagée par plusieurs MockBackend : capacité en Mo,
+    éviction LRU, expiration keep_alive, horloge virtuelle (aucune attente
+    réelle : un chargement avance l'horloge de son temps de chargement)."""
+
+    def __init__(self, capacity_mb=16000):
+        self.capacity_mb = capacity_mb
+        self.now = 0.0
+        self.resident = OrderedDict()   # (backend, modèle) -> [taille, expiration|None]
+        self.loads = 0
+        self.evictions = 0
+        self.load_sec = 0.0
+
+    def time(self):
+        return self.now
+
+    def expire(self):
+        for key, (_, expires) in list(self.resident.items()):
+            if expires is not None and expires <= self.now:
+                del self.resident[key]
+
+    def load(self, key, size_mb, load_sec, keep_alive_sec):
+        """Retourne True si le modèle était déjà résident."""
+        self.expire()
+        expires = self.now + keep_alive_sec if keep_alive_sec else None
+        if key in self.resident:
+            self.resident[key][1] = expires
+            self.resident.move_to_end(key)
+            return True
+        while self.resident and sum(s for s, _ in self.resident.values()) + size_mb > self.capacity_mb:
+            self.resident.popitem(last=False)
+            self.evictions += 1
+        self.now += load_sec
+        self.load_sec += load_sec
+        self.loads += 1
+        self.resident[key] = [size_mb, expires]
+        return False
+
+
+class MockBackend:
+    """Backend CPU-only pour tests et simulation : même interface que
+    OllamaBackend (preload=True) ou ComfyUIBackend (preload=False)."""
+
+    def __init__(self, name, gpu, sizes=None, load_sec=None, preload=True,
+                 default_keep_sec=300):
+        self.name = name
+        self.gpu = gpu
+        self.sizes = sizes or {}
+        self.load_secs = load_sec or {}
+        self.preload = preload
+        self.default_keep_sec = default_keep_sec if preload else None
+
+    def loaded(self):
+        if not self.preload:
+            return None
+        self.gpu.expire()
+        return {m: exp for (b, m), (_, exp) in self.gpu.resident.items() if b == self.name}
+
+    def _load(self, model, keep_alive_sec):
+        keep = keep_alive_sec if keep_alive_sec is not None else self.default_keep_sec
+        return self.gpu.load((self.name, model), self.sizes.get(model, 8000),
+                             self.load_secs.get(model, 30.0), keep)
+
+    def load(self, model, keep_alive_sec):
+        if not self.preload:
+            return False
+        self._load(model, keep_alive_sec)
+        return True
+
+    def run(self, model, keep_alive_sec=None):
+        """Exécute un travail simulé : True s'il a trouvé le modèle chaud."""
+        return self._load(model, keep_alive_sec)
+
+    def unload(self, model=None):
+        for key in [k for k in self.gpu.resident if k[0] == self.name and model in (None, k[1])]:
+            del self.gpu.resident[key]
+        return True
+
+
+# ─────────────────────────────── gestionnaire ─────────────────────────────────
+
+def _empty_state():
+    return {"resident": {}, "models": {}, "history": [], "prewarm": {}, "since": time.time()}
+
+
+class ResidencyManager:
+    """Décisions de résidence et compteurs. Sans état en mémoire : chaque
+    opération relit et réécrit STATE_FILE sous verrou (begin/end ont lieu
+    dans des processus différents) ; state_file=None -> état en mémoire
+    (simulation)."""
+
+    def __init__(self, backends=None, state_file=STATE_FILE, pending=None, clock=time.time):
+        self._backends = backends
+        self.state_file = state_file
+        self._pending = pending
+        self.clock = clock
+        self._mem = _empty_state()
+
+    @property
+    def backends(self):
+        if self._backends is None:
+            self._backends = {"ollama": OllamaBackend(), "comfyui": ComfyUIBackend()}
+        return self._backends
+
+    # ── état partagé ─────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _state(self):
+        if self.state_file is None:
+            yield self._mem
+            return
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(f"{self.state_file}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.state_file, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = _empty_state()
+            yield state
+            tmp = f"{self.state_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_file)
+
+    def _count(self, state, backend, model, name, n=1):
+        entry = state["models"].setdefault(f"{backend}:{model}", {})
+        entry[name] = entry.get(name, 0) + n
+
+    def _observe(self, state, backend):
+        """Aligne les résidents suivis sur ce que le backend rapporte ; un
+        modèle disparu avant son expiration a été évincé."""
+        tracked = state["resident"].setdefault(backend, {})
+        try:
+            actual = self.backends[backend].loaded()
+        except Exception:
+            return tracked
+        if actual is None:
+            return tracked
+        now = self.clock()
+        for model in [m for m in tracked if m not in actual]:
+            info = tracked.pop(model)
+            expires = info.get("expires")
+            self._count(state, backend, model,
+                        "expirations" if expires is not None and now >= expires - 1 else "evictions")
+            if info.get("preloaded"):
+                self._count(state, backend, model, "preload_wasted")
+        for model, expires in actual.items():
+            tracked.setdefault(model, {"since": now, "preloaded": False})["expires"] = expires
+        return tracked
+
+    def pending(self):
+        """[(type, état)] des autres travaux actifs (en cours d'abord)."""
+        if self._pending is not None:
+            return self._pending()
+        try:
+            import bro_jobs
+            return bro_jobs.pending_kinds()
+        except Exception:
+            return []
+
+    def _needed(self, pending):
+        return [t for t in (model_for(kind) for kind, _ in pending) if t]
+
+    def _release(self, state, backend, model):
+        try:
+            ok = self.backends[backend].unload(model)
+        except Exception:
+            ok = False
+        if ok:
+            resident = state["resident"].setdefault(backend, {})
+            for m in ([model] if backend != "comfyui" else list(resident)):
+                info = resident.pop(m, None)
+                if info is not None:
+                    self._count(state, backend, m, "unloads")
+                    if info.get("preloaded"):
+                        self._count(state, backend, m, "preload_wasted")
+        return ok
+
+    # ── cycle d'un travail ───────────────────────────────────────────────────
+
+    def begin(self, kind, model=None):
+        """Avant un travail : lease {"kind", "backend", "model", "warm",
+        "keep_alive"} ou None (type non géré). `model` remplace le modèle
+        par défaut du type (describe_image.py -m ...)."""
+        target = model_for(kind)
+        if not target:
+            return None
+        backend, model = target[0], model or target[1]
+        model = _norm(model) if backend == "ollama" else model
+        needed = self._needed(self.pending())
+        now = self.clock()
+        with self._state() as state:
+            resident = self._observe(state, backend)
+            if backend == "comfyui":
+                # ComfyUI remplace les poids d'un autre workflow : éviction.
+                for other in [m for m in resident if m != model]:
+                    info = resident.pop(other)
+                    self._count(state, backend, other, "evictions")
+                    if info.get("preloaded"):
+                        self._count(state, backend, other, "preload_wasted")
+            info = resident.get(model)
+            warm = info is not None
+            self._count(state, backend, model, "uses")
+            self._count(state, backend, model, "warm" if warm else "cold")
+            if warm and info.get("preloaded"):
+                self._count(state, backend, model, "preload_hits")
+            # VRAM partagée : un modèle géré d'un autre backend dont aucun
+            # travail en file n'a besoin cède la place avant le chargement.
+            # Observé d'abord : keep_alive 0 sur un modèle Ollama déjà
+            # expiré le rechargerait pour rien.
+            for other_backend in self.backends:
+                if other_backend == backend:
+                    continue
+                for other in list(self._observe(state, other_backend)):
+                    if not any(b == other_backend and _same(b, m, other) for b, m in needed) \
+                            and _managed(other_backend, other):
+                        self._release(state, other_backend, other)
+                        if other_backend == "comfyui":
+                            break   # /free décharge tout d'un coup
+            keep = KEEP_ALIVE_SEC if any(b == backend and _same(b, m, model)
+                                         for b, m in needed) else None
+            resident[model] = {"since": info["since"] if warm else now, "preloaded": False,
+                               "expires": now + keep if keep else None}
+            state["history"] = (state["history"] + [[now, kind]])[-HISTORY:]
+        return {"kind": kind, "backend": backend, "model": model, "warm": warm,
+                "keep_alive": f"{keep}s" if keep else None, "t0": time.monotonic()}
+
+    def end(self, lease, ok=True):
+        """Après un travail : True si le modèle reste résident pour un
+        travail en file, False s'il a été libéré."""
+        if not lease:
+            return False
+        backend, model = lease["backend"], lease["model"]
+        elapsed = time.monotonic() - lease["t0"]
+        needed = self._needed(self.pending())
+        with self._state() as state:
+            phase = "warm" if lease["warm"] else "cold"
+            self._count(state, backend, model, f"{phase}_sec", round(elapsed, 3))
+            if not ok:
+                self._count(state, backend, model, "failures")
+            keep = any(b == backend and _same(b, m, model) for b, m in needed)
+            other_gpu_job = any(b != backend for b, _ in needed)
+            if keep:
+                self._count(state, backend, model, "kept")
+            elif backend == "comfyui" or other_gpu_job:
+                # ComfyUI : /free comme avant (rien ne l'attend) ; Ollama :
+                # déchargé tout de suite si un travail ComfyUI attend la VRAM,
+                # sinon laissé à son keep_alive.
+                self._release(state, backend, model)
+        return keep
+
+    def prewarm(self, kinds=None):
+        """Précharge le premier modèle de la file qui n'est pas résident ;
+        retourne "backend:modèle" préchargé, ou None. Ne charge rien si un
+        travail en cours occupe un autre backend (VRAM partagée)."""
+        pending = [(k, "queued") for k in kinds] if kinds is not None else self.pending()
+        running = {t[0] for t in (model_for(k) for k, s in pending if s == "running") if t}
+        now = self.clock()
+        for kind, _ in pending:
+            target = model_for(kind)
+            if not target:
+                continue
+            backend, model = target
+            impl = self.backends[backend]
+            if not impl.preload or running - {backend}:
+                continue
+            model = _norm(model) if backend == "ollama" else model
+            with self._state() as state:
+                resident = self._observe(state, backend)
+                key = f"{backend}:{model}"
+                if model in resident or now - state["prewarm"].get(key, 0) < PREWARM_COOLDOWN_SEC:
+                    return None
+                state["prewarm"][key] = now
+            try:
+                loaded = impl.load(model, KEEP_ALIVE_SEC)
+            except Exception:
+                loaded = False
+            if not loaded:
+                return None
+            with self._state() as state:
+                self._count(state, backend, model, "preloads")
+                state["resident"].setdefault(backend, {}).setdefault(model, {
+                    "since": self.clock(), "preloaded": True,
+                    "expires": self.clock() + KEEP_ALIVE_SEC})
+            return key
+        return None
+
+    def free(self, backend=None):
+        """Libère les modèles gérés (tous backends, ou un seul)."""
+        freed = []
+        with self._state() as state:
+            for name in ([backend] if backend else list(self.backends)):
+                resident = self._observe(state, name)
+                models = [m for m in resident if _managed(name, m)] or ([None] if name == "comfyui" else [])
+                for model in models:
+                    if self._release(state, name, model):
+                        freed.append(f"{name}:{model or '*'}")
+        return freed
+
+    def status(self):
+        with self._state() as state:
+            for name in self.backends:
+                self._observe(state, name)
+            return {b: dict(models) for b, models in state["resident"].items()}
+
+    def stats(self):
+        with self._state() as state:
+            models = {}
+            totals = {c: 0 for c in _COUNTERS}
+            for key, counters in state["models"].items():
+                out = {c: counters.get(c, 0) for c in _COUNTERS}
+                for c in _COUNTERS:
+                    totals[c] += out[c]
+                for phase in ("warm", "cold"):
+                    if out[phase]:
+                        out[f"avg_{phase}_sec"] = round(counters.get(f"{phase}_sec", 0) / out[phase], 1)
+                if out["uses"]:
+                    out["warm_rate"] = round(out["warm"] / out["uses"], 2)
+                models[key] = out
+            return {"enabled": ENABLED, "since": state.get("since"),
+                    "resident": {b: sorted(m) for b, m in state["resident"].items() if m},
+                    "totals": totals, "models": models}
+
+
+def _same(backend, a, b):
+    return _norm(a) == _norm(b) if backend == "ollama" else a == b
+
+
+def _managed(backend, model):
+    """Seuls les modèles de MODEL_FOR_KIND sont libérés d'office : les
+    modèles de conversation d'Ollama ne sont jamais touchés."""
+    return any(b == backend and _same(b, m, model) for b, m in MODEL_FOR_KIND.values())
+
+
+# ─────────────────────────────── API module ───────────────────────────────────
+
+_MANAGER = ResidencyManager()
+
+
+def begin(kind, model=None):
+    """Lease du travail, ou None (désactivé, type non géré, panne) : l'appelant
+    garde alors son comportement historique."""
+    if not ENABLED:
+        return None
+    try:
+        return _MANAGER.begin(kind, model)
+    except Exception as e:
+        print(f"[model_residency] ⚠️ begin({kind}) : {e}", file=sys.stderr)
+        return None
+
+
+def end(lease, ok=True):
+    if not lease:
+        return False
+    try:
+        return _MANAGER.end(lease, ok)
+    except Exception as e:
+        print(f"[model_residency] ⚠️ end({lease.get('kind')}) : {e}", file=sys.stderr)
+        return False
+
+
+def chat_options(lease):
+    """Arguments supplémentaires pour ollama.chat / ollama.generate."""
+    return {"keep_alive": lease["keep_alive"]} if lease and lease.get("keep_alive") else {}
+
+
+def prewarm(kinds=None, background=False):
+    """Précharge le prochain modèle ; background=True -> sous-processus
+    détaché (le worker bro_jobs n'attend jamais un chargement)."""
+    if not ENABLED:
+        return None
+    if background:
+        try:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), "prewarm", *(kinds or [])],
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError:
+            pass
+        return None
+    try:
+        return _MANAGER.prewarm(kinds)
+    except Exception as e:
+        print(f"[model_residency] ⚠️ prewarm : {e}", file=sys.stderr)
+        return None
+
+
+def wants_prewarm(kinds):
+    """Vrai si l'un des types relève d'un backend préchargeable — filtre
+    bon marché avant de lancer prewarm(background=True)."""
+    return any((model_for(k) or ("",))[0] == "ollama" for k in kinds)
+
+
+def stats():
+    try:
+        return _MANAGER.stats()
+    except Exception as e:
+        return {"enabled": ENABLED, "error": str(e)}
+
+
+# ─────────────────────────────── simulation ───────────────────────────────────
+
+_SIM_MIX = [("media:image", 5), ("media:inventory", 4), ("describe", 3),
+            ("media:music", 1), ("badge", 1), ("media:video", 1)]
+_SIM_SIZES = {"FluxImage": 12000, "video_wan2_2_5B_ti2v": 14000, "audio_ace_step_1_t2m": 7000,
+              _norm(VISION_MODEL): 8000}
+_SIM_LOAD = {"FluxImage": 45.0, "video_wan2_2_5B_ti2v": 60.0, "audio_ace_step_1_t2m": 25.0,
+             _norm(VISION_MODEL): 20.0}
+_SIM_WORK = {"comfyui": 12.0, "ollama": 6.0}
+
+
+def simulate(n=200, seed=1, capacity_mb=24000):
+    """Rejoue la même suite de travaux (rafales, arrivées exponentielles)
+    avec la politique de résidence puis avec l'historique « /free après
+    chaque génération, keep_alive par défaut ». Horloge virtuelle."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*_SIM_MIX)
+    jobs, t = [], 0.0
+    while len(jobs) < n:
+        t += rng.expovariate(1 / 120)
+        burst = rng.choice(kinds) if rng.random() < 0.4 else None
+        for _ in range(rng.randint(2, 4) if burst else 1):
+            jobs.append((t, burst or rng.choices(kinds, weights)[0]))
+    jobs = jobs[:n]
+    results = {}
+    for policy in ("historique", "résidence"):
+        gpu = MockGPU(capacity_mb)
+        backends = {
+            "ollama": MockBackend("ollama", gpu, _SIM_SIZES, _SIM_LOAD, preload=True),
+            "comfyui": MockBackend("comfyui", gpu, _SIM_SIZES, _SIM_LOAD, preload=False),
+        }
+        queue = []
+        mgr = ResidencyManager(backends, state_file=None, clock=gpu.time,
+                               pending=lambda: [(k, "queued") for k in queue])
+        i, latency = 0, []
+        while i < len(jobs):
+            gpu.now = max(gpu.now, jobs[i][0])
+            arrived, kind = jobs[i]
+            queue[:] = [k for a, k in jobs[i + 1:] if a <= gpu.now]
+            backend, model = model_for(kind)
+            model = _norm(model) if backend == "ollama" else model
+            if policy == "résidence":
+                lease = mgr.begin(kind)
+                backends[backend].run(model, KEEP_ALIVE_SEC if lease["keep_alive"] else None)
+                gpu.now += _SIM_WORK[backend]
+                mgr.end(lease)
+                mgr.prewarm()
+            else:
+                backends[backend].run(model)
+                gpu.now += _SIM_WORK[backend]
+                if backend == "comfyui":
+                    backends["comfyui"].unload()
+            latency.append(gpu.now - arrived)
+            i += 1
+        results[policy] = {"jobs": len(jobs), "loads": gpu.loads, "evictions": gpu.evictions,
+                           "load_sec": round(gpu.load_sec),
+                           "avg_latency_sec": round(sum(latency) / len(latency), 1),
+                           "stats": mgr.stats()["totals"] if policy == "résidence" else None}
+    return results
+
+
+# ─────────────────────────────── CLI ──────────────────────────────────────────
+
+def main(argv):
+    if "--stats" in argv:
+        print(json.dumps(stats(), indent=2, ensure_ascii=False))
+        return 0
+    cmd = argv[0] if argv else ""
+    if cmd == "status":
+        print(json.dumps(_MANAGER.status(), indent=2, ensure_ascii=False))
+        return 0
+    if cmd == "prewarm":
+        key = prewarm(argv[1:] or None)
+        print(key or "rien à précharger")
+        return 0
+    if cmd == "free":
+        for key in _MANAGER.free(argv[1] if len(argv) > 1 else None):
+            print(f"libéré : {key}")
+        return 0
+    if cmd == "simulate":
+        n = int(argv[1]) if len(argv) > 1 else 200
+        seed = int(argv[2]) if len(argv) > 2 else 1
+        print(json.dumps(simulate(n, seed), indent=2, ensure_ascii=False))
+        return 0
+    print(__doc__.split("Usage :", 1)[1].rstrip(), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
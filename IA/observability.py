@@ -16,13 +16,47 @@ usages :
 Format : ~/.zen/flashmem/<user_id>/observability/activity.jsonl, une ligne
 JSON par évènement, ring buffer des ACTIVITY_RING_LIMIT dernières lignes
 (cohérent avec les limites documentées dans SLOT_MEMORY_README.md).
+
+Stockage (2026-10-18) : chaque évènement relisait puis réécrivait TOUT le
+JSONL (_trim_ring_buffer), et recent_events()/digest() le reparsaient à
+chaque appel. La source de vérité est désormais un anneau d'enregistrements
+préalloué, activity.ring, à côté du JSONL :
+  - en-tête (magic, taille d'enregistrement, capacité, curseur d'écriture) ;
+  - ACTIVITY_RING_LIMIT enregistrements de taille fixe (longueur + JSON) —
+    un ajout écrit UN slot en place, O(1), sous flock ;
+  - une table d'agrégats (jour, outil, succès) → compteur + histogramme de
+    latence en seaux logarithmiques : digest() donne p50/p95 par outil sans
+    relire un seul évènement, sur toute la période (plus seulement les 200
+    derniers).
+Lectures par mmap. Le JSONL reste écrit en append (tail -f, 20h12.process.sh,
+log_file_watch.sh, bro_log_event côté bash) ; il n'est plus tronqué qu'une
+fois JSONL_TRIM_BYTES dépassés, aux ACTIVITY_RING_LIMIT dernières lignes.
 """
 
 import os
 import json
+import math
+import mmap
 import time
+import fcntl
+import struct
 
 ACTIVITY_RING_LIMIT = 200
+RECORD_SIZE = 1024                  # octets par enregistrement (longueur u16 + JSON)
+AGG_SLOTS = 512                     # couples (jour, outil, succès) agrégés
+JSONL_TRIM_BYTES = 128 * 1024       # export JSONL tronqué au-delà (amorti, plus à chaque ligne)
+
+_MAGIC = b"OBSR0001"
+_HEADER = struct.Struct("<8sIIQI")  # magic, record_size, capacity, cursor, agg_slots
+_HDR_LEN = 64
+_CURSOR_OFF = 16
+_LEN = struct.Struct("<H")
+# Seaux de latence : seau i = [2^(i/4), 2^((i+1)/4)[ ms, i ∈ [0, 80[ (1 ms → 17 min,
+# ±9 % d'erreur sur un percentile)
+_BUCKETS = 80
+_AGG_KEY = struct.Struct("<IB47s")  # jour AAAAMMJJ, succès, outil (utf-8, tronqué)
+_AGG_VAL = struct.Struct(f"<II{_BUCKETS}I")   # évènements, dont avec latence, seaux
+_AGG_SIZE = _AGG_KEY.size + _AGG_VAL.size
 
 
 def _activity_path(user_id: str) -> str:
@@ -45,6 +79,224 @@ def _node_activity_path() -> str:
     return os.path.expanduser(f"~/.zen/tmp/{_ipfs_node_id()}/observability/node-activity.jsonl")
 
 
+# ── Anneau d'enregistrements ─────────────────────────────────────────────────
+
+def _ring_path(jsonl_path: str) -> str:
+    return jsonl_path[:-len(".jsonl")] + ".ring"
+
+
+def _ring_size() -> int:
+    return _HDR_LEN + ACTIVITY_RING_LIMIT * RECORD_SIZE + AGG_SLOTS * _AGG_SIZE
+
+
+def _ring_open(jsonl_path: str, create: bool):
+    """(fichier, mmap) de l'anneau, créé au besoin (amorcé avec les dernières
+    lignes du JSONL existant) ; None si absent et create=False."""
+    path = _ring_path(jsonl_path)
+    if not os.path.isfile(path):
+        if not create:
+            return None
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        f = os.fdopen(fd, "r+b")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        if os.fstat(f.fileno()).st_size == 0:       # personne ne l'a initialisé entre-temps
+            f.write(_HEADER.pack(_MAGIC, RECORD_SIZE, ACTIVITY_RING_LIMIT, 0, AGG_SLOTS)
+                    .ljust(_HDR_LEN, b"\0"))
+            f.truncate(_ring_size())
+            f.flush()
+            mm = mmap.mmap(f.fileno(), 0)
+            for event in _read_jsonl(jsonl_path, ACTIVITY_RING_LIMIT):
+                _ring_append_locked(mm, event)
+        else:
+            mm = mmap.mmap(f.fileno(), 0)
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f = open(path, "r+b")
+        mm = mmap.mmap(f.fileno(), 0)
+    magic, rsize, cap, _cursor, slots = _HEADER.unpack_from(mm, 0)
+    if magic != _MAGIC or len(mm) != _HDR_LEN + cap * rsize + slots * _AGG_SIZE:
+        mm.close()
+        f.close()
+        raise ValueError(f"anneau d'observabilité invalide : {path}")
+    return f, mm
+
+
+def _encode_record(event: dict) -> bytes:
+    raw = json.dumps(event, ensure_ascii=False).encode("utf-8")
+    if len(raw) > RECORD_SIZE - _LEN.size:
+        # Champs "extra" trop volumineux : seul le schéma commun est gardé
+        core = {k: event[k] for k in ("timestamp", "tool", "script", "category", "action",
+                                      "success", "latency_ms") if k in event}
+        core["action"] = str(core.get("action", ""))[:200]
+        core["truncated"] = True
+        raw = json.dumps(core, ensure_ascii=False).encode("utf-8")[:RECORD_SIZE - _LEN.size]
+    return _LEN.pack(len(raw)) + raw
+
+
+def _bucket(latency_ms: float) -> int:
+    if latency_ms is None or latency_ms < 1:
+        return 0
+    return min(_BUCKETS - 1, int(4 * math.log2(latency_ms)))
+
+
+def _agg_key(event: dict) -> bytes:
+    day = int(event.get("timestamp", "")[:10].replace("-", "") or 0)
+    tool = str(event.get("tool") or event.get("script") or "?").encode("utf-8")[:47]
+    return _AGG_KEY.pack(day, 1 if event.get("success") else 0, tool)
+
+
+def _agg_slot(mm, key: bytes) -> int:
+    """Offset du slot d'agrégat de `key` — créé dans un slot libre, ou à la
+    place du jour le plus ancien si la table est pleine."""
+    base = _HDR_LEN + ACTIVITY_RING_LIMIT * RECORD_SIZE
+    end = base + AGG_SLOTS * _AGG_SIZE
+    for needle in (key, b"\0" * _AGG_KEY.size):
+        pos = mm.find(needle, base, end)
+        while pos != -1 and (pos - base) % _AGG_SIZE:
+            pos = mm.find(needle, pos + 1, end)
+        if pos != -1:
+            if needle is not key:
+                mm[pos:pos + _AGG_SIZE] = key + b"\0" * _AGG_VAL.size
+            return pos
+    oldest = min(range(AGG_SLOTS), key=lambda i: _AGG_KEY.unpack_from(mm, base + i * _AGG_SIZE)[0])
+    pos = base + oldest * _AGG_SIZE
+    mm[pos:pos + _AGG_SIZE] = key + b"\0" * _AGG_VAL.size
+    return pos
+
+
+def _ring_append_locked(mm, event: dict) -> None:
+    cursor = struct.unpack_from("<Q", mm, _CURSOR_OFF)[0]
+    off = _HDR_LEN + (cursor % ACTIVITY_RING_LIMIT) * RECORD_SIZE
+    rec = _encode_record(event)
+    mm[off:off + len(rec)] = rec
+    struct.pack_into("<Q", mm, _CURSOR_OFF, cursor + 1)
+
+    pos = _agg_slot(mm, _agg_key(event)) + _AGG_KEY.size
+    values = list(_AGG_VAL.unpack_from(mm, pos))
+    values[0] += 1
+    if event.get("latency_ms") is not None:
+        values[1] += 1
+        values[2 + _bucket(event["latency_ms"])] += 1
+    _AGG_VAL.pack_into(mm, pos, *values)
+
+
+def _append_event(jsonl_path: str, event: dict) -> None:
+    """Écrit l'évènement dans l'anneau (O(1)) et en append dans le JSONL."""
+    os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
+    try:
+        f, mm = _ring_open(jsonl_path, create=True)
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            _ring_append_locked(mm, event)
+        finally:
+            mm.close()
+            f.close()
+    except Exception:
+        pass
+    with open(jsonl_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        oversized = f.tell() > JSONL_TRIM_BYTES
+    if oversized:
+        _trim_ring_buffer(jsonl_path, ACTIVITY_RING_LIMIT)
+
+
+def _ring_events(jsonl_path: str, limit: int):
+    """Derniers évènements de l'anneau (ordre chronologique), ou None s'il
+    n'existe pas encore."""
+    opened = _ring_open(jsonl_path, create=False)
+    if opened is None:
+        return None
+    f, mm = opened
+    try:
+        fcntl.flock(f, fcntl.LOCK_SH)
+        cursor = struct.unpack_from("<Q", mm, _CURSOR_OFF)[0]
+        n = min(limit, cursor, ACTIVITY_RING_LIMIT)
+        events = []
+        for seq in range(cursor - n, cursor):
+            off = _HDR_LEN + (seq % ACTIVITY_RING_LIMIT) * RECORD_SIZE
+            length = _LEN.unpack_from(mm, off)[0]
+            try:
+                events.append(json.loads(mm[off + _LEN.size:off + _LEN.size + length]))
+            except Exception:
+                continue
+        return events
+    finally:
+        mm.close()
+        f.close()
+
+
+def _percentile_ms(buckets: list, total: int, q: float) -> float:
+    """Estimation par seau logarithmique (milieu géométrique du seau)."""
+    rank, seen = q * total, 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if n and seen >= rank:
+            return 2 ** ((i + 0.5) / 4) if i else 1.0
+    return 0.0
+
+
+def _whole_days(since_ts: str = None, until_ts: str = None) -> bool:
+    """Période sans partie horaire ("AAAA-MM-JJ" ou absente) : la seule que
+    la table d'agrégats, tenue par jour, sait servir exactement."""
+    return all(ts is None or len(ts) <= 10 for ts in (since_ts, until_ts))
+
+
+def _in_window(events: list, since_ts: str = None, until_ts: str = None) -> list:
+    if since_ts:
+        events = [e for e in events if e.get("timestamp", "") >= since_ts]
+    if until_ts:
+        events = [e for e in events if e.get("timestamp", "") <= until_ts]
+    return events
+
+
+def latency_stats(user_id: str, since_ts: str = None, until_ts: str = None,
+                  limit: int = ACTIVITY_RING_LIMIT) -> dict:
+    """{(outil, succès): {"count", "p50_ms", "p95_ms"}}. Période en jours
+    entiers (bornes "AAAA-MM-JJ" incluses) : table d'agrégats, sur toute
+    l'histoire. Bornes horodatées : filtrage exact des `limit` derniers
+    enregistrements de l'anneau — jamais d'évènement hors période."""
+    path = _activity_path(user_id)
+    merged = {}
+    if not _whole_days(since_ts, until_ts):
+        for e in _in_window(_ring_events(path, limit) or [], since_ts, until_ts):
+            key = (str(e.get("tool") or e.get("script") or "?"), bool(e.get("success")))
+            acc = merged.setdefault(key, [0, 0] + [0] * _BUCKETS)
+            acc[0] += 1
+            if e.get("latency_ms") is not None:
+                acc[1] += 1
+                acc[2 + _bucket(e["latency_ms"])] += 1
+        return _stats_from(merged)
+    opened = _ring_open(path, create=False)
+    if opened is None:
+        return {}
+    lo = int(since_ts.replace("-", "")) if since_ts else 0
+    hi = int(until_ts.replace("-", "")) if until_ts else 99999999
+    f, mm = opened
+    try:
+        base = _HDR_LEN + ACTIVITY_RING_LIMIT * RECORD_SIZE
+        for i in range(AGG_SLOTS):
+            pos = base + i * _AGG_SIZE
+            day, success, tool = _AGG_KEY.unpack_from(mm, pos)
+            if not day or not lo <= day <= hi:
+                continue
+            values = _AGG_VAL.unpack_from(mm, pos + _AGG_KEY.size)
+            key = (tool.rstrip(b"\0").decode("utf-8", errors="replace"), bool(success))
+            acc = merged.setdefault(key, [0, 0] + [0] * _BUCKETS)
+            for j, v in enumerate(values):
+                acc[j] += v
+    finally:
+        mm.close()
+        f.close()
+    return _stats_from(merged)
+
+
+def _stats_from(merged: dict) -> dict:
+    return {key: {"count": acc[0],
+                  "p50_ms": _percentile_ms(acc[2:], acc[1], 0.50) if acc[1] else None,
+                  "p95_ms": _percentile_ms(acc[2:], acc[1], 0.95) if acc[1] else None}
+            for key, acc in merged.items()}
+
+
 def log_node_event(script: str, action: str, success: bool, category: str = None,
                     latency_ms: float = None, extra: dict = None) -> None:
     """Pendant STATION/NODE de log_event() — même fichier que
@@ -71,9 +323,7 @@ def log_node_event(script: str, action: str, success: bool, category: str = None
             event["latency_ms"] = round(latency_ms, 1)
         if extra:
             event.update(extra)
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
-        _trim_ring_buffer(path, ACTIVITY_RING_LIMIT)
+        _append_event(path, event)
     except Exception:
         pass
 
@@ -97,9 +347,7 @@ def log_event(user_id: str, tool: str, action: str, success: bool,
             event["latency_ms"] = round(latency_ms, 1)
         if extra:
             event.update(extra)
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
-        _trim_ring_buffer(path, ACTIVITY_RING_LIMIT)
+        _append_event(path, event)
     except Exception:
         pass
 
@@ -115,10 +363,7 @@ def _trim_ring_buffer(path: str, limit: int) -> None:
         pass
 
 
-def recent_events(user_id: str, limit: int = ACTIVITY_RING_LIMIT) -> list:
-    """Derniers évènements structurés — utilisé par memory_manager.reve_compress_slot
-    et par un futur résumé côté 12345.json."""
-    path = _activity_path(user_id)
+def _read_jsonl(path: str, limit: int) -> list:
     if not os.path.isfile(path):
         return []
     try:
@@ -135,17 +380,48 @@ def recent_events(user_id: str, limit: int = ACTIVITY_RING_LIMIT) -> list:
     return events
 
 
+def recent_events(user_id: str, limit: int = ACTIVITY_RING_LIMIT) -> list:
+    """Derniers évènements structurés — utilisé par memory_manager.reve_compress_slot
+    et par un futur résumé côté 12345.json. Lus dans l'anneau (mmap) ; repli
+    sur le JSONL pour un compte sans anneau (historique antérieur)."""
+    path = _activity_path(user_id)
+    try:
+        events = _ring_events(path, limit)
+        if events is not None:
+            return events
+    except Exception:
+        pass
+    return _read_jsonl(path, limit)
+
+
 def digest(user_id: str, since_ts: str = None, until_ts: str = None,
            limit: int = ACTIVITY_RING_LIMIT) -> str:
     """Résumé compact « outil : Nx (réussi/échoué) » des évènements de la
     période [since_ts, until_ts] (comparaison lexicographique ISO-8601, donc
     triable directement) — alimente le prompt de compression RÊVE sans le
-    noyer sous des lignes JSON brutes."""
-    events = recent_events(user_id, limit=limit)
-    if since_ts:
-        events = [e for e in events if e.get("timestamp", "") >= since_ts]
-    if until_ts:
-        events = [e for e in events if e.get("timestamp", "") <= until_ts]
+    noyer sous des lignes JSON brutes.
+
+    Période en jours entiers ("AAAA-MM-JJ") : servie par la table
+    d'agrégats de l'anneau quand elle existe (latences p50/p95 par outil).
+    Bornes horodatées (ex. la tranche exacte d'un slot compressé par RÊVE) :
+    ancien calcul, filtrage exact des `limit` derniers évènements (anneau,
+    sinon JSONL)."""
+    stats = None
+    if _whole_days(since_ts, until_ts):
+        try:
+            stats = latency_stats(user_id, since_ts, until_ts) if os.path.isfile(
+                _ring_path(_activity_path(user_id))) else None
+        except Exception:
+            stats = None
+    if stats is not None:
+        lines = []
+        for (tool, success), st in sorted(stats.items(), key=lambda kv: -kv[1]["count"]):
+            line = f"- {tool} : {st['count']}x ({'réussi' if success else 'échoué'})"
+            if st["p50_ms"] is not None:
+                line += f" — p50 {st['p50_ms']:.0f} ms, p95 {st['p95_ms']:.0f} ms"
+            lines.append(line)
+        return "\n".join(lines)
+    events = _in_window(recent_events(user_id, limit), since_ts, until_ts)
     if not events:
         return ""
     counts = {}
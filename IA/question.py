@@ -44,6 +44,7 @@ import json
 MY_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, MY_DIR)
 from prompt_safety import wrap_untrusted
+import slot_store
 
 
 def load_skill_context(skill: str, question: str = "") -> str:
@@ -121,10 +122,8 @@ def load_context(latitude=None, longitude=None, pubkey=None, user_id=None, slot=
         slot_file = os.path.expanduser(f"~/.zen/flashmem/{user_id}/slot{slot}.json")
         if os.path.isfile(slot_file):
             try:
-                with open(slot_file, 'r') as f:
-                    memory = json.load(f)
-                    messages = memory.get('messages', [])
-                    return "\n".join(f"- {m.get('content', '')}" for m in messages[-20:])
+                messages = slot_store.messages(slot_file)
+                return "\n".join(f"- {m.get('content', '')}" for m in messages[-20:])
             except Exception:
                 pass
 
@@ -142,10 +141,8 @@ def load_context(latitude=None, longitude=None, pubkey=None, user_id=None, slot=
     if not os.path.isfile(memory_file):
         return ""
     try:
-        with open(memory_file, 'r') as f:
-            memory = json.load(f)
-            messages = memory.get('messages', [])
-            return "\n".join(f"- {m.get('content', '')}" for m in messages)
+        messages = slot_store.messages(memory_file)
+        return "\n".join(f"- {m.get('content', '')}" for m in messages)
     except Exception:
         return ""
 
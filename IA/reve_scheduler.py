@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+reve_scheduler.py — Ordonnanceur RÊVE de la station (toutes mémoires, tous comptes).
+
+Contexte (2026-10-18) : la compression RÊVE (memory_manager.reve_compress_slot)
+était déclenchée EN LIGNE par le chemin chaud — bro/rag._remember_exchange et
+bro/tools._persist_slot_content dès 170 messages, short_memory._maybe_reve
+(sous-processus, timeout 60 s) — et la réponse de l'utilisateur attendait
+l'appel LLM _ollama_summarize. Les mémoires géo (uplanet_memory/*.json),
+elles, n'étaient jamais compressées : rien n'appelait reve_compress_geo.
+
+Désormais le chemin chaud appelle enqueue() : une ligne ajoutée à une file
+(O_APPEND, aucun appel réseau). La compression tourne ici, hors conversation :
+  - run() vide la file (et, avec scan_all, parcourt ~/.zen/flashmem/*/slot*.json
+    et uplanet_memory/*.json), retient les mémoires >= REVE_THRESHOLD et les
+    résume dans un pool borné de REVE_WORKERS threads ;
+  - les purges Qdrant des messages résumés sont regroupées par collection et
+    envoyées en fin de passe par lots de DELETE_BATCH (un POST par lot au
+    lieu d'un par mémoire) ; le rattrapage des messages jamais synchronisés
+    reste un upsert par lots par mémoire (upsert_*_bulk) ;
+  - chaque passe ajoute une ligne de métriques à runs.jsonl.
+
+Quand : le service BRO résident (bro_service.py) lance run() dès qu'il est
+inactif et que la file n'est pas vide ; 20h12.process.sh lance
+`reve_scheduler.py run --all` chaque nuit. Filet de sécurité hors service :
+une mémoire qui approche du plafond de 200 entrées des écrivains
+(REVE_URGENT) déclenche un run détaché sur ce seul fichier — jamais
+d'attente côté conversation, et au plus un lancement par mémoire toutes les
+URGENT_COOLDOWN_SEC (marqueur O_EXCL daté dans STATE_DIR/urgent) : sans ce
+garde-fou, chaque ajout au-delà de 190 messages lançait un processus.
+
+Concurrence : un verrou non bloquant par fichier (<json>.reve) empêche deux
+passes de résumer la même mémoire ; il est supprimé en fin de passe (sous
+verrou, l'inode est revérifié après flock) et les restes d'anciennes
+versions sont balayés par le scan nocturne. La réécriture du JSON se fait
+sous le verrou des écrivains (slot_store.rewrite) et conserve les messages
+arrivés pendant le résumé.
+
+Usage :
+  python3 reve_scheduler.py scan                    # mémoires au-delà du seuil
+  python3 reve_scheduler.py run [--all] [--workers N] [--path FICHIER ...]
+  python3 reve_scheduler.py stats [--last 10]       # métriques des dernières passes
+"""
+
+import os
+import re
+import sys
+import json
+import glob
+import time
+import fcntl
+import hashlib
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import slot_store
+
+FLASHMEM_BASE = os.path.expanduser("~/.zen/flashmem")
+GEO_DIR       = os.path.join(FLASHMEM_BASE, "uplanet_memory")
+STATE_DIR     = os.path.join(FLASHMEM_BASE, "reve_scheduler")
+QUEUE_PATH    = os.path.join(STATE_DIR, "queue")
+SCAN_STATE    = os.path.join(STATE_DIR, "scan.json")
+RUNS_LOG      = os.path.join(STATE_DIR, "runs.jsonl")
+URGENT_DIR    = os.path.join(STATE_DIR, "urgent")
+
+WORKERS       = int(os.environ.get("REVE_WORKERS", "2"))
+REVE_TRIGGER  = 170     # seuil de mise en file côté chemin chaud (inchangé)
+REVE_URGENT   = 190     # proche du plafond [-200:] des écrivains : run détaché
+RETRY_SEC     = 600     # pas de nouvel essai d'une mémoire en échec avant ce délai
+DELETE_BATCH  = 1000    # IDs par POST /points/delete
+RUNS_KEEP     = 1000    # lignes conservées dans runs.jsonl
+URGENT_COOLDOWN_SEC = 120   # entre deux runs détachés d'une même mémoire
+
+_SLOT_RE = re.compile(r"^slot(\d+)\.json$")
+_state_lock = threading.Lock()
+
+
+def _mm():
+    """memory_manager importé à la demande : enqueue() reste importable par
+    le chemin chaud (short_memory.py) sans charger le client Qdrant/Ollama."""
+    import memory_manager
+    return memory_manager
+
+
+# ── chemin chaud ──────────────────────────────────────────────────────────────
+
+def enqueue(path: str, count: int = 0) -> None:
+    """Met une mémoire en file de compression. Appelé après chaque écriture
+    d'un JSON de mémoire qui dépasse REVE_TRIGGER ; ne lève jamais."""
+    try:
+        path = os.path.abspath(path)
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(QUEUE_PATH, "a", encoding="utf-8") as f:
+            f.write(path + "\n")
+        if count >= REVE_URGENT and _claim_urgent(path):
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "run", "--path", path],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+    except Exception:
+        pass
+
+
+def _claim_urgent(path: str) -> bool:
+    """True si ce processus doit lancer le run détaché de `path` : marqueur
+    créé en O_EXCL (un seul gagnant parmi les écrivains concurrents),
+    renouvelé une fois URGENT_COOLDOWN_SEC écoulées."""
+    marker = os.path.join(URGENT_DIR, hashlib.sha1(path.encode("utf-8")).hexdigest()[:16])
+    os.makedirs(URGENT_DIR, exist_ok=True)
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        return True
+    except FileExistsError:
+        pass
+    try:
+        if time.time() - os.path.getmtime(marker) < URGENT_COOLDOWN_SEC:
+            return False
+        # Marqueur périmé : un seul écrivain le reprend (rename atomique).
+        stale = f"{marker}.{os.getpid()}.{threading.get_ident()}"
+        os.rename(marker, stale)
+        os.remove(stale)
+    except OSError:
+        return False
+    return _claim_urgent(path)
+
+
+def _sweep_urgent() -> None:
+    try:
+        names = os.listdir(URGENT_DIR)
+    except OSError:
+        return
+    for name in names:
+        marker = os.path.join(URGENT_DIR, name)
+        try:
+            if time.time() - os.path.getmtime(marker) >= URGENT_COOLDOWN_SEC:
+                os.remove(marker)
+        except OSError:
+            pass
+
+
+def queue_pending() -> bool:
+    try:
+        return os.path.getsize(QUEUE_PATH) > 0
+    except OSError:
+        return False
+
+
+def _drain_queue() -> list:
+    """Chemins en file (dédoublonnés, ordre d'arrivée). La file est renommée
+    avant lecture : les enqueue() concurrents écrivent dans une nouvelle."""
+    taken = f"{QUEUE_PATH}.{os.getpid()}.{threading.get_ident()}"
+    try:
+        os.replace(QUEUE_PATH, taken)
+    except OSError:
+        return []
+    try:
+        with open(taken, encoding="utf-8") as f:
+            return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    finally:
+        os.remove(taken)
+
+
+# ── inventaire ────────────────────────────────────────────────────────────────
+
+def _load_state() -> dict:
+    try:
+        with open(SCAN_STATE, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("files", {})
+    state.setdefault("failed", {})
+    return state
+
+
+def _save_state(state: dict) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = f"{SCAN_STATE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, SCAN_STATE)
+
+
+def _inspect(path: str, state: dict):
+    """Job de compression pour `path` : {"kind", "path", "count", ...}, None
+    si le fichier n'est pas une mémoire RÊVE. Le job est mis en cache par
+    (mtime_ns, taille) de l'instantané et taille du journal slot_store — le
+    scan nocturne ne relit que les mémoires modifiées."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        state["files"].pop(path, None)
+        return None
+    try:
+        journal = os.path.getsize(os.path.splitext(path)[0] + ".jsonl")
+    except OSError:
+        journal = 0
+    sig = [st.st_mtime_ns, st.st_size, journal]
+    cached = state["files"].get(path)
+    if cached and cached[:3] == sig:
+        job = dict(cached[3])
+    else:
+        job = _describe(path)
+        if job is None:
+            return None
+        state["files"][path] = sig + [dict(job)]
+    job["path"] = path
+    return job
+
+
+def _describe(path: str):
+    """Nombre de messages lu dans l'index slot_store ; seul l'en-tête des
+    mémoires géo (latitude/longitude) impose de lire l'instantané."""
+    try:
+        count = slot_store.count(path)
+    except (OSError, ValueError):
+        return None
+    if os.path.dirname(path) == GEO_DIR:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "latitude" not in data or "longitude" not in data:
+            return None
+        return {"kind": "geo", "lat": str(data["latitude"]),
+                "lon": str(data["longitude"]), "count": count}
+    m = _SLOT_RE.match(os.path.basename(path))
+    if not m:
+        return None
+    return {"kind": "slot", "user_id": os.path.basename(os.path.dirname(path)),
+            "slot": int(m.group(1)), "count": count}
+
+
+def _memory_files() -> list:
+    return (sorted(glob.glob(os.path.join(FLASHMEM_BASE, "*", "slot*.json")))
+            + sorted(glob.glob(os.path.join(GEO_DIR, "*.json"))))
+
+
+def scan(state: dict = None, threshold: int = None) -> list:
+    """Mémoires de la station qui ont atteint le seuil RÊVE."""
+    own = state is None
+    state = _load_state() if own else state
+    threshold = _mm().REVE_THRESHOLD if threshold is None else threshold
+    jobs = []
+    for path in _memory_files():
+        job = _inspect(path, state)
+        if job and job["count"] >= threshold:
+            jobs.append(job)
+    if own:
+        _save_state(state)
+    return jobs
+
+
+# ── exécution ─────────────────────────────────────────────────────────────────
+
+def _lock_memory(path: str):
+    """Descripteur du verrou <json>.reve pris en LOCK_NB, None si une autre
+    passe le tient. Le fichier pouvant être supprimé par son détenteur
+    (_unlock_memory), l'inode verrouillé est comparé à celui du chemin :
+    un verrou pris sur un fichier déjà supprimé ne protège rien."""
+    lock_path = f"{path}.reve"
+    while True:
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        try:
+            if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _unlock_memory(path: str, fd: int) -> None:
+    """Supprime le verrou AVANT de le relâcher (cf. _lock_memory)."""
+    try:
+        os.remove(f"{path}.reve")
+    except OSError:
+        pass
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _sweep_locks() -> None:
+    """Verrous <json>.reve laissés par les versions qui ne les supprimaient
+    pas (ou par une mémoire disparue) : retirés s'ils sont libres."""
+    for lock_path in (glob.glob(os.path.join(FLASHMEM_BASE, "*", "*.json.reve"))
+                      + glob.glob(os.path.join(GEO_DIR, "*.json.reve"))):
+        path = lock_path[:-len(".reve")]
+        fd = _lock_memory(path)
+        if fd is not None:
+            _unlock_memory(path, fd)
+
+
+def _run_job(job: dict, should_continue) -> dict:
+    """Compresse une mémoire ; retourne son résultat et ses compteurs."""
+    result = {"path": job["path"], "kind": job["kind"], "status": "skipped",
+              "pending_deletes": {}}
+    if should_continue is not None and not should_continue():
+        result["status"] = "deferred"
+        return result
+    lock_fd = _lock_memory(job["path"])
+    if lock_fd is None:
+        result["status"] = "busy"
+        return result
+    try:
+        mm = _mm()
+        stats = {}
+        t0 = time.monotonic()
+        if job["kind"] == "geo":
+            ok = mm.reve_compress_geo(job["lat"], job["lon"], geo_file=job["path"],
+                                      stats=stats, pending_deletes=result["pending_deletes"])
+        else:
+            ok = mm.reve_compress_slot(job["user_id"], job["slot"], slot_file=job["path"],
+                                       stats=stats, pending_deletes=result["pending_deletes"])
+        result.update(stats)
+        result["sec"] = round(time.monotonic() - t0, 3)
+        # ok=False sans rien compressé : résumé vide, Ollama/Qdrant en panne,
+        # ou rattrapage impossible — à retenter plus tard.
+        result["status"] = "compressed" if ok else "failed"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)[:200]
+    finally:
+        _unlock_memory(job["path"], lock_fd)
+    return result
+
+
+def _flush_deletes(pending: dict) -> tuple:
+    """(points purgés, appels POST) — par collection, lots de DELETE_BATCH."""
+    mm = _mm()
+    deleted = calls = 0
+    for collection, ids in pending.items():
+        ids = list(dict.fromkeys(ids))
+        for i in range(0, len(ids), DELETE_BATCH):
+            batch = ids[i:i + DELETE_BATCH]
+            calls += 1
+            if mm._delete_points(collection, batch):
+                deleted += len(batch)
+            else:
+                print(f"[reve_scheduler] ⚠️ {len(batch)} vecteur(s) non purgés de {collection} "
+                      f"(orphelins, sans impact fonctionnel — nettoyage différé).")
+    return deleted, calls
+
+
+def _record_run(metrics: dict) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with _state_lock:
+        try:
+            with open(RUNS_LOG, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            lines = []
+        if len(lines) >= RUNS_KEEP:
+            tmp = f"{RUNS_LOG}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(lines[-(RUNS_KEEP - 1):])
+            os.replace(tmp, RUNS_LOG)
+        with open(RUNS_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics, ensure_ascii=False) + "\n")
+
+
+def run(paths: list = None, scan_all: bool = False, workers: int = WORKERS,
+        should_continue=None, mode: str = "queue", drain: bool = True) -> dict:
+    """Une passe RÊVE : file (si drain), + `paths`, + scan complet si scan_all ; pool
+    de `workers` résumés, purge Qdrant groupée, métriques dans runs.jsonl.
+    `should_continue()` est consulté avant chaque mémoire : False = la passe
+    s'interrompt et remet le reste en file (fenêtre d'inactivité terminée)."""
+    started = datetime.utcnow().isoformat() + "Z"
+    t0 = time.monotonic()
+    threshold = _mm().REVE_THRESHOLD
+    with _state_lock:
+        state = _load_state()
+    queued = _drain_queue() if drain else []
+    candidates = list(dict.fromkeys(queued + [os.path.abspath(p) for p in paths or []]))
+    if scan_all:
+        every = _memory_files()
+        candidates = list(dict.fromkeys(candidates + every))
+        present = set(every)
+        state["files"] = {p: v for p, v in state["files"].items() if p in present}
+        _sweep_locks()
+        _sweep_urgent()
+
+    now = time.time()
+    jobs, retry_later = [], 0
+    for path in candidates:
+        job = _inspect(path, state)
+        if not job or job["count"] < threshold:
+            continue
+        if now - state["failed"].get(path, 0) < RETRY_SEC:
+            retry_later += 1
+            continue
+        jobs.append(job)
+    # Les plus pleines d'abord : ce sont elles qui approchent du plafond.
+    jobs.sort(key=lambda j: -j["count"])
+
+    results = []
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="reve") as pool:
+            results = list(pool.map(lambda j: _run_job(j, should_continue), jobs))
+
+    pending = {}
+    for r in results:
+        for collection, ids in r.pop("pending_deletes").items():
+            pending.setdefault(collection, []).extend(ids)
+    deleted, delete_calls = _flush_deletes(pending) if pending else (0, 0)
+
+    deferred = [r["path"] for r in results if r["status"] == "deferred"]
+    if deferred:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(QUEUE_PATH, "a", encoding="utf-8") as f:
+            f.writelines(p + "\n" for p in deferred)
+    with _state_lock:
+        fresh = _load_state()
+        if scan_all:
+            fresh["files"] = state["files"]
+        else:
+            fresh["files"].update(state["files"])
+        for r in results:
+            if r["status"] == "failed":
+                fresh["failed"][r["path"]] = now
+            elif r["status"] == "compressed":
+                fresh["failed"].pop(r["path"], None)
+        _save_state(fresh)
+
+    count = lambda status: sum(1 for r in results if r["status"] == status)
+    metrics = {
+        "started": started,
+        "mode": mode,
+        "workers": max(1, workers),
+        "duration_sec": round(time.monotonic() - t0, 3),
+        "candidates": len(candidates),
+        "jobs": len(jobs),
+        "compressed": count("compressed"),
+        "failed": count("failed"),
+        "busy": count("busy"),
+        "deferred": len(deferred),
+        "retry_later": retry_later,
+        "messages_compressed": sum(r.get("compressed", 0) for r in results),
+        "catchup_upserts": sum(r.get("catchup", 0) for r in results),
+        "deleted_points": deleted,
+        "delete_calls": delete_calls,
+        "summarize_sec": round(sum(r.get("summarize_sec", 0.0) for r in results), 3),
+        "max_job_sec": max((r.get("sec", 0.0) for r in results), default=0.0),
+    }
+    if jobs:
+        _record_run(metrics)
+    return metrics
+
+
+def last_runs(n: int = 10) -> list:
+    try:
+        with open(RUNS_LOG, encoding="utf-8") as f:
+            lines = f.readlines()[-n:]
+    except OSError:
+        return []
+    runs = []
+    for line in lines:
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ordonnanceur RÊVE de la station")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("scan", help="Mémoires au-delà du seuil RÊVE")
+    pr = sub.add_parser("run", help="Compresse la file (et tout, avec --all)")
+    pr.add_argument("--all", action="store_true", help="Parcourt toutes les mémoires de la station")
+    pr.add_argument("--workers", type=int, default=WORKERS)
+    pr.add_argument("--path", action="append", default=[], help="Mémoire à traiter (répétable)")
+    ps = sub.add_parser("stats", help="Métriques des dernières passes")
+    ps.add_argument("--last", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cmd == "scan":
+        jobs = scan()
+        for job in jobs:
+            print(f"{job['count']:4d}  {job['kind']:4s}  {job['path']}")
+        print(f"{len(jobs)} mémoire(s) à compresser")
+    elif args.cmd == "run":
+        mode = "night" if args.all else ("path" if args.path else "queue")
+        # --path seul (run détaché d'enqueue) : ne touche pas au reste de la file.
+        metrics = run(paths=args.path, scan_all=args.all, workers=args.workers, mode=mode,
+                      drain=args.all or not args.path)
+        print(json.dumps(metrics, ensure_ascii=False))
+        sys.exit(0 if metrics["failed"] == 0 else 1)
+    elif args.cmd == "stats":
+        for metrics in last_runs(args.last):
+            print(json.dumps(metrics, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
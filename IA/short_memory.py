@@ -10,67 +10,24 @@ if os.path.exists(venv_path):
     if os.path.exists(site_packages):
         sys.path.insert(0, site_packages)
 
-import contextlib
-import fcntl
 import hashlib
 import json
 import re
-import subprocess
 from datetime import datetime
 
-# Importer le gestionnaire Qdrant unifié (même répertoire)
+# Gestionnaire Qdrant unifié et stockage journalisé des mémoires (même
+# répertoire), appelés en processus (2026-10-18) : plus de sous-processus
+# memory_manager.py par upsert ni de réécriture du JSON entier par message.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import slot_store
 _MEMORY_MGR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_manager.py")
 _HAS_MEMORY_MGR = os.path.isfile(_MEMORY_MGR)
 
-@contextlib.contextmanager
-def _file_lock(target_path):
-    """Verrou sur un fichier .lock SÉPARÉ et STABLE (jamais remplacé) pour
-    protéger la région critique read-modify-write d'un fichier de données
-    écrit par ailleurs de façon atomique (tmp + os.replace).
-
-    Bug corrigé (2026-07-06) : la version précédente faisait flock() sur le
-    fd ouvert sur le fichier de DONNÉES lui-même, puis le remplaçait via
-    os.replace(). Or flock() verrouille l'INODE, pas le CHEMIN. Une fois
-    os.replace() exécuté, le chemin pointe vers un NOUVEL inode — mais un
-    processus B qui avait déjà ouvert l'ANCIEN inode (avant le replace de A)
-    et attendait le flock sur CET inode continue d'attendre sur l'inode
-    maintenant orphelin (plus aucune entrée de répertoire ne le désigne).
-    Quand B obtient enfin le lock (à la fermeture du fd de A), il lit encore
-    l'ANCIEN contenu (pré-update de A), écrit sa propre mise à jour dessus,
-    et son propre os.replace ÉCRASE la mise à jour de A — perte de donnée
-    silencieuse. En verrouillant un fichier .lock qui n'est JAMAIS remplacé,
-    tous les processus se disputent toujours le MÊME inode stable, donc la
-    sérialisation reste correcte quel que soit l'ordre des replace()."""
-    lock_path = f"{target_path}.lock"
-    lock_fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
-    try:
-        fcntl.flock(lock_fd, fcntl.LOCK_EX)
-        yield
-    finally:
-        fcntl.flock(lock_fd, fcntl.LOCK_UN)
-        os.close(lock_fd)
-
-
-def _read_json_or_default(path, default_factory):
-    """Lecture protégée — à appeler UNIQUEMENT sous _file_lock(path)."""
-    if not os.path.isfile(path):
-        return default_factory()
-    try:
-        with open(path, encoding="utf-8") as f:
-            raw = f.read().strip()
-        return json.loads(raw) if raw else default_factory()
-    except Exception:
-        return default_factory()
-
-
-def _write_json_atomic(path, data):
-    """Écriture atomique (tmp + os.replace) — à appeler UNIQUEMENT sous
-    _file_lock(path), jamais en dehors (voir le commentaire de _file_lock)."""
-    tmp_path = f"{path}.tmp"
-    with open(tmp_path, "w", encoding="utf-8") as tf:
-        json.dump(data, tf, indent=2)
-    os.replace(tmp_path, path)
 
+def _memory_manager():
+    """memory_manager importé à la demande (client Qdrant/Ollama)."""
+    import memory_manager
+    return memory_manager
 
 # Check if debug mode is enabled
 DEBUG_MODE = os.environ.get('DEBUG', '0') == '1'
@@ -166,25 +123,22 @@ def _log_qdrant_failure(context, detail):
         pass
 
 
-def _upsert_to_qdrant(user_id, content, timestamp, slot):
-    """Délègue à memory_manager.py — retourne True SEULEMENT si l'upsert a
-    réellement réussi (code retour du sous-processus), jamais un optimisme
-    silencieux comme avant."""
+def _upsert_to_qdrant(user_id, content, timestamp, slot, event_id=""):
+    """Upsert en processus via memory_manager — retourne True SEULEMENT si
+    l'upsert a réellement réussi, jamais un optimisme silencieux. Le
+    timestamp du JSON est transmis : l'ID du point (_stable_id(user_id, ts))
+    est ainsi celui que RÊVE purgera (l'ancien sous-processus upsert-slot
+    horodatait de son côté — points orphelins après compression)."""
     if not _HAS_MEMORY_MGR:
         return False
     try:
-        result = subprocess.run(
-            [sys.executable, _MEMORY_MGR, "upsert-slot",
-             "--user-id", user_id, "--slot", str(slot), "--content", content],
-            capture_output=True, timeout=20, text=True,
-        )
-        if result.returncode != 0:
-            _log_qdrant_failure("upsert-slot", result.stderr.strip()[:300] or f"exit code {result.returncode}")
-            return False
-        return True
+        if _memory_manager().upsert_user_slot(user_id, slot, content,
+                                              timestamp=timestamp, event_id=event_id):
+            return True
+        _log_qdrant_failure("upsert-slot", "aucun point écrit (Qdrant/Ollama indisponible ?)")
     except Exception as e:
         _log_qdrant_failure("upsert-slot", e)
-        return False
+    return False
 
 
 def _upsert_geo_to_qdrant(lat, lon, content, pubkey, timestamp, event_id=""):
@@ -193,31 +147,25 @@ def _upsert_geo_to_qdrant(lat, lon, content, pubkey, timestamp, event_id=""):
     if not _HAS_MEMORY_MGR:
         return False
     try:
-        result = subprocess.run(
-            [sys.executable, _MEMORY_MGR, "upsert-geo",
-             "--lat", lat, "--lon", lon, "--content", content,
-             "--pubkey", pubkey, "--event-id", event_id],
-            capture_output=True, timeout=20, text=True,
-        )
-        if result.returncode != 0:
-            _log_qdrant_failure("upsert-geo", result.stderr.strip()[:300] or f"exit code {result.returncode}")
-            return False
-        return True
+        if _memory_manager().upsert_geo(lat, lon, content, pubkey=pubkey,
+                                        timestamp=timestamp, event_id=event_id):
+            return True
+        _log_qdrant_failure("upsert-geo", "aucun point écrit (Qdrant/Ollama indisponible ?)")
     except Exception as e:
         _log_qdrant_failure("upsert-geo", e)
-        return False
+    return False
 
 
-def _maybe_reve(user_id, slot, slot_file):
-    """Déclenche le cycle RÊVE si le slot est plein (>= seuil dans memory_manager)."""
+def _maybe_reve(memory_file, count):
+    """Met la mémoire (slot ou géo) en file RÊVE au-delà du seuil. Le résumé
+    LLM se fait hors chemin chaud, dans reve_scheduler.py (2026-10-18) —
+    avant, ce sous-processus memory_manager.py reve bloquait jusqu'à 60 s."""
     if not _HAS_MEMORY_MGR:
         return
     try:
-        subprocess.run(
-            [sys.executable, _MEMORY_MGR, "reve",
-             "--user-id", user_id, "--slot", str(slot)],
-            capture_output=True, timeout=60
-        )
+        import reve_scheduler
+        if count >= reve_scheduler.REVE_TRIGGER:
+            reve_scheduler.enqueue(memory_file, count)
     except Exception:
         pass
 
@@ -266,55 +214,41 @@ def main():
     # Coordinate-based memory (legacy)
     coord_key = f"{latitude}_{longitude}".replace(".", "_").replace("-", "m")
     memory_file = os.path.join(MEMORY_DIR, f"{coord_key}.json")
-    with _file_lock(memory_file):
-        memory = _read_json_or_default(memory_file, lambda: {
-            "latitude": latitude,
-            "longitude": longitude,
-            "messages": []
-        })
-        # Qdrant AVANT l'écriture JSON : qdrant_synced reflète le résultat RÉEL
-        # de cet upsert (jamais un optimisme par défaut) — voir
-        # memory_manager.py::reve_compress_slot pour l'usage de ce flag : ne
-        # jamais purger du JSON un message qui n'a jamais atteint Qdrant.
-        geo_synced = _upsert_geo_to_qdrant(latitude, longitude, content, pubkey, _ts, event_id)
-        memory['messages'].append({
-            "timestamp": _ts,
-            "event_id": event_id,
-            "pubkey": pubkey,
-            "content": content,
-            "qdrant_synced": geo_synced,
-        })
-        # Fenêtre glissante géo : 200 entrées (RÊVE prend le relais via Qdrant pour les anciennes)
-        memory['messages'] = memory['messages'][-200:]
-        _write_json_atomic(memory_file, memory)
+    # Qdrant AVANT l'écriture JSON : qdrant_synced reflète le résultat RÉEL
+    # de cet upsert (jamais un optimisme par défaut) — voir
+    # memory_manager.py::reve_compress_slot pour l'usage de ce flag : ne
+    # jamais purger du JSON un message qui n'a jamais atteint Qdrant.
+    # L'upsert se fait hors verrou ; l'ajout au journal est O(1) et la
+    # fenêtre glissante de 200 entrées est appliquée à la compaction
+    # (RÊVE prend le relais via Qdrant pour les anciennes).
+    geo_synced = _upsert_geo_to_qdrant(latitude, longitude, content, pubkey, _ts, event_id)
+    geo_count = slot_store.append(memory_file, {
+        "timestamp": _ts,
+        "event_id": event_id,
+        "pubkey": pubkey,
+        "content": content,
+        "qdrant_synced": geo_synced,
+    }, lambda: {"latitude": latitude, "longitude": longitude, "messages": []})
+    _maybe_reve(memory_file, geo_count)
 
     # --- Multi-user, multi-slot memory ---
     if user_id:
         USER_DIR = os.path.expanduser(f"~/.zen/flashmem/{user_id}")
         os.makedirs(USER_DIR, exist_ok=True)
         slot_file = os.path.join(USER_DIR, f"slot{slot}.json")
-        with _file_lock(slot_file):
-            slot_mem = _read_json_or_default(slot_file, lambda: {
-                "user_id": user_id,
-                "slot": slot,
-                "messages": []
-            })
-            slot_synced = _upsert_to_qdrant(user_id, content, _ts, slot)
-            slot_mem['messages'].append({
-                "timestamp": _ts,
-                "event_id": event_id,
-                "latitude": latitude,
-                "longitude": longitude,
-                "content": content,
-                "qdrant_synced": slot_synced,
-            })
-            # Fenêtre glissante slot : 200 entrées — RÊVE compresse à 150 et garde 80 récentes
-            slot_mem['messages'] = slot_mem['messages'][-200:]
-            _write_json_atomic(slot_file, slot_mem)
+        slot_synced = _upsert_to_qdrant(user_id, content, _ts, slot, event_id)
+        # Fenêtre glissante slot : 200 entrées — RÊVE compresse à 150 et garde 80 récentes
+        slot_count = slot_store.append(slot_file, {
+            "timestamp": _ts,
+            "event_id": event_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "content": content,
+            "qdrant_synced": slot_synced,
+        }, lambda: {"user_id": user_id, "slot": slot, "messages": []})
         print(f"Memory updated for user: {user_id}, slot: {slot}")
-        # RÊVE : comprimer à partir de 170 entrées (REVE_THRESHOLD=150 dans memory_manager)
-        if len(slot_mem['messages']) >= 170:
-            _maybe_reve(user_id, slot, slot_file)
+        # RÊVE : mise en file à partir de 170 entrées (REVE_THRESHOLD=150 dans memory_manager)
+        _maybe_reve(slot_file, slot_count)
     else:
         print("No user_id provided, slot memory not updated.")
 
@@ -34,53 +34,33 @@ if os.path.exists(venv_path):
     if os.path.exists(site_packages):
         sys.path.insert(0, site_packages)
 
-QDRANT_HOST = "localhost"
-QDRANT_PORT = 6333
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import vector_store
+
 COLLECTION  = "wotx2_resources"
 EMBED_MODEL = "nomic-embed-text"  # Ollama embedding model
 VECTOR_SIZE = 768                 # nomic-embed-text output size
 TOP_K       = 5
 
 
-def _load_qdrant_api_key():
-    env_file = os.path.expanduser("~/.zen/ai-company/.env")
-    try:
-        with open(env_file) as f:
-            for line in f:
-                if line.startswith("QDRANT_API_KEY="):
-                    return line.strip().split("=", 1)[1]
-    except Exception:
-        pass
-    return None
-
-
-def _client():
-    import warnings
-    from qdrant_client import QdrantClient
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", UserWarning)
-        return QdrantClient(url=f"http://{QDRANT_HOST}:{QDRANT_PORT}",
-                             api_key=_load_qdrant_api_key(), check_compatibility=False)
-
-
 def _embed(text: str) -> list:
-    """Génère un embedding via Ollama (nomic-embed-text)."""
-    import ollama
-    resp = ollama.embeddings(model=EMBED_MODEL, prompt=text)
-    return resp["embedding"]
+    """Génère un embedding via Ollama (nomic-embed-text), servi par
+    embed_cache si le texte a déjà été embedé (ré-indexation du relay) —
+    lève si Ollama échoue."""
+    vec = vector_store.embed(text, EMBED_MODEL)
+    if not vec:
+        raise RuntimeError(f"embedding Ollama indisponible ({vector_store.OLLAMA_URL})")
+    return vec
 
 
 def _ensure_collection():
-    """Crée la collection Qdrant si elle n'existe pas."""
-    from qdrant_client.models import Distance, VectorParams
-    client = _client()
-    existing = [c.name for c in client.get_collections().collections]
-    if COLLECTION not in existing:
-        client.create_collection(
-            collection_name=COLLECTION,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
-        )
-        print(f"[skill_qdrant] Collection '{COLLECTION}' créée.", file=sys.stderr)
+    """Crée la collection Qdrant si elle n'existe pas (existence mémorisée
+    par vector_store : un seul GET par processus, même sur index-all)."""
+    if vector_store.collection_exists(COLLECTION):
+        return
+    if not vector_store.ensure_collection(COLLECTION, VECTOR_SIZE):
+        raise RuntimeError(f"collection '{COLLECTION}' indisponible ({vector_store.QDRANT_URL})")
+    print(f"[skill_qdrant] Collection '{COLLECTION}' créée.", file=sys.stderr)
 
 
 def _event_to_doc(event: dict) -> dict | None:
@@ -167,19 +147,14 @@ def index_event(event: dict) -> bool:
     --event fourni en CLI sans validation amont : le seul usage sûr est
     index_all_from_relay() (lit depuis `strfry scan`, donc des events déjà
     vérifiés par le relay à leur réception)."""
-    from qdrant_client.models import PointStruct
     try:
         _ensure_collection()
         doc = _event_to_doc(event)
         if not doc:
             return False
         vec = _embed(doc["text"])
-        client = _client()
-        client.upsert(
-            collection_name=COLLECTION,
-            points=[PointStruct(id=doc["id"], vector=vec, payload=doc["payload"])]
-        )
-        return True
+        return vector_store.upsert(
+            COLLECTION, [{"id": doc["id"], "vector": vec, "payload": doc["payload"]}]) == 1
     except Exception as e:
         print(f"[skill_qdrant] Erreur indexation: {e}", file=sys.stderr)
         return False
@@ -194,22 +169,16 @@ def search_resources(skill: str, question: str = "", limit: int = TOP_K) -> list
         _ensure_collection()
         query = f"{skill} {question}".strip()
         vec = _embed(query)
-        client = _client()
-        hits = client.query_points(
-            collection_name=COLLECTION,
-            query=vec,
-            limit=limit,
-            score_threshold=0.3,
-        ).points
+        hits = vector_store.search(COLLECTION, vec, limit=limit, score_threshold=0.3)
         results = []
         for h in hits:
-            p = h.payload
+            p = h.get("payload") or {}
             results.append({
                 "name":        p.get("name", ""),
                 "description": p.get("description", ""),
                 "skills":      p.get("skills", []),
                 "resources":   p.get("resources", []),
-                "score":       round(h.score, 3),
+                "score":       round(h["score"], 3),
                 "kind":        p.get("kind", 0),
             })
         return results
@@ -251,23 +220,24 @@ def rebuild_collection():
     l'historique, puis périodiquement (cron) en filet de sécurité ; le fix du
     point_id par identité NIP-33 empêche déjà toute nouvelle accumulation au
     fil de l'eau, donc ce n'est plus strictement nécessaire à chaque cycle."""
-    client = _client()
-    existing = [c.name for c in client.get_collections().collections]
-    if COLLECTION in existing:
-        client.delete_collection(COLLECTION)
+    if vector_store.collection_exists(COLLECTION):
+        vector_store.delete_collection(COLLECTION)
         print(f"[skill_qdrant] Collection '{COLLECTION}' supprimée (reconstruction).", file=sys.stderr)
     _ensure_collection()
 
 
 def index_all_from_relay(strfry_path: str = None) -> int:
-    """Indexe tous les Kind 30500/30504 du relay local strfry."""
+    """Indexe tous les Kind 30500/30504 du relay local strfry — embeddings
+    par lots (/api/embed multi-input) et upsert par lots de
+    vector_store.UPSERT_BATCH, plus un aller-retour Ollama + Qdrant par
+    événement."""
     import subprocess
     strfry = strfry_path or os.path.expanduser("~/.zen/strfry/strfry")
     if not os.path.exists(strfry):
         print(f"[skill_qdrant] strfry non trouvé : {strfry}", file=sys.stderr)
         return 0
 
-    count = 0
+    docs = {}
     for kind in [30500, 30504]:
         try:
             result = subprocess.run(
@@ -277,14 +247,25 @@ def index_all_from_relay(strfry_path: str = None) -> int:
             )
             for line in result.stdout.splitlines():
                 try:
-                    ev = json.loads(line)
-                    if index_event(ev):
-                        count += 1
+                    doc = _event_to_doc(json.loads(line))
                 except Exception:
-                    pass
+                    continue
+                if doc:
+                    docs[doc["id"]] = doc    # même identité NIP-33 : la dernière version gagne
         except Exception as e:
             print(f"[skill_qdrant] Erreur scan kind {kind}: {e}", file=sys.stderr)
-    return count
+    if not docs:
+        return 0
+    try:
+        _ensure_collection()
+    except Exception as e:
+        print(f"[skill_qdrant] Erreur indexation: {e}", file=sys.stderr)
+        return 0
+    docs = list(docs.values())
+    vecs = vector_store.embed_many([d["text"] for d in docs], EMBED_MODEL)
+    return vector_store.upsert(COLLECTION, [
+        {"id": d["id"], "vector": v, "payload": d["payload"]}
+        for d, v in zip(docs, vecs) if v])
 
 
 # ── CLI ───────────────────────────────────────────────────────────────────────
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+slot_store.py — Stockage des mémoires JSON (slotN.json, uplanet_memory/*.json)
+en journal append-only + compaction périodique.
+
+Contexte (2026-10-18) : chaque message mémorisé (short_memory.py,
+bro/rag._remember_exchange, bro/tools._persist_slot_content) relisait puis
+réécrivait TOUT le JSON (jusqu'à 200 messages, indent=2) : O(n) octets par
+ajout, sous verrou. Ici, un ajout = une ligne JSON en O_APPEND + un petit
+index réécrit ; le JSON n'est réécrit qu'une fois tous les COMPACT_EVERY
+ajouts (compaction).
+
+Fichiers, pour une mémoire <nom>.json :
+  <nom>.json   — instantané, format historique inchangé ({"messages": [...]}
+                 + "journal_gen") ; à jour après chaque compaction
+  <nom>.jsonl  — journal : en-tête {"gen": g, "snapshot": empreinte du
+                 contenu de l'instantané}, puis un message par ligne
+  <nom>.idx    — index : nombre de messages, taille du journal, messages
+                 non synchronisés, signature (inode, mtime, taille) de
+                 l'instantané
+  <nom>.json.lock — verrou (convention de short_memory, cf. file_lock)
+
+Cohérence : le journal n'est pris en compte que si sa génération est celle
+de l'instantané ET si l'empreinte de son en-tête est celle du contenu actuel
+de l'instantané. Chaque compaction écrit l'instantané sous une génération
+NEUVE avant de vider le journal — un arrêt entre les deux laisse un journal
+périmé, ignoré, jamais rejoué deux fois. Un instantané supprimé (#reset,
+`rm slot*.json`) ou réécrit par un outil externe invalide donc son journal,
+même si l'outil a conservé la clé "journal_gen" (jq, json.load/dump) : seule
+l'empreinte du contenu fait foi (2026-10-18). Une copie à l'identique
+(cp -a, restauration) garde son journal.
+
+Lecteurs Python : load() / messages() / count() (count lit l'index seul).
+Lecteurs shell : `python3 slot_store.py cat <fichier.json>` imprime la vue
+fusionnée au format historique (remplace un `jq ... <fichier.json>` direct).
+
+Usage bash :
+  python3 slot_store.py cat     ~/.zen/flashmem/<email>/slot0.json
+  python3 slot_store.py count   ~/.zen/flashmem/<email>/slot0.json
+  python3 slot_store.py compact ~/.zen/flashmem/<email>/slot0.json
+"""
+
+import os
+import sys
+import json
+import uuid
+import hashlib
+import argparse
+import contextlib
+import fcntl
+
+MAX_MESSAGES  = 200     # fenêtre glissante historique des écrivains
+COMPACT_EVERY = 32      # ajouts journalisés entre deux compactions
+
+
+@contextlib.contextmanager
+def file_lock(target_path: str):
+    """Verrou sur un fichier .lock SÉPARÉ et STABLE (jamais remplacé) pour
+    protéger la région critique read-modify-write d'un fichier de données
+    écrit par ailleurs de façon atomique (tmp + os.replace).
+
+    flock() verrouille l'INODE, pas le CHEMIN : verrouiller le fichier de
+    données lui-même, puis le remplacer par os.replace(), laisse un
+    processus en attente sur l'ancien inode orphelin relire l'ancien
+    contenu et écraser la mise à jour précédente (bug corrigé le
+    2026-07-06 dans short_memory.py). Le .lock n'est jamais remplacé : tous
+    les processus se disputent le MÊME inode."""
+    lock_fd = os.open(f"{target_path}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+
+def write_json_atomic(path: str, data: dict, indent: int = 2) -> bytes:
+    """Écriture atomique (tmp + os.replace) — sous file_lock(path) uniquement.
+    Retourne les octets écrits."""
+    raw = json.dumps(data, indent=indent, ensure_ascii=False).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as tf:
+        tf.write(raw)
+    os.replace(tmp_path, path)
+    return raw
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _journal_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".jsonl"
+
+
+def _index_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".idx"
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _read_snapshot(path: str):
+    """(instantané, empreinte du contenu), (None, None) s'il est absent ;
+    ValueError s'il est illisible."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None, None
+    text = raw.decode("utf-8").strip()
+    return (json.loads(text) if text else {}), _digest(raw)
+
+
+def _read_journal(path: str, gen, digest):
+    """(messages, taille lue) du journal s'il appartient à la génération
+    `gen` et à l'instantané d'empreinte `digest` ; une dernière ligne
+    tronquée (arrêt pendant l'écriture) est ignorée. Un en-tête sans
+    empreinte (journal antérieur au 2026-10-18) n'est jugé que sur sa
+    génération, jusqu'à la prochaine compaction."""
+    jpath = _journal_path(path)
+    try:
+        with open(jpath, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return [], 0
+    lines = raw.split(b"\n")
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return [], len(raw)
+    if gen is None or header.get("gen") != gen \
+            or header.get("snapshot", digest) != digest:
+        return [], len(raw)
+    msgs = []
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        try:
+            msgs.append(json.loads(line))
+        except ValueError:
+            continue
+    return msgs, len(raw)
+
+
+def _repair_journal(path: str) -> None:
+    """Tronque une dernière ligne incomplète (arrêt pendant os.write) : le
+    prochain ajout ne doit pas se coller à elle."""
+    jpath = _journal_path(path)
+    try:
+        with open(jpath, "rb+") as f:
+            raw = f.read()
+            if raw and not raw.endswith(b"\n"):
+                f.truncate(raw.rfind(b"\n") + 1)
+    except OSError:
+        pass
+
+
+def _load_index(path: str):
+    try:
+        with open(_index_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_index(path: str, idx: dict) -> None:
+    write_json_atomic(_index_path(path), idx, indent=None)
+
+
+def _index_valid(path: str, idx) -> bool:
+    return (idx is not None
+            and idx.get("snapshot") == _signature(path)
+            and idx.get("journal_bytes") == _size(_journal_path(path)))
+
+
+def _synced(m: dict) -> bool:
+    return bool(m.get("qdrant_synced", True))
+
+
+def _compact(path: str, data: dict, msgs: list, cap: int = MAX_MESSAGES) -> dict:
+    """Écrit `msgs` (tronqués à `cap`) dans l'instantané sous une génération
+    neuve, puis repart d'un journal vide. Sous file_lock(path)."""
+    gen = uuid.uuid4().hex[:16]
+    data = dict(data)
+    data["messages"] = msgs[-cap:] if cap else msgs
+    data["journal_gen"] = gen
+    raw = write_json_atomic(path, data)
+    header = (json.dumps({"gen": gen, "snapshot": _digest(raw)}) + "\n").encode("utf-8")
+    tmp = f"{_journal_path(path)}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+    os.replace(tmp, _journal_path(path))
+    idx = {
+        "gen": gen,
+        "count": len(data["messages"]),
+        "journal_lines": 0,
+        "journal_bytes": len(header),
+        "unsynced": sum(1 for m in data["messages"] if not _synced(m)),
+        "snapshot": _signature(path),
+    }
+    _save_index(path, idx)
+    return idx
+
+
+def _recover(path: str, default_factory=None):
+    """Index reconstruit depuis l'instantané et le journal (index absent ou
+    périmé : instantané réécrit ailleurs, arrêt entre journal et index...).
+    Retourne None si la mémoire n'existe pas et qu'aucun défaut n'est fourni.
+    Un instantané illisible est remplacé par le défaut (comportement
+    historique des écrivains) ; sans défaut, l'erreur remonte — un lecteur
+    ne l'écrase jamais."""
+    try:
+        data, digest = _read_snapshot(path)
+    except ValueError:
+        if default_factory is None:
+            raise
+        data = None
+    if data is None:
+        if default_factory is None:
+            return None
+        return _compact(path, default_factory(), [])
+    _repair_journal(path)
+    gen = data.get("journal_gen")
+    jmsgs, _ = _read_journal(path, gen, digest)
+    if gen is None or not jmsgs:
+        # Instantané historique, sans journal ou au journal périmé (réécrit
+        # par un outil externe) : l'adopter sous une génération neuve.
+        return _compact(path, data, data.get("messages", []) + jmsgs)
+    idx = {
+        "gen": gen,
+        "count": len(data.get("messages", [])) + len(jmsgs),
+        "journal_lines": len(jmsgs),
+        "journal_bytes": _size(_journal_path(path)),
+        "unsynced": sum(1 for m in data.get("messages", []) + jmsgs if not _synced(m)),
+        "snapshot": _signature(path),
+    }
+    _save_index(path, idx)
+    return idx
+
+
+def _load_locked(path: str, cap: int = MAX_MESSAGES):
+    try:
+        data, digest = _read_snapshot(path)
+    except ValueError:
+        return None
+    if data is None:
+        return None
+    jmsgs, _ = _read_journal(path, data.get("journal_gen"), digest)
+    msgs = data.get("messages", []) + jmsgs
+    data["messages"] = msgs[-cap:] if cap else msgs
+    return data
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def append(path: str, message: dict, default_factory=dict,
+           cap: int = MAX_MESSAGES) -> int:
+    """Ajoute `message` à la mémoire `path` (créée via default_factory si
+    absente) ; retourne le nombre de messages après ajout (borné à cap)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with file_lock(path):
+        idx = _load_index(path)
+        if not _index_valid(path, idx):
+            idx = _recover(path, default_factory)
+        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(_journal_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        if not _synced(message):
+            idx["unsynced"] += 1
+        idx["journal_bytes"] += len(line)
+        idx["journal_lines"] += 1
+        idx["count"] += 1
+        if idx["journal_lines"] >= COMPACT_EVERY:
+            data, digest = _read_snapshot(path)
+            jmsgs, _ = _read_journal(path, idx["gen"], digest)
+            data = data or {}
+            idx = _compact(path, data, data.get("messages", []) + jmsgs, cap)
+        else:
+            _save_index(path, idx)
+        return min(idx["count"], cap)
+
+
+def load(path: str, cap: int = MAX_MESSAGES):
+    """Vue fusionnée (instantané + journal) au format historique, None si
+    la mémoire n'existe pas."""
+    if not os.path.isfile(path):
+        return None
+    with file_lock(path):
+        return _load_locked(path, cap)
+
+
+def messages(path: str, cap: int = MAX_MESSAGES) -> list:
+    data = load(path, cap)
+    return data.get("messages", []) if data else []
+
+
+def count(path: str, cap: int = MAX_MESSAGES) -> int:
+    """Nombre de messages, lu dans l'index quand il est à jour."""
+    idx = info(path)
+    return min(idx["count"], cap) if idx else 0
+
+
+def info(path: str):
+    """Index de la mémoire (reconstruit si périmé), None si absente."""
+    if not os.path.isfile(path):
+        return None
+    idx = _load_index(path)
+    if _index_valid(path, idx):
+        return idx
+    with file_lock(path):
+        return _recover(path)
+
+
+def rewrite(path: str, fn, cap: int = MAX_MESSAGES) -> bool:
+    """Réécrit la mémoire sous verrou : fn(data) reçoit la vue fusionnée et
+    retourne la nouvelle (ou None pour ne rien changer). Compaction incluse."""
+    with file_lock(path):
+        data = _load_locked(path, cap=0)
+        if data is None:
+            return False
+        new = fn(data)
+        if new is None:
+            return False
+        _compact(path, new, new.get("messages", []), cap)
+        return True
+
+
+def compact(path: str, cap: int = MAX_MESSAGES) -> bool:
+    return rewrite(path, lambda data: data, cap)
+
+
+def remove(path: str) -> None:
+    """Supprime la mémoire (instantané, journal, index)."""
+    with file_lock(path):
+        for p in (path, _journal_path(path), _index_path(path)):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoires JSON journalisées")
+    parser.add_argument("cmd", choices=["cat", "count", "compact"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+    if args.cmd == "cat":
+        data = load(args.path)
+        if data is None:
+            sys.exit(1)
+        data.pop("journal_gen", None)
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    elif args.cmd == "count":
+        print(count(args.path))
+    elif args.cmd == "compact":
+        sys.exit(0 if compact(args.path) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ MEMORY_FILE="$HOME/.zen/flashmem/$TEST_USER/slot$TEST_SLOT.json"
 if [[ -f "$MEMORY_FILE" ]]; then
     echo "✅ Memory file created: $MEMORY_FILE"
     echo "Content:"
-    cat "$MEMORY_FILE" | jq '.'
+    python3 $HOME/.zen/Astroport.ONE/IA/slot_store.py cat "$MEMORY_FILE" | jq '.'
 else
     echo "❌ Memory file not found: $MEMORY_FILE"
 fi
@@ -40,7 +40,7 @@ echo "Answer: $ANSWER"
 echo ""
 echo "4. Testing memory display..."
 # Simulate #mem #3
-MEMORY_DISPLAY=$(jq -r '.messages | to_entries | .[-5:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content)\n---"' "$MEMORY_FILE" 2>/dev/null)
+MEMORY_DISPLAY=$(python3 $HOME/.zen/Astroport.ONE/IA/slot_store.py cat "$MEMORY_FILE" | jq -r '.messages | to_entries | .[-5:] | .[] | "📅 \(.value.timestamp | sub("\\.[0-9]+Z$"; "Z") | strptime("%Y-%m-%dT%H:%M:%SZ") | strftime("%d/%m/%Y %H:%M"))\n💬 \(.value.content)\n---"' 2>/dev/null)
 echo "Memory display for slot $TEST_SLOT:"
 echo "$MEMORY_DISPLAY"
 
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+vector_store.py — Couche client unique Qdrant + Ollama (embeddings) pour IA/.
+
+Contexte (2026-10-18) : chaque module parlait à Qdrant à sa façon.
+bro/rag.py, skill_qdrant.py et bro_backfill.py construisaient un QdrantClient
+neuf à chaque appel et relisaient get_collections avant chaque upsert ;
+embed.py et les indexeurs admin/ia_db passaient par requests (un GET de
+collection à chaque indexation) ; memory_manager.py avait son propre pool
+keep-alive. Quatre lectures de QDRANT_API_KEY, autant de vérifications
+d'existence de collection, et aucune mesure de latence.
+
+Ici, une seule couche pour tout le processus :
+  - connexions HTTP/1.1 persistantes par (hôte, thread), Qdrant ET Ollama
+    (ex memory_manager._KeepAliveHTTP), remises à zéro dans un enfant forké ;
+  - réessai avec backoff exponentiel sur les pannes transitoires (connexion
+    refusée ou coupée, HTTP 429/502/503/504) — jamais sur un timeout, qui ne
+    ferait que multiplier l'attente ; un hôte qui vient d'épuiser ses
+    réessais est tenté une seule fois pendant DOWN_SEC (pas de backoff payé
+    à chaque message quand Qdrant est arrêté) ;
+  - existence des collections mémorisée (un GET par collection et par
+    processus, oubliée sur DELETE) ;
+  - upsert / retrieve / delete par lots, search_batch, scroll paginé ;
+  - embeddings Ollama /api/embed multi-input, servis par embed_cache ;
+  - latence de chaque appel agrégée par (service, opération) : appels,
+    erreurs, réessais, p50/p95 (seaux logarithmiques d'observability.py),
+    lisible par metrics() — exposée par bro_service.py --stats.
+
+API REST brute, sans qdrant_client : search/retrieve/scroll rendent les
+points Qdrant tels quels ({"id", "score", "payload", "vector"}). Stdlib
+uniquement. Les fonctions de haut niveau ne lèvent pas : {} / [] / 0 en cas
+de panne, avec le détail sur stderr (jamais avalé en silence).
+
+Usage :
+    python3 vector_store.py health          # Qdrant + Ollama, latence
+    python3 vector_store.py collections     # collections et nombre de points
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import http.client
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import embed_cache
+import observability
+
+
+def load_qdrant_api_key() -> str:
+    """Env var en priorité, sinon ~/.zen/ai-company/.env — Qdrant refuse toute
+    requête sans clé dès que la stack IA a été installée avec authentification."""
+    key = os.environ.get("QDRANT_API_KEY", "")
+    if key:
+        return key
+    try:
+        with open(os.path.expanduser("~/.zen/ai-company/.env")) as f:
+            for line in f:
+                if line.startswith("QDRANT_API_KEY="):
+                    return line.strip().split("=", 1)[1].strip('"').strip("'")
+    except Exception:
+        pass
+    return ""
+
+
+# ── Configuration (overridable via env) ──────────────────────────────────────
+QDRANT_URL     = os.environ.get("QDRANT_URL", "http://127.0.0.1:6333").rstrip("/")
+QDRANT_API_KEY = load_qdrant_api_key()
+OLLAMA_URL     = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434").rstrip("/")
+EMBED_MODEL    = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+VECTOR_SIZE    = int(os.environ.get("OLLAMA_EMBED_DIM", "768"))
+
+# Taille des lots : /api/embed, PUT /points, ids de retrieve/delete — au-delà,
+# un seul appel raté ferait perdre tout le lot.
+EMBED_BATCH  = int(os.environ.get("OLLAMA_EMBED_BATCH", "32"))
+UPSERT_BATCH = 256
+IDS_BATCH    = 512
+SCROLL_PAGE  = 256
+
+TIMEOUT     = 15
+RETRIES     = int(os.environ.get("VECTOR_STORE_RETRIES", "2"))
+BACKOFF_SEC = 0.25
+DOWN_SEC    = 10
+SLOW_MS     = float(os.environ.get("VECTOR_STORE_SLOW_MS", "0"))   # 0 = pas de log des appels lents
+
+_RETRY_STATUS = frozenset({429, 502, 503, 504})
+
+
+# ─────────────────────────────── transport ────────────────────────────────────
+
+class _KeepAlivePool:
+    """Connexions HTTP/1.1 persistantes, une par (hôte, thread).
+    urllib.request.urlopen ouvrait une connexion TCP neuve à chaque appel : un
+    simple #rec payait 3 à 5 handshakes (GET collection, embedding, PUT
+    points). Une connexion fermée côté serveur entre deux appels (idle
+    timeout) est rouverte UNE fois de façon transparente. Après un fork, l'enfant
+    repart sans connexion : une socket partagée avec le parent mélangerait les
+    réponses."""
+
+    _STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                     http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._local = threading.local()
+
+    def _conns(self) -> dict:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        return conns
+
+    def _drop(self, key) -> None:
+        conn = self._conns().pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, method: str, url: str, body: bytes = None,
+                headers: dict = None, timeout: float = None) -> tuple:
+        """Retourne (status, corps brut). Lève OSError/HTTPException si
+        l'hôte est injoignable (à gérer par l'appelant, cf. request())."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        timeout = timeout or self.timeout
+        for attempt in (0, 1):
+            conns = self._conns()
+            conn = conns.get(key)
+            if conn is None:
+                cls = (http.client.HTTPSConnection if parts.scheme == "https"
+                       else http.client.HTTPConnection)
+                conn = conns[key] = cls(parts.netloc, timeout=timeout)
+            elif conn.timeout != timeout:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except self._STALE_ERRORS:
+                self._drop(key)
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self._drop(key)
+                raise
+            if resp.will_close:
+                self._drop(key)
+            return resp.status, data
+        return 0, b""
+
+
+class _Metrics:
+    """Latence par (service, opération), en mémoire du processus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, key: str, ms: float, ok: bool, retries: int) -> None:
+        with self._lock:
+            m = self._ops.get(key)
+            if m is None:
+                m = self._ops[key] = {"count": 0, "errors": 0, "retries": 0,
+                                      "total_ms": 0.0, "max_ms": 0.0,
+                                      "buckets": [0] * observability._BUCKETS}
+            m["count"] += 1
+            m["errors"] += not ok
+            m["retries"] += retries
+            m["total_ms"] += ms
+            m["max_ms"] = max(m["max_ms"], ms)
+            m["buckets"][observability._bucket(ms)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ops = {k: dict(v, buckets=list(v["buckets"])) for k, v in self._ops.items()}
+        return {k: {"count": m["count"], "errors": m["errors"], "retries": m["retries"],
+                    "avg_ms": round(m["total_ms"] / m["count"], 1),
+                    "p50_ms": round(observability._percentile_ms(m["buckets"], m["count"], 0.50), 1),
+                    "p95_ms": round(observability._percentile_ms(m["buckets"], m["count"], 0.95), 1),
+                    "max_ms": round(m["max_ms"], 1)}
+                for k, m in sorted(ops.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+
+
+_POOL = _KeepAlivePool()
+_METRICS = _Metrics()
+_DOWN_UNTIL = {}          # netloc -> instant jusqu'auquel on ne réessaie plus
+_KNOWN_COLLECTIONS = set()
+_ENSURED = {}             # collection -> paramètres de ensure_collection (recréation)
+
+
+def _op_key(method: str, path: str) -> str:
+    """"qdrant POST points/search", "ollama embed"... — le nom de collection
+    est omis (une collection memory_{hex16} par utilisateur)."""
+    if path.startswith("/api/"):
+        return f"ollama {path[5:]}"
+    segs = [s for s in path.split("/") if s]
+    if len(segs) >= 2 and segs[0] == "collections":
+        return f"qdrant {method} {'/'.join(segs[2:]) or 'collection'}"
+    return f"http {method} {'/'.join(segs[:1]) or '/'}"
+
+
+def _headers(netloc: str, extra: dict = None) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if QDRANT_API_KEY and netloc == urllib.parse.urlsplit(QDRANT_URL).netloc:
+        headers["api-key"] = QDRANT_API_KEY
+    if extra:
+        headers.update(extra)
+    return headers
+
+
+def request(method: str, url: str, payload=None, timeout: float = None,
+            headers: dict = None) -> tuple:
+    """Appel brut : (status, corps). Réessaie les pannes transitoires avec
+    backoff exponentiel, mesure la latence totale (réessais compris). Lève
+    OSError/HTTPException si l'hôte reste injoignable."""
+    method = method.upper()
+    parts = urllib.parse.urlsplit(url)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    hdrs = _headers(parts.netloc, headers)
+    op = _op_key(method, parts.path)
+    retries = RETRIES if time.time() >= _DOWN_UNTIL.get(parts.netloc, 0) else 0
+    attempt = 0
+    t0 = time.monotonic()
+    while True:
+        try:
+            status, data = _POOL.request(method, url, body, hdrs, timeout)
+        except TimeoutError:
+            _METRICS.record(op, (time.monotonic() - t0) * 1000, False, attempt)
+            raise
+        except (OSError, http.client.HTTPException):
+            if attempt < retries:
+                time.sleep(BACKOFF_SEC * 2 ** attempt)
+                attempt += 1
+                continue
+            _DOWN_UNTIL[parts.netloc] = time.time() + DOWN_SEC
+            _METRICS.record(op, (time.monotonic() - t0) * 1000, False, attempt)
+            raise
+        if status in _RETRY_STATUS and attempt < retries:
+            time.sleep(BACKOFF_SEC * 2 ** attempt)
+            attempt += 1
+            continue
+        break
+    _DOWN_UNTIL.pop(parts.netloc, None)
+    ms = (time.monotonic() - t0) * 1000
+    _METRICS.record(op, ms, status < 400, attempt)
+    if SLOW_MS and ms >= SLOW_MS:
+        print(f"[vector_store] {op} lent : {ms:.0f} ms", file=sys.stderr)
+    if method == "DELETE" and status < 400:
+        segs = [s for s in parts.path.split("/") if s]
+        if len(segs) == 2 and segs[0] == "collections":
+            # Collection supprimée (ex: bro_node_reset.py) : l'oublier, sinon
+            # le prochain upsert la croirait présente.
+            _KNOWN_COLLECTIONS.discard(segs[1])
+    return status, data
+
+
+def curl(method: str, url: str, payload=None, timeout: float = None,
+         quiet: tuple = ()) -> dict:
+    """Appel JSON : corps décodé, ou {} sur toute panne (hôte injoignable,
+    HTTP >= 400, réponse non JSON). Échec BRUYANT sur stderr — toute panne
+    (Qdrant down, Ollama down, auth invalide, timeout) laisse un détail
+    exploitable dans les logs — sauf pour les statuts attendus de `quiet`
+    (ex: 404 d'une collection pas encore créée)."""
+    return _curl(method, url, payload, timeout, quiet)[1]
+
+
+def _curl(method: str, url: str, payload=None, timeout: float = None,
+          quiet: tuple = ()) -> tuple:
+    """curl() avec le statut HTTP : (statut, corps décodé) — statut 0 si
+    l'hôte est injoignable."""
+    method = method.upper()
+    try:
+        status, body = request(method, url, payload, timeout)
+    except Exception as e:
+        print(f"[vector_store] ⚠️ Échec {method} {url} : {e}", file=sys.stderr)
+        return 0, {}
+    if status >= 400:
+        if status not in quiet:
+            detail = body.decode("utf-8", errors="replace")[:200]
+            print(f"[vector_store] ⚠️ Échec {method} {url} (HTTP {status}) : {detail or '(pas de corps)'}",
+                  file=sys.stderr)
+        return status, {}
+    try:
+        return status, (json.loads(body) if body.strip() else {})
+    except ValueError as e:
+        print(f"[vector_store] ⚠️ Échec {method} {url} : réponse non JSON ({e})", file=sys.stderr)
+        return status, {}
+
+
+def metrics() -> dict:
+    """{"qdrant PUT points": {"count", "errors", "retries", "avg_ms",
+    "p50_ms", "p95_ms", "max_ms"}, ...} depuis le démarrage du processus."""
+    return _METRICS.snapshot()
+
+
+def reset_metrics() -> None:
+    _METRICS.reset()
+
+
+class Response:
+    """Réponse façon requests (ok, status_code, content, json())."""
+
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content) if self.content.strip() else {}
+
+
+class Session:
+    """Façade minimale de requests.Session (get/post/put/delete, json=,
+    timeout=) sur le pool partagé — pour le code écrit contre requests
+    (admin/ia_db). Une panne réseau donne une Response de status 0 au lieu
+    d'une exception."""
+
+    def __init__(self):
+        self.headers = {}
+
+    def request(self, method: str, url: str, json=None, timeout: float = None, **_):
+        try:
+            status, body = request(method, url, json, timeout, self.headers)
+        except Exception:
+            return Response(0, b"")
+        return Response(status, body)
+
+    def get(self, url, **kw):
+        return self.request("GET", url, **kw)
+
+    def post(self, url, **kw):
+        return self.request("POST", url, **kw)
+
+    def put(self, url, **kw):
+        return self.request("PUT", url, **kw)
+
+    def delete(self, url, **kw):
+        return self.request("DELETE", url, **kw)
+
+
+# ─────────────────────────────── collections ──────────────────────────────────
+
+def _col(name: str) -> str:
+    return f"{QDRANT_URL}/collections/{name}"
+
+
+def collection_info(name: str) -> dict:
+    """Bloc "result" de GET /collections/{name}, {} si absente."""
+    info = curl("GET", _col(name), quiet=(404,)).get("result") or {}
+    if info:
+        _KNOWN_COLLECTIONS.add(name)
+    return info
+
+
+def collection_exists(name: str) -> bool:
+    return name in _KNOWN_COLLECTIONS or bool(collection_info(name))
+
+
+def ensure_collection(name: str, size: int = VECTOR_SIZE, distance: str = "Cosine",
+                      **config) -> bool:
+    """Crée la collection si elle n'existe pas (idempotent). Existence
+    vérifiée par GET plutôt qu'un PUT à l'aveugle (409 sur une collection déjà
+    là), puis mémorisée : un seul GET par collection et par processus.
+    Les paramètres sont retenus pour la recréer si elle disparaît (cf.
+    _points)."""
+    _ENSURED[name] = dict(size=size, distance=distance, **config)
+    if collection_exists(name):
+        return True
+    body = {"vectors": {"size": size, "distance": distance}, **config}
+    if curl("PUT", _col(name), body, quiet=(409,)):
+        _KNOWN_COLLECTIONS.add(name)
+        return True
+    return collection_exists(name)     # créée entre-temps par un autre processus
+
+
+def forget_collection(name: str) -> None:
+    _KNOWN_COLLECTIONS.discard(name)
+
+
+def _points(method: str, collection: str, suffix: str = "", payload=None,
+            timeout: float = None, quiet: tuple = ()) -> dict:
+    """curl() sur /collections/{collection}/points{suffix}. Un 404 signifie
+    que la collection a disparu sous le cache _KNOWN_COLLECTIONS (supprimée
+    par un autre processus, Qdrant réinitialisé — 2026-10-18) : elle est
+    oubliée et, si ce processus l'avait créée via ensure_collection,
+    recréée avec les mêmes paramètres puis l'appel rejoué une fois."""
+    url = f"{_col(collection)}/points{suffix}"
+    status, result = _curl(method, url, payload, timeout, quiet + (404,))
+    if status != 404:
+        return result
+    _KNOWN_COLLECTIONS.discard(collection)
+    params = _ENSURED.get(collection)
+    if params is not None and ensure_collection(collection, **params):
+        return _curl(method, url, payload, timeout, quiet)[1]
+    if 404 not in quiet:
+        print(f"[vector_store] ⚠️ Échec {method.upper()} {url} (HTTP 404) : collection absente",
+              file=sys.stderr)
+    return {}
+
+
+def delete_collection(name: str) -> bool:
+    return bool(curl("DELETE", _col(name), quiet=(404,)))
+
+
+def list_collections() -> list:
+    cols = curl("GET", f"{QDRANT_URL}/collections").get("result", {}).get("collections", [])
+    return [c.get("name", "") for c in cols]
+
+
+# ─────────────────────────────── points ───────────────────────────────────────
+
+def upsert(collection: str, points: list, batch: int = UPSERT_BATCH) -> int:
+    """PUT /points par lots — points {"id", "vector", "payload"} ; retourne le
+    nombre de points acceptés par Qdrant (un lot en échec compte pour 0)."""
+    ok = 0
+    for start in range(0, len(points), batch):
+        chunk = points[start:start + batch]
+        if _points("PUT", collection, "", {"points": chunk}):
+            ok += len(chunk)
+    return ok
+
+
+def _search_body(vector, limit, score_threshold, query_filter, with_payload,
+                 with_vector) -> dict:
+    body = {"vector": vector, "limit": limit, "with_payload": with_payload}
+    if with_vector:
+        body["with_vector"] = True
+    if score_threshold is not None:
+        body["score_threshold"] = score_threshold
+    if query_filter:
+        body["filter"] = query_filter
+    return body
+
+
+def search(collection: str, vector: list, limit: int = 5, score_threshold: float = None,
+           query_filter: dict = None, with_payload=True, with_vector=False,
+           timeout: float = None) -> list:
+    """Points les plus proches (triés par score décroissant), [] si panne."""
+    body = _search_body(vector, limit, score_threshold, query_filter,
+                        with_payload, with_vector)
+    return _points("POST", collection, "/search", body,
+                   timeout=timeout).get("result") or []
+
+
+def search_batch(collection: str, searches: list) -> list:
+    """Plusieurs recherches en UN aller-retour (POST /points/search/batch).
+    `searches` : dicts d'arguments de search() (vector, limit,
+    score_threshold, query_filter...). Retourne une liste de résultats
+    alignée ([] pour chaque recherche si panne)."""
+    bodies = [_search_body(s["vector"], s.get("limit", 5), s.get("score_threshold"),
+                           s.get("query_filter"), s.get("with_payload", True),
+                           s.get("with_vector", False))
+              for s in searches]
+    result = _points("POST", collection, "/search/batch",
+                     {"searches": bodies}).get("result")
+    if not isinstance(result, list) or len(result) != len(searches):
+        return [[] for _ in searches]
+    return result
+
+
+def match_filter(**conditions) -> dict:
+    """Filtre Qdrant "must" d'égalités : match_filter(label="positive")."""
+    return {"must": [{"key": k, "match": {"value": v}} for k, v in conditions.items()]}
+
+
+def retrieve(collection: str, ids: list, with_payload=True, with_vector=False) -> list:
+    """Points par id (POST /points, par lots de IDS_BATCH) ; ids absents omis."""
+    out = []
+    for start in range(0, len(ids), IDS_BATCH):
+        r = _points("POST", collection, "", {
+            "ids": ids[start:start + IDS_BATCH],
+            "with_payload": with_payload, "with_vector": with_vector})
+        out.extend(r.get("result") or [])
+    return out
+
+
+def scroll(collection: str, query_filter: dict = None, with_payload=True,
+           with_vector=False, page: int = SCROLL_PAGE):
+    """Itère sur tous les points (pages de `page`) ; s'arrête sur une panne."""
+    offset = None
+    while True:
+        body = {"limit": page, "with_payload": with_payload, "with_vector": with_vector}
+        if query_filter:
+            body["filter"] = query_filter
+        if offset is not None:
+            body["offset"] = offset
+        result = _points("POST", collection, "/scroll", body).get("result") or {}
+        yield from result.get("points", [])
+        offset = result.get("next_page_offset")
+        if offset is None:
+            return
+
+
+def count(collection: str, query_filter: dict = None, exact: bool = True) -> int:
+    body = {"exact": exact}
+    if query_filter:
+        body["filter"] = query_filter
+    return _points("POST", collection, "/count", body,
+                   quiet=(404,)).get("result", {}).get("count", 0)
+
+
+def delete_points(collection: str, ids: list = None, query_filter: dict = None) -> bool:
+    """Supprime par ids (par lots de IDS_BATCH) ou par filtre."""
+    if query_filter is not None:
+        return bool(_points("POST", collection, "/delete", {"filter": query_filter}))
+    ok = True
+    for start in range(0, len(ids or []), IDS_BATCH):
+        ok = bool(_points("POST", collection, "/delete",
+                          {"points": ids[start:start + IDS_BATCH]})) and ok
+    return ok
+
+
+# ─────────────────────────────── embeddings ───────────────────────────────────
+
+# Par URL Ollama : absent = pas encore testé ; False = Ollama trop ancien (pas
+# de /api/embed, antérieur à 0.3.4) → repli définitif sur /api/embeddings.
+# Seul un 404/405 (route inconnue) le prouve : un timeout ou un 5xx sur le lot
+# n'est qu'une panne passagère, le lot suivant retente /api/embed.
+_EMBED_BATCH_SUPPORTED = {}
+_EMBED_UNKNOWN_ROUTE = (404, 405)
+
+
+def _embed_single(text: str, model: str, url: str) -> list:
+    return curl("POST", f"{url}/api/embeddings",
+                {"model": model, "prompt": text}).get("embedding", [])
+
+
+def _embed_many_uncached(texts: list, model: str, url: str) -> list:
+    out = [[] for _ in texts]
+    todo = [i for i, t in enumerate(texts) if t and t.strip()]
+    for start in range(0, len(todo), EMBED_BATCH):
+        idx = todo[start:start + EMBED_BATCH]
+        status = None
+        if _EMBED_BATCH_SUPPORTED.get(url) is not False:
+            status, body = _curl("POST", f"{url}/api/embed",
+                                 {"model": model, "input": [texts[i] for i in idx]},
+                                 quiet=_EMBED_UNKNOWN_ROUTE)
+            vecs = body.get("embeddings")
+            if vecs and len(vecs) == len(idx):
+                _EMBED_BATCH_SUPPORTED[url] = True
+                for i, v in zip(idx, vecs):
+                    out[i] = v
+                continue
+        for i in idx:
+            out[i] = _embed_single(texts[i], model, url)
+        if status in _EMBED_UNKNOWN_ROUTE and any(out[i] for i in idx):
+            # /api/embeddings répond mais pas /api/embed : Ollama ancien, pas
+            # une panne — inutile de retenter le lot à chaque appel.
+            _EMBED_BATCH_SUPPORTED[url] = False
+    return out
+
+
+def embed_many(texts: list, model: str = None, url: str = None) -> list:
+    """Embeddings d'une liste de textes : UN appel /api/embed par lot de
+    EMBED_BATCH, aucun pour un texte déjà embedé (embed_cache). Liste alignée
+    sur `texts` ([] pour un texte vide ou un échec, jamais d'exception)."""
+    model = model or EMBED_MODEL
+    url = (url or OLLAMA_URL).rstrip("/")
+    return embed_cache.cached_embed_many(
+        texts, model, lambda ts: _embed_many_uncached(ts, model, url))
+
+
+def embed(text: str, model: str = None, url: str = None) -> list:
+    return embed_many([text], model, url)[0]
+
+
+# ─────────────────────────────── CLI ──────────────────────────────────────────
+
+def _health() -> dict:
+    out = {}
+    for name, url in (("qdrant", f"{QDRANT_URL}/healthz"), ("ollama", f"{OLLAMA_URL}/api/tags")):
+        t0 = time.monotonic()
+        try:
+            status, _ = request("GET", url, timeout=3)
+            ok = status < 400
+        except Exception:
+            ok = False
+        out[name] = {"ok": ok, "ms": round((time.monotonic() - t0) * 1000, 1)}
+    out["qdrant"].update(url=QDRANT_URL, secured=bool(QDRANT_API_KEY))
+    out["ollama"].update(url=OLLAMA_URL, embed_model=EMBED_MODEL)
+    return out
+
+
+def main(argv):
+    if argv and argv[0] == "health":
+        health = _health()
+        print(json.dumps(health, indent=2))
+        return 0 if health["qdrant"]["ok"] else 1
+    if argv and argv[0] == "collections":
+        for name in sorted(list_collections()):
+            print(f"{name}\t{collection_info(name).get('points_count', 0)}")
+        return 0
+    print(__doc__.split("Usage :", 1)[1].rstrip(), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
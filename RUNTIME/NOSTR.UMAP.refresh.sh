@@ -201,6 +201,64 @@ log_always() {
     echo "$1"
 }
 
+## Clés NOSTR géographiques (UMAP, SECTOR, REGION) : dérivées de
+## ("${UPLANETNAME}<coord>", "${UPLANETNAME}<coord>"), demandées une
+## vingtaine de fois par zone et par cycle — chaque `keygen -t nostr` relançait
+## Python et scrypt. geokeys_prefetch dérive toutes les zones connues en UN
+## `keygen -b` (une dérivation par zone) ; geokey sert ensuite ce cache
+## (mémoire du shell uniquement, hérité par les $(...)) et retombe sur keygen
+## pour une zone absente (2026-10-18).
+declare -A GEOKEY_NPUB=() GEOKEY_NSEC=()
+
+geokeys_prefetch() {
+    (( $# )) || return 0
+    local -a pairs=("$@")
+    local i=0 npub nsec
+    while IFS=$'\t' read -r npub nsec; do
+        if [[ -n "$npub" && -n "$nsec" ]]; then
+            GEOKEY_NPUB["${pairs[$i]}"]="$npub"
+            GEOKEY_NSEC["${pairs[$i]}"]="$nsec"
+        fi
+        (( i++ ))
+    done < <(printf '%s\n' "${pairs[@]}" \
+        | ${MY_PATH}/../tools/keygen -b -J nostr -k 2>/dev/null \
+        | jq -r '[.nostr.npub // "", .nostr.nsec // ""] | @tsv')
+}
+
+# geokey SALT PEPPER [-s] — même sortie que `keygen -t nostr SALT PEPPER [-s]`
+geokey() {
+    local pair="$1"$'\t'"$2"
+    if [[ "$3" == "-s" && -n "${GEOKEY_NSEC[$pair]}" ]]; then
+        echo "${GEOKEY_NSEC[$pair]}"
+    elif [[ "$3" != "-s" && -n "${GEOKEY_NPUB[$pair]}" ]]; then
+        echo "${GEOKEY_NPUB[$pair]}"
+    else
+        ${MY_PATH}/../tools/keygen -t nostr "$1" "$2" ${3:+"$3"}
+    fi
+}
+
+# Paires de toutes les zones UMAP locales et de leurs SECTOR / REGION
+geokeys_prefetch_local() {
+    local -a pairs=()
+    local -A seen=()
+    local hexfile dir lat lon zone pair
+    for hexfile in ~/.zen/game/nostr/UMAP_*_*/HEX; do
+        [[ -f "$hexfile" ]] || continue
+        dir="${hexfile%/HEX}"; dir="${dir##*/UMAP_}"
+        lat=$(makecoord "${dir%%_*}"); lon=$(makecoord "${dir#*_}")
+        [[ -z "$lat" || -z "$lon" ]] && continue
+        for pair in "${UPLANETNAME}${lat}"$'\t'"${UPLANETNAME}${lon}" \
+                    "${UPLANETNAME}_${lat::-1}_${lon::-1}"$'\t'"${UPLANETNAME}_${lat::-1}_${lon::-1}" \
+                    "${UPLANETNAME}_${lat%%.*}_${lon%%.*}"$'\t'"${UPLANETNAME}_${lat%%.*}_${lon%%.*}"; do
+            [[ -n "${seen[$pair]}" ]] && continue
+            seen[$pair]=1
+            pairs+=("$pair")
+        done
+    done
+    geokeys_prefetch "${pairs[@]}"
+    log "🔑 ${#GEOKEY_NSEC[@]}/${#pairs[@]} clés géographiques dérivées en un passage"
+}
+
 ## Validate that a CID points to a valid image (JPEG or PNG)
 ## Returns 0 if valid image, 1 if invalid/corrupted
 validate_image_cid() {
@@ -384,7 +442,7 @@ process_umap_friends() {
     local UMAPDIR=$3  # Source directory of UMAP
 
     # Initialize NPRIV_HEX early for this UMAP using global coordinates
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
     local NPRIV_HEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$UMAPNSEC")
 
     local friends=($($MY_PATH/../tools/nostr_get_N1.sh $hex 2>/dev/null))
@@ -469,7 +527,7 @@ process_umap_opportunities() {
     touch "$opp_marker"
 
     # Publish as kind 30023 blog article on UMAP identity
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s 2>/dev/null)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s 2>/dev/null)
     [[ -z "$UMAPNSEC" ]] && return 0
 
     local opp_title="Économie circulaire – UMAP ${LAT},${LON}"
@@ -717,7 +775,7 @@ handle_inactive_friend() {
     local GOODBYE_MSG="👋 nostr:$profile ! It seems you've been inactive for a while. I remove you from my GeoKey list, but you're welcome to reconnect anytime! #UPlanet #Community"
     
     # Regenerate UMAPNSEC for keyfile
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
     
     # Send using nostr_send_note.py
     send_nostr_event_py "$UMAPNSEC" "$GOODBYE_MSG" "1" "[[\"p\", \"$ami\"]]" "$myRELAY"
@@ -754,7 +812,7 @@ send_reminder_message() {
     local REMINDER_MSG="👋 nostr:$profile ! Haven't seen you around lately. How are you doing? Feel free to share your thoughts or updates! #UPlanet #Community"
     
     # Regenerate UMAPNSEC for keyfile
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
     
     # Send using nostr_send_note.py
     send_nostr_event_py "$UMAPNSEC" "$REMINDER_MSG" "1" "[[\"p\", \"$ami\"]]" "$myRELAY"
@@ -1206,7 +1264,7 @@ generate_umap_index() {
     local RLON=$(echo ${LON} | cut -d '.' -f 1)
     
     # Get UMAP Nostr keys (npub and hex)
-    local UMAPNPUB=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}")
+    local UMAPNPUB=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}")
     local UMAPHEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "${UMAPNPUB}" 2>/dev/null)
     
     if [[ -z "$UMAPNPUB" || -z "$UMAPHEX" ]]; then
@@ -1314,7 +1372,7 @@ cleanup_old_documents() {
                 # Send using nostr_send_note.py
                 send_nostr_event_py "$NPRIV_HEX" "$notification" "1" "[[\"p\", \"$author\"]]" "$myRELAY" 2>/dev/null || {
                     # If NPRIV_HEX is actually HEX instead of NSEC, regenerate NSEC from UMAP coordinates
-                    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+                    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
                     send_nostr_event_py "$UMAPNSEC" "$notification" "1" "[[\"p\", \"$author\"]]" "$myRELAY" 2>/dev/null
                 }
             fi
@@ -1476,7 +1534,7 @@ cleanup_inventory_without_likes() {
                 local notification="🌱 nostr:$author_nprofile Votre observation (inventaire/plantnet) n'a pas reçu de like depuis 28 jours et sera archivée. Republiez si toujours pertinent! #UPlanet #inventory"
                 
                 # Regenerate UMAPNSEC for sending notification
-                local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+                local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
                 
                 # Send with 24h expiration (86400 seconds)
                 send_nostr_event_py "$UMAPNSEC" "$notification" "1" "[[\"p\", \"$msg_pubkey\"]]" "$myRELAY" "86400" 2>/dev/null
@@ -1535,7 +1593,7 @@ setup_umap_identity() {
     TAGS_JSON="[$TAGS_JSON]"
 
     # Get NPRIV_HEX from the calling context
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
     local NPRIV_HEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$UMAPNSEC")
     
     send_nostr_events "$NPRIV_HEX" "$TAGS_JSON" "$UMAPPATH"
@@ -1547,7 +1605,7 @@ send_nostr_events() {
     local UMAPPATH=$3
 
     # Regenerate UMAPNSEC for keyfile (since NPRIV_HEX might be HEX, not NSEC)
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
     
     # Send kind 3 (contacts) using nostr_send_note.py
     send_nostr_event_py "$UMAPNSEC" "" "3" "$TAGS_JSON" "$myRELAY"
@@ -1617,7 +1675,7 @@ send_nostr_events() {
             local published_at=$(date +%s)
             
             # Regenerate UMAPNSEC for keyfile (same method as setup_umap_identity)
-            local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+            local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
             local UMAP_HEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$UMAPNSEC")
             
             # Check if journal already exists (prevent duplicates in swarm)
@@ -1656,7 +1714,7 @@ send_nostr_events() {
                     ipfs pin rm "$old_umap_previous_to_unpin" 2>/dev/null && log "📌 Unpinned old UMAP CID (dropped from chain): ${old_umap_previous_to_unpin:0:20}..." || true
                 fi
                 # Publish UMAP DID (kind 30800) per NIP-28 - ipfsChain for discovery and chain of information
-                local UMAP_NPUB=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}")
+                local UMAP_NPUB=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}")
                 local UMAP_HEX_DID=$(${MY_PATH}/../tools/nostr2hex.py "$UMAP_NPUB")
                 if [[ -n "$UMAP_HEX_DID" ]]; then
                     local umap_did_content
@@ -1786,7 +1844,7 @@ diffuse_sector_g1_opportunities() {
     fi
 
     # Publish blog article (kind 30023) on SECTOR Nostr identity
-    local SECTORNSEC=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}" -s 2>/dev/null)
+    local SECTORNSEC=$(geokey "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}" -s 2>/dev/null)
     [[ -z "$SECTORNSEC" ]] && return 0
 
     local g1_title="G1 opportunities - ${sector}"
@@ -1894,7 +1952,7 @@ republish_umap_commons() {
             ]')
 
         local UMAPNSEC temp_keyfile
-        UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+        UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
         temp_keyfile=$(mktemp)
         echo "NSEC=$UMAPNSEC;" > "$temp_keyfile"
 
@@ -2485,8 +2543,8 @@ save_sector_journal() {
     echo "$ANSWER" > $sectorpath/${IPFSNODEID: -12}.NOSTR_journal
 
     # Get SECTOR NOSTR HEX for image lookup
-    local SECTORNSEC=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}" -s)
-    local SECTOR_NPUB=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}")
+    local SECTORNSEC=$(geokey "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}" -s)
+    local SECTOR_NPUB=$(geokey "${UPLANETNAME}${sector}" "${UPLANETNAME}${sector}")
     local SECTOR_HEX=$(${MY_PATH}/../tools/nostr2hex.py "$SECTOR_NPUB")
 
     # Generate sector images (NOSTR-native: returns CIDs, no local storage)
@@ -2642,9 +2700,9 @@ update_sector_nostr_profile() {
     $(${MY_PATH}/../tools/getUMAP_ENV.sh "${slat}0" "${slon}0" | tail -n 1)
     RTAGS+=("[\"p\", \"$REGIONHEX\", \"$myRELAY\", \"$REGION\"]")
 
-    local SECTORNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${SECTOR}" "${UPLANETNAME}${SECTOR}" -s)
+    local SECTORNSEC=$(geokey "${UPLANETNAME}${SECTOR}" "${UPLANETNAME}${SECTOR}" -s)
     local NPRIV_HEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$SECTORNSEC")
-    local SECTOR_NPUB=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${SECTOR}" "${UPLANETNAME}${SECTOR}")
+    local SECTOR_NPUB=$(geokey "${UPLANETNAME}${SECTOR}" "${UPLANETNAME}${SECTOR}")
     local SECTOR_HEX=$(${MY_PATH}/../tools/nostr2hex.py "$SECTOR_NPUB")
     local sector_lat=$(echo "scale=1; $slat + 0.05" | bc -l 2>/dev/null || echo "${slat}")
     local sector_lon=$(echo "scale=1; $slon + 0.05" | bc -l 2>/dev/null || echo "${slon}")
@@ -2960,7 +3018,7 @@ save_region_journal() {
     echo "$content" > "$regionpath/${IPFSNODEID: -12}.NOSTR_journal"
 
     # Get REGION NOSTR HEX for image lookup
-    local REGION_NPUB=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${region}" "${UPLANETNAME}${region}")
+    local REGION_NPUB=$(geokey "${UPLANETNAME}${region}" "${UPLANETNAME}${region}")
     local REGION_HEX=$(${MY_PATH}/../tools/nostr2hex.py "$REGION_NPUB")
 
     # Generate region images (NOSTR-native: returns CIDs, no local storage)
@@ -3086,9 +3144,9 @@ update_region_nostr_profile() {
     local rlon=$(echo ${region} | cut -d '_' -f 3)
 
     $(${MY_PATH}/../tools/getUMAP_ENV.sh "${rlat}.00" "${rlon}.00" | tail -n 1) ## Get UMAP ENV for REGION = export REGIONHEX...
-    local REGSEC=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${region}" "${UPLANETNAME}${region}" -s)
+    local REGSEC=$(geokey "${UPLANETNAME}${region}" "${UPLANETNAME}${region}" -s)
     local NPRIV_HEX=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$REGSEC")
-    local REGION_NPUB=$(${MY_PATH}/../tools/keygen -t nostr "${UPLANETNAME}${region}" "${UPLANETNAME}${region}")
+    local REGION_NPUB=$(geokey "${UPLANETNAME}${region}" "${UPLANETNAME}${region}")
     local REGION_HEX=$(${MY_PATH}/../tools/nostr2hex.py "$REGION_NPUB")
     local region_lat=$(echo "scale=1; $rlat + 0.5" | bc -l 2>/dev/null || echo "${rlat}")
     local region_lon=$(echo "scale=1; $rlon + 0.5" | bc -l 2>/dev/null || echo "${rlon}")
@@ -3211,7 +3269,7 @@ update_friends_list() {
     local friends=("$@")
 
     # Get UPlanet UMAP NSEC with LAT and LON
-    local UMAPNSEC=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
+    local UMAPNSEC=$(geokey "${UPLANETNAME}${LAT}" "${UPLANETNAME}${LON}" -s)
 
     # Update friends list using nostr_follow.sh
     if [[ ${#friends[@]} -gt 0 ]]; then
@@ -3304,7 +3362,7 @@ process_atom4love_welcomes() {
             continue
         fi
 
-        _umap_nsec=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr \
+        _umap_nsec=$(geokey \
             "${UPLANETNAME}${_fmt_lat}" "${UPLANETNAME}${_fmt_lon}" -s 2>/dev/null)
         [[ -z "$_umap_nsec" ]] && continue
 
@@ -3327,6 +3385,9 @@ main() {
     check_dependencies
     display_banner
 
+    # Clés UMAP / SECTOR / REGION du cycle : une dérivation par zone
+    geokeys_prefetch_local
+
     BLACKLIST_FILE="${HOME}/.zen/strfry/blacklist.txt"
     AMISOFAMIS_FILE="${HOME}/.zen/strfry/amisOfAmis.txt"
 
@@ -3448,7 +3509,7 @@ publish_ore_verification_meeting() {
     log "🌱 Publishing ORE Verification Meeting (kind 30313) for UMAP (${lat}, ${lon})"
     
     # Generate UMAP hex key for room reference
-    local umap_npub=$($HOME/.zen/Astroport.ONE/tools/keygen -t nostr "${UPLANETNAME}${lat}" "${UPLANETNAME}${lon}")
+    local umap_npub=$(geokey "${UPLANETNAME}${lat}" "${UPLANETNAME}${lon}")
     local umap_hex=$($HOME/.zen/Astroport.ONE/tools/nostr2hex.py "$umap_npub")
     
     # Create ORE Verification Meeting event (kind 30313)
@@ -41,6 +41,47 @@ log_metric() {
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] [$$] [METRIC] [$player] $metric=$value" >> "$LOGFILE"
 }
 
+## Conversions v1 → SS58 du cycle (2026-10-18) : .secret.dunikey, G1PUBNOSTR
+## et .g1pub de chaque membre lançaient chacun un python3 g1pub_to_ss58.py.
+## ss58_prefetch les convertit toutes en UN `g1pub_to_ss58.py --stdin` (une
+## ligne en sortie par ligne en entrée) ; to_ss58 sert ce cache et retombe
+## sur l'appel unitaire pour une clé inconnue (dunikey reconstruite...).
+declare -A SS58_OF=()
+ss58_prefetch() {
+    (( $# )) || return 0
+    local -a keys=("$@")
+    local i=0 ss58
+    while IFS= read -r ss58; do
+        [[ -n "$ss58" ]] && SS58_OF["${keys[$i]}"]="$ss58"
+        (( i++ ))
+    done < <(printf '%s\n' "${keys[@]}" \
+        | python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" --stdin 2>/dev/null)
+}
+
+# to_ss58 KEY — même sortie que `g1pub_to_ss58.py KEY 2>/dev/null`
+to_ss58() {
+    [[ -z "$1" ]] && return 0
+    if [[ -n "${SS58_OF[$1]}" ]]; then
+        echo "${SS58_OF[$1]}"
+    else
+        python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" "$1" 2>/dev/null
+    fi
+}
+
+# Clés de tous les membres traités par ce run
+ss58_prefetch_players() {
+    local -a keys=()
+    local player key
+    for player in "$@"; do
+        for key in "$(cat "${HOME}/.zen/game/nostr/${player}/G1PUBNOSTR" 2>/dev/null)" \
+                   "$(cat "${HOME}/.zen/game/players/${player}/.g1pub" 2>/dev/null)" \
+                   "$(grep -E '^pub:' "${HOME}/.zen/game/nostr/${player}/.secret.dunikey" 2>/dev/null | awk '{print $2}')"; do
+            [[ -n "$key" ]] && keys+=("$key")
+        done
+    done
+    ss58_prefetch "${keys[@]}"
+}
+
 # Régénère ~/.zen/game/nostr/$player/.secret.dunikey si absent OU incompatible,
 # en le validant contre G1PUBNOSTR (source de vérité déjà créditée), formule
 # PEPPER_UPLANET_SALT (seule formule actuelle, cf. make_NOSTRCARD.sh — wallet
@@ -69,7 +110,7 @@ ensure_player_dunikey() {
     if [[ -s "$dunikey" ]]; then
         local existing_v1 existing_ss58
         existing_v1=$(grep -E '^pub:' "$dunikey" 2>/dev/null | awk '{print $2}')
-        existing_ss58=$(python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" "$existing_v1" 2>/dev/null)
+        existing_ss58=$(to_ss58 "$existing_v1")
         if [[ -z "$g1pubnostr_ref" ]] || [[ "$existing_ss58" == "$g1pubnostr_ref" ]] || [[ "$existing_v1" == "$g1pubnostr_ref" ]]; then
             return 0
         fi
@@ -84,7 +125,7 @@ ensure_player_dunikey() {
     tmp=$(mktemp)
     "${MY_PATH}/../tools/keygen" -t duniter -o "$tmp" "${salt}" "${pepper}_${uplanet_salt}" 2>/dev/null
     candidate_v1=$(grep -E '^pub:' "$tmp" 2>/dev/null | awk '{print $2}')
-    candidate_ss58=$(python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" "$candidate_v1" 2>/dev/null)
+    candidate_ss58=$(to_ss58 "$candidate_v1")
 
     if [[ -z "$g1pubnostr_ref" ]] || [[ "$candidate_ss58" == "$g1pubnostr_ref" ]] || [[ "$candidate_v1" == "$g1pubnostr_ref" ]]; then
         mv "$tmp" "$dunikey"
@@ -493,6 +534,9 @@ _send_player_email() {
     [[ -n "$_flag" ]] && echo "${TODATE}" > "$_flag"
 }
 
+## Adresses SS58 de tous les membres du run, en une conversion
+ss58_prefetch_players "${NOSTR[@]}"
+
 ## RUNING FOR ALL LOCAL MULTIPASS (MULTIPASS)
 for PLAYER in "${NOSTR[@]}"; do
 
@@ -1195,9 +1239,9 @@ ${tva_result}"
         G1V2ADDRESS=""
         ZENCARDG1_V2=""
         if [[ -x "${MY_PATH}/../tools/g1pub_to_ss58.py" ]]; then
-            G1V2ADDRESS=$(python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" "$G1PUBNOSTR" 2>/dev/null)
+            G1V2ADDRESS=$(to_ss58 "$G1PUBNOSTR")
             [[ -z "$G1V2ADDRESS" ]] && G1V2ADDRESS="$G1PUBNOSTR"
-            [[ -n "$ZENCARDG1" ]] && ZENCARDG1_V2=$(python3 "${MY_PATH}/../tools/g1pub_to_ss58.py" "$ZENCARDG1" 2>/dev/null)
+            [[ -n "$ZENCARDG1" ]] && ZENCARDG1_V2=$(to_ss58 "$ZENCARDG1")
             [[ -n "$ZENCARDG1" && -z "$ZENCARDG1_V2" ]] && ZENCARDG1_V2="$ZENCARDG1"
         else
             G1V2ADDRESS="$G1PUBNOSTR"
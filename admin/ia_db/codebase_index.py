@@ -4,20 +4,36 @@ codebase_index.py — Mémoire vectorielle du code source (Qdrant + nomic-embed-
 
 Modes :
   --index        Indexer / réindexer les fichiers du codebase
-  --incremental  Réindexer seulement les fichiers modifiés (mtime)
+  --incremental  Réindexer seulement les fichiers modifiés (empreinte de contenu)
   --search TEXT  Recherche sémantique (output: score<TAB>path, un par ligne)
   --snapshot     Créer un snapshot Qdrant et le publier sur IPFS
   --restore CID  Restaurer depuis un snapshot IPFS (via gateway locale)
   --reset        Supprimer et recréer la collection avant indexation
   --stats        Afficher les statistiques de la collection
+  --bench        Débit du pipeline (fichiers/s, chunks/s) — sans écrire dans Qdrant
+
+Pipeline (2026-10-18) : chaque fichier était embedé en UN point limité à ses
+MAX_CHARS premiers caractères (la fin des gros scripts restait invisible à la
+recherche), un appel HTTP par upsert, et l'incrémental comparait les mtime —
+un `git checkout` ré-embedait tout. Désormais :
+  parcours → découpage en chunks (fonctions / sections, avec recouvrement)
+  → dédup par sha256 contre un manifeste disque (fichier inchangé : rien ;
+  chunk inchangé : rien) → embeddings par lots /api/embed sur EMBED_JOBS
+  requêtes en parallèle (bornées) → upserts par lots, suppression des chunks
+  périmés (fichier modifié ou supprimé).
+Un point = un chunk ; son id dérive de (chemin, contenu du chunk), son payload
+garde "path"/"preview" (lus par nextcloud_bro_sync.sh) + start_line/end_line.
 
 Variables d'environnement :
   QDRANT_URL      http://127.0.0.1:6333
-  QDRANT_API_KEY  (optionnel — clé API Qdrant si configurée)
-  OLLAMA_URL      http://localhost:11434
+  QDRANT_API_KEY  (optionnel — sinon lue dans ~/.zen/ai-company/.env)
+  OLLAMA_URL      http://127.0.0.1:11434
   EMBED_MODEL     nomic-embed-text
   IPFS_GATEWAY    http://localhost:8080
   CODEBASE_ROOT   ~/workspace/AAA
+  CODEBASE_EMBED_JOBS   requêtes d'embedding simultanées (défaut 2)
+  CODEBASE_EMBED_BATCH  textes par requête /api/embed (défaut 32)
+  CODEBASE_MANIFEST     ~/.zen/flashmem/codebase_index/manifest.json
 """
 
 # Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
@@ -29,6 +45,7 @@ if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
 del _sys, _os
 
 import os
+import re
 import sys
 import json
 import time
@@ -36,50 +53,31 @@ import hashlib
 import argparse
 import subprocess
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    import requests
-except ImportError:
-    # Fallback urllib (toujours disponible)
-    import urllib.request
-    import urllib.error
-
-    class _FakeResp:
-        def __init__(self, data, status):
-            self._data = data
-            self.status_code = status
-        def ok(self): return 200 <= self.status_code < 300
-        def json(self): return json.loads(self._data)
-
-    class _Session:
-        def _call(self, method, url, **kw):
-            data = json.dumps(kw.get("json", kw.get("data", {}))).encode()
-            headers = {"Content-Type": "application/json"}
-            req = urllib.request.Request(url, data=data, headers=headers, method=method.upper())
-            try:
-                with urllib.request.urlopen(req, timeout=kw.get("timeout", 30)) as r:
-                    body = r.read()
-                    return type("R", (), {"ok": True, "status_code": r.status, "json": lambda: json.loads(body), "_data": body})()
-            except urllib.error.HTTPError as e:
-                return type("R", (), {"ok": False, "status_code": e.code, "json": lambda: {}, "_data": b""})()
-            except Exception:
-                return type("R", (), {"ok": False, "status_code": 0, "json": lambda: {}, "_data": b""})()
-        def get(self, url, **kw):  return self._call("GET",    url, **kw)
-        def post(self, url, **kw): return self._call("POST",   url, **kw)
-        def put(self, url, **kw):  return self._call("PUT",    url, **kw)
-        def delete(self, url, **kw): return self._call("DELETE", url, **kw)
-
-    requests = type("requests", (), {"Session": _Session})()
+# Client HTTP Qdrant/Ollama partagé avec IA/ (IA/vector_store.py : pool
+# keep-alive, clé API, réessais, métriques) et cache disque des embeddings
+# (IA/embed_cache.py).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "IA"))
+import vector_store
+import embed_cache
 
 # ── Configuration ─────────────────────────────────────────────────────────────
-QDRANT_URL     = os.getenv("QDRANT_URL",     "http://127.0.0.1:6333")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-OLLAMA_URL     = os.getenv("OLLAMA_URL",     "http://localhost:11434")
+QDRANT_URL     = vector_store.QDRANT_URL
+OLLAMA_URL     = vector_store.OLLAMA_URL
 EMBED_MODEL  = os.getenv("EMBED_MODEL",  "nomic-embed-text")
 IPFS_GATEWAY = os.getenv("IPFS_GATEWAY", "http://localhost:8080")
 COLLECTION   = "codebase"
 VECTOR_SIZE  = 768   # nomic-embed-text:latest (matryoshka 768-dim)
-MAX_CHARS    = 2000  # chars par fichier — limite tokens nomic-embed-text (2048t)
+MAX_CHARS    = 2000  # chars par texte embedé — limite tokens nomic-embed-text (2048t)
+CHUNK_CHARS   = 1600  # corps d'un chunk (l'en-tête Fichier/Projet complète jusqu'à MAX_CHARS)
+CHUNK_OVERLAP = 4     # lignes du chunk précédent reprises en tête du suivant
+EMBED_JOBS    = int(os.getenv("CODEBASE_EMBED_JOBS", "2"))
+EMBED_BATCH   = int(os.getenv("CODEBASE_EMBED_BATCH", "32"))
+UPSERT_BATCH  = 128
+MANIFEST_PATH = Path(os.getenv("CODEBASE_MANIFEST",
+                               "~/.zen/flashmem/codebase_index/manifest.json")).expanduser()
 
 WORKSPACE_DEFAULT = str(Path.home() / "workspace" / "AAA")
 
@@ -99,30 +97,47 @@ SKIP_DIRS = frozenset({
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _session():
-    try:
-        s = requests.Session()
-    except Exception:
-        s = requests.Session()
-    if QDRANT_API_KEY:
-        s.headers.update({"api-key": QDRANT_API_KEY})
-    return s
+    """Façade requests sur le client partagé vector_store (clé API ajoutée
+    pour l'hôte Qdrant, une connexion persistante par thread d'embedding)."""
+    return vector_store.Session()
 
 
 def get_embedding(session, text: str) -> list | None:
+    text = text[:MAX_CHARS]
+    return embed_cache.cached_embed(
+        text, EMBED_MODEL, lambda t: _ollama_embedding(session, t))
+
+
+def _ollama_embedding(session, text: str) -> list | None:
+    return _ollama_embed_many(session, [text])[0]
+
+
+def _ollama_embed_many(session, texts: list) -> list:
+    """Un seul appel /api/embed pour tout le lot — liste alignée sur `texts`
+    (None partout si l'appel échoue)."""
     try:
         r = session.post(
             f"{OLLAMA_URL}/api/embed",
-            json={"model": EMBED_MODEL, "input": text[:MAX_CHARS]},
-            timeout=30,
+            json={"model": EMBED_MODEL, "input": texts},
+            timeout=30 + 5 * len(texts),
         )
         if r.ok:
             data = r.json()
             emb = data.get("embeddings") or data.get("embedding")
             if emb:
-                return emb[0] if isinstance(emb[0], list) else emb
+                if not isinstance(emb[0], list):
+                    emb = [emb]
+                if len(emb) == len(texts):
+                    return emb
     except Exception as e:
         print(f"  [EMBED] {e}", file=sys.stderr)
-    return None
+    return [None] * len(texts)
+
+
+def embed_batch(session, texts: list) -> list:
+    texts = [t[:MAX_CHARS] for t in texts]
+    return embed_cache.cached_embed_many(
+        texts, EMBED_MODEL, lambda ts: _ollama_embed_many(session, ts))
 
 
 def path_to_uuid(rel_path: str) -> str:
@@ -130,6 +145,82 @@ def path_to_uuid(rel_path: str) -> str:
     return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{h[16:20]}-{h[20:32]}"
 
 
+def chunk_id(rel_path: str, body: str, occurrence: int = 0) -> str:
+    """Id de point stable : même chemin + même contenu → même point
+    (`occurrence` distingue les chunks identiques d'un même fichier)."""
+    return path_to_uuid(f"{rel_path}\0{hashlib.sha256(body.encode()).hexdigest()}\0{occurrence}")
+
+
+# ── Découpage ─────────────────────────────────────────────────────────────────
+
+# Lignes qui ouvrent une unité logique (fonction, classe, section commentée) :
+# on coupe de préférence juste avant elles.
+_BOUNDARY = {
+    "py":   re.compile(r"^(async\s+def|def|class)\s|^# ──|^# ==="),
+    "sh":   re.compile(r"^(function\s+[\w:.-]+|[\w:.-]+\s*\(\)\s*\{?\s*$)|^#{3,}|^# ──|^# ==="),
+    "js":   re.compile(r"^(export\s+)?(async\s+)?(function|class)\s"
+                       r"|^(export\s+)?(const|let|var)\s+\w+\s*=\s*(async\s*)?(\(|function)|^// ──"),
+    "html": re.compile(r"^\s*<(script|style|section|header|footer|main|nav|body|head)\b", re.I),
+    "css":  re.compile(r"^(/\*|@media|@keyframes|\S[^{]*\{\s*$)"),
+}
+
+
+def chunk_text(content: str, ext: str) -> list:
+    """[(première_ligne, dernière_ligne, corps)] — unités logiques regroupées
+    jusqu'à CHUNK_CHARS, unités trop longues découpées par fenêtres ; chaque
+    chunk reprend les CHUNK_OVERLAP dernières lignes du précédent. Lignes
+    numérotées à partir de 1."""
+    # Lignes géantes (JS minifié...) : découpées pour rester sous CHUNK_CHARS,
+    # chaque morceau gardant le numéro de sa ligne d'origine
+    lines, lineno = [], []
+    for n, ln in enumerate(content.splitlines(keepends=True), 1):
+        while len(ln) > CHUNK_CHARS:
+            lines.append(ln[:CHUNK_CHARS])
+            lineno.append(n)
+            ln = ln[CHUNK_CHARS:]
+        lines.append(ln)
+        lineno.append(n)
+    if not lines:
+        return []
+    pattern = _BOUNDARY.get(ext)
+    starts = [0] + [i for i, ln in enumerate(lines) if i and pattern and pattern.match(ln)]
+    units = [(a, b) for a, b in zip(starts, starts[1:] + [len(lines)])]
+
+    chunks, cur_a, cur_b, size = [], None, None, 0
+
+    def emit(a, b):
+        lo = max(0, a - CHUNK_OVERLAP) if chunks else a
+        body = "".join(lines[lo:b])
+        while len(body) > CHUNK_CHARS and lo < a:     # recouvrement rogné au besoin
+            lo += 1
+            body = "".join(lines[lo:b])
+        chunks.append((lineno[lo], lineno[b - 1], body))
+
+    for a, b in units:
+        unit_size = sum(len(ln) for ln in lines[a:b])
+        if cur_a is not None and size + unit_size > CHUNK_CHARS:
+            emit(cur_a, cur_b)
+            cur_a = None
+        if unit_size > CHUNK_CHARS:
+            # Unité trop longue : fenêtres de lignes successives
+            i = a
+            while i < b:
+                j, acc = i, 0
+                while j < b and acc + len(lines[j]) <= CHUNK_CHARS - 200:
+                    acc += len(lines[j])
+                    j += 1
+                j = max(j, i + 1)
+                emit(i, j)
+                i = j
+            continue
+        if cur_a is None:
+            cur_a, size = a, 0
+        cur_b, size = b, size + unit_size
+    if cur_a is not None:
+        emit(cur_a, cur_b)
+    return [c for c in chunks if c[2].strip()]
+
+
 def ensure_collection(session, reset: bool = False) -> bool:
     if reset:
         session.delete(f"{QDRANT_URL}/collections/{COLLECTION}", timeout=10)
@@ -158,42 +249,57 @@ def ensure_collection(session, reset: bool = False) -> bool:
     return False
 
 
-def upsert_file(session, file_path: Path, rel_path: str, project: str) -> bool:
+def _points_count(session) -> int:
     try:
-        content = file_path.read_text(errors="replace")
+        r = session.get(f"{QDRANT_URL}/collections/{COLLECTION}", timeout=5)
+        return r.json().get("result", {}).get("points_count", 0) if r.ok else 0
     except Exception:
-        return False
-
-    text   = f"Fichier: {rel_path}\nProjet: {project}\n\n{content[:MAX_CHARS]}"
-    vector = get_embedding(session, text)
-    if vector is None:
-        return False
+        return 0
 
-    mtime   = int(file_path.stat().st_mtime)
-    size    = file_path.stat().st_size
-    payload = {
-        "path":    rel_path,
-        "project": project,
-        "ext":     file_path.suffix.lstrip("."),
-        "mtime":   mtime,
-        "size":    size,
-        "preview": content[:300],
-    }
 
-    r = session.put(
-        f"{QDRANT_URL}/collections/{COLLECTION}/points",
-        json={"points": [{"id": path_to_uuid(rel_path), "vector": vector, "payload": payload}]},
-        timeout=15,
-    )
-    return bool(r.ok)
+def _upsert_points(session, points: list) -> bool:
+    try:
+        r = session.put(
+            f"{QDRANT_URL}/collections/{COLLECTION}/points",
+            json={"points": points},
+            timeout=60,
+        )
+        return bool(r.ok)
+    except Exception as e:
+        print(f"  [UPSERT] {e}", file=sys.stderr)
+        return False
 
 
-def load_existing_mtimes(session) -> dict:
-    """Charger les mtimes existants pour la mise à jour incrémentale."""
-    existing = {}
+def _delete_points(session, ids: list) -> bool:
+    ok = True
+    for i in range(0, len(ids), 512):
+        try:
+            r = session.post(
+                f"{QDRANT_URL}/collections/{COLLECTION}/points/delete",
+                json={"points": ids[i:i + 512]},
+                timeout=30,
+            )
+            ok = ok and bool(r.ok)
+        except Exception as e:
+            print(f"  [DELETE] {e}", file=sys.stderr)
+            ok = False
+    return ok
+
+
+def load_manifest(session) -> dict:
+    """Manifeste {chemin: {"sha": sha256 du fichier, "chunks": {id: [l1, l2]}}}.
+    Absent (première exécution, collection restaurée depuis IPFS) → reconstruit
+    depuis les payloads Qdrant : sans "sha", chaque fichier sera relu une fois,
+    et les anciens points un-par-fichier remplacés par ses chunks."""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    manifest = {}
     offset   = None
     while True:
-        body = {"limit": 1000, "with_payload": ["path", "mtime"]}
+        body = {"limit": 1000, "with_payload": ["path", "start_line", "end_line"]}
         if offset:
             body["offset"] = offset
         try:
@@ -206,71 +312,259 @@ def load_existing_mtimes(session) -> dict:
             result = r.json().get("result", {})
             for pt in result.get("points", []):
                 pl = pt.get("payload", {})
-                existing[pl.get("path", "")] = pl.get("mtime", 0)
+                entry = manifest.setdefault(pl.get("path", ""), {"sha": None, "chunks": {}})
+                entry["chunks"][pt.get("id")] = [pl.get("start_line"), pl.get("end_line")]
             offset = result.get("next_page_offset")
             if not offset:
                 break
         except Exception:
             break
-    return existing
+    return manifest
 
 
-# ── Modes principaux ──────────────────────────────────────────────────────────
+def save_manifest(manifest: dict) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, MANIFEST_PATH)
 
-def do_index(session, workspace: Path, incremental: bool, reset: bool):
-    if not ensure_collection(session, reset):
-        sys.exit(1)
-
-    existing = load_existing_mtimes(session) if incremental else {}
-
-    total, skipped, errors = 0, 0, 0
-    t0 = time.time()
 
+def walk_files(workspace: Path, live_dirs: list = None):
+    """(fichier, chemin relatif, projet, extension) de INDEX_DIRS. Les
+    sous-dossiers effectivement présents sont ajoutés à `live_dirs` (seuls
+    leurs fichiers disparus sont purgés de l'index)."""
     for subdir, exts in INDEX_DIRS:
         base = workspace / subdir
         if not base.exists():
             print(f"  [SKIP] {subdir} absent", file=sys.stderr)
             continue
+        if live_dirs is not None:
+            live_dirs.append(subdir)
         project = subdir.split("/")[0]
         print(f"\n  → {subdir} ({', '.join(exts)})...", file=sys.stderr)
-
         for ext in exts:
             for fp in sorted(base.rglob(f"*.{ext}")):
                 if any(s in fp.parts for s in SKIP_DIRS):
                     continue
-                rel = str(fp.relative_to(workspace))
+                yield fp, str(fp.relative_to(workspace)), project, ext
 
-                if incremental and existing.get(rel) == int(fp.stat().st_mtime):
-                    skipped += 1
-                    continue
 
-                print(f"    {rel} ...", end=" ", flush=True, file=sys.stderr)
-                if upsert_file(session, fp, rel, project):
-                    print("✓", file=sys.stderr)
-                    total += 1
+def prepare_file(fp: Path, rel: str, project: str, ext: str, old: dict, incremental: bool):
+    """Lit, empreinte et découpe un fichier. None si inchangé (incrémental) ;
+    sinon (sha, {id: [l1, l2]}, points à (ré)écrire sans vecteur)."""
+    raw = fp.read_bytes()
+    sha = hashlib.sha256(raw).hexdigest()
+    if incremental and old.get("sha") == sha:
+        return None
+    content = raw.decode("utf-8", errors="replace")
+    chunks, todo = {}, []
+    old_chunks = old.get("chunks", {}) if incremental else {}
+    seen = {}
+    for start, end, body in chunk_text(content, ext):
+        pid = chunk_id(rel, body, seen.get(body, 0))
+        seen[body] = seen.get(body, 0) + 1
+        chunks[pid] = [start, end]
+        if old_chunks.get(pid) == [start, end]:
+            continue        # chunk déjà indexé à l'identique
+        todo.append({
+            "id": pid,
+            "text": f"Fichier: {rel}\nProjet: {project}\n\n{body}",
+            "payload": {
+                "path":       rel,
+                "project":    project,
+                "ext":        ext,
+                "start_line": start,
+                "end_line":   end,
+                "size":       len(raw),
+                "preview":    body[:300],
+            },
+        })
+    return sha, chunks, todo
+
+
+# ── Modes principaux ──────────────────────────────────────────────────────────
+
+def do_index(session, workspace: Path, incremental: bool, reset: bool,
+             jobs: int = EMBED_JOBS):
+    if not ensure_collection(session, reset):
+        sys.exit(1)
+
+    manifest = {} if reset else load_manifest(session)
+    if manifest and not _points_count(session):
+        manifest = {}       # collection vidée/recréée hors de ce script : tout réindexer
+    stats = {"files": 0, "skipped": 0, "errors": 0, "chunks": 0, "deleted": 0}
+    seen, live_dirs = set(), []
+    t0 = time.time()
+
+    # Un fichier n'entre au manifeste qu'une fois TOUS ses chunks écrits ;
+    # ses chunks périmés ne sont supprimés qu'à ce moment-là.
+    files = {}          # rel → {"sha", "chunks", "left", "failed"}
+    ready = []          # points embedés en attente d'upsert
+    in_flight = deque() # (future, lot) — au plus 2 × jobs lots en vol
+
+    def commit(rel):
+        f = files.pop(rel)
+        old = manifest.get(rel, {}).get("chunks", {})
+        if f["failed"]:
+            # Retenté au prochain passage ; les chunks déjà écrits restent suivis
+            manifest[rel] = {"sha": None, "chunks": {**old, **f["written"]}}
+            stats["errors"] += 1
+            return
+        stale = [pid for pid in old if pid not in f["chunks"]]
+        if stale and not _delete_points(session, stale):
+            # Chunks périmés toujours en base : gardés au manifeste, sans sha,
+            # pour que le prochain passage relise le fichier et les retire
+            manifest[rel] = {"sha": None, "chunks": {**f["chunks"], **{pid: old[pid] for pid in stale}}}
+            stats["errors"] += 1
+            return
+        stats["deleted"] += len(stale)
+        manifest[rel] = {"sha": f["sha"], "chunks": f["chunks"]}
+        stats["files"] += 1
+
+    def flush(force=False):
+        while ready and (force or len(ready) >= UPSERT_BATCH):
+            batch, ready[:] = ready[:UPSERT_BATCH], ready[UPSERT_BATCH:]
+            ok = _upsert_points(session, [{k: p[k] for k in ("id", "vector", "payload")}
+                                          for p in batch])
+            for p in batch:
+                f = files[p["payload"]["path"]]
+                if ok:
+                    f["written"][p["id"]] = f["chunks"][p["id"]]
+                    stats["chunks"] += 1
                 else:
-                    print("✗", file=sys.stderr)
-                    errors += 1
+                    f["failed"] = True
+                f["left"] -= 1
+                if f["left"] == 0:
+                    commit(p["payload"]["path"])
+
+    def collect(drain=False):
+        while in_flight and (drain or len(in_flight) >= 2 * jobs or in_flight[0][0].done()):
+            fut, batch = in_flight.popleft()
+            for p, vec in zip(batch, fut.result()):
+                if vec is None:
+                    f = files[p["payload"]["path"]]
+                    f["failed"] = True
+                    f["left"] -= 1
+                    if f["left"] == 0:
+                        commit(p["payload"]["path"])
+                else:
+                    p["vector"] = vec
+                    ready.append(p)
+            flush()
+
+    pending = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+
+            def submit(batch):
+                in_flight.append((pool.submit(embed_batch, session, [p["text"] for p in batch]), batch))
+                collect()
+
+            for fp, rel, project, ext in walk_files(workspace, live_dirs):
+                seen.add(rel)
+                try:
+                    prepared = prepare_file(fp, rel, project, ext, manifest.get(rel, {}), incremental)
+                except OSError:
+                    stats["errors"] += 1
+                    continue
+                if prepared is None:
+                    stats["skipped"] += 1
+                    continue
+                sha, chunks, todo = prepared
+                print(f"    {rel} : {len(todo)}/{len(chunks)} chunk(s)", file=sys.stderr)
+                files[rel] = {"sha": sha, "chunks": chunks, "left": len(todo),
+                              "failed": False, "written": {}}
+                if not todo:
+                    commit(rel)
+                    continue
+                pending.extend(todo)
+                while len(pending) >= EMBED_BATCH:
+                    submit(pending[:EMBED_BATCH])
+                    pending = pending[EMBED_BATCH:]
+            if pending:
+                submit(pending)
+            collect(drain=True)
+            flush(force=True)
+
+        # Fichiers disparus (dans un sous-dossier présent) : tous leurs chunks
+        gone = [rel for rel in manifest
+                if rel not in seen and any(rel.startswith(d + "/") for d in live_dirs)]
+        for rel in gone:
+            ids = list(manifest[rel].get("chunks", {}))
+            if not ids or _delete_points(session, ids):
+                stats["deleted"] += len(ids)
+                del manifest[rel]
+    finally:
+        # Interrompu (Ctrl-C, panne inattendue), le passage garde au moins
+        # les fichiers déjà entièrement écrits : le suivant ne les ré-embede pas.
+        save_manifest(manifest)
 
     elapsed = time.time() - t0
     print(
-        f"\n  ✓ {total} fichiers indexés, {skipped} skippés, {errors} erreurs — {elapsed:.1f}s",
+        f"\n  ✓ {stats['files']} fichiers indexés ({stats['chunks']} chunks écrits, "
+        f"{stats['deleted']} périmés supprimés), {stats['skipped']} inchangés, "
+        f"{stats['errors']} erreurs — {elapsed:.1f}s "
+        f"({stats['files'] / max(elapsed, 1e-9):.1f} fichiers/s, "
+        f"{stats['chunks'] / max(elapsed, 1e-9):.1f} chunks/s)",
         file=sys.stderr,
     )
 
 
+def do_bench(session, workspace: Path, jobs: int, sample: int = 256):
+    """Débit du pipeline sans toucher à Qdrant : parcours + empreinte +
+    découpage sur tout le workspace, puis — si Ollama répond — embedding d'un
+    échantillon de `sample` chunks, un appel par chunk (ancien chemin) contre
+    lots parallèles (cache disque contourné : on mesure Ollama)."""
+    t0 = time.time()
+    n_files, texts = 0, []
+    for fp, rel, project, ext in walk_files(workspace):
+        try:
+            _sha, chunks, todo = prepare_file(fp, rel, project, ext, {}, False)
+        except OSError:
+            continue
+        n_files += 1
+        texts.extend(p["text"] for p in todo)
+    dt = max(time.time() - t0, 1e-9)
+    result = {"files": n_files, "chunks": len(texts),
+              "walk_chunk_files_per_s": round(n_files / dt, 1),
+              "walk_chunk_chunks_per_s": round(len(texts) / dt, 1)}
+
+    sample_texts = texts[:sample]
+    if sample_texts and _ollama_embedding(session, "ping") is not None:
+        t0 = time.time()
+        for t in sample_texts:
+            _ollama_embedding(session, t[:MAX_CHARS])
+        result["embed_serial_chunks_per_s"] = round(len(sample_texts) / (time.time() - t0), 1)
+        t0 = time.time()
+        batches = [[t[:MAX_CHARS] for t in sample_texts[i:i + EMBED_BATCH]]
+                   for i in range(0, len(sample_texts), EMBED_BATCH)]
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            list(pool.map(lambda b: _ollama_embed_many(session, b), batches))
+        result["embed_batched_chunks_per_s"] = round(len(sample_texts) / (time.time() - t0), 1)
+        result["embed_sample"] = len(sample_texts)
+    else:
+        result["embed"] = "Ollama indisponible — étape d'embedding non mesurée"
+    print(json.dumps(result, indent=2))
+
+
 def do_search(session, query: str, limit: int, workspace: Path) -> list[dict]:
+    """Meilleur chunk par fichier, `limit` fichiers au plus (plusieurs chunks
+    d'un même fichier remontent souvent ensemble)."""
     vector = get_embedding(session, query)
     if vector is None:
         return []
     try:
         r = session.post(
             f"{QDRANT_URL}/collections/{COLLECTION}/points/search",
-            json={"vector": vector, "limit": limit, "with_payload": True},
+            json={"vector": vector, "limit": limit * 4, "with_payload": True},
             timeout=10,
         )
         if r.ok:
-            return r.json().get("result", [])
+            best = {}
+            for hit in r.json().get("result", []):
+                best.setdefault(hit.get("payload", {}).get("path", ""), hit)
+            return list(best.values())[:limit]
     except Exception as e:
         print(f"  [SEARCH] {e}", file=sys.stderr)
     return []
@@ -301,7 +595,7 @@ def do_snapshot_ipfs(session) -> str | None:
         return None
 
     with open(snap_path, "wb") as f:
-        f.write(r2._data if hasattr(r2, "_data") else r2.content)
+        f.write(r2.content)
 
     # Publier sur IPFS
     print(f"  Publication IPFS de {snap_path}...", file=sys.stderr)
@@ -366,6 +660,10 @@ def main():
     ap.add_argument("--snapshot",    action="store_true",  help="Snapshot → IPFS")
     ap.add_argument("--restore",     type=str, default="", help="Restaurer depuis CID IPFS")
     ap.add_argument("--stats",       action="store_true",  help="Statistiques de la collection")
+    ap.add_argument("--jobs",        type=int, default=EMBED_JOBS,
+                    help=f"Requêtes d'embedding simultanées (défaut: {EMBED_JOBS})")
+    ap.add_argument("--bench",       action="store_true",
+                    help="Débit du pipeline (fichiers/s, chunks/s), sans écrire dans Qdrant")
     ap.add_argument("--workspace",   type=str,
                     default=os.getenv("CODEBASE_ROOT", WORKSPACE_DEFAULT))
     args = ap.parse_args()
@@ -373,6 +671,10 @@ def main():
     workspace = Path(args.workspace).expanduser()
     session   = _session()
 
+    if args.bench:
+        do_bench(session, workspace, args.jobs)
+        return
+
     # Vérifier Qdrant (/healthz — /health n'existe pas dans Qdrant ≥1.13)
     try:
         r = session.get(f"{QDRANT_URL}/healthz", timeout=3)
@@ -433,7 +735,8 @@ def main():
             print(f"[ERREUR] Ollama non disponible sur {OLLAMA_URL}", file=sys.stderr)
             sys.exit(1)
 
-        do_index(session, workspace, incremental=args.incremental, reset=args.reset)
+        do_index(session, workspace, incremental=args.incremental, reset=args.reset,
+                 jobs=args.jobs)
         return
 
     ap.print_help()
@@ -137,18 +137,25 @@ case "${1:-}" in
         "$PYTHON3" "$INDEXER" --stats
         ;;
 
+    --bench|bench)
+        echo -e "${CYAN}[codebase_index]${NC} Débit du pipeline (fichiers/s, chunks/s)..."
+        "$PYTHON3" "$INDEXER" --bench --workspace "$WORKSPACE" "${@:2}"
+        ;;
+
     --help|-h|help|"")
         echo ""
         echo -e "  ${CYAN}codebase_index.sh${NC} — Mémoire vectorielle du codebase UPlanet/Astroport"
         echo ""
         echo "  Commandes :"
         echo "    --index         Indexer tout le codebase (première fois)"
-        echo "    --incremental   Réindexer seulement les fichiers modifiés"
+        echo "    --incremental   Réindexer seulement les fichiers modifiés (empreinte sha256)"
         echo "    --reset         Supprimer et tout réindexer"
         echo "    --search TEXT   Recherche sémantique (retourne score<TAB>path)"
         echo "    --snapshot      Snapshot Qdrant → IPFS (partage constellation)"
         echo "    --restore CID   Restaurer depuis un snapshot IPFS"
         echo "    --stats         Afficher les stats de la collection"
+        echo "    --bench         Débit du pipeline (sans écrire dans Qdrant)"
+        echo "    --jobs N        (avec --index/--incremental) requêtes d'embedding simultanées"
         echo ""
         echo "  Variables :"
         echo "    QDRANT_URL    ${QDRANT_URL}"
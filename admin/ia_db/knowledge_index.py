@@ -23,16 +23,31 @@ Payload par point  :
   relay      — relay NOSTR source (ou "local")
   created_at — timestamp UNIX
 
+  chunk/chunks — rang du passage dans le document / nombre de passages
+
 Sortie --search : score<TAB>cid<TAB>author_hex<TAB>title<TAB>skill
-(parseable par BRO et minelife.js)
+(parseable par BRO et minelife.js) — un document par ligne (meilleur passage)
+
+Ingestion (2026-10-18) : un document = un point embedé sur ses 2000 premiers
+caractères (8 pages PDF au plus), CIDs téléchargés un par un avec une
+Session neuve à chaque fois, fichiers locaux relus et ré-embedés à chaque
+passage. Désormais :
+  - CIDs récupérés en parallèle (--jobs) sur une Session partagée, et gardés
+    à vie dans un cache disque (un CID est immuable) ;
+  - PDF extraits page par page en flux, le document ENTIER découpé en
+    passages recouvrants (un point par passage) ;
+  - fichiers locaux ignorés si (chemin, taille, mtime, sha256) inchangés
+    (manifeste disque), passages périmés supprimés ;
+  - embeddings par lots /api/embed (--jobs requêtes en vol), upserts par lots.
 
 Variables d'environnement :
   QDRANT_URL      http://127.0.0.1:6333
-  QDRANT_API_KEY  (optionnel)
-  OLLAMA_URL      http://localhost:11434
+  QDRANT_API_KEY  (optionnel — sinon lue dans ~/.zen/ai-company/.env)
+  OLLAMA_URL      http://127.0.0.1:11434
   EMBED_MODEL     nomic-embed-text
   IPFS_GATEWAY    http://localhost:8080
   NOSTR_RELAY     ws://localhost:7777
+  KNOWLEDGE_CACHE_DIR  ~/.zen/flashmem/knowledge_index (cache CIDs + manifeste)
 """
 
 # Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
@@ -50,8 +65,11 @@ import json
 import time
 import hashlib
 import argparse
+import threading
 import subprocess
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import requests
@@ -90,16 +108,30 @@ except ImportError:
     _SessionCls = _Session
     requests = type("requests", (), {"Session": _SessionCls})()
 
+# Client HTTP Qdrant/Ollama partagé avec IA/ (IA/vector_store.py : pool
+# keep-alive, clé API, réessais, métriques) et cache disque des embeddings
+# (IA/embed_cache.py). requests ne sert plus qu'au flux de la gateway IPFS.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "IA"))
+import vector_store
+import embed_cache
+
 # ── Configuration ─────────────────────────────────────────────────────────────
-QDRANT_URL     = os.getenv("QDRANT_URL",     "http://127.0.0.1:6333")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-OLLAMA_URL     = os.getenv("OLLAMA_URL",     "http://localhost:11434")
+QDRANT_URL     = vector_store.QDRANT_URL
+OLLAMA_URL     = vector_store.OLLAMA_URL
 EMBED_MODEL    = os.getenv("EMBED_MODEL",    "nomic-embed-text")
 IPFS_GATEWAY   = os.getenv("IPFS_GATEWAY",   "http://localhost:8080")
 NOSTR_RELAY    = os.getenv("NOSTR_RELAY",    "ws://localhost:7777")
 COLLECTION     = "knowledge"
 VECTOR_SIZE    = 768   # nomic-embed-text
 MAX_CHARS      = 2000  # limite tokens nomic-embed-text (2048t)
+CHUNK_CHARS    = 1600  # texte d'un passage (l'en-tête Titre/Skill complète jusqu'à MAX_CHARS)
+CHUNK_OVERLAP  = 200   # caractères repris du passage précédent
+EMBED_BATCH    = 32    # textes par requête /api/embed
+UPSERT_BATCH   = 128
+DEFAULT_JOBS   = 4
+CACHE_DIR      = Path(os.getenv("KNOWLEDGE_CACHE_DIR",
+                                "~/.zen/flashmem/knowledge_index")).expanduser()
+MANIFEST_PATH  = CACHE_DIR / "manifest.json"
 
 # Tags méta exclus de la liste des skills
 _META_T = frozenset({"permit", "auto_proclaimed", "composite", "formation",
@@ -108,10 +140,9 @@ _META_T = frozenset({"permit", "auto_proclaimed", "composite", "formation",
 # ── Helpers Qdrant ────────────────────────────────────────────────────────────
 
 def _session():
-    s = requests.Session()
-    if QDRANT_API_KEY:
-        s.headers.update({"api-key": QDRANT_API_KEY})
-    return s
+    """Façade requests sur le client partagé vector_store (clé API ajoutée
+    pour l'hôte Qdrant, une connexion persistante par thread d'embedding)."""
+    return vector_store.Session()
 
 
 def _path_to_uuid(key: str) -> str:
@@ -140,68 +171,319 @@ def ensure_collection(session) -> bool:
     return False
 
 
-def _upsert(session, point_id: str, vector: list, payload: dict) -> bool:
+def _upsert_points(session, points: list) -> bool:
     r = session.put(
         f"{QDRANT_URL}/collections/{COLLECTION}/points",
-        json={"points": [{"id": point_id, "vector": vector, "payload": payload}]},
-        timeout=15,
+        json={"points": points},
+        timeout=60,
     )
     return r.ok
 
 
+def _delete_points(session, ids: list) -> bool:
+    ok = True
+    for i in range(0, len(ids), 512):
+        try:
+            r = session.post(
+                f"{QDRANT_URL}/collections/{COLLECTION}/points/delete",
+                json={"points": ids[i:i + 512]},
+                timeout=30,
+            )
+            ok = ok and r.ok
+        except Exception as e:
+            print(f"  [DELETE] {e}", file=sys.stderr)
+            ok = False
+    return ok
+
+
+def _points_count(session) -> int:
+    try:
+        r = session.get(f"{QDRANT_URL}/collections/{COLLECTION}", timeout=5)
+        return r.json().get("result", {}).get("points_count", 0) if r.ok else 0
+    except Exception:
+        return 0
+
+
+def _chunk_point_id(key: str, n: int) -> str:
+    """Passage n du document `key` — le passage 0 garde l'id historique du
+    point unique, remplacé en place à la première réindexation."""
+    return _path_to_uuid(key if n == 0 else f"{key}#{n}")
+
+
+def load_manifest() -> dict:
+    """{clé document: {"chunks": n, ["size", "mtime", "sha"]}} — clé = chemin
+    local, ou "event_id:cid" pour les ressources NOSTR."""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, MANIFEST_PATH)
+
+
 # ── Embedding ─────────────────────────────────────────────────────────────────
 
 def get_embedding(session, text: str) -> list | None:
+    return embed_batch(session, [text])[0]
+
+
+def embed_batch(session, texts: list) -> list:
+    texts = [t[:MAX_CHARS] for t in texts]
+    return embed_cache.cached_embed_many(
+        texts, EMBED_MODEL, lambda ts: _ollama_embed_many(session, ts))
+
+
+def _ollama_embed_many(session, texts: list) -> list:
+    """Un seul appel /api/embed pour le lot — liste alignée sur `texts`
+    (None partout si l'appel échoue)."""
     try:
         r = session.post(
             f"{OLLAMA_URL}/api/embed",
-            json={"model": EMBED_MODEL, "input": text[:MAX_CHARS]},
-            timeout=30,
+            json={"model": EMBED_MODEL, "input": texts},
+            timeout=30 + 5 * len(texts),
         )
         if r.ok:
             data = r.json()
             emb = data.get("embeddings") or data.get("embedding")
             if emb:
-                return emb[0] if isinstance(emb[0], list) else emb
+                if not isinstance(emb[0], list):
+                    emb = [emb]
+                if len(emb) == len(texts):
+                    return emb
     except Exception as e:
         print(f"  [EMBED] {e}", file=sys.stderr)
-    return None
+    return [None] * len(texts)
+
+
+class IngestEngine:
+    """Étapes embedding + upsert communes aux trois sources. Les passages
+    s'accumulent en lots de EMBED_BATCH, embedés sur `jobs` requêtes en vol
+    au plus, puis écrits par lots de UPSERT_BATCH. Un document n'entre au
+    manifeste (et ses passages en trop ne sont supprimés) qu'une fois TOUS
+    ses passages écrits — sinon il sera retenté au prochain passage."""
+
+    def __init__(self, session, manifest: dict, jobs: int = DEFAULT_JOBS):
+        self.session = session
+        self.manifest = manifest
+        self.jobs = max(1, jobs)
+        self._pool = ThreadPoolExecutor(max_workers=self.jobs)
+        self._pending = []          # passages à embeder
+        self._in_flight = deque()   # (future, lot)
+        self._ready = []            # passages embedés, à écrire
+        self._docs = {}             # clé → {"left", "failed", "entry", "stale"}
+        self.ok = self.err = 0
+
+    def add_document(self, key: str, texts: list, payload: dict, entry: dict) -> None:
+        """Indexe le document `key` : un point par texte de `texts`, payload
+        commun + rang du passage ; `entry` = empreinte à mémoriser au manifeste."""
+        old_n = self.manifest.get(key, {}).get("chunks", 0)
+        entry = dict(entry, chunks=len(texts))
+        self._docs[key] = {
+            "left": len(texts), "failed": False, "entry": entry,
+            "stale": [_chunk_point_id(key, n) for n in range(len(texts), old_n)],
+        }
+        if not texts:
+            self._commit(key)
+            return
+        for n, text in enumerate(texts):
+            self._pending.append({
+                "doc": key, "id": _chunk_point_id(key, n), "text": text,
+                "payload": dict(payload, chunk=n, chunks=len(texts)),
+            })
+        while len(self._pending) >= EMBED_BATCH:
+            self._submit(self._pending[:EMBED_BATCH])
+            self._pending = self._pending[EMBED_BATCH:]
+
+    def remove_document(self, key: str) -> bool:
+        n = self.manifest.get(key, {}).get("chunks", 0)
+        if n and not _delete_points(self.session, [_chunk_point_id(key, i) for i in range(n)]):
+            return False
+        self.manifest.pop(key, None)
+        return True
+
+    def close(self) -> tuple:
+        if self._pending:
+            self._submit(self._pending)
+            self._pending = []
+        self._collect(drain=True)
+        self._flush(force=True)
+        self._pool.shutdown()
+        return self.ok, self.err
+
+    # ── interne ───────────────────────────────────────────────────────────────
+
+    def _submit(self, batch: list) -> None:
+        fut = self._pool.submit(embed_batch, self.session, [p["text"] for p in batch])
+        self._in_flight.append((fut, batch))
+        self._collect()
+
+    def _collect(self, drain: bool = False) -> None:
+        while self._in_flight and (drain or len(self._in_flight) >= 2 * self.jobs
+                                   or self._in_flight[0][0].done()):
+            fut, batch = self._in_flight.popleft()
+            for p, vec in zip(batch, fut.result()):
+                if vec is None:
+                    self._done(p["doc"], False)
+                else:
+                    p["vector"] = vec
+                    self._ready.append(p)
+            self._flush()
+
+    def _flush(self, force: bool = False) -> None:
+        while self._ready and (force or len(self._ready) >= UPSERT_BATCH):
+            batch, self._ready = self._ready[:UPSERT_BATCH], self._ready[UPSERT_BATCH:]
+            ok = _upsert_points(self.session, [{k: p[k] for k in ("id", "vector", "payload")}
+                                               for p in batch])
+            for p in batch:
+                self._done(p["doc"], ok)
+
+    def _done(self, key: str, ok: bool) -> None:
+        doc = self._docs[key]
+        doc["failed"] |= not ok
+        doc["left"] -= 1
+        if doc["left"] == 0:
+            self._commit(key)
+
+    def _commit(self, key: str) -> None:
+        doc = self._docs.pop(key)
+        if doc["failed"]:
+            print(f"    ✗ {key} (embed/upsert)", file=sys.stderr)
+            self.err += 1
+            return
+        if doc["stale"] and not _delete_points(self.session, doc["stale"]):
+            # Passages en trop toujours en base : l'ancien nombre de chunks
+            # reste au manifeste (remove_document les couvre) et l'empreinte
+            # est retirée, pour que le prochain passage relise et réessaie
+            print(f"    ✗ {key} (suppression de {len(doc['stale'])} passage(s) périmé(s))",
+                  file=sys.stderr)
+            self.manifest[key] = {"chunks": doc["entry"]["chunks"] + len(doc["stale"])}
+            self.err += 1
+            return
+        self.manifest[key] = doc["entry"]
+        self.ok += 1
 
 
 # ── IPFS ──────────────────────────────────────────────────────────────────────
 
-def ipfs_get(cid: str) -> bytes | None:
-    cid = cid.strip().lstrip("/").removeprefix("ipfs/")
+_IPFS_SESSION = None
+_IPFS_SESSION_LOCK = threading.Lock()
+
+
+def _ipfs_session():
+    """Session HTTP partagée (pool de connexions keep-alive vers la gateway)."""
+    global _IPFS_SESSION
+    with _IPFS_SESSION_LOCK:
+        if _IPFS_SESSION is None:
+            _IPFS_SESSION = requests.Session()
+        return _IPFS_SESSION
+
+
+def _clean_cid(cid: str) -> str:
+    return cid.strip().lstrip("/").removeprefix("ipfs/")
+
+
+def ipfs_fetch(cid: str) -> Path | None:
+    """Chemin local du contenu de `cid` : cache disque CACHE_DIR/ipfs/<cid>,
+    rempli au premier accès (téléchargement en flux vers un fichier
+    temporaire puis renommage atomique). Un CID est immuable : jamais
+    invalidé."""
+    cid = _clean_cid(cid)
+    if not cid or "/" in cid or cid.startswith("."):
+        return None
+    path = CACHE_DIR / "ipfs" / cid
+    if path.is_file():
+        return path
     url = f"{IPFS_GATEWAY}/ipfs/{cid}"
     try:
-        r = requests.Session().get(url, timeout=30)
-        if r.ok:
-            return r.content
+        r = _ipfs_session().get(url, timeout=30, stream=True)
+        if not r.ok:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{cid}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "wb") as f:
+            if hasattr(r, "iter_content"):
+                for block in r.iter_content(1 << 16):
+                    f.write(block)
+            else:
+                f.write(r.content)
+        os.replace(tmp, path)
+        return path
     except Exception as e:
         print(f"  [IPFS] {cid[:16]}… : {e}", file=sys.stderr)
     return None
 
 
+def ipfs_get(cid: str) -> bytes | None:
+    path = ipfs_fetch(cid)
+    try:
+        return path.read_bytes() if path else None
+    except OSError:
+        return None
+
+
+def iter_text_pages(source, filename: str):
+    """Texte de `source` (chemin ou octets), page par page pour un PDF
+    (pdfplumber, sinon PyPDF2) — le document n'est jamais extrait d'un bloc,
+    le cache de chaque page est libéré après lecture. .md : un seul bloc."""
+    fname = filename.lower()
+    if not fname.endswith(".pdf"):
+        data = source.read_bytes() if isinstance(source, Path) else source
+        yield data.decode("utf-8", errors="replace")
+        return
+    stream = str(source) if isinstance(source, Path) else io.BytesIO(source)
+    try:
+        import pdfplumber
+        with pdfplumber.open(stream) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+                (getattr(page, "close", None) or page.flush_cache)()
+        return
+    except ImportError:
+        pass
+    except Exception as e:
+        yield f"[PDF erreur: {e}]"
+        return
+    try:
+        import PyPDF2  # noqa: N813
+        for page in PyPDF2.PdfReader(stream).pages:
+            yield page.extract_text() or ""
+    except ImportError:
+        yield f"[PDF: {filename} — pip install pdfplumber pour extraction]"
+    except Exception as e:
+        yield f"[PDF erreur: {e}]"
+
+
+def iter_chunks(pages, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP):
+    """Passages de ~`size` caractères sur TOUT le document, coupés de
+    préférence entre paragraphes / lignes / mots, chacun reprenant les
+    `overlap` derniers caractères du précédent. Consomme `pages` en flux."""
+    buf = ""
+    for page in pages:
+        buf += page + "\n"
+        while len(buf) >= size:
+            cut = -1
+            for sep in ("\n\n", "\n", " "):
+                cut = buf.rfind(sep, size // 2, size)
+                if cut != -1:
+                    break
+            if cut == -1:
+                cut = size
+            yield buf[:cut]
+            buf = buf[cut - overlap:]
+    if buf.strip():
+        yield buf
+
+
 def extract_text(data: bytes, filename: str) -> str:
     """Extrait le texte depuis .md (direct) ou .pdf (pdfplumber/PyPDF2)."""
-    fname = filename.lower()
-    if fname.endswith(".pdf"):
-        try:
-            import pdfplumber
-            with pdfplumber.open(io.BytesIO(data)) as pdf:
-                pages = [p.extract_text() or "" for p in pdf.pages[:8]]
-                return "\n".join(pages)
-        except ImportError:
-            pass
-        try:
-            import PyPDF2  # noqa: N813
-            reader = PyPDF2.PdfReader(io.BytesIO(data))
-            return "\n".join(p.extract_text() or "" for p in reader.pages[:8])
-        except ImportError:
-            return f"[PDF: {filename} — pip install pdfplumber pour extraction]"
-        except Exception as e:
-            return f"[PDF erreur: {e}]"
-    return data.decode("utf-8", errors="replace")
+    return "\n".join(iter_text_pages(data, filename))
 
 
 # ── NOSTR query via nostr_node_intercom.py ────────────────────────────────────
@@ -278,20 +560,18 @@ def r_tags_ipfs(tags: list) -> list[tuple[str, str]]:
 
 # ── Indexation NOSTR ──────────────────────────────────────────────────────────
 
-def index_nostr(session, relay: str, workspace: Path):
+def index_nostr(engine: IngestEngine, relay: str, workspace: Path):
     print(f"\n  → Fetch Kind 30504 + 30500 depuis {relay}...", file=sys.stderr)
     events = fetch_nostr_events(relay, [30504, 30500], workspace)
     if not events:
         print("  [WARN] aucun event récupéré (relay inaccessible?)", file=sys.stderr)
         return 0, 0
 
-    ok_count = err_count = 0
+    # Inventaire des ressources à (ré)indexer — déjà indexée = même event, même CID
+    resources = []
     for ev in events:
         tags      = ev.get("tags", [])
-        author    = ev.get("pubkey", "")
-        kind      = ev.get("kind", 0)
         event_id  = ev.get("id", "")
-        created   = ev.get("created_at", 0)
 
         # Titre depuis tags ou content JSON
         title = _tag_first(tags, "title")
@@ -306,54 +586,104 @@ def index_nostr(session, relay: str, workspace: Path):
         primary_skill = skills[0] if skills else "unknown"
 
         for cid, rtype in r_tags_ipfs(tags):
-            # Types non-textuels → on indexe juste les métadonnées (pas de téléchargement)
-            if rtype in ("video", "audio", "image"):
-                embed_text = (
-                    f"Ressource {rtype} WoTx2 : {title or cid}\n"
-                    f"Skill: {primary_skill}\nType: {rtype}"
-                )
-                text_for_embed = embed_text
-            else:
-                # Téléchargement et extraction du contenu
-                print(f"    {cid[:20]}… [{rtype}] ...", end=" ", flush=True, file=sys.stderr)
-                raw = ipfs_get(cid)
-                if raw is None:
-                    print("✗ (IPFS indisponible)", file=sys.stderr)
-                    err_count += 1
-                    continue
-                filename = f"doc.{rtype}" if rtype != "cours" else "doc.md"
-                text_for_embed = (
-                    f"Skill: {primary_skill}\nTitre: {title}\nType: {rtype}\n\n"
-                    + extract_text(raw, filename)
-                )
-
-            vector = get_embedding(session, text_for_embed)
-            if vector is None:
-                print("✗ (embed)", file=sys.stderr)
-                err_count += 1
+            key = f"{event_id}:{cid}"
+            if key in engine.manifest:
                 continue
-
-            point_id = _path_to_uuid(f"{event_id}:{cid}")
             payload = {
                 "cid": cid, "title": title or cid[:20], "type": rtype,
                 "skill": primary_skill, "skills": skills,
-                "author_hex": author, "event_id": event_id,
-                "kind": kind, "relay": relay, "created_at": created,
+                "author_hex": ev.get("pubkey", ""), "event_id": event_id,
+                "kind": ev.get("kind", 0), "relay": relay,
+                "created_at": ev.get("created_at", 0),
             }
-            if _upsert(session, point_id, vector, payload):
-                print("✓", file=sys.stderr)
-                ok_count += 1
-            else:
-                print("✗ (upsert)", file=sys.stderr)
+            resources.append((key, cid, rtype, title, primary_skill, payload))
+
+    # Types non-textuels → on indexe juste les métadonnées (pas de téléchargement) ;
+    # les autres CIDs sont récupérés en parallèle (cache disque au-delà du premier passage)
+    to_fetch = sorted({cid for _k, cid, rtype, *_ in resources
+                       if rtype not in ("video", "audio", "image")})
+    print(f"  {len(resources)} ressource(s) nouvelle(s), {len(to_fetch)} CID(s) à lire "
+          f"({engine.jobs} en parallèle)", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=engine.jobs) as pool:
+        fetched = dict(zip(to_fetch, pool.map(ipfs_fetch, to_fetch)))
+
+    err_count = 0
+    for key, cid, rtype, title, primary_skill, payload in resources:
+        if rtype in ("video", "audio", "image"):
+            texts = [f"Ressource {rtype} WoTx2 : {title or cid}\n"
+                     f"Skill: {primary_skill}\nType: {rtype}"]
+        else:
+            path = fetched.get(cid)
+            if path is None:
+                print(f"    ✗ {cid[:20]}… (IPFS indisponible)", file=sys.stderr)
+                err_count += 1
+                continue
+            filename = f"doc.{rtype}" if rtype != "cours" else "doc.md"
+            header = f"Skill: {primary_skill}\nTitre: {title}\nType: {rtype}\n\n"
+            texts = [header + c for c in iter_chunks(iter_text_pages(path, filename))]
+            print(f"    {cid[:20]}… [{rtype}] : {len(texts)} passage(s)", file=sys.stderr)
+        engine.add_document(key, texts, payload, {})
+
+    print(f"\n  ✓ NOSTR: {len(resources) - err_count} docs soumis, {err_count} erreurs IPFS",
+          file=sys.stderr)
+    return len(resources) - err_count, err_count
+
+
+# ── Indexation fichiers locaux (uDRIVE, répertoire libre) ─────────────────────
+
+def _index_tree(engine: IngestEngine, root: Path, author: str, skill_hint: str = "",
+                default_skill: str = ""):
+    """Indexe les .md/.pdf de `root` — fichier ignoré si (taille, mtime)
+    inchangés, ou si son sha256 l'est (simple `touch`/copie) ; documents
+    disparus de `root` retirés de l'index. Retourne (soumis, erreurs)."""
+    submitted = err_count = 0
+    seen = set()
+    for ext in ["md", "pdf"]:
+        for fp in sorted(root.rglob(f"*.{ext}")):
+            key = str(fp)
+            seen.add(key)
+            old = engine.manifest.get(key, {})
+            try:
+                st = fp.stat()
+                if old.get("size") == st.st_size and old.get("mtime") == st.st_mtime_ns:
+                    continue
+                h = hashlib.sha256()
+                with open(fp, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        h.update(block)
+            except OSError:
+                print(f"    ✗ {fp.relative_to(root)} (lecture)", file=sys.stderr)
                 err_count += 1
+                continue
+            entry = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha": h.hexdigest()}
+            if old.get("sha") == entry["sha"]:
+                engine.manifest[key] = dict(old, **entry)
+                continue
 
-    print(f"\n  ✓ NOSTR: {ok_count} docs indexés, {err_count} erreurs", file=sys.stderr)
-    return ok_count, err_count
+            skill = skill_hint or fp.parent.name.lower().replace("-", "_") or default_skill
+            title = fp.stem.replace("_", " ").replace("-", " ")
+            header = f"Titre: {title}\nSkill: {skill}\n\n"
+            texts = [header + c for c in iter_chunks(iter_text_pages(fp, fp.name))]
+            print(f"    {fp.relative_to(root)} : {len(texts)} passage(s)", file=sys.stderr)
+            payload = {
+                "cid": "", "title": title, "type": ext,
+                "skill": skill, "skills": [skill],
+                "author_hex": author,
+                "event_id": "", "kind": 0, "relay": "local",
+                "created_at": int(st.st_mtime),
+                "local_path": key,
+            }
+            engine.add_document(key, texts, payload, entry)
+            submitted += 1
 
+    prefix = str(root).rstrip("/") + "/"
+    for key in [k for k in engine.manifest if k.startswith(prefix) and k not in seen]:
+        if engine.remove_document(key):
+            print(f"    - {key[len(prefix):]} (supprimé)", file=sys.stderr)
+    return submitted, err_count
 
-# ── Indexation uDRIVE ─────────────────────────────────────────────────────────
 
-def index_udrive(session, udrive_root: Path | None = None):
+def index_udrive(engine: IngestEngine, udrive_root: Path | None = None):
     """
     Indexe les .md et .pdf depuis les répertoires uDRIVE locaux.
 
@@ -378,7 +708,7 @@ def index_udrive(session, udrive_root: Path | None = None):
         print("  [INFO] Aucun répertoire uDRIVE trouvé", file=sys.stderr)
         return 0, 0
 
-    ok_count = err_count = 0
+    submitted = err_count = 0
     for root in roots:
         # Extraire G1PUB depuis le chemin (~/.zen/game/players/<G1PUB>/...)
         parts = root.parts
@@ -389,108 +719,37 @@ def index_udrive(session, udrive_root: Path | None = None):
                 author_label = parts[idx + 1]  # G1PUB comme identifiant
 
         print(f"\n  → uDRIVE {root} ...", file=sys.stderr)
-        for ext in ["md", "pdf"]:
-            for fp in sorted(root.rglob(f"*.{ext}")):
-                rel = str(fp.relative_to(root))
-                print(f"    {rel} ...", end=" ", flush=True, file=sys.stderr)
-                try:
-                    raw = fp.read_bytes()
-                except Exception:
-                    print("✗ (lecture)", file=sys.stderr)
-                    err_count += 1
-                    continue
-
-                text = extract_text(raw, fp.name)
-                skill_guess = fp.parent.name.lower().replace("-", "_")
-                title = fp.stem.replace("_", " ").replace("-", " ")
-
-                embed_text = f"Titre: {title}\nSkill: {skill_guess}\n\n{text}"
-                vector = get_embedding(session, embed_text)
-                if vector is None:
-                    print("✗ (embed)", file=sys.stderr)
-                    err_count += 1
-                    continue
-
-                point_id = _path_to_uuid(str(fp))
-                payload = {
-                    "cid": "", "title": title, "type": ext,
-                    "skill": skill_guess, "skills": [skill_guess],
-                    "author_hex": author_label,
-                    "event_id": "", "kind": 0, "relay": "local",
-                    "created_at": int(fp.stat().st_mtime),
-                    "local_path": str(fp),
-                }
-                if _upsert(session, point_id, vector, payload):
-                    print("✓", file=sys.stderr)
-                    ok_count += 1
-                else:
-                    print("✗ (upsert)", file=sys.stderr)
-                    err_count += 1
+        n, err = _index_tree(engine, root, author_label)
+        submitted += n; err_count += err
 
-    print(f"\n  ✓ uDRIVE: {ok_count} docs indexés, {err_count} erreurs", file=sys.stderr)
-    return ok_count, err_count
+    print(f"\n  ✓ uDRIVE: {submitted} docs soumis, {err_count} erreurs", file=sys.stderr)
+    return submitted, err_count
 
 
 # ── Indexation répertoire libre ───────────────────────────────────────────────
 
-def index_directory(session, path: Path, author_hex: str = "", skill_hint: str = ""):
+def index_directory(engine: IngestEngine, path: Path, author_hex: str = "", skill_hint: str = ""):
     """Indexe récursivement un répertoire de documents (.md, .pdf)."""
     if not path.exists():
         print(f"  [WARN] répertoire absent : {path}", file=sys.stderr)
         return 0, 0
 
-    ok_count = err_count = 0
     print(f"\n  → Répertoire {path} ...", file=sys.stderr)
-    for ext in ["md", "pdf"]:
-        for fp in sorted(path.rglob(f"*.{ext}")):
-            rel = str(fp.relative_to(path))
-            print(f"    {rel} ...", end=" ", flush=True, file=sys.stderr)
-            try:
-                raw = fp.read_bytes()
-            except Exception:
-                print("✗ (lecture)", file=sys.stderr)
-                err_count += 1
-                continue
-
-            text = extract_text(raw, fp.name)
-            skill = skill_hint or fp.parent.name.lower().replace("-", "_") or "unknown"
-            title = fp.stem.replace("_", " ").replace("-", " ")
-
-            embed_text = f"Titre: {title}\nSkill: {skill}\n\n{text}"
-            vector = get_embedding(session, embed_text)
-            if vector is None:
-                print("✗ (embed)", file=sys.stderr)
-                err_count += 1
-                continue
-
-            point_id = _path_to_uuid(str(fp))
-            payload = {
-                "cid": "", "title": title, "type": ext,
-                "skill": skill, "skills": [skill],
-                "author_hex": author_hex,
-                "event_id": "", "kind": 0, "relay": "local",
-                "created_at": int(fp.stat().st_mtime),
-                "local_path": str(fp),
-            }
-            if _upsert(session, point_id, vector, payload):
-                print("✓", file=sys.stderr)
-                ok_count += 1
-            else:
-                print("✗ (upsert)", file=sys.stderr)
-                err_count += 1
-
-    print(f"\n  ✓ Répertoire: {ok_count} docs indexés, {err_count} erreurs", file=sys.stderr)
-    return ok_count, err_count
+    submitted, err_count = _index_tree(engine, path, author_hex, skill_hint,
+                                       default_skill="unknown")
+    print(f"\n  ✓ Répertoire: {submitted} docs soumis, {err_count} erreurs", file=sys.stderr)
+    return submitted, err_count
 
 
 # ── Recherche ─────────────────────────────────────────────────────────────────
 
 def do_search(session, query: str, skill_filter: str, limit: int) -> list[dict]:
+    """Meilleur passage par document, `limit` documents au plus."""
     vector = get_embedding(session, query)
     if vector is None:
         return []
     body: dict = {
-        "vector": vector, "limit": limit, "with_payload": True
+        "vector": vector, "limit": limit * 4, "with_payload": True
     }
     if skill_filter:
         body["filter"] = {
@@ -505,7 +764,11 @@ def do_search(session, query: str, skill_filter: str, limit: int) -> list[dict]:
             json=body, timeout=10,
         )
         if r.ok:
-            return r.json().get("result", [])
+            best = {}
+            for hit in r.json().get("result", []):
+                pl = hit.get("payload", {})
+                best.setdefault((pl.get("event_id", ""), pl.get("cid") or pl.get("local_path", "")), hit)
+            return list(best.values())[:limit]
     except Exception as e:
         print(f"  [SEARCH] {e}", file=sys.stderr)
     return []
@@ -558,6 +821,9 @@ def main():
                                       str(Path.home() / "workspace" / "AAA")))
     ap.add_argument("--stats",        action="store_true",
                     help="Stats de la collection knowledge")
+    ap.add_argument("--jobs",         type=int, default=DEFAULT_JOBS,
+                    help=f"Téléchargements IPFS / requêtes d'embedding simultanés "
+                         f"(défaut: {DEFAULT_JOBS})")
     args = ap.parse_args()
 
     session = _session()
@@ -596,29 +862,36 @@ def main():
     if not ensure_collection(session):
         sys.exit(1)
 
-    workspace = Path(args.workspace).expanduser()
-    total_ok = total_err = 0
-
-    if args.index_nostr:
-        ok, err = index_nostr(session, args.relay, workspace)
-        total_ok += ok; total_err += err
-
-    if args.index_udrive:
-        ok, err = index_udrive(session)
-        total_ok += ok; total_err += err
-
-    if args.index_dir:
-        ok, err = index_directory(
-            session, Path(args.index_dir).expanduser(),
-            author_hex=args.author, skill_hint=args.skill_hint
-        )
-        total_ok += ok; total_err += err
-
     if not (args.index_nostr or args.index_udrive or args.index_dir):
         ap.print_help()
         sys.exit(0)
 
-    print(f"\n  TOTAL knowledge: {total_ok} docs indexés, {total_err} erreurs",
+    workspace = Path(args.workspace).expanduser()
+    manifest = {} if args.reset else load_manifest()
+    if manifest and not _points_count(session):
+        manifest = {}       # collection vidée/recréée hors de ce script : tout réindexer
+    engine = IngestEngine(session, manifest, jobs=args.jobs)
+    total_err = 0
+    t0 = time.time()
+
+    try:
+        if args.index_nostr:
+            total_err += index_nostr(engine, args.relay, workspace)[1]
+
+        if args.index_udrive:
+            total_err += index_udrive(engine)[1]
+
+        if args.index_dir:
+            total_err += index_directory(
+                engine, Path(args.index_dir).expanduser(),
+                author_hex=args.author, skill_hint=args.skill_hint
+            )[1]
+    finally:
+        ok, err = engine.close()
+        save_manifest(engine.manifest)
+
+    print(f"\n  TOTAL knowledge: {ok} docs indexés, {total_err + err} erreurs "
+          f"— {time.time() - t0:.1f}s",
           file=sys.stderr)
 
 
@@ -151,6 +151,7 @@ case "${1:-}" in
         echo "    --search TEXT         Recherche sémantique (score⇥cid⇥auteur⇥titre⇥skill)"
         echo "    --skill SKILL         Filtre skill pour --search"
         echo "    --stats               Stats collection"
+        echo "    --jobs N              (avec --index-*) téléchargements IPFS / embeddings simultanés"
         echo ""
         echo "  Variables :"
         echo "    QDRANT_URL    ${QDRANT_URL}"
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests de IA/model_residency.py (résidence des modèles GPU) — sans GPU, sur
+MockGPU / MockBackend, état en mémoire (state_file=None, horloge virtuelle).
+Couvre :
+  - MockGPU : ordre d'éviction LRU, expiration keep_alive
+  - bail épinglé : tant qu'un travail tenu par begin() est en cours, un
+    begin() sur l'autre backend n'évince pas son modèle ; libéré après end()
+  - end() : modèle gardé si un travail en file en a besoin, libéré sinon
+  - simulate : nombre de chargements du scénario de référence (200 travaux,
+    graine 1), historique contre résidence
+
+Usage : python3 tests/test_model_residency.py
+"""
+
+# Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
+import sys as _sys
+import os as _os
+_venv_python = _os.path.expanduser("~/.astro/bin/python3")
+if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+    _os.execv(_venv_python, [_venv_python] + _sys.argv)
+del _sys, _os
+
+
+import sys, os
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+IA_DIR    = os.path.normpath(os.path.join(TESTS_DIR, '..', 'IA'))
+sys.path.insert(0, IA_DIR)
+
+# Valeurs par défaut du module : le scénario de simulate en dépend.
+for var in ("BRO_VISION_MODEL", "MODEL_RESIDENCY_KEEP_SEC", "MODEL_RESIDENCY"):
+    os.environ.pop(var, None)
+
+import model_residency as mr
+
+PASS = 0
+FAIL = 0
+
+def ok(msg):
+    global PASS
+    PASS += 1
+    print(f"  ✅ {msg}")
+
+def ko(msg, exc=None):
+    global FAIL
+    FAIL += 1
+    print(f"  ❌ {msg}", file=sys.stderr)
+    if exc:
+        print(f"     Exception : {exc}", file=sys.stderr)
+
+def section(title):
+    print(f"\n{'━'*60}")
+    print(f"  {title}")
+    print('━'*60)
+
+VISION = mr._norm(mr.VISION_MODEL)
+
+def make_manager(capacity_mb=24000):
+    """Gestionnaire sur VRAM simulée ; la file (pending) est une liste
+    modifiable [(type, état)]."""
+    gpu = mr.MockGPU(capacity_mb)
+    backends = {
+        "ollama": mr.MockBackend("ollama", gpu, mr._SIM_SIZES, mr._SIM_LOAD, preload=True),
+        "comfyui": mr.MockBackend("comfyui", gpu, mr._SIM_SIZES, mr._SIM_LOAD, preload=False),
+    }
+    pending = []
+    mgr = mr.ResidencyManager(backends, state_file=None, clock=gpu.time,
+                              pending=lambda: list(pending))
+    return mgr, gpu, backends, pending
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("1. MockGPU — éviction LRU et expiration")
+
+try:
+    gpu = mr.MockGPU(capacity_mb=20000)
+    assert gpu.load(("b", "A"), 8000, 10.0, None) is False
+    assert gpu.load(("b", "B"), 8000, 10.0, None) is False
+    assert gpu.load(("b", "A"), 8000, 10.0, None) is True     # A redevient le plus récent
+    assert gpu.load(("b", "C"), 8000, 10.0, None) is False    # évince B, pas A
+    assert list(gpu.resident) == [("b", "A"), ("b", "C")], list(gpu.resident)
+    assert (gpu.loads, gpu.evictions) == (3, 1), (gpu.loads, gpu.evictions)
+    assert gpu.load(("b", "D"), 16000, 10.0, None) is False   # évince A puis C, dans l'ordre
+    assert list(gpu.resident) == [("b", "D")] and gpu.evictions == 3
+    ok("LRU : le modèle touché le plus récemment survit, évictions dans l'ordre d'usage ✓")
+except Exception as e:
+    ko("éviction LRU", e)
+
+try:
+    gpu = mr.MockGPU()
+    gpu.load(("ollama", VISION), 8000, 20.0, keep_alive_sec=300)
+    expires = gpu.resident[("ollama", VISION)][1]
+    gpu.now = expires - 1
+    gpu.expire()
+    assert ("ollama", VISION) in gpu.resident
+    gpu.now = expires
+    gpu.expire()
+    assert ("ollama", VISION) not in gpu.resident
+    assert gpu.load(("ollama", VISION), 8000, 20.0, 300) is False and gpu.loads == 2
+    ok("keep_alive : résident jusqu'à l'échéance, rechargé à froid après ✓")
+except Exception as e:
+    ko("expiration keep_alive", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("2. Bail épinglé — pas d'éviction tant que begin() est tenu")
+
+try:
+    mgr, gpu, backends, pending = make_manager()
+    lease = mgr.begin("describe")
+    assert lease and lease["backend"] == "ollama" and lease["model"] == VISION
+    assert lease["warm"] is False
+    backends["ollama"].run(VISION)
+    pending[:] = [("describe", "running"), ("media:image", "queued")]
+
+    img = mgr.begin("media:image")
+    assert img["backend"] == "comfyui"
+    assert ("ollama", VISION) in gpu.resident, "modèle vision évincé sous bail"
+    assert VISION in mgr.status()["ollama"]
+    ok("begin(image) pendant un describe en cours : vision toujours résident ✓")
+
+    pending[:] = [("media:image", "running")]
+    mgr.end(lease)
+    assert ("ollama", VISION) not in gpu.resident, "vision non libéré après end()"
+    ok("end(describe) avec un travail ComfyUI en cours : vision libéré ✓")
+
+    pending[:] = []
+    mgr.end(img)
+    assert not [k for k in gpu.resident if k[0] == "comfyui"]
+    counters = mgr.stats()["models"]
+    assert counters[f"ollama:{VISION}"]["unloads"] == 1
+    assert counters[f"ollama:{VISION}"]["evictions"] == 0
+    ok("compteurs : 1 libération, 0 éviction du modèle épinglé ✓")
+except Exception as e:
+    ko("bail épinglé", e)
+
+try:
+    mgr, gpu, backends, pending = make_manager()
+    pending[:] = [("describe", "queued")]
+    first = mgr.begin("describe")
+    assert first["keep_alive"] == f"{mr.KEEP_ALIVE_SEC}s"
+    backends["ollama"].run(VISION, mr.KEEP_ALIVE_SEC)
+    assert mgr.end(first) is True
+    pending[:] = []
+    second = mgr.begin("identify")
+    assert second["warm"] is True and gpu.loads == 1
+    ok("end() garde le modèle pour le travail en file : le suivant le trouve chaud ✓")
+except Exception as e:
+    ko("end() et travail en file", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("3. simulate — chargements du scénario de référence")
+
+try:
+    results = mr.simulate(n=200, seed=1)
+    hist, res = results["historique"], results["résidence"]
+    print(f"     historique : {hist['loads']} chargements, {hist['load_sec']} s")
+    print(f"     résidence  : {res['loads']} chargements, {res['load_sec']} s")
+    assert hist["jobs"] == res["jobs"] == 200
+    assert hist["loads"] == 116, hist["loads"]
+    assert res["loads"] == 77, res["loads"]
+    totals = res["stats"]
+    assert totals["uses"] == 200
+    assert res["loads"] == totals["cold"] + totals["preloads"], totals
+    assert mr.simulate(n=200, seed=1)["résidence"]["loads"] == res["loads"]
+    ok("200 travaux, graine 1 : 116 → 77 chargements (froids + préchargements), déterministe ✓")
+except Exception as e:
+    ko("simulate", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+print(f"\n{'═'*60}")
+print(f"  Résultat : {PASS} test(s) réussi(s), {FAIL} échec(s)")
+print('═'*60)
+sys.exit(0 if FAIL == 0 else 1)
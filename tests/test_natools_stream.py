@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests de la bibliothèque natools.py : flux chiffré par blocs et IPFS HTTP
+Couvre :
+  - encrypt_stream / decrypt_stream (scellé et box) : round-trip, découpage
+    quelconque du chiffré, flux tronqué / altéré / prolongé refusés
+  - decrypt_any : scellé historique (encrypt) et flux
+  - ipfs_add / ipfs_cat / encrypt_to_ipfs / decrypt_from_ipfs contre un
+    bouchon local de l'API IPFS (POST /api/v0/add en multipart chunked,
+    POST /api/v0/cat)
+  - CLI : encrypt --stream puis decrypt (détection automatique du flux)
+  - bro.nostr._natools_encrypt / _natools_decrypt en processus
+
+Usage : ~/.astro/bin/python tests/test_natools_stream.py
+"""
+
+# Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
+import sys as _sys
+import os as _os
+_venv_python = _os.path.expanduser("~/.astro/bin/python3")
+if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+    _os.execv(_venv_python, [_venv_python] + _sys.argv)
+del _sys, _os
+
+
+import sys, os, importlib.util, hashlib, json, subprocess, tempfile, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# ── Helpers de chargement ──────────────────────────────────────────────────────
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod  = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS     = os.path.normpath(os.path.join(TESTS_DIR, '..', 'tools'))
+IA_DIR    = os.path.normpath(os.path.join(TESTS_DIR, '..', 'IA'))
+
+natools = load_module("natools", os.path.join(TOOLS, "natools.py"))
+
+import duniterpy.key
+
+_ALICE = duniterpy.key.SigningKey.from_credentials("coucou", "coucou")
+_BOB   = duniterpy.key.SigningKey.from_credentials("bob", "bob")
+
+PASS = 0
+FAIL = 0
+
+def ok(msg):
+    global PASS
+    PASS += 1
+    print(f"  ✅ {msg}")
+
+def ko(msg, exc=None):
+    global FAIL
+    FAIL += 1
+    print(f"  ❌ {msg}", file=sys.stderr)
+    if exc:
+        print(f"     Exception : {exc}", file=sys.stderr)
+
+def section(title):
+    print(f"\n{'━'*60}")
+    print(f"  {title}")
+    print('━'*60)
+
+def expect_error(fn, what):
+    try:
+        fn()
+    except ValueError:
+        return
+    raise AssertionError(f"{what} : ValueError attendue")
+
+# ── Bouchon de l'API IPFS ─────────────────────────────────────────────────────
+class _IPFSStub(BaseHTTPRequestHandler):
+    """add : stocke le fichier du multipart sous un pseudo-CID (sha256) ;
+    cat : le rend. Compte les requêtes chunked reçues."""
+    store = {}
+    chunked_adds = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            type(self).chunked_adds += 1
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._body()
+        if url.path == "/api/v0/add":
+            boundary = self.headers["Content-Type"].split("boundary=", 1)[1].encode()
+            part = body.split(b"--" + boundary)[1]
+            content = part.split(b"\r\n\r\n", 1)[1][:-2]
+            cid = "Qm" + hashlib.sha256(content).hexdigest()[:44]
+            self.store[cid] = content
+            reply = json.dumps({"Name": "data", "Hash": cid, "Size": str(len(content))}).encode() + b"\n"
+        elif url.path == "/api/v0/cat":
+            cid = parse_qs(url.query)["arg"][0].rsplit("/", 1)[-1]
+            if cid not in self.store:
+                self.send_response(500)
+                self.end_headers()
+                return
+            reply = self.store[cid]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+_server = ThreadingHTTPServer(("127.0.0.1", 0), _IPFSStub)
+threading.Thread(target=_server.serve_forever, daemon=True).start()
+API = f"http://127.0.0.1:{_server.server_address[1]}"
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("1. encrypt_stream / decrypt_stream — round-trip")
+
+DATA = os.urandom(300_000)
+
+try:
+    enc = list(natools.encrypt_stream([DATA[:1000], DATA[1000:]], _ALICE.pubkey, chunk_size=65536))
+    blob = b"".join(enc)
+    assert blob.startswith(natools.STREAM_MAGIC)
+    assert b"".join(natools.decrypt_stream(enc, _ALICE)) == DATA
+    # découpage du chiffré sans rapport avec les blocs
+    pieces = [blob[i:i + 777] for i in range(0, len(blob), 777)]
+    assert b"".join(natools.decrypt_stream(pieces, _ALICE)) == DATA
+    ok(f"scellé : {len(DATA)} octets, {len(enc) - 1} blocs, découpage arbitraire ✓")
+except Exception as e:
+    ko("round-trip scellé échoué", e)
+
+try:
+    blob = b"".join(natools.encrypt_stream([DATA], _ALICE.pubkey, privkey=_BOB))
+    assert b"".join(natools.decrypt_stream([blob], _ALICE, _BOB.pubkey)) == DATA
+    expect_error(lambda: b"".join(natools.decrypt_stream([blob], _ALICE)), "box sans pubkey expéditeur")
+    ok("box : expéditeur authentifié, pubkey requise au déchiffrement ✓")
+except Exception as e:
+    ko("round-trip box échoué", e)
+
+try:
+    for payload in (b"", b"x", os.urandom(65536), os.urandom(65536 * 2)):
+        blob = b"".join(natools.encrypt_stream([payload], _ALICE.pubkey))
+        assert b"".join(natools.decrypt_stream([blob], _ALICE)) == payload
+    ok("tailles limites (vide, 1 octet, multiples exacts du bloc) ✓")
+except Exception as e:
+    ko("tailles limites échouées", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("2. Flux invalides")
+
+try:
+    blob = b"".join(natools.encrypt_stream([DATA], _ALICE.pubkey))
+    expect_error(lambda: b"".join(natools.decrypt_stream([blob[:-1]], _ALICE)), "flux tronqué")
+    # Coupé exactement entre deux blocs : plus de bloc final
+    first_end = len(natools.STREAM_MAGIC) + 1 + 32 + 16 + 4 + 65536 + 16
+    expect_error(lambda: b"".join(natools.decrypt_stream([blob[:first_end]], _ALICE)), "bloc final absent")
+    expect_error(lambda: b"".join(natools.decrypt_stream([blob + b"\x00"], _ALICE)), "données en trop")
+    tampered = bytearray(blob)
+    tampered[-5] ^= 1
+    # Échec d'authentification : libnacl.CryptError, comme natools.decrypt
+    for bad, key in ((bytes(tampered), _ALICE), (blob, _BOB)):
+        try:
+            b"".join(natools.decrypt_stream([bad], key))
+        except Exception:
+            continue
+        raise AssertionError("flux altéré ou mauvaise clé acceptés")
+    ok("tronqué, sans bloc final, prolongé, altéré, mauvaise clé → refusés ✓")
+except Exception as e:
+    ko("détection des flux invalides échouée", e)
+
+try:
+    sealed = natools.encrypt(b"historique", _ALICE.pubkey)
+    assert natools.decrypt_any(sealed, _ALICE) == b"historique"
+    assert natools.decrypt_any(b"".join(natools.encrypt_stream([b"flux"], _ALICE.pubkey)), _ALICE) == b"flux"
+    ok("decrypt_any : scellé historique et flux ✓")
+except Exception as e:
+    ko("decrypt_any échoué", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("3. IPFS par l'API HTTP (bouchon local)")
+
+try:
+    cid = natools.ipfs_add([b"abc", b"def"], api=API)
+    assert b"".join(natools.ipfs_cat(cid, api=API)) == b"abcdef"
+    assert _IPFSStub.chunked_adds >= 1
+    ok(f"ipfs_add (multipart chunked) / ipfs_cat → {cid[:12]}… ✓")
+except Exception as e:
+    ko("ipfs_add / ipfs_cat échoués", e)
+
+try:
+    cid = natools.encrypt_to_ipfs(b"log BRO", _ALICE.pubkey, api=API)
+    stored = _IPFSStub.store[cid]
+    assert not natools.is_stream(stored) and natools.decrypt(stored, _ALICE) == b"log BRO"
+    assert natools.decrypt_from_ipfs(cid, _ALICE, api=API) == b"log BRO"
+    cid = natools.encrypt_to_ipfs(iter([DATA[:5], DATA[5:]]), _ALICE.pubkey, stream=True, api=API)
+    assert natools.is_stream(_IPFSStub.store[cid])
+    assert natools.decrypt_from_ipfs(cid, _ALICE, api=API) == DATA
+    ok("encrypt_to_ipfs : scellé (format CLI) et flux, relus par decrypt_from_ipfs ✓")
+except Exception as e:
+    ko("encrypt_to_ipfs / decrypt_from_ipfs échoués", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("4. CLI natools.py (enveloppe fine)")
+
+try:
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, enc, out = (os.path.join(tmp, n) for n in ("plain", "enc", "out"))
+        keyfile = os.path.join(tmp, "alice.dunikey")
+        with open(keyfile, "wb") as f:
+            f.write(natools.format_privkey(_ALICE, "pubsec"))
+        with open(plain, "wb") as f:
+            f.write(DATA)
+        cli = [sys.executable, os.path.join(TOOLS, "natools.py")]
+        subprocess.run(cli + ["encrypt", "--stream", "-p", _ALICE.pubkey, "-i", plain, "-o", enc], check=True)
+        with open(enc, "rb") as f:
+            assert natools.is_stream(f.read(8))
+        subprocess.run(cli + ["decrypt", "-f", "pubsec", "-k", keyfile, "-i", enc, "-o", out], check=True)
+        with open(out, "rb") as f:
+            assert f.read() == DATA
+        subprocess.run(cli + ["encrypt", "-p", _ALICE.pubkey, "-i", plain, "-o", enc], check=True)
+        subprocess.run(cli + ["decrypt", "-f", "pubsec", "-k", keyfile, "-i", enc, "-o", out], check=True)
+        with open(out, "rb") as f:
+            assert f.read() == DATA
+        res = subprocess.run(cli + ["encrypt", "--ipfs", "-p", _ALICE.pubkey, "-i", plain],
+                             check=True, capture_output=True, text=True, env=dict(os.environ, IPFS_API=API))
+        assert natools.decrypt(_IPFSStub.store[res.stdout.strip()], _ALICE) == DATA
+    ok("encrypt --stream / decrypt auto, encrypt / decrypt historique, encrypt --ipfs ✓")
+except Exception as e:
+    ko("CLI échouée", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("5. bro.nostr : chiffrement des logs en processus")
+
+try:
+    with tempfile.TemporaryDirectory() as home:
+        owner = "alice@example.org"
+        owner_dir = os.path.join(home, ".zen", "game", "nostr", owner)
+        os.makedirs(owner_dir)
+        # bro résout TOOLS_PATH sous ~/.zen/Astroport.ONE
+        os.symlink(os.path.dirname(TOOLS), os.path.join(home, ".zen", "Astroport.ONE"))
+        with open(os.path.join(owner_dir, ".secret.dunikey"), "wb") as f:
+            f.write(natools.format_privkey(_ALICE, "pubsec"))
+        env = dict(os.environ, HOME=home, IPFS_API=API)
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import bro.nostr as n;"
+            "cid = n._natools_encrypt(sys.argv[2], b'log chiffre');"
+            "import json; print(json.dumps([cid, n._natools_decrypt(sys.argv[2], cid).decode(), bool(n._natools)]))"
+        )
+        res = subprocess.run([sys.executable, "-c", code, IA_DIR, owner],
+                             capture_output=True, text=True, env=env, timeout=60)
+        assert res.returncode == 0, res.stderr[-500:]
+        cid, text, inprocess = json.loads(res.stdout.splitlines()[-1])
+        assert text == "log chiffre" and inprocess, res.stderr[-500:]
+        assert natools.decrypt(_IPFSStub.store[cid], _ALICE) == b"log chiffre"
+    ok("_natools_encrypt / _natools_decrypt : natools importé, sans sous-processus ✓")
+except Exception as e:
+    ko("bro.nostr en processus échoué", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+_server.shutdown()
+print(f"\n{'═'*60}")
+print(f"  Résultat : {PASS} test(s) réussi(s), {FAIL} échec(s)")
+print('═'*60)
+sys.exit(0 if FAIL == 0 else 1)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Tests de tools/nostr_crypto.py (NIP-44 v2 / NIP-04 partagés)
+Couvre :
+  - vecteurs officiels NIP-44 v2 (paulmillr/nip44, nip44.vectors.json) :
+    clés de conversation, calc_padded_len, encrypt_decrypt, message long,
+    cas invalides ; le fichier complet est rejoué s'il est fourni
+    (NIP44_VECTORS=/chemin/nip44.vectors.json ou tests/nip44.vectors.json)
+  - rétrocompatibilité : NIP-04, anciens formats NIP-44 d'intercom
+  - cache LRU des clés de conversation, lots decrypt_events / nip44_encrypt_many
+  - nostr_node_intercom.py decrypt : un event, une liste d'events
+  - benchmark : déchiffrement de 1000 self-DM (NOSTR_BENCH_DMS)
+
+Usage : ~/.astro/bin/python tests/test_nostr_crypto.py
+"""
+
+# Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
+import sys as _sys
+import os as _os
+_venv_python = _os.path.expanduser("~/.astro/bin/python3")
+if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+    _os.execv(_venv_python, [_venv_python] + _sys.argv)
+del _sys, _os
+
+
+import sys, os, json, time, base64, hashlib, hmac, subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS     = os.path.normpath(os.path.join(TESTS_DIR, '..', 'tools'))
+sys.path.insert(0, TOOLS)
+
+import nostr_crypto as nc
+
+PASS = 0
+FAIL = 0
+
+def ok(msg):
+    global PASS
+    PASS += 1
+    print(f"  ✅ {msg}")
+
+def ko(msg, exc=None):
+    global FAIL
+    FAIL += 1
+    print(f"  ❌ {msg}", file=sys.stderr)
+    if exc:
+        print(f"     Exception : {exc}", file=sys.stderr)
+
+def section(title):
+    print(f"\n{'━'*60}")
+    print(f"  {title}")
+    print('━'*60)
+
+def expect_error(fn, what):
+    try:
+        fn()
+    except ValueError:
+        return
+    raise AssertionError(f"{what} : ValueError attendue")
+
+def nsec_of(priv_hex):
+    import bech32
+    return bech32.bech32_encode("nsec", bech32.convertbits(bytes.fromhex(priv_hex), 8, 5))
+
+# ── Vecteurs officiels NIP-44 v2 (extraits de nip44.vectors.json) ─────────────
+ONE = "00" * 31 + "01"
+TWO = "00" * 31 + "02"
+
+CONV_KEYS = [
+    ("315e59ff51cb9209768cf7da80791ddcaae56ac9775eb25b6dee1234bc5d2268",
+     "c2f9d9948dc8c7c38321e4b85c8558872eafa0641cd269db76848a6073e69133",
+     "3dfef0ce2a4d80a25e7a328accf73448ef67096f65f79588e358d9a0eb9013f1"),
+    ("a1e37752c9fdc1273be53f68c5f74be7c8905728e8de75800b94262f9497c86e",
+     "03bb7947065dde12ba991ea045132581d0954f042c84e06d8c00066e23c1a800",
+     "4d14f36e81b8452128da64fe6f1eae873baae2f444b02c950b90e43553f2178b"),
+    ("98a5902fd67518a0c900f0fb62158f278f94a21d6f9d33d30cd3091195500311",
+     "aae65c15f98e5e677b5050de82e3aba47a6fe49b3dab7863cf35d9478ba9f7d1",
+     "9c00b769d5f54d02bf175b7284a1cbd28b6911b06cda6666b2243561ac96bad7"),
+    ("fffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364139",
+     "0000000000000000000000000000000000000000000000000000000000000002",
+     "8b6392dbf2ec6a2b2d5b1477fc2be84d63ef254b667cadd31bd3f444c44ae6ba"),
+]
+
+PADDED_LENS = [[16, 32], [32, 32], [33, 64], [37, 64], [45, 64], [49, 64], [64, 64],
+               [65, 96], [100, 128], [111, 128], [200, 224], [250, 256], [320, 320],
+               [383, 384], [384, 384], [400, 448], [500, 512], [512, 512], [515, 640],
+               [700, 768], [800, 896], [900, 1024], [1020, 1024], [65536, 65536]]
+
+ENCRYPT_DECRYPT = [
+    {"sec1": ONE, "sec2": TWO,
+     "conversation_key": "c41c775356fd92eadc63ff5a0dc1da211b268cbea22316767095b2871ea1412d",
+     "nonce": "0000000000000000000000000000000000000000000000000000000000000001",
+     "plaintext": "a",
+     "payload": "AgAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAABee0G5VSK0/9YypIObAtDKfYEAjD35uVkHyB0F4DwrcNaCXlCWZKaArsGrY6M9wnuTMxWfp1RTN9Xga8no+kF5Vsb"},
+    {"sec1": TWO, "sec2": ONE,
+     "conversation_key": "c41c775356fd92eadc63ff5a0dc1da211b268cbea22316767095b2871ea1412d",
+     "nonce": "f00000000000000000000000000000f00000000000000000000000000000000f",
+     "plaintext": "🍕🫃",
+     "payload": "AvAAAAAAAAAAAAAAAAAAAPAAAAAAAAAAAAAAAAAAAAAPSKSK6is9ngkX2+cSq85Th16oRTISAOfhStnixqZziKMDvB0QQzgFZdjLTPicCJaV8nDITO+QfaQ61+KbWQIOO2Yj"},
+    {"conversation_key": "3e2b52a63be47d34fe0a80e34e73d436d6963bc8f39827f327057a9986c20a45",
+     "nonce": "b635236c42db20f021bb8d1cdff5ca75dd1a0cc72ea742ad750f33010b24f73b",
+     "plaintext": "表ポあA鷗ŒéＢ逍Üßªąñ丂㐀𠀀",
+     "payload": "ArY1I2xC2yDwIbuNHN/1ynXdGgzHLqdCrXUPMwELJPc7s7JqlCMJBAIIjfkpHReBPXeoMCyuClwgbT419jUWU1PwaNl4FEQYKCDKVJz+97Mp3K+Q2YGa77B6gpxB/lr1QgoqpDf7wDVrDmOqGoiPjWDqy8KzLueKDcm9BVP8xeTJIxs="},
+    {"conversation_key": "d5a2f879123145a4b291d767428870f5a8d9e5007193321795b40183d4ab8c2b",
+     "nonce": "b20989adc3ddc41cd2c435952c0d59a91315d8c5218d5040573fc3749543acaf",
+     "plaintext": "ability🤝的 ȺȾ",
+     "payload": "ArIJia3D3cQc0sQ1lSwNWakTFdjFIY1QQFc/w3SVQ6yvbG2S0x4Yu86QGwPTy7mP3961I1XqB6SFFTzqDZZavhxoWMj7mEVGMQIsh2RLWI5EYQaQDIePSnXPlzf7CIt+voTD"},
+    {"conversation_key": "3b15c977e20bfe4b8482991274635edd94f366595b1a3d2993515705ca3cedb8",
+     "nonce": "8d4442713eb9d4791175cb040d98d6fc5be8864d6ec2f89cf0895a2b2b72d1b1",
+     "plaintext": "pepper👀їжак",
+     "payload": "Ao1EQnE+udR5EXXLBA2Y1vxb6IZNbsL4nPCJWisrctGxY3AduCS+jTUgAAnfvKafkmpy15+i9YMwCdccisRa8SvzW671T2JO4LFSPX31K4kYUKelSAdSPwe9NwO6LhOsnoJ+"},
+]
+
+LONG_MSG = [
+    {"conversation_key": "8fc262099ce0d0bb9b89bac05bb9e04f9bc0090acc181fef6840ccee470371ed",
+     "nonce": "326bcb2c943cd6bb717588c9e5a7e738edf6ed14ec5f5344caa6ef56f0b9cff7",
+     "pattern": "x", "repeat": 65535,
+     "plaintext_sha256": "09ab7495d3e61a76f0deb12cb0306f0696cbb17ffc12131368c7a939f12f56d3",
+     "payload_sha256": "90714492225faba06310bff2f249ebdc2a5e609d65a629f1c87f2d4ffc55330a"},
+]
+
+INVALID_MSG_LENGTHS = [0, 65536, 100000, 10000000]
+
+def check_conv_key(v):
+    assert nc.conversation_key(v["sec1"], v["pub2"]).hex() == v["conversation_key"], v
+
+def check_encrypt_decrypt(v):
+    ck = bytes.fromhex(v["conversation_key"])
+    if "sec1" in v:
+        assert nc.conversation_key(v["sec1"], nc.pubkey_hex(v["sec2"])) == ck
+        assert nc.conversation_key(v["sec2"], nc.pubkey_hex(v["sec1"])) == ck
+    assert nc.nip44_encrypt_with_key(v["plaintext"], ck, bytes.fromhex(v["nonce"])) == v["payload"], v
+    assert nc.nip44_decrypt_with_key(v["payload"], ck) == v["plaintext"]
+
+def check_long_msg(v):
+    plaintext = v["pattern"] * v["repeat"]
+    assert hashlib.sha256(plaintext.encode()).hexdigest() == v["plaintext_sha256"]
+    ck = bytes.fromhex(v["conversation_key"])
+    payload = nc.nip44_encrypt_with_key(plaintext, ck, bytes.fromhex(v["nonce"]))
+    assert hashlib.sha256(payload.encode()).hexdigest() == v["payload_sha256"]
+    assert nc.nip44_decrypt_with_key(payload, ck) == plaintext
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("1. Vecteurs officiels NIP-44 v2")
+
+try:
+    for v in CONV_KEYS:
+        check_conv_key({"sec1": v[0], "pub2": v[1], "conversation_key": v[2]})
+    ok(f"get_conversation_key : {len(CONV_KEYS)} vecteurs ✓")
+except Exception as e:
+    ko("get_conversation_key échoué", e)
+
+try:
+    for n, padded in PADDED_LENS:
+        assert nc.calc_padded_len(n) == padded, (n, padded)
+    ok(f"calc_padded_len : {len(PADDED_LENS)} vecteurs ✓")
+except Exception as e:
+    ko("calc_padded_len échoué", e)
+
+try:
+    for v in ENCRYPT_DECRYPT:
+        check_encrypt_decrypt(v)
+    for v in LONG_MSG:
+        check_long_msg(v)
+    ok(f"encrypt_decrypt : {len(ENCRYPT_DECRYPT)} vecteurs + message de 65535 octets ✓")
+except Exception as e:
+    ko("encrypt_decrypt échoué", e)
+
+try:
+    ck = bytes(32)
+    for n in INVALID_MSG_LENGTHS:
+        expect_error(lambda: nc.nip44_encrypt_with_key("a" * n, ck), f"longueur {n}")
+    ok(f"encrypt_msg_lengths invalides ({INVALID_MSG_LENGTHS}) refusées ✓")
+except Exception as e:
+    ko("longueurs invalides acceptées", e)
+
+try:
+    N = "fffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141"
+    pub = nc.pubkey_hex(TWO)
+    for sec in ("00" * 32, N, "ff" * 32):
+        expect_error(lambda: nc.conversation_key(sec, pub), f"sec1 {sec[:8]}…")
+    # 0 et p-1... : x sans racine (hors courbe), x >= p
+    for bad in ("00" * 32, "ff" * 32,
+                "fffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc30"):
+        expect_error(lambda: nc.conversation_key(ONE, bad), f"pub2 {bad[:8]}…")
+    ok("get_conversation_key invalides (sec1 = 0, n, > n ; pub2 hors courbe / ≥ p) ✓")
+except Exception as e:
+    ko("clés invalides acceptées", e)
+
+try:
+    v = ENCRYPT_DECRYPT[0]
+    ck = bytes.fromhex(v["conversation_key"])
+    raw = base64.b64decode(v["payload"])
+    bad_mac = base64.b64encode(raw[:-1] + bytes([raw[-1] ^ 1])).decode()
+    bad_version = base64.b64encode(b"\x01" + raw[1:]).decode()
+    # padding incohérent : 1 octet annoncé mais 64 octets de bourrage, MAC valide
+    nonce = bytes.fromhex(v["nonce"])
+    chacha_key, chacha_nonce, hmac_key = nc._message_keys(ck, nonce)
+    ct = nc._chacha20(chacha_key, chacha_nonce, b"\x00\x01a" + b"\x00" * 63)
+    bad_pad = base64.b64encode(b"\x02" + nonce + ct +
+                               hmac.new(hmac_key, nonce + ct, hashlib.sha256).digest()).decode()
+    cases = {"version inconnue (#)": "#" + v["payload"][1:], "version 1": bad_version,
+             "MAC invalide": bad_mac, "padding invalide": bad_pad,
+             "payload trop court": v["payload"][:100], "base64 invalide": v["payload"][:-4] + "!!!!"}
+    for what, payload in cases.items():
+        expect_error(lambda: nc.nip44_decrypt_with_key(payload, ck), what)
+    ok(f"decrypt invalides refusés : {', '.join(cases)} ✓")
+except Exception as e:
+    ko("payloads invalides acceptés", e)
+
+VECTORS_FILE = os.environ.get("NIP44_VECTORS") or os.path.join(TESTS_DIR, "nip44.vectors.json")
+if os.path.isfile(VECTORS_FILE):
+    try:
+        with open(VECTORS_FILE) as f:
+            v2 = json.load(f)["v2"]
+        valid, invalid = v2["valid"], v2["invalid"]
+        for v in valid["get_conversation_key"]:
+            check_conv_key(v)
+        mk = valid["get_message_keys"]
+        for k in mk["keys"]:
+            keys = nc._message_keys(bytes.fromhex(mk["conversation_key"]), bytes.fromhex(k["nonce"]))
+            assert [x.hex() for x in keys] == [k["chacha_key"], k["chacha_nonce"], k["hmac_key"]]
+        for n, padded in valid["calc_padded_len"]:
+            assert nc.calc_padded_len(n) == padded
+        for v in valid["encrypt_decrypt"]:
+            check_encrypt_decrypt(v)
+        for v in valid["encrypt_decrypt_long_msg"]:
+            check_long_msg(v)
+        for n in invalid["encrypt_msg_lengths"]:
+            expect_error(lambda: nc.nip44_encrypt_with_key("a" * n, bytes(32)), f"longueur {n}")
+        for v in invalid["get_conversation_key"]:
+            expect_error(lambda: nc.conversation_key(v["sec1"], v["pub2"]), v.get("note", ""))
+        for v in invalid["decrypt"]:
+            expect_error(lambda: nc.nip44_decrypt_with_key(v["payload"], bytes.fromhex(v["conversation_key"])),
+                         v.get("note", ""))
+        ok(f"fichier complet {os.path.basename(VECTORS_FILE)} rejoué ✓")
+    except Exception as e:
+        ko(f"fichier de vecteurs {VECTORS_FILE}", e)
+else:
+    print("  ⏭  nip44.vectors.json absent — extraits embarqués uniquement")
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("2. Rétrocompatibilité NIP-04 / anciens NIP-44")
+
+A_SEC = hashlib.sha256(b"alice").hexdigest()
+B_SEC = hashlib.sha256(b"bob").hexdigest()
+A_PUB, B_PUB = nc.pubkey_hex(A_SEC), nc.pubkey_hex(B_SEC)
+
+try:
+    for msg in ("salut", "é" * 500, json.dumps({"channel": "bro_ia", "payload": {"text": "x"}})):
+        assert nc.decrypt_content(nc.nip44_encrypt(msg, A_SEC, B_PUB), B_SEC, A_PUB) == msg
+        assert nc.decrypt_content(nc.nip04_encrypt(msg, A_SEC, B_PUB), B_SEC, A_PUB) == msg
+    ok("NIP-44 et NIP-04 : A → B déchiffré par B ✓")
+except Exception as e:
+    ko("round-trip NIP-04/44 échoué", e)
+
+try:
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+    hkdf = lambda ikm, n, salt, info: HKDF(hashes.SHA256(), n, salt, info).derive(ikm)
+    shared = nc.shared_secret(A_SEC, B_PUB)
+    # ancienne impl intercom : conv key = HKDF(salt=None), clés = HKDF(salt=nonce)
+    nonce = os.urandom(32)
+    keys = hkdf(hkdf(shared, 32, None, b"nip44-v2"), 76, nonce, b"nip44-v2")
+    ct = nc._chacha20(keys[:32], keys[32:44], b"\x00\x06legacy" + b"\x00" * 26)
+    legacy_v2 = base64.b64encode(b"\x02" + nonce + ct +
+                                 hmac.new(keys[44:76], nonce + ct, hashlib.sha256).digest()).decode()
+    assert nc.decrypt_content(legacy_v2, B_SEC, A_PUB) == "legacy"
+    expect_error(lambda: nc.nip44_decrypt(legacy_v2, B_SEC, A_PUB, legacy=False), "legacy=False")
+    n12 = os.urandom(12)
+    key = hkdf(shared, 32, b"nostr-nip44-v1", b"nostr-encryption")
+    legacy_v1 = base64.b64encode(n12 + ChaCha20Poly1305(key).encrypt(n12, b"v1", None)).decode()
+    assert nc.decrypt_content(legacy_v1, B_SEC, A_PUB) == "v1"
+    ok("anciens formats intercom (v2 non conforme, ChaCha20Poly1305) toujours lus ✓")
+except Exception as e:
+    ko("anciens formats illisibles", e)
+
+try:
+    import nostr_node_intercom, nostr_send_secure_dm
+    assert nostr_node_intercom._decrypt_content is nc.decrypt_content
+    assert nostr_node_intercom._nip44_encrypt is nc.nip44_encrypt
+    assert nostr_send_secure_dm.nip44_encrypt is nc.nip44_encrypt
+    assert nostr_send_secure_dm.nip04_encrypt is nc.nip04_encrypt
+    ok("nostr_node_intercom / nostr_send_secure_dm utilisent nostr_crypto ✓")
+except ImportError as e:
+    print(f"  ⏭  import des outils impossible ici ({e})")
+except Exception as e:
+    ko("outils non branchés sur nostr_crypto", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("3. Cache LRU des clés de conversation")
+
+try:
+    cache = nc.ConversationKeyCache(maxsize=2)
+    k1 = cache.get(A_SEC, B_PUB)
+    assert cache.get(A_SEC, B_PUB) is k1 and cache.stats()["hits"] == 1
+    assert cache.get(B_SEC, A_PUB)[1] == k1[1]          # symétrique
+    cache.get(A_SEC, A_PUB)                             # évince (A, B)
+    cache.get(A_SEC, B_PUB.upper())
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["misses"] == 4, stats
+    ok(f"hits/misses, symétrie, éviction LRU (maxsize=2) ✓ {stats}")
+except Exception as e:
+    ko("cache LRU incorrect", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+section("4. Lots : decrypt_events / nip44_encrypt_many")
+
+try:
+    payloads = nc.nip44_encrypt_many([(B_PUB, "pour B"), (A_PUB, "note à soi")], A_SEC)
+    events = [
+        {"id": "1", "pubkey": A_PUB, "tags": [["p", B_PUB]], "content": payloads[0]},   # écrit par A
+        {"id": "2", "pubkey": A_PUB, "tags": [["p", A_PUB]], "content": payloads[1]},   # self-DM
+        {"id": "3", "pubkey": B_PUB, "tags": [["p", A_PUB]],
+         "content": nc.nip04_encrypt("de B", B_SEC, A_PUB)},                           # reçu, NIP-04
+        {"id": "4", "pubkey": B_PUB, "tags": [], "content": "illisible"},
+    ]
+    assert nc.decrypt_events(events, A_SEC) == ["pour B", "note à soi", "de B", None]
+    ok("events écrits, self-DM, reçus NIP-04, illisibles → None ✓")
+except Exception as e:
+    ko("lots échoués", e)
+
+try:
+    env = {**os.environ, "NOSTR_NSEC": nsec_of(A_SEC)}
+    cli = [sys.executable, os.path.join(TOOLS, "nostr_node_intercom.py"), "decrypt"]
+    dm = json.dumps({"channel": "bro_ia", "payload": {"text": "cmd"}})
+    ev = {"id": "x", "pubkey": A_PUB, "tags": [["p", A_PUB]], "content": nc.nip44_encrypt(dm, A_SEC, A_PUB)}
+    one = subprocess.run(cli, input=json.dumps(ev), capture_output=True, text=True, env=env, timeout=60)
+    assert json.loads(one.stdout)["payload"]["text"] == "cmd", one.stderr[-300:]
+    many = subprocess.run(cli, input=json.dumps([ev, {**ev, "content": "zz"}]),
+                          capture_output=True, text=True, env=env, timeout=60)
+    out = json.loads(many.stdout)
+    assert out[0]["payload"]["text"] == "cmd" and out[1] is None, many.stderr[-300:]
+    ok("nostr_node_intercom.py decrypt : un event, une liste (null si illisible) ✓")
+except Exception as e:
+    ko("CLI decrypt échouée", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+BENCH_DMS = int(os.environ.get("NOSTR_BENCH_DMS", "1000"))
+section(f"5. Benchmark — {BENCH_DMS} self-DM")
+
+try:
+    texts = [json.dumps({"channel": "bro_ia", "payload": {"text": f"#BRO commande {i}"}})
+             for i in range(BENCH_DMS)]
+    events = [{"id": str(i), "pubkey": A_PUB, "tags": [["p", A_PUB]], "content": c}
+              for i, c in enumerate(nc.nip44_encrypt_many([(A_PUB, t) for t in texts], A_SEC))]
+
+    nc.clear_cache()
+    t0 = time.perf_counter()
+    out = nc.decrypt_events(events, A_SEC)
+    batch = time.perf_counter() - t0
+    assert out == texts
+
+    t0 = time.perf_counter()
+    for ev in events:
+        nc.clear_cache()                    # ancien comportement : ECDH par message
+        nc.decrypt_content(ev["content"], A_SEC, A_PUB)
+    uncached = time.perf_counter() - t0
+
+    sample = events[:10]
+    env = {**os.environ, "NOSTR_NSEC": nsec_of(A_SEC)}
+    cli = [sys.executable, os.path.join(TOOLS, "nostr_node_intercom.py"), "decrypt"]
+    t0 = time.perf_counter()
+    for ev in sample:
+        subprocess.run(cli, input=json.dumps(ev), capture_output=True, text=True, env=env, timeout=60)
+    per_process = (time.perf_counter() - t0) / len(sample)
+
+    print(f"     lot, clé en cache     : {batch * 1000:8.1f} ms ({batch / BENCH_DMS * 1e6:.0f} µs/DM)")
+    print(f"     ECDH par message      : {uncached * 1000:8.1f} ms ({uncached / BENCH_DMS * 1e6:.0f} µs/DM)")
+    print(f"     sous-processus / DM   : {per_process * BENCH_DMS:8.1f} s  (extrapolé, {per_process * 1000:.0f} ms/DM)")
+    ok(f"{BENCH_DMS} self-DM : ×{uncached / batch:.1f} vs ECDH par message, "
+       f"×{per_process * BENCH_DMS / batch:.0f} vs un sous-processus par DM ✓")
+except Exception as e:
+    ko("benchmark échoué", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+print(f"\n{'═'*60}")
+print(f"  Résultat : {PASS} test(s) réussi(s), {FAIL} échec(s)")
+print('═'*60)
+sys.exit(0 if FAIL == 0 else 1)
@@ -7,6 +7,9 @@ Couvre :
   - box_encrypt/box_decrypt avec clé SS58 (NaCl Box DH)
   - g1pub_to_ss58 round-trip v1 ↔ SS58
   - Simulation SSSS (cas make_NOSTRCARD.sh)
+  - Propriété round-trip v1 ↔ SS58 (unitaire, batch, --stdin) sur des clés
+    aléatoires, octets nuls de tête compris
+  - Débit des conversions batch sur 100k clés (SS58_BENCH_KEYS pour changer)
 
 Usage : ~/.astro/bin/python tests/test_ss58_integration.py
 """
@@ -36,6 +39,7 @@ TOOLS     = os.path.normpath(TOOLS)
 
 natools   = load_module("natools",        os.path.join(TOOLS, "natools.py"))
 g1pub_mod = load_module("g1pub_to_ss58",  os.path.join(TOOLS, "g1pub_to_ss58.py"))
+mbase58   = load_module("Mbase58",        os.path.join(TOOLS, "Mbase58.py"))
 
 import duniterpy.key, libnacl, base58
 
@@ -232,6 +236,83 @@ try:
 except Exception as e:
     ko("Test longueur clés échoué", e)
 
+# ─────────────────────────────────────────────────────────────────────────────
+section("7. Propriété round-trip v1 ↔ SS58 (clés aléatoires)")
+
+import io, random, hashlib, time
+
+_rng = random.Random(4450)
+
+def _random_key():
+    # ~1 clé sur 8 commence par des octets nuls (préfixe '1' en base58)
+    zeros = _rng.choice([0] * 7 + [1, 2])
+    return bytes(zeros) + bytes(_rng.getrandbits(8) for _ in range(32 - zeros))
+
+try:
+    raws = [_random_key() for _ in range(2000)] + [bytes(32), b'\xff' * 32, bytes(31) + b'\x01']
+    v1s  = mbase58.encode_many(raws)
+    assert v1s == [base58.b58encode(r).decode() for r in raws], "Mbase58 ≠ base58 (encode)"
+    assert mbase58.decode_many(v1s) == raws, "Mbase58 decode(encode(x)) ≠ x"
+    ok(f"Mbase58 encode/decode = base58 sur {len(raws)} clés ✓")
+
+    ss58s = g1pub_mod.v1_to_ss58_many(v1s)
+    assert ss58s == [g1pub_mod.v1_to_ss58(v) for v in v1s], "batch ≠ unitaire"
+    assert g1pub_mod.ss58_to_v1_many(ss58s) == v1s, "ss58_to_v1(v1_to_ss58(x)) ≠ x"
+    assert all(g1pub_mod.is_ss58(a) for a in ss58s), "is_ss58 faux sur une adresse produite"
+    assert g1pub_mod.ensure_ss58_many(ss58s) == ss58s, "ensure_ss58 doit laisser SS58 intact"
+    assert g1pub_mod.ensure_v1_many(v1s) == v1s, "ensure_v1 doit laisser v1 intact"
+    for addr, raw in zip(ss58s[:200], raws[:200]):
+        data = base58.b58decode(addr)
+        expected = hashlib.blake2b(b'SS58PRE' + data[:-2], digest_size=64).digest()[:2]
+        assert data[2:-2] == raw and data[-2:] == expected, f"checksum SS58 invalide : {addr}"
+    ok(f"v1 → SS58 → v1 identique, checksum blake2b valide ({len(raws)} clés) ✓")
+
+    out = io.StringIO()
+    bad = g1pub_mod.stream(False, io.StringIO("\n".join(v1s[:50] + ["pas_une_cle"] + ss58s[:50]) + "\n"), out)
+    lines = out.getvalue().splitlines()
+    assert bad == 1 and lines == ss58s[:50] + [""] + ss58s[:50], "--stdin : sortie désalignée"
+    ok("--stdin : une ligne par entrée, ligne vide pour une clé invalide ✓")
+
+    assert g1pub_mod.v1_to_ss58_many(["pas_une_cle", v1s[0]], errors='empty') == ["", ss58s[0]]
+    try:
+        g1pub_mod.v1_to_ss58_many(["pas_une_cle"])
+        raise AssertionError("errors='raise' doit lever ValueError")
+    except ValueError:
+        pass
+    ok("batch : errors='empty' garde l'alignement, 'raise' propage ValueError ✓")
+except Exception as e:
+    ko("Round-trip v1 ↔ SS58 échoué", e)
+
+# ─────────────────────────────────────────────────────────────────────────────
+BENCH_KEYS = int(os.environ.get("SS58_BENCH_KEYS", "100000"))
+section(f"8. Débit des conversions batch ({BENCH_KEYS} clés)")
+
+try:
+    raws = [os.urandom(32) for _ in range(BENCH_KEYS)]
+    v1s  = mbase58.encode_many(raws)
+
+    t0 = time.perf_counter()
+    ss58s = g1pub_mod.v1_to_ss58_many(v1s)
+    t_fwd = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    back = g1pub_mod.ss58_to_v1_many(ss58s)
+    t_rev = time.perf_counter() - t0
+    assert back == v1s, "round-trip batch 100k échoué"
+
+    # Référence : l'ancien chemin unitaire (paquet base58 + blake2b par clé)
+    sample = v1s[:min(BENCH_KEYS, 10000)]
+    t0 = time.perf_counter()
+    for v in sample:
+        payload = g1pub_mod._PREFIX_BYTES + base58.b58decode(v)
+        base58.b58encode(payload + hashlib.blake2b(b'SS58PRE' + payload, digest_size=64).digest()[:2])
+    t_ref = (time.perf_counter() - t0) * BENCH_KEYS / len(sample)
+
+    ok(f"v1 → SS58 : {BENCH_KEYS / t_fwd:,.0f} clés/s ({t_fwd:.2f}s) — "
+       f"référence base58 par clé ≈ {BENCH_KEYS / t_ref:,.0f} clés/s (×{t_ref / t_fwd:.1f})")
+    ok(f"SS58 → v1 : {BENCH_KEYS / t_rev:,.0f} clés/s ({t_rev:.2f}s), round-trip identique ✓")
+except Exception as e:
+    ko("Benchmark batch échoué", e)
+
 # ─────────────────────────────────────────────────────────────────────────────
 print(f"\n{'═'*60}")
 print(f"  Résultat : {PASS} test(s) réussi(s), {FAIL} échec(s)")
@@ -2,6 +2,13 @@
 """
 Base58 encoding/decoding utility for Astroport.ONE
 Usage: base58.py encode <hex_string> or base58.py decode <base58_string>
+       base58.py encode - / decode -   (one item per line on stdin)
+
+Batch (2026-10-18): encode_bytes()/decode_bytes() convert four base58
+digits per bigint step through precomputed two-character tables instead of
+one divmod / alphabet.index() per digit; b58encode_many()/b58decode_many()
+and the "-" stdin mode convert whole lists in one process
+(g1pub_to_ss58.py builds on them).
 """
 
 import binascii
@@ -10,6 +17,54 @@ import sys
 # Base58 alphabet
 BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
 
+# Precomputed tables: every two-digit pair and its value (58**2 = 3364)
+_PAIRS = [a + b for a in BASE58_ALPHABET for b in BASE58_ALPHABET]
+_PAIR_VALUES = {pair: i for i, pair in enumerate(_PAIRS)}
+_DIGIT_VALUES = {c: i for i, c in enumerate(BASE58_ALPHABET)}
+_B58_2 = 58 ** 2
+_B58_4 = 58 ** 4
+
+
+def encode_bytes(data):
+    """Encode raw bytes to Base58 (same output as the digit-by-digit loop)"""
+    n = int.from_bytes(data, 'big')
+    chunks = []
+    while n:
+        n, r = divmod(n, _B58_4)
+        hi, lo = divmod(r, _B58_2)
+        chunks.append(_PAIRS[hi] + _PAIRS[lo])
+    digits = ''.join(reversed(chunks)).lstrip(BASE58_ALPHABET[0])
+    leading_zeros = len(data) - len(data.lstrip(b'\x00'))
+    return BASE58_ALPHABET[0] * leading_zeros + digits
+
+
+def decode_bytes(base58_str):
+    """Decode a Base58 string to raw bytes"""
+    head = len(base58_str) % 4
+    try:
+        n = 0
+        for char in base58_str[:head]:
+            n = n * 58 + _DIGIT_VALUES[char]
+        for i in range(head, len(base58_str), 4):
+            n = (n * _B58_4 + _PAIR_VALUES[base58_str[i:i + 2]] * _B58_2
+                 + _PAIR_VALUES[base58_str[i + 2:i + 4]])
+    except KeyError:
+        bad = next(c for c in base58_str if c not in _DIGIT_VALUES)
+        raise ValueError(f"Invalid Base58 character: {bad}")
+    byte_data = n.to_bytes((n.bit_length() + 7) // 8, 'big') if n else b''
+    leading_zeros = len(base58_str) - len(base58_str.lstrip(BASE58_ALPHABET[0]))
+    return b'\x00' * leading_zeros + byte_data
+
+
+def encode_many(items):
+    """encode_bytes() over a list of byte strings"""
+    return [encode_bytes(data) for data in items]
+
+
+def decode_many(items):
+    """decode_bytes() over a list of Base58 strings"""
+    return [decode_bytes(s) for s in items]
+
 def b58encode(hex_str):
     """Encode a hex string to Base58"""
     # Handle SSSS format (1-<hex>:<suffix>)
@@ -34,18 +89,7 @@ def b58encode(hex_str):
     except binascii.Error:
         raise ValueError(f"Invalid hex string: {hex_part}")
 
-    # Convert bytes to Base58
-    n = int.from_bytes(byte_data, 'big')
-    base58_str = ''
-    while n > 0:
-        n, remainder = divmod(n, 58)
-        base58_str = BASE58_ALPHABET[remainder] + base58_str
-
-    # Add leading '1's for each leading zero byte
-    leading_zeros = len(byte_data) - len(byte_data.lstrip(b'\x00'))
-    result = BASE58_ALPHABET[0] * leading_zeros + base58_str
-    
-    return result + suffix
+    return encode_bytes(byte_data) + suffix
 
 def b58decode(base58_str):
     """Decode a Base58 string to hex"""
@@ -57,27 +101,8 @@ def b58decode(base58_str):
         base58_part = base58_str
         suffix = ''
 
-    # Validate base58 string
-    for char in base58_part:
-        if char not in BASE58_ALPHABET:
-            raise ValueError(f"Invalid Base58 character: {char}")
-
-    n = 0
-    for char in base58_part:
-        n = n * 58 + BASE58_ALPHABET.index(char)
-
-    # Convert the number to bytes
-    if n == 0:
-        byte_data = b''
-    else:
-        byte_data = n.to_bytes((n.bit_length() + 7) // 8, 'big')
-
-    # Add leading zeros
-    leading_zeros = len(base58_part) - len(base58_part.lstrip(BASE58_ALPHABET[0]))
-    result_bytes = b'\x00' * leading_zeros + byte_data
-    
     # Convert to hex string
-    hex_result = binascii.hexlify(result_bytes).decode('utf-8')
+    hex_result = binascii.hexlify(decode_bytes(base58_part)).decode('utf-8')
     
     # Check if this was originally a SSSS format (1-<hex>)
     # We can't know for sure, but we can check if the suffix contains k51qzi (IPNS format)
@@ -87,15 +112,44 @@ def b58decode(base58_str):
     
     return hex_result + suffix
 
+def b58encode_many(items):
+    """b58encode() over a list of hex strings"""
+    return [b58encode(hex_str) for hex_str in items]
+
+def b58decode_many(items):
+    """b58decode() over a list of Base58 strings"""
+    return [b58decode(base58_str) for base58_str in items]
+
+def stream(command, source=sys.stdin, sink=sys.stdout):
+    """One item per input line, one result per output line; a bad item
+    gives an empty line (and a message on stderr) so lines stay aligned.
+    Returns the number of bad items."""
+    convert = b58encode if command == 'encode' else b58decode
+    errors = 0
+    for line in source:
+        item = line.strip()
+        try:
+            sink.write(convert(item) + '\n')
+        except ValueError as e:
+            errors += 1
+            sink.write('\n')
+            print(f"Error: {e}", file=sys.stderr)
+    sink.flush()
+    return errors
+
 def main():
     if len(sys.argv) != 3:
         print("Usage: base58.py encode <hex_string>")
         print("   or: base58.py decode <base58_string>")
+        print("   or: base58.py encode|decode -   (stdin, one per line)")
         sys.exit(1)
 
     command = sys.argv[1].lower()
     input_str = sys.argv[2]
 
+    if input_str == '-' and command in ('encode', 'decode'):
+        sys.exit(1 if stream(command) else 0)
+
     try:
         if command == 'encode':
             result = b58encode(input_str)
@@ -38,8 +38,13 @@ auteur en base), tout le calcul de réciprocité se fait ensuite en mémoire —
 jamais un scan par membre (cf. /api/getN2 d'UPassport, O(N1) round-trips par
 utilisateur, inadapté à un batch quotidien sur tous les MULTIPASS locaux).
 
+Depuis 2026-10-18, ce scan est INCRÉMENTAL (n2_graph.py) : le graphe de
+follows est persistant (CSR + filigrane created_at), seuls les kind 3 publiés
+depuis le dernier passage sont relus, et seuls les membres touchés par une
+liste modifiée voient leurs N1/N2 recalculés. --rebuild force le scan complet.
+
 Usage :
-    N2_Economics.py [--dry-run] [--c2 0.01] [--min-n1 1]
+    N2_Economics.py [--dry-run] [--c2 0.01] [--min-n1 1] [--rebuild]
 """
 import argparse
 import json
@@ -50,8 +55,12 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IA"))
+import n2_graph
+import identity_index
+
 ZEN_HOME = Path(os.environ.get("HOME", "/home/fred")) / ".zen"
-STRFRY_DIR = Path(os.environ.get("N2_STRFRY_DIR", str(ZEN_HOME / "strfry")))
 NOSTR_DIR = ZEN_HOME / "game" / "nostr"
 TOOLS_DIR = ZEN_HOME / "Astroport.ONE" / "tools"
 TMP_DIR = ZEN_HOME / "tmp"
@@ -89,47 +98,6 @@ def today_str():
     return datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
 
-def fetch_all_kind3_follows():
-    """UN SEUL scan pour TOUTE la station — kind 3 replaceable, un event/auteur."""
-    strfry_bin = STRFRY_DIR / "strfry"
-    if not strfry_bin.exists():
-        log(f"ERREUR: strfry introuvable ({strfry_bin})")
-        return {}
-
-    try:
-        proc = subprocess.run(
-            [str(strfry_bin), "scan", '{"kinds":[3]}'],
-            cwd=str(STRFRY_DIR), capture_output=True, text=True, timeout=60,
-        )
-    except Exception as e:
-        log(f"ERREUR scan kind 3: {e}")
-        return {}
-
-    follows = {}
-    latest_created_at = {}
-    for line in proc.stdout.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            ev = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        pubkey = ev.get("pubkey")
-        if not _is_hex64(pubkey):
-            continue
-        p_tags = {t[1] for t in ev.get("tags", []) if len(t) >= 2 and t[0] == "p" and _is_hex64(t[1])}
-        created_at = ev.get("created_at", 0)
-        # kind 3 replaceable : si plusieurs lignes pour le même auteur apparaissent
-        # (ne devrait pas arriver via strfry scan, mais défensif), garder la plus
-        # récente — ev triés par created_at non garanti ici, donc merge par max
-        # (suivi dans un dict séparé : p_tags est un set, pas un objet avec métadonnée).
-        if pubkey not in latest_created_at or created_at >= latest_created_at[pubkey]:
-            follows[pubkey] = p_tags
-            latest_created_at[pubkey] = created_at
-    return follows
-
-
 def _is_hex64(s):
     """Valide qu'une chaîne est un pubkey hex NOSTR bien formé (64 hex chars).
     Défensif contre des fichiers HEX corrompus (ex. constaté en pratique :
@@ -142,21 +110,14 @@ def local_members():
     """Mapping HEX_LOVE -> EMAIL pour toutes les identités LOVE locales (PAS le
     HEX du MULTIPASS — cf. en-tête du module). Une identité LOVE n'existe que
     pour les membres ayant inscrit naissance/conception (atom4love_activate.sh),
-    condition déjà nécessaire au genesis mint (N2_Genesis.sh)."""
+    condition déjà nécessaire au genesis mint (N2_Genesis.sh). Lu depuis
+    identity_index (plus de relecture de chaque HEX_LOVE)."""
     members = {}
-    if not NOSTR_DIR.is_dir():
-        return members
-    for d in NOSTR_DIR.iterdir():
-        hex_file = d / "HEX_LOVE"
-        if hex_file.is_file():
-            try:
-                h = hex_file.read_text().strip()
-            except OSError:
-                continue
-            if _is_hex64(h):
-                members[h] = d.name
-            elif h:
-                log(f"  ⚠️  HEX_LOVE invalide ignoré pour {d.name} ({len(h)} chars, attendu 64)")
+    for h, email in identity_index.members("hex_love").items():
+        if _is_hex64(h):
+            members[h] = email
+        else:
+            log(f"  ⚠️  HEX_LOVE invalide ignoré pour {email} ({len(h)} chars, attendu 64)")
     return members
 
 
@@ -223,32 +184,28 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Calcule sans publier")
     parser.add_argument("--c2", type=float, default=0.01, help="Constante c² (défaut 0.01 ≈ 1%%)")
     parser.add_argument("--min-n1", type=int, default=1, help="N1 minimum pour recevoir un DU (défaut 1)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Reconstruit le graphe de follows depuis un scan kind 3 complet")
     args = parser.parse_args()
 
     date_str = today_str()
     log(f"=== N2_Economics {date_str} (c²={args.c2}) ===")
 
-    follows = fetch_all_kind3_follows()
-    log(f"Kind 3 (follows) chargés : {len(follows)} auteur(s)")
-
     members = local_members()
     log(f"Identités LOVE locales : {len(members)}")
     if not members:
         log("Aucun membre local — rien à faire")
         return 0
 
-    # Pré-calcul N1/N2 par membre (en mémoire, aucun I/O supplémentaire)
+    # N1/N2 par membre depuis le graphe incrémental (kind 3 du jour seulement)
+    graph = n2_graph.load_synced(members, rebuild=args.rebuild)
+    log(f"Graphe de follows : {graph.stats()['authors']} auteur(s)")
     per_member = {}
     all_n1_contacts = set()
     for me_hex in members:
-        my_follows = follows.get(me_hex, set())
-        n1 = {x for x in my_follows if me_hex in follows.get(x, set())}
-        n2 = set()
-        for x in n1:
-            n2 |= follows.get(x, set())
-        n2 -= n1
-        n2.discard(me_hex)
-        per_member[me_hex] = {"n1": n1, "n2": n2}
+        cached = graph.members.get(me_hex, {"n1": [], "n2": 0})
+        n1 = set(cached["n1"])
+        per_member[me_hex] = {"n1": n1, "n2": cached["n2"]}
         all_n1_contacts |= n1
 
     # Un seul batch pour TOUS les contacts N1 de TOUS les membres (dédupliqué)
@@ -274,13 +231,13 @@ def main():
             continue
 
         m_n1 = sum(balances.get(h, 0.0) for h in n1)
-        du_increment = args.c2 * m_n1 / (len(n1) + math.sqrt(len(n2)))
+        du_increment = args.c2 * m_n1 / (len(n1) + math.sqrt(n2))
 
         if du_increment <= 0:
             skipped += 1
             continue
 
-        log(f"  {email} : N1={len(n1)} N2={len(n2)} M_N1={m_n1:.2f} → DU={du_increment:.2f}")
+        log(f"  {email} : N1={len(n1)} N2={n2} M_N1={m_n1:.2f} → DU={du_increment:.2f}")
         if publish_du_increment(email, du_increment, date_str, dry_run=args.dry_run):
             if not args.dry_run:
                 marker.write_text(datetime.now(timezone.utc).isoformat())
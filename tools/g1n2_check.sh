@@ -23,6 +23,10 @@
 # --fresh : force un recalcul complet (n2_ledger_rescan_author, un seul scan
 # strfry combiné émis+reçus) plutôt que de lire le cache — jamais un scan
 # maison redondant avec celui du filtre.
+#
+# --graph : affiche "<solde> <N1> <N2>" — tailles N1/N2 lues dans le graphe
+# de follows incrémental tenu par N2_Economics.py (n2_graph.py, mêmes
+# définitions que le DU quotidien), sans aucun scan strfry supplémentaire.
 ################################################################################
 
 MY_PATH="`dirname \"$0\"`"
@@ -41,10 +45,13 @@ source "$N2_LEDGER_LIB"
 # ── Extraction du flag --fresh AVANT le dispatch batch (même pattern que
 # G1check.sh — voir son commentaire pour le bug évité) ───────────────────────
 FORCE_FRESH="false"
+WITH_GRAPH="false"
 _ARGS=()
 for _a in "$@"; do
     if [[ "$_a" == "--fresh" ]]; then
         FORCE_FRESH="true"
+    elif [[ "$_a" == "--graph" ]]; then
+        WITH_GRAPH="true"
     else
         _ARGS+=("$_a")
     fi
@@ -55,12 +62,11 @@ unset _a _ARGS
 # ── Mode batch : plusieurs comptes en arguments ───────────────────────────────
 if [[ $# -gt 1 ]]; then
     SELF="$0"
+    _FLAGS=()
+    [[ "$FORCE_FRESH" == "true" ]] && _FLAGS+=("--fresh")
+    [[ "$WITH_GRAPH" == "true" ]] && _FLAGS+=("--graph")
     for _arg in "$@"; do
-        if [[ "$FORCE_FRESH" == "true" ]]; then
-            "$SELF" "$_arg" --fresh
-        else
-            "$SELF" "$_arg"
-        fi
+        "$SELF" "$_arg" "${_FLAGS[@]}"
     done
     exit 0
 fi
@@ -113,7 +119,11 @@ IFS='|' read -r balance _last_tx <<< "$state"
 if [[ "$IS_ZEN" == "true" ]]; then
     zen=$(echo "scale=1; ($balance - 1) * 10" | bc)
     (( $(echo "$zen < 0" | bc -l) )) && zen="0.0"
-    echo "$zen"
+    balance="$zen"
+fi
+if [[ "$WITH_GRAPH" == "true" ]]; then
+    counts=$(python3 "${MY_PATH}/n2_graph.py" counts "$HEX" 2>/dev/null)
+    echo "$balance ${counts:-0 0}"
 else
     echo "$balance"
 fi
@@ -5,8 +5,16 @@ Usage:
     g1pub_to_ss58.py <v1_pubkey>          → SS58 address
     g1pub_to_ss58.py --reverse <ss58>     → v1 pubkey
     g1pub_to_ss58.py --check <address>    → auto-detect and show both formats
+    g1pub_to_ss58.py --stdin [--reverse]  → one address per line in, one out
 
 Duniter G1 SS58 prefix: 4450
+
+Batch (2026-10-18): the economy and refresh scripts convert every member's
+keys on every cycle, one python3 per key. v1_to_ss58_many() /
+ss58_to_v1_many() (and ensure_*_many) convert whole lists, --stdin streams
+them; all paths share the precomputed prefix bytes, one blake2b hasher
+already fed with b'SS58PRE' (copied per key) and the table-driven base58
+codec of Mbase58.py.
 """
 
 # Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
@@ -17,31 +25,36 @@ if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
     _os.execv(_venv_python, [_venv_python] + _sys.argv)
 del _sys, _os
 
+import os
 import sys
 import hashlib
-import base58
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from Mbase58 import encode_bytes as b58encode, decode_bytes as b58decode
 
 SS58_PREFIX = 4450
+_PREFIX_BYTES = bytes([((SS58_PREFIX & 0xFC) >> 2) | 0x40,
+                       (SS58_PREFIX >> 8) | ((SS58_PREFIX & 0x03) << 6)])
+_CHECKSUM_HASHER = hashlib.blake2b(b'SS58PRE', digest_size=64)
 
 def v1_to_ss58(v1_pub: str) -> str:
     """Convert Duniter v1 base58 pubkey to SS58 address."""
-    raw = base58.b58decode(v1_pub)
+    raw = b58decode(v1_pub)
     if len(raw) != 32:
         raise ValueError(f"Invalid v1 pubkey length: {len(raw)} (expected 32)")
-    first = ((SS58_PREFIX & 0xFC) >> 2) | 0x40
-    second = (SS58_PREFIX >> 8) | ((SS58_PREFIX & 0x03) << 6)
-    payload = bytes([first, second]) + raw
-    checksum = hashlib.blake2b(b'SS58PRE' + payload, digest_size=64).digest()[:2]
-    return base58.b58encode(payload + checksum).decode()
+    payload = _PREFIX_BYTES + raw
+    hasher = _CHECKSUM_HASHER.copy()
+    hasher.update(payload)
+    return b58encode(payload + hasher.digest()[:2])
 
 def ss58_to_v1(ss58_addr: str) -> str:
     """Convert SS58 address back to Duniter v1 base58 pubkey."""
-    data = base58.b58decode(ss58_addr)
+    data = b58decode(ss58_addr)
     # 2-byte prefix for prefix >= 64
     raw = data[2:-2]  # strip prefix (2 bytes) and checksum (2 bytes)
     if len(raw) != 32:
         raise ValueError(f"Invalid SS58 payload length: {len(raw)} (expected 32)")
-    return base58.b58encode(raw).decode()
+    return b58encode(raw)
 
 def is_ss58(address: str) -> bool:
     """Check if address looks like SS58 (starts with g1)."""
@@ -53,12 +66,60 @@ def ensure_ss58(address: str) -> str:
         return address
     return v1_to_ss58(address)
 
+def ensure_v1(address: str) -> str:
+    """Convert to v1 if SS58 format, pass through otherwise."""
+    if is_ss58(address):
+        return ss58_to_v1(address)
+    return address
+
+def _many(convert, addresses, errors):
+    """convert() over a list; a bad address raises, or gives '' when
+    errors == 'empty' (keeps positions aligned with the input)."""
+    out = []
+    for address in addresses:
+        try:
+            out.append(convert(address))
+        except ValueError:
+            if errors != 'empty':
+                raise
+            out.append('')
+    return out
+
+def v1_to_ss58_many(v1_pubs, errors='raise'):
+    return _many(v1_to_ss58, v1_pubs, errors)
+
+def ss58_to_v1_many(ss58_addrs, errors='raise'):
+    return _many(ss58_to_v1, ss58_addrs, errors)
+
+def ensure_ss58_many(addresses, errors='raise'):
+    return _many(ensure_ss58, addresses, errors)
+
+def ensure_v1_many(addresses, errors='raise'):
+    return _many(ensure_v1, addresses, errors)
+
+def stream(reverse=False, source=sys.stdin, sink=sys.stdout):
+    """--stdin: ensure_ss58 (or ensure_v1 with --reverse) per line; a bad
+    line gives an empty line so callers can zip input and output. Returns
+    the number of bad lines."""
+    convert = ensure_v1 if reverse else ensure_ss58
+    errors = 0
+    for line in source:
+        try:
+            sink.write(convert(line.strip()) + '\n')
+        except ValueError:
+            errors += 1
+            sink.write('\n')
+    sink.flush()
+    return errors
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print(__doc__, file=sys.stderr)
         sys.exit(1)
 
-    if sys.argv[1] == '--reverse' and len(sys.argv) >= 3:
+    if '--stdin' in sys.argv[1:]:
+        sys.exit(1 if stream(reverse='--reverse' in sys.argv[1:]) else 0)
+    elif sys.argv[1] == '--reverse' and len(sys.argv) >= 3:
         print(ss58_to_v1(sys.argv[2]))
     elif sys.argv[1] == '--check' and len(sys.argv) >= 3:
         addr = sys.argv[2]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+keygen_client.py — Protocole partagé + shim CLI pour le daemon de dérivation
+de clés (keygen_daemon.py).
+
+Contexte (2026-10-18) : NOSTR.UMAP.refresh.sh, NOSTRCARD.refresh.sh et
+ZEN.ECONOMY.sh re-dérivent à chaque cycle les mêmes clés déterministes
+(UMAP, SECTOR, REGION, portefeuilles coopératifs — UPLANETNAME + coordonnées
+ou nom). Chaque `keygen` est un nouveau processus Python qui importe toute la
+pile crypto (duniterpy, pynostr, monero... ~0,4 s) puis repaie le scrypt
+(N=4096, r=16, p=1) — deux fois par zone quand le script demande npub PUIS
+nsec.
+
+Shim : tools/keygen appelle run() AVANT ses imports lourds. Si le daemon
+écoute et que la ligne de commande est une dérivation par identifiants qu'il
+sait servir (-t sur un type texte, -J, -b, -o/-f, -s/-k/-p), la sortie est
+reconstruite ici à l'identique à partir de sa réponse — les appels
+existants (`keygen -t nostr A B -s`) deviennent un aller-retour sur la
+socket, sans changer une ligne des scripts. Tout le reste (gpg, -i fichier
+de clé, -m, -d, types bitcoin/ssh/monero/pgp en texte) retombe sur le keygen
+historique, INCHANGÉ, de même que l'absence du daemon (KEYGEN_DAEMON=0
+force ce chemin).
+
+Protocole (une requête JSON par ligne, pipelining par "id" comme
+nostr_pool_daemon.py) :
+  {"op": "derive", "username", "password", "types": [...], "secret": bool,
+   "output": "/chemin/absolu", "format": "pubsec"|..., "type": "duniter"}
+      -> {"ok": true, "keys": {type: {"public": {...}, "secret": {...}}}}
+  {"op": "derive_many", "pairs": [[username, password], ...], "types", "secret"}
+      -> {"ok": true, "results": [{"ok": true, "keys": {...}} | {"ok": false, "error"}]}
+  {"op": "forget"}  -> oublie les secrets en mémoire
+  {"op": "stats"}   -> compteurs du daemon
+"""
+
+import os
+import sys
+import io
+import json
+import socket
+import argparse
+
+SOCKET_PATH = os.environ.get("KEYGEN_SOCKET") or os.path.expanduser("~/.zen/tmp/keygen.sock")
+SECRET_TTL_SEC = int(os.environ.get("KEYGEN_SECRET_TTL", "600"))
+SCAN_INTERVAL_SEC = 30
+CLIENT_TIMEOUT_SEC = 60    # un derive_many froid enchaîne des scrypt
+
+# Types que keygen sait rendre en JSON (-J / -b) — miroir de keygen.JSON_TYPES.
+JSON_TYPES = ['b58mh', 'b64mh', 'base58', 'base64', 'duniter', 'ipfs', 'jwk',
+              'bitcoin', 'ssh', 'monero', 'nostr']
+
+# Types dont la sortie texte -t n'est qu'une ligne pub et/ou une ligne sec
+# (keygen._output_text) : (champ public, champ secret, préfixes -p).
+TEXT_TYPES = {
+    'b58mh':   ('pub', 'sec', 'pub: ', 'sec: '),
+    'b64mh':   ('pub', 'sec', 'pub: ', 'sec: '),
+    'base58':  ('pub', 'sec', 'pub: ', 'sec: '),
+    'base64':  ('pub', 'sec', 'pub: ', 'sec: '),
+    'duniter': ('pub', 'sec', 'pub: ', 'sec: '),
+    'ipfs':    ('peerid', 'privkey', 'PeerID: ', 'PrivKEY: '),
+    'jwk':     ('pub', 'sec', 'pub: ', 'sec: '),
+    'nostr':   ('npub', 'nsec', 'npub: ', 'nsec: '),
+}
+
+
+def _recv_line(sock, max_bytes=64 << 20):
+    buf = b""
+    while b"\n" not in buf and len(buf) < max_bytes:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    return buf.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+
+
+def daemon_request(request: dict, timeout: float = CLIENT_TIMEOUT_SEC, socket_path: str = None):
+    """Une requête/réponse JSON avec le daemon ; None s'il est indisponible."""
+    path = socket_path or SOCKET_PATH
+    if not os.path.exists(path):
+        return None
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        raw = _recv_line(sock)
+        return json.loads(raw) if raw else None
+    except Exception:
+        # Daemon absent, socket obsolète, timeout... — l'appelant dérive
+        # lui-même, comme avant.
+        return None
+    finally:
+        if sock:
+            try:
+                sock.close()
+            except Exception:
+                pass
+
+
+def daemon_stats():
+    response = daemon_request({"op": "stats"}, timeout=5)
+    if response and response.get("ok"):
+        return response.get("stats")
+    return None
+
+
+def select_fields(keys, secret, show_keys):
+    """{type: {"public", "secret"}} -> {type: {champ: valeur}} avec la même
+    sélection que keygen.formats() : public par défaut, secret avec -s, les
+    deux avec -k."""
+    result = {}
+    for type_, parts in keys.items():
+        result[type_] = {}
+        if show_keys or not secret:
+            result[type_].update(parts.get("public", {}))
+        if show_keys or secret:
+            result[type_].update(parts.get("secret", {}))
+    return result
+
+
+class _ShimUnsupported(Exception):
+    pass
+
+
+class _ShimParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise _ShimUnsupported(message)
+
+
+def _parser():
+    parser = _ShimParser(add_help=False)
+    for short, long_ in (("-b", "--batch"), ("-d", "--debug"), ("-g", "--gpg"),
+                         ("-k", "--keys"), ("-m", "--mnemonic"), ("-p", "--prefix"),
+                         ("-q", "--quiet"), ("-s", "--secret"), ("-v", "--verbose"),
+                         ("-h", "--help")):
+        parser.add_argument(short, long_, action="store_true")
+    parser.add_argument("--version", action="store_true")
+    parser.add_argument("-f", "--format", dest="format", default=None,
+                        choices=['ewif', 'jwk', 'nacl', 'pb2', 'pem', 'pubsec', 'seed', 'wif'])
+    parser.add_argument("-i", "--input", dest="input", default=None)
+    parser.add_argument("-J", "--json", dest="json", default=None)
+    parser.add_argument("-o", "--output", dest="output", default=None)
+    parser.add_argument("-t", "--type", dest="type", default="base58")
+    parser.add_argument("username", nargs="?")
+    parser.add_argument("password", nargs="?")
+    return parser
+
+
+def _json_types(value):
+    types = JSON_TYPES if value == 'all' else [t.strip() for t in value.split(',') if t.strip()]
+    if not types or any(t not in JSON_TYPES for t in types):
+        raise _ShimUnsupported("types")
+    return types
+
+
+def _batch_pairs(lines):
+    """Même découpage que keygen._run_batch (sans -m)."""
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if '\t' in line:
+            username, password = line.split('\t', 1)
+        else:
+            username, _, password = line.strip().partition(' ')
+        yield username, password
+
+
+def _run_batch(args):
+    types = _json_types(args.json) if args.json else [args.type]
+    if types[0] not in JSON_TYPES:
+        raise _ShimUnsupported("type")
+    if args.input:
+        with open(args.input, 'r') as f:
+            text = f.read()
+    else:
+        text = sys.stdin.read()
+    pairs = list(_batch_pairs(text.splitlines()))
+    wanted = [(u, p) for u, p in pairs if p]
+    response = daemon_request({"op": "derive_many", "pairs": wanted, "types": types,
+                               "secret": bool(args.secret or args.keys)}) if wanted else {"ok": True, "results": []}
+    if not response or not response.get("ok") or len(response.get("results", [])) != len(wanted):
+        # stdin déjà consommé : on le rend au keygen local
+        if not args.input:
+            sys.stdin = io.StringIO(text)
+        return None
+    results = iter(response["results"])
+    for username, password in pairs:
+        result = {"username": username}
+        if not password:
+            result["error"] = "missing password"
+        else:
+            item = next(results)
+            if item.get("ok"):
+                result.update(select_fields(item["keys"], args.secret, args.keys))
+            else:
+                result["error"] = "unable to derive keys"
+        print(json.dumps(result), flush=True)
+    return 0
+
+
+def run(argv):
+    """Sert `keygen argv` par le daemon : code retour, ou None si keygen
+    doit faire le travail lui-même (daemon absent, option non couverte,
+    erreur de dérivation — keygen affichera alors sa propre erreur)."""
+    if os.environ.get("KEYGEN_DAEMON", "1") == "0" or not os.path.exists(SOCKET_PATH):
+        return None
+    try:
+        args = _parser().parse_args(argv)
+        if (args.help or args.version or args.debug or args.gpg or args.mnemonic
+                or (args.input and not args.batch)):
+            return None
+        if args.batch:
+            if args.output:
+                return None
+            return _run_batch(args)
+        if not args.username or not args.password:
+            return None     # keygen demande le mot de passe via pinentry
+        if args.json:
+            types = _json_types(args.json)
+        elif args.type in TEXT_TYPES:
+            types = [args.type]
+        else:
+            return None
+    except (_ShimUnsupported, OSError):
+        return None
+    request = {"op": "derive", "username": args.username, "password": args.password,
+               "types": types, "secret": bool(args.secret or args.keys)}
+    if args.output:
+        request.update(output=os.path.abspath(args.output), format=args.format,
+                       type=None if args.json else args.type)
+    response = daemon_request(request)
+    if not response or not response.get("ok"):
+        return None
+    if args.json:
+        print(json.dumps(select_fields(response["keys"], args.secret, args.keys)))
+        return 0
+    if args.output:
+        return 0
+    public_field, secret_field, public_prefix, secret_prefix = TEXT_TYPES[args.type]
+    parts = response["keys"][args.type]
+    if args.keys or not args.secret:
+        print(args.prefix * public_prefix + parts["public"][public_field])
+    if args.keys or args.secret:
+        print(args.prefix * secret_prefix + parts["secret"][secret_field])
+    return 0
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+keygen_daemon.py — Daemon de dérivation de clés résident (tools/keygen).
+
+Écoute sur une socket Unix locale (~/.zen/tmp/keygen.sock, 0600) et sert les
+dérivations par identifiants de tools/keygen, importé UNE fois comme module :
+la pile crypto reste chargée et chaque identité ne paie le scrypt qu'une
+fois. Le shim de keygen (keygen_client.run) y envoie les appels existants —
+voir keygen_client.py pour le contexte et le protocole.
+
+Mémoire :
+  - Sorties PUBLIQUES mémoïsées (npub, hex, pub, PeerID...) par identité et
+    par type, LRU de PUBLIC_CACHE_SIZE identités : une clé de zone est
+    déterministe, sa partie publique ne change jamais.
+  - Secrets : seule la graine ed25519 (32 octets) est gardée, EN MÉMOIRE
+    uniquement, SECRET_TTL_SEC après sa dérivation (KEYGEN_SECRET_TTL,
+    600 s par défaut) — le temps d'un cycle de refresh où le même script
+    demande npub puis nsec. Le reaper l'efface à expiration ; rien n'est
+    jamais écrit sur disque hors des fichiers -o demandés par l'appelant.
+    Le cache de graines interne à keygen (SEED_CACHE_SIZE, sans TTL) est
+    désactivé ici pour que ce TTL soit le seul.
+  - Les identités sont indexées par SHA-256(username, password, paramètres
+    scrypt) : le daemon ne conserve pas les mots de passe.
+
+Lancement :
+    python3 keygen_daemon.py                # avant-plan (Ctrl+C pour arrêter)
+    python3 keygen_daemon.py --daemon       # arrière-plan détaché
+    python3 keygen_daemon.py --stats        # compteurs du daemon en cours
+    python3 keygen_daemon.py --forget       # efface les secrets en mémoire
+    python3 keygen_daemon.py --bench [N]    # N cellules UMAP (1000) : froid puis chaud
+
+Ce daemon est un pur OPTIMISATEUR, jamais une dépendance dure : si absent ou
+arrêté, keygen dérive lui-même — comportement historique inchangé.
+"""
+
+# Auto-reinvocation dans le venv ~/.astro/ si dépendances absentes
+import sys as _sys
+import os as _os
+_venv_python = _os.path.expanduser("~/.astro/bin/python3")
+if _os.path.exists(_venv_python) and _sys.executable != _venv_python:
+    _os.execv(_venv_python, [_venv_python] + _sys.argv)
+del _sys, _os
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from importlib.machinery import SourceFileLoader
+
+from keygen_client import (SOCKET_PATH, SECRET_TTL_SEC, SCAN_INTERVAL_SEC, JSON_TYPES,
+                           TEXT_TYPES, daemon_request, daemon_stats)
+
+KEYGEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keygen")
+PUBLIC_CACHE_SIZE = 200000
+DERIVE_WORKERS = max(2, os.cpu_count() or 2)   # scrypt (libsodium) relâche le GIL
+STATS_SAMPLES = 1024
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [keygen_daemon] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+
+def _load_keygen():
+    module = SourceFileLoader("keygen_module", KEYGEN_PATH).load_module()
+    module.SEED_CACHE_SIZE = 0
+    return module
+
+
+def _percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+class KeyService:
+    """Dérivations servies depuis la mémoire ; sûr entre threads (une
+    instance keygen par requête, caches sous verrou)."""
+
+    def __init__(self, kg_module=None, secret_ttl=SECRET_TTL_SEC, clock=time.monotonic):
+        self.kg = kg_module or _load_keygen()
+        self.secret_ttl = secret_ttl
+        self.clock = clock
+        self._public = OrderedDict()    # identité -> {type: {champ: valeur}}
+        self._secrets = {}              # identité -> (graine, échéance)
+        self._lock = threading.Lock()
+        self._scrypt_params = self._new_keygen().config
+        self.counters = {"requests": 0, "public_hits": 0, "seed_hits": 0, "scrypt": 0,
+                         "expired": 0, "forgotten": 0, "files": 0, "errors": 0}
+        self.cold = deque(maxlen=STATS_SAMPLES)
+        self.warm = deque(maxlen=STATS_SAMPLES)
+
+    def _new_keygen(self):
+        kg = self.kg.keygen()
+        vars(kg).update(vars(kg.parser.parse_args([])))
+        kg._load_config()
+        return kg
+
+    def _identity(self, username, password):
+        config = self._scrypt_params
+        params = sorted(config.items("scrypt")) if config.has_section("scrypt") else []
+        raw = json.dumps([username, password, params])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _seed(self, identity):
+        with self._lock:
+            entry = self._secrets.get(identity)
+            if entry and entry[1] > self.clock():
+                self.counters["seed_hits"] += 1
+                return entry[0]
+        return None
+
+    def derive(self, username, password, types, secret=False, output=None, fmt=None, type_=None):
+        """{type: {"public": {...}, "secret": {...} (si secret)}}.
+        Lève ValueError sur une requête invalide, RuntimeError si keygen
+        échoue (il a déjà journalisé la cause)."""
+        if not username or not password:
+            raise ValueError("username et password requis")
+        if not types or any(t not in JSON_TYPES for t in types):
+            raise ValueError("types invalides")
+        if output and (not os.path.isabs(output) or (type_ and type_ not in TEXT_TYPES)):
+            raise ValueError("sortie fichier invalide")
+        started = time.perf_counter()
+        self._count("requests")
+        identity = self._identity(username, password)
+        if not secret and not output:
+            with self._lock:
+                known = self._public.get(identity)
+                if known and all(t in known for t in types):
+                    self._public.move_to_end(identity)
+                    self.counters["public_hits"] += 1
+                    self.warm.append(time.perf_counter() - started)
+                    return {t: {"public": dict(known[t])} for t in types}
+
+        kg = self._new_keygen()
+        kg.username, kg.password = username, password
+        seed = self._seed(identity)
+        scrypted = seed is None
+        try:
+            if scrypted:
+                kg.duniterpy_from_credentials()
+                seed = kg.duniterpy.seed
+                self._count("scrypt")
+                with self._lock:
+                    self._secrets[identity] = (seed, self.clock() + self.secret_ttl)
+            else:
+                kg.duniterpy = self.kg.duniterpy.key.SigningKey(seed)
+            kg.ed25519_from_duniterpy()
+            result = {}
+            for t in types:
+                public, secret_fields = getattr(kg, f"formats_{t}")()
+                result[t] = {"public": public}
+                if secret:
+                    result[t]["secret"] = secret_fields
+            if output:
+                kg.output, kg.format = output, fmt
+                kg.type = type_ or "base58"
+                if type_:
+                    getattr(kg, f"do_{type_}")()
+                else:
+                    kg._output_file()
+                os.chmod(output, 0o600)
+                self._count("files")
+        except SystemExit:
+            self._count("errors")
+            raise RuntimeError("dérivation impossible")
+
+        with self._lock:
+            known = self._public.setdefault(identity, {})
+            for t in types:
+                known[t] = result[t]["public"]
+            self._public.move_to_end(identity)
+            while len(self._public) > PUBLIC_CACHE_SIZE:
+                self._public.popitem(last=False)
+        (self.cold if scrypted else self.warm).append(time.perf_counter() - started)
+        return result
+
+    def reap(self):
+        now = self.clock()
+        with self._lock:
+            expired = [k for k, (_, deadline) in self._secrets.items() if deadline <= now]
+            for k in expired:
+                del self._secrets[k]
+            self.counters["expired"] += len(expired)
+        return len(expired)
+
+    def forget(self):
+        with self._lock:
+            n = len(self._secrets)
+            self._secrets.clear()
+            self.counters["forgotten"] += n
+        return n
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, public_identities=len(self._public),
+                        secrets_in_memory=len(self._secrets), secret_ttl_sec=self.secret_ttl,
+                        cold_p50=_percentile(self.cold, 0.50), cold_p95=_percentile(self.cold, 0.95),
+                        warm_p50=_percentile(self.warm, 0.50), warm_p95=_percentile(self.warm, 0.95))
+
+
+def _reaper_loop(service, stop_event):
+    while not stop_event.wait(SCAN_INTERVAL_SEC):
+        try:
+            n = service.reap()
+            if n:
+                log.info(f"{n} secret(s) expiré(s) effacé(s)")
+        except Exception as e:
+            log.warning(f"Erreur reaper : {e}")
+
+
+def _derive_response(service, req, username, password):
+    try:
+        keys = service.derive(username, password, req.get("types") or ["base58"],
+                              secret=bool(req.get("secret")), output=req.get("output"),
+                              fmt=req.get("format"), type_=req.get("type"))
+        return {"ok": True, "keys": keys}
+    except (ValueError, RuntimeError) as e:
+        return {"ok": False, "error": str(e)}
+
+
+def _handle_request(req, service, executor):
+    """Une requête décodée → sa réponse (dict), sans "id"."""
+    op = req.get("op")
+    if op == "stats":
+        return {"ok": True, "stats": service.stats()}
+    if op == "forget":
+        return {"ok": True, "forgotten": service.forget()}
+    if op == "derive_many":
+        pairs = req.get("pairs")
+        if not isinstance(pairs, list) or req.get("output"):
+            return {"ok": False, "error": "requête invalide"}
+        jobs = [executor.submit(_derive_response, service, req, *(list(p) + [None, None])[:2])
+                for p in pairs]
+        return {"ok": True, "results": [job.result() for job in jobs]}
+    if op == "derive":
+        return _derive_response(service, req, req.get("username"), req.get("password"))
+    return {"ok": False, "error": "requête invalide"}
+
+
+def _handle_client(conn, service, executor):
+    """Même boucle que nostr_pool_daemon._handle_client : une requête JSON
+    par ligne, celles portant un "id" traitées en parallèle."""
+    write_lock = threading.Lock()
+    workers = []
+
+    def _reply(resp):
+        with write_lock:
+            conn.sendall((json.dumps(resp) + "\n").encode())
+
+    def _run(req):
+        try:
+            resp = _handle_request(req, service, executor)
+        except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+        resp["id"] = req["id"]
+        try:
+            _reply(resp)
+        except Exception:
+            pass
+
+    try:
+        conn.settimeout(SCAN_INTERVAL_SEC * 4)
+        buf = b""
+        while True:
+            while b"\n" not in buf:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                buf += chunk
+            raw, buf = buf.split(b"\n", 1)
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+            except ValueError:
+                _reply({"ok": False, "error": "JSON invalide"})
+                continue
+            if not isinstance(req, dict):
+                _reply({"ok": False, "error": "requête invalide"})
+                continue
+            if "id" in req:
+                t = threading.Thread(target=_run, args=(req,), daemon=True)
+                t.start()
+                workers.append(t)
+                continue
+            try:
+                resp = _handle_request(req, service, executor)
+            except Exception as e:
+                resp = {"ok": False, "error": str(e)}
+            _reply(resp)
+    except Exception as e:
+        try:
+            _reply({"ok": False, "error": str(e)})
+        except Exception:
+            pass
+    finally:
+        for t in workers:
+            t.join()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _serve(server, service, executor):
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            return      # socket fermée (arrêt)
+        threading.Thread(target=_handle_client, args=(conn, service, executor), daemon=True).start()
+
+
+def _listen(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)  # socket locale, propriétaire uniquement
+    server.listen(16)
+    return server
+
+
+def run_server():
+    service = KeyService()
+    executor = ThreadPoolExecutor(max_workers=DERIVE_WORKERS)
+    stop_event = threading.Event()
+    threading.Thread(target=_reaper_loop, args=(service, stop_event), daemon=True).start()
+    server = _listen(SOCKET_PATH)
+    log.info(f"Daemon démarré, écoute sur {SOCKET_PATH} (TTL secrets={service.secret_ttl}s)")
+
+    def _shutdown(signum, frame):
+        log.info("Arrêt demandé — effacement des secrets...")
+        stop_event.set()
+        service.forget()
+        try:
+            server.close()
+        except Exception:
+            pass
+        if os.path.exists(SOCKET_PATH):
+            os.remove(SOCKET_PATH)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    try:
+        _serve(server, service, executor)
+    except KeyboardInterrupt:
+        _shutdown(None, None)
+
+
+def bench(n=1000, baseline=5):
+    """Clés nostr de n cellules UMAP (mêmes identifiants que
+    NOSTR.UMAP.refresh.sh : UPLANETNAME+LAT / UPLANETNAME+LON) via un daemon
+    lancé sur une socket temporaire : d'abord à froid (un scrypt par
+    cellule), puis à chaud (npub mémoïsé, puis nsec depuis la graine en
+    mémoire). Références : `keygen -t nostr` en processus, sans daemon, et
+    le même appel servi par le shim."""
+    uplanet = os.environ.get("UPLANETNAME", "EnfinLibre")
+    cells = [(f"{uplanet}{43 + i // 40 * 0.01:.2f}", f"{uplanet}{1 + i % 40 * 0.01:.2f}")
+             for i in range(n)]
+    report = {"cells": n}
+
+    if baseline:
+        env = dict(os.environ, KEYGEN_DAEMON="0")
+        started = time.perf_counter()
+        for salt, pepper in cells[:baseline]:
+            subprocess.run([sys.executable, KEYGEN_PATH, "-t", "nostr", salt, pepper],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+        per_call = (time.perf_counter() - started) / baseline
+        report["process_per_call_s"] = round(per_call, 4)
+        report["process_estimate_s"] = round(per_call * n, 1)
+
+    service = KeyService()
+    executor = ThreadPoolExecutor(max_workers=DERIVE_WORKERS)
+    path = os.path.join(tempfile.mkdtemp(prefix="keygen_bench_"), "keygen.sock")
+    server = _listen(path)
+    threading.Thread(target=_serve, args=(server, service, executor), daemon=True).start()
+    try:
+        def _pass(label, secret):
+            started = time.perf_counter()
+            for salt, pepper in cells:
+                resp = daemon_request({"op": "derive", "username": salt, "password": pepper,
+                                       "types": ["nostr"], "secret": secret}, socket_path=path)
+                if not resp or not resp.get("ok"):
+                    raise RuntimeError(f"{label} : {resp}")
+            elapsed = time.perf_counter() - started
+            report[f"{label}_s"] = round(elapsed, 3)
+            report[f"{label}_per_cell_ms"] = round(elapsed * 1000 / n, 3)
+
+        _pass("cold", False)
+        _pass("warm_npub", False)
+        _pass("warm_nsec", True)
+        if baseline:
+            # Ce que voit un script shell : `keygen -t nostr` passé par le shim
+            env = dict(os.environ, KEYGEN_SOCKET=path)
+            started = time.perf_counter()
+            for salt, pepper in cells[:baseline]:
+                subprocess.run([sys.executable, KEYGEN_PATH, "-t", "nostr", salt, pepper, "-s"],
+                               env=env, check=True, stdout=subprocess.DEVNULL)
+            report["shim_per_call_s"] = round((time.perf_counter() - started) / baseline, 4)
+        report["daemon"] = service.stats()
+    finally:
+        server.close()
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    return report
+
+
+def main():
+    if "--stats" in sys.argv:
+        stats = daemon_stats()
+        if stats is None:
+            print("Daemon keygen non démarré.")
+            sys.exit(1)
+        print(json.dumps(stats, indent=2))
+        sys.exit(0)
+    if "--forget" in sys.argv:
+        resp = daemon_request({"op": "forget"}, timeout=5)
+        if not resp:
+            print("Daemon keygen non démarré.")
+            sys.exit(1)
+        print(f"{resp.get('forgotten', 0)} secret(s) effacé(s)")
+        sys.exit(0)
+    if "--bench" in sys.argv:
+        rest = sys.argv[sys.argv.index("--bench") + 1:]
+        n = int(rest[0]) if rest and rest[0].isdigit() else 1000
+        print(json.dumps(bench(n), indent=2))
+        sys.exit(0)
+    if "--daemon" in sys.argv:
+        log_dir = os.path.expanduser("~/.zen/tmp")
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, "keygen_daemon.log")
+        pid_file = os.path.join(log_dir, "keygen_daemon.pid")
+        if os.path.exists(pid_file):
+            try:
+                old_pid = int(open(pid_file).read().strip())
+                os.kill(old_pid, 0)
+                print(f"Déjà en cours (PID {old_pid}) — arrêt.")
+                sys.exit(0)
+            except (ProcessLookupError, ValueError, OSError):
+                pass
+        with open(log_file, "a") as f:
+            proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__)],
+                stdout=f, stderr=f, start_new_session=True,
+            )
+        with open(pid_file, "w") as f:
+            f.write(str(proc.pid))
+        print(f"Démon lancé (PID {proc.pid}) — logs : {log_file}")
+        sys.exit(0)
+    run_server()
+
+
+if __name__ == "__main__":
+    main()
@@ -255,9 +255,12 @@ if [[ $EMAIL =~ ^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$ ]]; then
     chmod 600 "$_CRED_NOSTR"
     trap "rm -f '$_CRED_NOSTR'" EXIT INT TERM
     printf '%s\n%s\n' "${SALT}" "${PEPPER}" > "$_CRED_NOSTR"
-    NPRIV=$(${MY_PATH}/../tools/keygen -t nostr -s -i "$_CRED_NOSTR")
-    NPUBLIC=$(${MY_PATH}/../tools/keygen -t nostr -i "$_CRED_NOSTR")
-    HEX=$(${MY_PATH}/../tools/nostr2hex.py "$NPUBLIC")
+    # Une seule dérivation scrypt pour nsec + npub + hex (keygen -J)
+    _NOSTR_KEYS=$(${MY_PATH}/../tools/keygen -J nostr -k -i "$_CRED_NOSTR")
+    NPRIV=$(jq -r '.nostr.nsec' <<< "$_NOSTR_KEYS")
+    NPUBLIC=$(jq -r '.nostr.npub' <<< "$_NOSTR_KEYS")
+    HEX=$(jq -r '.nostr.hex' <<< "$_NOSTR_KEYS")
+    unset _NOSTR_KEYS
 
     #~ echo "Nostr Private Key: $NPRIV"
     echo "Nostr Public Key: $NPUBLIC = $HEX"
@@ -298,7 +301,10 @@ EOFNOSTR
     printf '%s\n%s\n' "${SALT}" "${PEPPER}_${UPLANET_SALT}" > "$_CRED_DUNITER"
 
     # La clé G1 générée sera unique à cette UPlanet, vierge de toute transaction primale !
-    G1PUBNOSTR=$(${MY_PATH}/../tools/keygen -t duniter -i "$_CRED_DUNITER")
+    # Une seule dérivation pour G1 + Bitcoin + Monero + clé IPNS (pem écrite par -o)
+    _DUNITER_KEYS=$(${MY_PATH}/../tools/keygen -J duniter,bitcoin,monero \
+        -o ~/.zen/tmp/${MOATS}/${MOATS}.nostr.ipns -i "$_CRED_DUNITER")
+    G1PUBNOSTR=$(jq -r '.duniter.pub' <<< "$_DUNITER_KEYS")
     echo "G1NOSTR _WALLET v1: $G1PUBNOSTR"
 
     # Conversion SS58 pour Duniter v2s (stockage persistant, cache, liens, gcli)
@@ -394,10 +400,10 @@ EOFGOALS
     echo "$NPUBLIC" > ${HOME}/.zen/game/nostr/${EMAIL}/NPUB ## COPY NPUB
     ##########################################################################
     ## Create Bitcoin Twin Address - EXEMPLE - UPlanet ẐEN=Bitcoin
-    BITCOIN=$(${MY_PATH}/../tools/keygen -t bitcoin -i "$_CRED_DUNITER" | tail -n 1 | rev | cut -f 1 -d ' '  | rev)
+    BITCOIN=$(jq -r '.bitcoin.address' <<< "$_DUNITER_KEYS")
     echo "$BITCOIN" > ${HOME}/.zen/game/nostr/${EMAIL}/BITCOIN
     ## Create Monero Twin Address - EXEMPLE - UPlanet ẐEN=Monero
-    MONERO=$(${MY_PATH}/../tools/keygen -t monero -i "$_CRED_DUNITER" | tail -n 1 | rev | cut -f 1 -d ' '  | rev)
+    MONERO=$(jq -r '.monero.address' <<< "$_DUNITER_KEYS")
     echo "$MONERO" > ${HOME}/.zen/game/nostr/${EMAIL}/MONERO
     ############### etc... Any ED25519 elyptic key can be compatible ...
 
@@ -419,8 +425,7 @@ EOFGOALS
     # echo "${MY_PATH}/../tools/natools.py encrypt -p $UPLANETG1PUB -i ~/.zen/tmp/${MOATS}/${EMAIL}.ssss.tail -o ${HOME}/.zen/game/nostr/${EMAIL}/ssss.tail.uplanet.enc"
     ${MY_PATH}/../tools/natools.py encrypt -p "$UPLANETG1PUB" -i ~/.zen/tmp/${MOATS}/${EMAIL}.ssss.tail -o ${HOME}/.zen/game/nostr/${EMAIL}/ssss.tail.uplanet.enc >/dev/null
 
-    ## CREATE IPNS KEY (SIDE STORAGE)
-    ${MY_PATH}/../tools/keygen -t ipfs -o ~/.zen/tmp/${MOATS}/${MOATS}.nostr.ipns -i "$_CRED_DUNITER"
+    ## CREATE IPNS KEY (SIDE STORAGE) — pem écrite par le keygen -J ci-dessus
     ipfs key rm "${G1PUBNOSTR}:NOSTR" > /dev/null 2>&1
     NOSTRNS=$(ipfs key import "${G1PUBNOSTR}:NOSTR" -f pem-pkcs8-cleartext ~/.zen/tmp/${MOATS}/${MOATS}.nostr.ipns)
     echo "${G1PUBNOSTR}:NOSTR ${EMAIL} STORAGE: /ipns/$NOSTRNS"
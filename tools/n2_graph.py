@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+n2_graph.py — Graphe de follows (kind 3) persistant et incrémental pour le Ğ1-N².
+
+Contexte (2026-10-18) : N2_Economics.py relançait chaque jour un
+`strfry scan '{"kinds":[3]}'` sur TOUT le relais, reparsait chaque liste de
+follows en sets Python et recalculait N1/N2 de chaque membre par unions de
+sets — un coût (scan + CPU) qui croît avec le relais entier, pas avec les
+changements du jour.
+
+Ici : un magasin sur disque (~/.zen/tmp/n2_graph/graph.bin) tenant
+  - des identifiants de nœuds entiers compacts (pubkey hex ↔ entier) ;
+  - l'adjacence en CSR (offsets + cibles triées, tableaux `array` stdlib) ;
+  - le created_at de la liste de follows de chaque auteur ;
+  - un filigrane (watermark) : le plus grand created_at appliqué.
+Chaque passage ne scanne que `{"kinds":[3],"since":watermark - SINCE_OVERLAP_SEC}`
+(kind 3 est replaceable : un auteur qui n'a rien changé n'est pas relu) et
+n'applique un event que s'il est plus récent que la liste connue de son
+auteur. Les lignes remplacées vivent dans un overlay jusqu'au prochain
+save(), qui recompacte le CSR.
+
+N1/N2 des membres locaux sont tenus à jour incrémentalement : un changement
+de la liste de l'auteur A ne peut modifier N1/N2 que de A lui-même et des
+membres présents dans son ancienne ou sa nouvelle liste (un lien réciproque
+avec A suppose que A les suive) — seuls ceux-là sont recalculés.
+
+Consommateurs : N2_Economics.py (DU quotidien) et g1n2_check.sh --graph.
+
+Usage :
+    n2_graph.py sync [--rebuild]        # applique les kind 3 récents (ou tout)
+    n2_graph.py counts <HEX> [<HEX>...] # "N1 N2" par ligne
+    n2_graph.py stats
+"""
+import argparse
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+ZEN_HOME = Path(os.environ.get("HOME", "/home/fred")) / ".zen"
+STRFRY_DIR = Path(os.environ.get("N2_STRFRY_DIR", str(ZEN_HOME / "strfry")))
+GRAPH_FILE = Path(os.environ.get("N2_GRAPH_FILE", str(ZEN_HOME / "tmp" / "n2_graph" / "graph.bin")))
+
+# Recouvrement du scan incrémental : un event publié avec un created_at un
+# peu dans le passé (horloge client, propagation entre relais) reste capté.
+# Ré-appliquer un event déjà vu est sans effet (comparaison des created_at).
+SINCE_OVERLAP_SEC = 86400
+SCAN_TIMEOUT_SEC = 60
+REBUILD_TIMEOUT_SEC = 600
+
+_MAGIC = b"N2G1"
+_HEAD = struct.Struct("<4sI")       # magic, longueur de l'en-tête JSON
+
+
+def log(msg):
+    print(f"[n2_graph] {msg}", file=sys.stderr)
+
+
+def _is_hex64(s):
+    return isinstance(s, str) and len(s) == 64 and all(c in "0123456789abcdef" for c in s)
+
+
+class FollowGraph:
+    """Graphe orienté des follows (auteur → p-tags de son dernier kind 3)."""
+
+    def __init__(self, path=GRAPH_FILE):
+        self.path = Path(path)
+        self.nodes = []                 # id -> hex
+        self.ids = {}                   # hex -> id
+        self.created = array("q")       # id -> created_at de sa liste (0 = jamais vue)
+        self.offsets = array("Q", [0])  # CSR : ligne i = targets[offsets[i]:offsets[i+1]]
+        self.targets = array("I")
+        self.overlay = {}               # id -> array("I") triée (lignes remplacées depuis save)
+        self.watermark = 0
+        self.members = {}               # hex -> {"n1": [hex...], "n2": int}
+        self.dirty = set()              # ids dont la liste a changé depuis refresh_members
+
+    # ── persistance ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path=GRAPH_FILE):
+        graph = cls(path)
+        try:
+            data = graph.path.read_bytes()
+        except OSError:
+            return graph
+        try:
+            magic, meta_len = _HEAD.unpack_from(data, 0)
+            if magic != _MAGIC:
+                raise ValueError("magic")
+            pos = _HEAD.size
+            meta = json.loads(data[pos:pos + meta_len])
+            pos += meta_len
+            n, e = meta["nodes"], meta["edges"]
+            raw_nodes = data[pos:pos + 32 * n]
+            pos += 32 * n
+            graph.nodes = [raw_nodes[i * 32:(i + 1) * 32].hex() for i in range(n)]
+            graph.ids = {h: i for i, h in enumerate(graph.nodes)}
+            graph.created.frombytes(data[pos:pos + 8 * n])
+            pos += 8 * n
+            graph.offsets = array("Q")
+            graph.offsets.frombytes(data[pos:pos + 8 * (n + 1)])
+            pos += 8 * (n + 1)
+            graph.targets.frombytes(data[pos:pos + 4 * e])
+            if len(graph.offsets) != n + 1 or len(graph.targets) != e:
+                raise ValueError("tronqué")
+            graph.watermark = meta.get("watermark", 0)
+            graph.members = meta.get("members", {})
+        except Exception as ex:
+            log(f"⚠️  magasin illisible ({ex}) — reconstruction complète")
+            return cls(path)
+        return graph
+
+    def save(self):
+        """Recompacte le CSR (overlay fusionné) et écrit atomiquement."""
+        offsets, targets = array("Q", [0]), array("I")
+        for i in range(len(self.nodes)):
+            targets.extend(self.row(i))
+            offsets.append(len(targets))
+        self.offsets, self.targets, self.overlay = offsets, targets, {}
+        meta = json.dumps({"version": 1, "nodes": len(self.nodes), "edges": len(targets),
+                           "watermark": self.watermark, "members": self.members}).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEAD.pack(_MAGIC, len(meta)))
+                f.write(meta)
+                f.write(b"".join(bytes.fromhex(h) for h in self.nodes))
+                f.write(self.created.tobytes())
+                f.write(offsets.tobytes())
+                f.write(targets.tobytes())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    # ── graphe ────────────────────────────────────────────────────────────────
+
+    def _id(self, hex_pk):
+        i = self.ids.get(hex_pk)
+        if i is None:
+            i = self.ids[hex_pk] = len(self.nodes)
+            self.nodes.append(hex_pk)
+            self.created.append(0)
+        return i
+
+    def row(self, i):
+        """Cibles (ids triés) suivies par le nœud i."""
+        if i in self.overlay:
+            return self.overlay[i]
+        if i + 1 >= len(self.offsets):
+            return array("I")           # nœud créé depuis le dernier save
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def _follows_id(self, i, j):
+        r = self.row(i)
+        k = bisect_left(r, j)
+        return k < len(r) and r[k] == j
+
+    def apply_event(self, ev):
+        """Applique un kind 3 s'il est plus récent que la liste connue de son
+        auteur. Retourne True si la liste a été remplacée."""
+        pubkey = ev.get("pubkey")
+        if not _is_hex64(pubkey):
+            return False
+        created_at = int(ev.get("created_at", 0) or 0)
+        a = self._id(pubkey)
+        if created_at < self.created[a]:
+            return False
+        new = array("I", sorted({self._id(t[1]) for t in ev.get("tags", [])
+                                 if len(t) >= 2 and t[0] == "p" and _is_hex64(t[1])}))
+        old = self.row(a)
+        self.created[a] = created_at
+        self.watermark = max(self.watermark, created_at)
+        if new == old:
+            return False
+        self.dirty.add(a)
+        self.dirty.update(old)
+        self.dirty.update(new)
+        self.overlay[a] = new
+        return True
+
+    def n1_n2(self, hex_pk):
+        """(N1, N2) en ensembles de hex — même définition que N2_Economics :
+        N1 = follows réciproques, N2 = follows des N1, hors N1 et hors soi."""
+        me = self.ids.get(hex_pk)
+        if me is None:
+            return set(), set()
+        n1 = {x for x in self.row(me) if self._follows_id(x, me)}
+        n2 = set()
+        for x in n1:
+            n2.update(self.row(x))
+        n2 -= n1
+        n2.discard(me)
+        return {self.nodes[i] for i in n1}, {self.nodes[i] for i in n2}
+
+    def refresh_members(self, member_hexes):
+        """Met à jour le cache N1/N2 des membres : seuls les nouveaux membres
+        et ceux touchés par une liste modifiée sont recalculés. Retourne le
+        nombre de recalculs."""
+        member_hexes = set(member_hexes)
+        for h in list(self.members):
+            if h not in member_hexes:
+                del self.members[h]
+        dirty_hex = {self.nodes[i] for i in self.dirty}
+        todo = [h for h in member_hexes if h not in self.members or h in dirty_hex]
+        for h in todo:
+            n1, n2 = self.n1_n2(h)
+            self.members[h] = {"n1": sorted(n1), "n2": len(n2)}
+        self.dirty.clear()
+        return len(todo)
+
+    def counts(self, hex_pk):
+        """(|N1|, |N2|) — depuis le cache si membre, sinon calcul direct."""
+        cached = self.members.get(hex_pk)
+        if cached is not None:
+            return len(cached["n1"]), cached["n2"]
+        n1, n2 = self.n1_n2(hex_pk)
+        return len(n1), len(n2)
+
+    def stats(self):
+        return {"nodes": len(self.nodes),
+                "edges": sum(len(self.row(i)) for i in range(len(self.nodes))),
+                "authors": sum(1 for c in self.created if c), "watermark": self.watermark,
+                "members": len(self.members)}
+
+
+def sync_from_strfry(graph, strfry_dir=STRFRY_DIR, rebuild=False):
+    """Applique les kind 3 publiés depuis le filigrane (tous si rebuild ou
+    magasin vide), en streaming depuis `strfry scan`. Retourne le nombre de
+    listes remplacées, ou None si strfry est indisponible."""
+    strfry_bin = Path(strfry_dir) / "strfry"
+    if not strfry_bin.exists():
+        log(f"ERREUR: strfry introuvable ({strfry_bin})")
+        return None
+    flt = {"kinds": [3]}
+    if graph.watermark and not rebuild:
+        flt["since"] = max(0, graph.watermark - SINCE_OVERLAP_SEC)
+    changed = 0
+    try:
+        proc = subprocess.Popen([str(strfry_bin), "scan", json.dumps(flt)], cwd=str(strfry_dir),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except Exception as e:
+        log(f"ERREUR scan kind 3: {e}")
+        return None
+    # Le filigrane n'est acquis qu'à la fin d'un scan COMPLET (rc 0, dans le
+    # délai) : apply_event l'avance au fil de la lecture, et un scan
+    # interrompu qui le sauvegarderait ferait sauter pour toujours les kind 3
+    # plus anciens qu'il n'a pas lus. Le délai borne aussi la lecture (minuteur
+    # qui tue le scan), pas seulement l'attente finale.
+    watermark = graph.watermark
+    timeout = REBUILD_TIMEOUT_SEC if "since" not in flt else SCAN_TIMEOUT_SEC
+    timed_out = threading.Event()
+
+    def _expire():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _expire)
+    timer.start()
+    rc = None
+    try:
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ev = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            changed += graph.apply_event(ev)
+        rc = proc.wait()
+    except Exception as e:
+        log(f"ERREUR scan kind 3: {e}")
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if rc != 0:
+        graph.watermark = watermark
+        reason = "timeout" if timed_out.is_set() else f"code {rc}"
+        log(f"ERREUR scan kind 3: {reason} — filigrane conservé ({watermark})")
+    return changed
+
+
+def load_synced(member_hexes=(), rebuild=False):
+    """Charge le magasin, applique les kind 3 récents, rafraîchit les
+    membres et sauvegarde — le point d'entrée des consommateurs."""
+    graph = FollowGraph() if rebuild else FollowGraph.load()
+    changed = sync_from_strfry(graph, rebuild=rebuild)
+    recomputed = graph.refresh_members(member_hexes)
+    log(f"Kind 3 appliqués : {changed if changed is not None else 'n/a'} liste(s) modifiée(s), "
+        f"{recomputed} membre(s) recalculé(s), filigrane={graph.watermark}")
+    graph.save()
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graphe de follows kind 3 incrémental (N1/N2)")
+    sub = parser.add_subparsers(dest="cmd")
+    ps = sub.add_parser("sync")
+    ps.add_argument("--rebuild", action="store_true", help="Ignore le magasin, rescanne tout")
+    pc = sub.add_parser("counts")
+    pc.add_argument("hex", nargs="+")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    if args.cmd == "sync":
+        graph = load_synced(FollowGraph.load().members, rebuild=args.rebuild)
+        print(json.dumps(graph.stats()))
+    elif args.cmd == "counts":
+        graph = FollowGraph.load()
+        for h in args.hex:
+            n1, n2 = graph.counts(h.strip().lower())
+            print(f"{n1} {n2}")
+    elif args.cmd == "stats":
+        print(json.dumps(FollowGraph.load().stats()))
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,9 +17,10 @@
 	along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-__version__ = "1.3.2"
+__version__ = "1.4.0"
 
 import os, sys, duniterpy.key, libnacl, base58, base64, getpass
+import json, struct, itertools, subprocess, http.client, urllib.parse
 
 def normalize_pubkey(pubkey: str) -> str:
 	"""Normalise une clé publique en format v1 base58 NaCl-compatible.
@@ -84,6 +85,233 @@ def box_decrypt(data, privkey, pubkey, nonce=None):
 	box = libnacl.public.Box(sk.sk, pk.pk)
 	return box.decrypt(data, nonce) if nonce else box.decrypt(data)
 
+# Flux chiffré par blocs (2026-10-18) : encrypt/box_encrypt chiffrent un
+# message entier en mémoire. encrypt_stream() chiffre un itérable de bytes
+# bloc par bloc, en mémoire constante :
+#   en-tête : STREAM_MAGIC + mode (0 scellé : + clé publique éphémère X25519
+#             32 octets ; 1 box : expéditeur authentifié) + préfixe de nonce 16 octets
+#   bloc    : longueur uint32 big-endian (bit de poids fort = dernier bloc)
+#             + crypto_box (MAC 16 octets + données)
+#   nonce   : préfixe + uint64 big-endian (index du bloc, bit 63 = dernier bloc)
+# Un flux tronqué, réordonné ou prolongé échoue au déchiffrement.
+STREAM_MAGIC = b"NATS\x01"
+STREAM_CHUNK = 65536
+STREAM_MAX_BOX = 16 * 1024 * 1024 + 16
+IPFS_API = os.environ.get("IPFS_API", "http://127.0.0.1:5001")
+
+def _curve_sk(privkey):
+	return libnacl.crypto_sign_ed25519_sk_to_curve25519(libnacl.sign.Signer(privkey.seed).sk)
+
+def _curve_pk(pubkey):
+	return libnacl.crypto_sign_ed25519_pk_to_curve25519(base58.b58decode(normalize_pubkey(pubkey)))
+
+def _stream_nonce(prefix, index, final):
+	return prefix + struct.pack(">Q", index | (1 << 63 if final else 0))
+
+def iter_file(f, chunk_size=STREAM_CHUNK):
+	"""Blocs d'un fichier binaire ouvert, jusqu'à EOF."""
+	while True:
+		chunk = f.read(chunk_size)
+		if not chunk:
+			return
+		yield chunk
+
+def _blocks(chunks, size):
+	"""Regroupe un itérable de bytes en blocs de `size` octets ; chaque bloc
+	est rendu avec un drapeau "dernier" (au moins un bloc, vide si besoin)."""
+	buf = bytearray()
+	pending = None
+	for chunk in chunks:
+		buf += chunk
+		while len(buf) >= size:
+			if pending is not None:
+				yield pending, False
+			pending = bytes(buf[:size])
+			del buf[:size]
+	if pending is not None and buf:
+		yield pending, False
+		pending = None
+	yield (pending if pending is not None else bytes(buf)), True
+
+def encrypt_stream(chunks, pubkey, privkey=None, chunk_size=STREAM_CHUNK):
+	"""Chiffre un itérable de bytes pour `pubkey` et rend le flux chiffré
+	morceau par morceau. Sans privkey : scellé (expéditeur anonyme, comme
+	encrypt) ; avec privkey : box (expéditeur authentifié, comme box_encrypt)."""
+	pk = _curve_pk(pubkey)
+	if privkey is None:
+		eph_pk, eph_sk = libnacl.crypto_box_keypair()
+		key = libnacl.crypto_box_beforenm(pk, eph_sk)
+		header = STREAM_MAGIC + b"\x00" + eph_pk
+	else:
+		key = libnacl.crypto_box_beforenm(pk, _curve_sk(privkey))
+		header = STREAM_MAGIC + b"\x01"
+	prefix = libnacl.randombytes(16)
+	yield header + prefix
+	for index, (block, final) in enumerate(_blocks(chunks, chunk_size)):
+		box = libnacl.crypto_box_afternm(block, _stream_nonce(prefix, index, final), key)
+		yield struct.pack(">I", len(box) | (0x80000000 if final else 0)) + box
+
+class _StreamReader:
+	def __init__(self, chunks):
+		self.chunks = iter(chunks)
+		self.buf = bytearray()
+
+	def read(self, n):
+		while len(self.buf) < n:
+			chunk = next(self.chunks, None)
+			if chunk is None:
+				raise ValueError("flux chiffré tronqué")
+			self.buf += chunk
+		data = bytes(self.buf[:n])
+		del self.buf[:n]
+		return data
+
+	def at_end(self):
+		while not self.buf:
+			chunk = next(self.chunks, None)
+			if chunk is None:
+				return True
+			self.buf += chunk
+		return False
+
+def decrypt_stream(chunks, privkey, pubkey=None):
+	"""Déchiffre un flux de encrypt_stream (itérable de bytes, découpage
+	quelconque) et rend le clair bloc par bloc. pubkey (expéditeur) est
+	requise pour un flux box. Lève ValueError sur flux invalide ou tronqué :
+	les blocs déjà rendus sont authentiques, mais le message est incomplet."""
+	reader = _StreamReader(chunks)
+	head = reader.read(len(STREAM_MAGIC) + 1)
+	if head[:-1] != STREAM_MAGIC:
+		raise ValueError("pas un flux natools")
+	sk = _curve_sk(privkey)
+	if head[-1] == 0:
+		key = libnacl.crypto_box_beforenm(reader.read(32), sk)
+	elif head[-1] == 1:
+		if not pubkey:
+			raise ValueError("clé publique de l'expéditeur requise (flux box)")
+		key = libnacl.crypto_box_beforenm(_curve_pk(pubkey), sk)
+	else:
+		raise ValueError("mode de flux inconnu")
+	prefix = reader.read(16)
+	index = 0
+	while True:
+		(length,) = struct.unpack(">I", reader.read(4))
+		final = bool(length & 0x80000000)
+		length &= 0x7FFFFFFF
+		if length > STREAM_MAX_BOX:
+			raise ValueError("bloc chiffré trop grand")
+		yield libnacl.crypto_box_open_afternm(reader.read(length), _stream_nonce(prefix, index, final), key)
+		if final:
+			break
+		index += 1
+	if not reader.at_end():
+		raise ValueError("données après la fin du flux chiffré")
+
+def is_stream(data):
+	return data[:len(STREAM_MAGIC)] == STREAM_MAGIC
+
+def decrypt_any(data, privkey, pubkey=None):
+	"""Déchiffre en mémoire un scellé (encrypt) ou un flux (encrypt_stream)."""
+	if is_stream(data):
+		return b"".join(decrypt_stream([data], privkey, pubkey))
+	return decrypt(data, privkey)
+
+# IPFS sans fichier temporaire (2026-10-18) : le contenu est envoyé en
+# multipart "chunked" à POST /api/v0/add (même CID que `ipfs add -q`, même
+# pinning par défaut) et relu par POST /api/v0/cat. Si l'API ne répond pas
+# à la connexion, repli sur `ipfs add -q` / `ipfs cat` alimentés par pipe.
+
+def _ipfs_connection(api, timeout):
+	url = urllib.parse.urlsplit(api)
+	conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+	conn.connect()
+	return conn
+
+def _ipfs_add_cli(chunks, timeout):
+	proc = subprocess.Popen(["ipfs", "add", "-q"], stdin=subprocess.PIPE,
+		stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+	try:
+		for chunk in chunks:
+			proc.stdin.write(chunk)
+		proc.stdin.close()
+		out = proc.stdout.read()
+		proc.wait(timeout=timeout)
+	except BaseException:
+		proc.kill()
+		raise
+	if proc.returncode != 0:
+		raise IOError("ipfs add a échoué")
+	return out.decode().strip().splitlines()[-1]
+
+def ipfs_add(chunks, api=IPFS_API, timeout=60):
+	"""Ajoute à IPFS le contenu d'un itérable de bytes ; retourne le CID."""
+	try:
+		conn = _ipfs_connection(api, timeout)
+	except OSError:
+		return _ipfs_add_cli(chunks, timeout)
+	try:
+		boundary = os.urandom(16).hex()
+		conn.putrequest("POST", "/api/v0/add?quieter=true")
+		conn.putheader("Content-Type", "multipart/form-data; boundary=" + boundary)
+		conn.putheader("Transfer-Encoding", "chunked")
+		conn.endheaders()
+		def send(data):
+			if data:
+				conn.send(b"%x\r\n" % len(data) + data + b"\r\n")
+		send(("--%s\r\nContent-Disposition: form-data; name=\"file\"; filename=\"data\"\r\n"
+			"Content-Type: application/octet-stream\r\n\r\n" % boundary).encode())
+		for chunk in chunks:
+			send(chunk)
+		send(("\r\n--%s--\r\n" % boundary).encode())
+		conn.send(b"0\r\n\r\n")
+		resp = conn.getresponse()
+		body = resp.read()
+		if resp.status != 200:
+			raise IOError("ipfs add : HTTP {} {}".format(resp.status, body[:200]))
+		lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+		return lines[-1]["Hash"]
+	finally:
+		conn.close()
+
+def ipfs_cat(cid, api=IPFS_API, timeout=60, chunk_size=STREAM_CHUNK):
+	"""Contenu d'un CID, bloc par bloc."""
+	path = cid if cid.startswith("/ip") else "/ipfs/" + cid
+	try:
+		conn = _ipfs_connection(api, timeout)
+	except OSError:
+		proc = subprocess.Popen(["ipfs", "cat", path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+		try:
+			yield from iter_file(proc.stdout, chunk_size)
+		finally:
+			proc.stdout.close()
+			if proc.wait(timeout=timeout) != 0:
+				raise IOError("ipfs cat a échoué")
+		return
+	try:
+		conn.request("POST", "/api/v0/cat?arg=" + urllib.parse.quote(path))
+		resp = conn.getresponse()
+		if resp.status != 200:
+			raise IOError("ipfs cat : HTTP {} {}".format(resp.status, resp.read(200)))
+		yield from iter_file(resp, chunk_size)
+	finally:
+		conn.close()
+
+def encrypt_to_ipfs(data, pubkey, privkey=None, stream=False, api=IPFS_API, timeout=60):
+	"""Chiffre pour pubkey et ajoute à IPFS, sans fichier ni processus ;
+	retourne le CID. Par défaut un scellé unique (format `natools.py
+	encrypt`, lisible par les outils existants) ; stream=True ou privkey
+	(box, expéditeur authentifié) : flux par blocs, data pouvant alors être
+	un itérable de bytes."""
+	if stream or privkey is not None:
+		chunks = encrypt_stream([data] if isinstance(data, bytes) else data, pubkey, privkey)
+	else:
+		chunks = [encrypt(data, pubkey)]
+	return ipfs_add(chunks, api, timeout)
+
+def decrypt_from_ipfs(cid, privkey, pubkey=None, api=IPFS_API, timeout=60):
+	"""Relit un CID et le déchiffre (scellé ou flux) ; retourne les bytes."""
+	return decrypt_any(b"".join(ipfs_cat(cid, api, timeout)), privkey, pubkey)
+
 def sign(data, privkey):
 	return privkey.sign(data)
 
@@ -193,6 +421,66 @@ defmt = {
 	"85": lambda data: base64.b85decode(data),
 }
 
+def open_input(data_path):
+	if data_path == "-":
+		return sys.stdin.buffer
+	return open(os.path.expanduser(data_path), "rb")
+
+def write_chunks(chunks, result_path):
+	out = os.fdopen(sys.stdout.fileno(), 'wb', closefd=False) if result_path == "-" else open(os.path.expanduser(result_path), "wb")
+	try:
+		for chunk in chunks:
+			out.write(chunk)
+	finally:
+		if result_path == "-":
+			out.flush()
+		else:
+			out.close()
+
+def cli_encrypt(data_path, result_path, input_format, output_format, pubkey, privkey=None, nonce=None, attach_nonce=False):
+	"""encrypt / box-encrypt : en mémoire (historique), --stream par blocs,
+	--ipfs vers IPFS (CID sur la sortie)."""
+	streaming = "--stream" in sys.argv
+	if streaming:
+		if input_format != "raw" or (output_format != "raw" and "--ipfs" not in sys.argv):
+			raise ValueError("--stream requires raw input and output formats")
+		with open_input(data_path) as f:
+			chunks = encrypt_stream(iter_file(f), pubkey, privkey)
+			if "--ipfs" in sys.argv:
+				write_data((ipfs_add(chunks) + "\n").encode(), result_path)
+			else:
+				write_chunks(chunks, result_path)
+		return
+	data = defmt[input_format](read_data(data_path))
+	if privkey is None:
+		result = encrypt(data, pubkey)
+	else:
+		result = box_encrypt(data, privkey, pubkey, nonce, attach_nonce)
+	if "--ipfs" in sys.argv:
+		write_data((ipfs_add([result]) + "\n").encode(), result_path)
+	else:
+		write_data(fmt[output_format](result), result_path)
+
+def cli_decrypt(data_path, result_path, input_format, output_format, privkey, pubkey=None, nonce=None):
+	"""decrypt / box-decrypt (box si pubkey) : un flux en entrée brute est
+	déchiffré bloc par bloc vers la sortie, le reste en mémoire."""
+	if input_format == "raw" and output_format == "raw":
+		with open_input(data_path) as f:
+			head = f.read(len(STREAM_MAGIC))
+			if head == STREAM_MAGIC:
+				write_chunks(decrypt_stream(itertools.chain([head], iter_file(f)), privkey, pubkey), result_path)
+				return
+			data = head + f.read()
+	else:
+		data = defmt[input_format](read_data(data_path))
+	if is_stream(data):
+		result = b"".join(decrypt_stream([data], privkey, pubkey))
+	elif pubkey:
+		result = box_decrypt(data, privkey, pubkey, nonce)
+	else:
+		result = decrypt(data, privkey)
+	write_data(fmt[output_format](result), result_path)
+
 def show_help():
 	print("""Usage:
 python3 natools.py <command> [options]
@@ -223,12 +511,15 @@ Options:
   -o <path>  Output file path (default: -)
   -O <fmt>   Output format: raw 16 32 58 64 64u 85 (default: raw)
   -p <str>   Pubkey (base58)
+  --stream   Chunked stream format, constant memory (encrypt, box-encrypt; raw I/O)
+  --ipfs     Add the encrypted result to IPFS and print its CID (encrypt, box-encrypt)
   
   --help     Show help
   --version  Show version
   --debug    Debug mode (display full errors)
 
 Note: "-" means stdin or stdout.
+decrypt / box-decrypt detect the chunked stream format automatically.
 """)
 
 if __name__ == "__main__":
@@ -268,10 +559,10 @@ if __name__ == "__main__":
 			if not pubkey:
 				print("Please provide pubkey!")
 				exit(1)
-			write_data(fmt[output_format](encrypt(defmt[input_format](read_data(data_path)), pubkey)), result_path)
+			cli_encrypt(data_path, result_path, input_format, output_format, pubkey)
 		
 		elif sys.argv[1] == "decrypt":
-			write_data(fmt[output_format](decrypt(defmt[input_format](read_data(data_path)), get_privkey(privkey_path, privkey_format))), result_path)
+			cli_decrypt(data_path, result_path, input_format, output_format, get_privkey(privkey_path, privkey_format))
 		
 		elif sys.argv[1] == "box-encrypt":
 			if not pubkey:
@@ -281,7 +572,7 @@ if __name__ == "__main__":
 			if nonce:
 				nonce = base64.b64decode(nonce)
 			attach_nonce = "-N" in sys.argv
-			write_data(fmt[output_format](box_encrypt(defmt[input_format](read_data(data_path)), get_privkey(privkey_path, privkey_format), pubkey, nonce, attach_nonce)), result_path)
+			cli_encrypt(data_path, result_path, input_format, output_format, pubkey, get_privkey(privkey_path, privkey_format), nonce, attach_nonce)
 		
 		elif sys.argv[1] == "box-decrypt":
 			if not pubkey:
@@ -290,7 +581,7 @@ if __name__ == "__main__":
 			nonce = getargv("-n", None)
 			if nonce:
 				nonce = base64.b64decode(nonce)
-			write_data(fmt[output_format](box_decrypt(defmt[input_format](read_data(data_path)), get_privkey(privkey_path, privkey_format), pubkey, nonce)), result_path)
+			cli_decrypt(data_path, result_path, input_format, output_format, get_privkey(privkey_path, privkey_format), pubkey, nonce)
 		
 		elif sys.argv[1] == "sign":
 			data = defmt[input_format](read_data(data_path))
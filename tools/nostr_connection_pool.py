@@ -26,61 +26,250 @@ Design retenu (validé avec le capitaine, 2026-07-06) :
   - Dégradation totalement transparente : si le daemon n'écoute pas (pas
     lancé, crashé, désactivé), try_publish_via_pool() retourne None et
     l'appelant retombe sur sa connexion directe historique, INCHANGÉE.
+
+Multi-relais (2026-10-18) : try_publish_many_via_pool() envoie UNE requête
+{"relays": [...]} — le daemon publie le même event vers toutes les cibles en
+parallèle et rend le résultat par relais. BRO publie chaque réponse vers le
+relais local ET copylaradio : la latence devient max() au lieu de sum().
+Mode de complétion optionnel : "quorum": N rend la main dès N OK (1 = premier
+OK) ; les publications restantes continuent côté daemon.
+
+Lecture (2026-10-18) : try_query_via_pool() fait exécuter un REQ (plusieurs
+filtres possibles) par le daemon sur sa connexion de lecture anonyme au
+relais, réutilisée d'une requête à l'autre, et rend les events jusqu'à EOSE.
+
+Pipelining (2026-10-18) : toutes les aides passent par PoolClient, UNE
+connexion persistante au daemon par processus, partagée entre threads —
+chaque requête porte un "id" que la réponse reprend, un thread lecteur remet
+chaque réponse à son appelant. Les publications et lectures concurrentes
+d'un même processus (BRO : réponse + relais multiples + lectures A4L)
+s'enchaînent sur cette connexion sans s'attendre ni la rouvrir.
+pool_stats() interroge les compteurs du daemon ({"op": "stats"}).
 """
 
 import os
 import json
+import time
 import socket
+import itertools
+import threading
 
 SOCKET_PATH = os.path.expanduser("~/.zen/tmp/nostr_pool.sock")
 POOL_TTL_SEC = 60          # inactivité avant fermeture d'une connexion pool
 POOL_SCAN_INTERVAL_SEC = 15
 CLIENT_TIMEOUT_SEC = 5     # côté appelant : au-delà, on suppose le daemon en panne
+CONNECT_TIMEOUT_SEC = 10   # côté daemon : ouverture WebSocket vers un relais
+PUBLISH_WAIT_SEC = 15      # côté daemon : attente du "OK" d'un relais
+# Une publication peut légitimement occuper le daemon CONNECT + WAIT : un
+# client qui abandonne avant prend un relais lent pour un daemon en panne et
+# republie tout en direct (doublons + latence). CLIENT_TIMEOUT_SEC sert de
+# marge (2026-10-18).
+PUBLISH_CLIENT_TIMEOUT_SEC = CONNECT_TIMEOUT_SEC + PUBLISH_WAIT_SEC + CLIENT_TIMEOUT_SEC
+QUERY_MAX_WAIT_SEC = 60    # côté daemon : plafond du "timeout" d'une requête REQ
 
 
-def _recv_line(sock, max_bytes=65536):
-    """Lit jusqu'au premier '\\n' ou jusqu'à max_bytes — le protocole est une
-    requête/réponse JSON par ligne, une seule par connexion cliente."""
-    buf = b""
-    while b"\n" not in buf and len(buf) < max_bytes:
-        chunk = sock.recv(4096)
-        if not chunk:
-            break
-        buf += chunk
-    return buf.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+class PoolClient:
+    """Connexion persistante et pipelinée au daemon, thread-safe. Les
+    réponses sont appariées par "id" (le daemon ne garantit pas leur ordre).
+    Une connexion morte (daemon redémarré, fermée par le daemon après
+    POOL_TTL_SEC d'inactivité) est rouverte à l'appel suivant. Toute erreur
+    de transport ou dépassement du délai lève OSError — l'appelant retombe
+    alors sur son mode direct."""
 
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.Lock()   # connexion, envoi, table des attentes
+        self._sock = None
+        self._waiting = {}              # id -> [Event, réponse] de la connexion courante
+        self._ids = itertools.count(1)
+        self._last_used = 0.0
 
-def try_publish_via_pool(event_dict: dict, relay_url: str, timeout: float = CLIENT_TIMEOUT_SEC):
-    """Tente de publier `event_dict` (DÉJÀ SIGNÉ) vers `relay_url` via le
-    daemon de pool. Retourne True/False si le daemon a répondu, ou None s'il
-    est indisponible — dans ce dernier cas, l'appelant DOIT retomber sur sa
-    propre logique de connexion directe (jamais de blocage sur son absence :
-    le pool est une optimisation pure, jamais une dépendance dure)."""
+    def _connect(self):
+        """Sous self._lock. Une connexion restée inactive plus de la moitié
+        du TTL est remplacée plutôt que de risquer sa fermeture par le daemon
+        pendant l'envoi."""
+        if self._sock is not None and (self._waiting or
+                                       time.monotonic() - self._last_used < POOL_TTL_SEC / 2):
+            return self._sock
+        self._close_locked()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CLIENT_TIMEOUT_SEC)
+        try:
+            sock.connect(self.path or SOCKET_PATH)
+        except OSError:
+            sock.close()
+            raise
+        self._sock, self._waiting = sock, {}
+        threading.Thread(target=self._read_loop, args=(sock, self._waiting),
+                         name="nostr-pool-client", daemon=True).start()
+        return sock
+
+    def _read_loop(self, sock, waiting):
+        buf = b""
+        try:
+            while True:
+                try:
+                    chunk = sock.recv(65536)
+                except socket.timeout:
+                    if self._sock is not sock:
+                        return
+                    continue
+                if not chunk:
+                    return
+                buf += chunk
+                while b"\n" in buf:
+                    line, buf = buf.split(b"\n", 1)
+                    try:
+                        resp = json.loads(line.decode("utf-8", errors="replace"))
+                    except ValueError:
+                        continue
+                    rid = resp.get("id") if isinstance(resp, dict) else None
+                    if not isinstance(rid, int):
+                        continue    # erreur de connexion du daemon, sans "id"
+                    with self._lock:
+                        slot = waiting.pop(rid, None)
+                        self._last_used = time.monotonic()
+                    if slot:
+                        slot[1] = resp
+                        slot[0].set()
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                if self._sock is sock:
+                    self._sock = None
+                orphans = list(waiting.values())
+                waiting.clear()
+            try:
+                sock.close()
+            except OSError:
+                pass
+            for slot in orphans:
+                slot[0].set()       # réponse None : connexion perdue
+
+    def call_many(self, requests: list, timeout: float = CLIENT_TIMEOUT_SEC) -> list:
+        """Envoie toutes les requêtes d'un coup puis attend leurs réponses,
+        rendues dans l'ordre des requêtes."""
+        slots = []
+        with self._lock:
+            sock = self._connect()
+            waiting = self._waiting
+            payload = b""
+            for req in requests:
+                rid = next(self._ids)
+                slot = [threading.Event(), None]
+                waiting[rid] = slot
+                slots.append((rid, slot))
+                payload += (json.dumps({**req, "id": rid}) + "\n").encode("utf-8")
+            self._last_used = time.monotonic()
+            try:
+                sock.sendall(payload)
+            except OSError:
+                self._close_locked()
+                raise
+        deadline = time.monotonic() + timeout
+        try:
+            responses = []
+            for _, slot in slots:
+                if not slot[0].wait(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError("daemon de pool : pas de réponse dans le délai")
+            for _, slot in slots:
+                if slot[1] is None:
+                    raise ConnectionResetError("daemon de pool : connexion fermée")
+                responses.append(slot[1])
+            return responses
+        finally:
+            with self._lock:
+                for rid, _ in slots:
+                    waiting.pop(rid, None)
+
+    def call(self, request: dict, timeout: float = CLIENT_TIMEOUT_SEC) -> dict:
+        return self.call_many([request], timeout)[0]
+
+    def _close_locked(self):
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)     # réveille le thread lecteur
+                sock.close()
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+_CLIENT = PoolClient()
+
+
+def _pool_request(request: dict, timeout: float):
+    """Une requête/réponse JSON avec le daemon, sur la connexion partagée du
+    processus ; None s'il est indisponible."""
     if not os.path.exists(SOCKET_PATH):
         return None
-    sock = None
     try:
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        sock.connect(SOCKET_PATH)
-        request = json.dumps({
-            "relay": relay_url,
-            "pubkey": event_dict.get("pubkey", ""),
-            "event": event_dict,
-        }) + "\n"
-        sock.sendall(request.encode("utf-8"))
-        raw = _recv_line(sock)
-        if not raw:
-            return None
-        response = json.loads(raw)
-        return bool(response.get("ok"))
+        return _CLIENT.call(request, timeout)
     except Exception:
         # Daemon absent, socket obsolète, timeout... — dégradation
         # silencieuse et systématique vers le mode direct.
         return None
-    finally:
-        if sock:
-            try:
-                sock.close()
-            except Exception:
-                pass
+
+
+def try_publish_via_pool(event_dict: dict, relay_url: str, timeout: float = PUBLISH_CLIENT_TIMEOUT_SEC):
+    """Tente de publier `event_dict` (DÉJÀ SIGNÉ) vers `relay_url` via le
+    daemon de pool. Retourne True/False si le daemon a répondu, ou None s'il
+    est indisponible — dans ce dernier cas, l'appelant DOIT retomber sur sa
+    propre logique de connexion directe (jamais de blocage sur son absence :
+    le pool est une optimisation pure, jamais une dépendance dure)."""
+    response = _pool_request({
+        "relay": relay_url,
+        "pubkey": event_dict.get("pubkey", ""),
+        "event": event_dict,
+    }, timeout)
+    if response is None:
+        return None
+    return bool(response.get("ok"))
+
+
+def try_publish_many_via_pool(event_dict: dict, relay_urls: list, quorum: int = None,
+                              timeout: float = PUBLISH_CLIENT_TIMEOUT_SEC):
+    """Publie `event_dict` (DÉJÀ SIGNÉ) vers tous `relay_urls` en parallèle
+    via le daemon. Retourne {relais: True/False} — un relais encore en cours
+    quand le quorum est atteint est absent du dict — ou None si le daemon est
+    indisponible (même contrat de repli que try_publish_via_pool)."""
+    request = {
+        "relays": list(relay_urls),
+        "pubkey": event_dict.get("pubkey", ""),
+        "event": event_dict,
+    }
+    if quorum:
+        request["quorum"] = int(quorum)
+    response = _pool_request(request, timeout)
+    if response is None or not isinstance(response.get("results"), dict):
+        return None
+    return {relay: bool(r.get("ok")) for relay, r in response["results"].items()
+            if not r.get("pending")}
+
+
+def try_query_via_pool(relay_url: str, filters: list, timeout: float = 8):
+    """REQ `filters` vers `relay_url` via le daemon. Retourne (events, eose)
+    — eose=False si le relais n'a pas fini dans le délai —, ou None si le
+    daemon est indisponible ou n'a pas pu joindre le relais (l'appelant ouvre
+    alors sa propre connexion). Le délai client couvre, comme pour une
+    publication, la connexion du daemon au relais en plus de l'attente."""
+    timeout = min(timeout, QUERY_MAX_WAIT_SEC)
+    response = _pool_request({"op": "query", "relay": relay_url,
+                              "filters": list(filters), "timeout": timeout},
+                             CONNECT_TIMEOUT_SEC + timeout + CLIENT_TIMEOUT_SEC)
+    if not response or not response.get("ok") or not isinstance(response.get("events"), list):
+        return None
+    return response["events"], bool(response.get("eose"))
+
+
+def pool_stats(timeout: float = CLIENT_TIMEOUT_SEC):
+    """Compteurs du daemon par (relais, pubkey), ou None s'il n'écoute pas."""
+    response = _pool_request({"op": "stats"}, timeout)
+    if not response or not response.get("ok"):
+        return None
+    return response.get("stats")
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+nostr_crypto.py — Chiffrement NOSTR partagé : NIP-44 v2, NIP-04, ECDH
+secp256k1 et cache LRU des clés de conversation.
+
+Contexte (2026-10-18) : l'implémentation NIP-44 (ECDH, clé de conversation
+HKDF, ChaCha20, HMAC) était recopiée dans nostr_send_secure_dm.py et
+nostr_node_intercom.py, et aucune des deux ne gardait la clé de
+conversation — pourtant fixe pour une paire (expéditeur, destinataire).
+BRO déchiffrait chaque self-DM par un sous-processus
+`nostr_node_intercom.py decrypt` : import de la pile crypto ET multiplication
+scalaire secp256k1 à chaque message, alors que tous ses self-DM partagent la
+même paire (owner, owner).
+
+Ici, une seule implémentation :
+  - conversation_key() / shared_secret() passent par un cache LRU
+    (ConversationKeyCache, NOSTR_CONV_KEY_CACHE entrées) : l'ECDH n'est
+    calculé qu'une fois par paire et par processus ;
+  - nip44_encrypt / nip44_decrypt conformes à la spec NIP-44 v2 (validation
+    des tailles et du padding), avec en déchiffrement les replis historiques
+    d'intercom (ancienne clé non conforme, ancien format ChaCha20Poly1305) ;
+  - nip04_encrypt / nip04_decrypt, decrypt_content (aiguillage NIP-04/44) ;
+  - lots : decrypt_events() sur une liste d'events kind 4 et
+    nip44_encrypt_many() sur une liste de (destinataire, texte).
+
+Dépendances : cryptography (bech32 pour nsec_to_hex uniquement).
+Tests : tests/test_nostr_crypto.py (vecteurs officiels NIP-44 + benchmark).
+"""
+
+import os
+import hmac
+import base64
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+
+CONV_KEY_CACHE_SIZE = int(os.environ.get("NOSTR_CONV_KEY_CACHE", "1024"))
+
+# secp256k1
+_P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+NIP44_SALT = b"nip44-v2"
+NIP44_MIN_PLAINTEXT = 1
+NIP44_MAX_PLAINTEXT = 65535
+
+
+# ── Clés ──────────────────────────────────────────────────────────────────────
+
+def nsec_to_hex(nsec: str) -> str:
+    """Convertit un nsec bech32 en hex brut de la clé privée."""
+    import bech32 as b32m
+    hrp, data = b32m.bech32_decode(nsec)
+    if hrp != "nsec" or data is None:
+        raise ValueError(f"NSEC invalide : {nsec[:12]}…")
+    return bytes(b32m.convertbits(data, 5, 8, False)).hex()
+
+
+def _private_key(priv_hex: str):
+    from cryptography.hazmat.primitives.asymmetric import ec
+    d = int(priv_hex, 16)
+    if not 0 < d < _N:
+        raise ValueError("clé privée hors de [1, n-1]")
+    return ec.derive_private_key(d, ec.SECP256K1())
+
+
+def _public_key(pub_hex: str):
+    """Point secp256k1 d'une pubkey x-only (BIP-340 : y pair)."""
+    from cryptography.hazmat.primitives.asymmetric import ec
+    if len(pub_hex) != 64:
+        raise ValueError("pubkey hex de 32 octets attendue")
+    x = int(pub_hex, 16)
+    if x >= _P:
+        raise ValueError("pubkey hors du corps secp256k1")
+    y_sq = (pow(x, 3, _P) + 7) % _P
+    y = pow(y_sq, (_P + 1) // 4, _P)
+    if y * y % _P != y_sq:
+        raise ValueError("pubkey hors de la courbe secp256k1")
+    if y % 2:
+        y = _P - y
+    return ec.EllipticCurvePublicKey.from_encoded_point(
+        ec.SECP256K1(), b"\x04" + x.to_bytes(32, "big") + y.to_bytes(32, "big"))
+
+
+def pubkey_hex(priv_hex: str) -> str:
+    """Pubkey NOSTR (x-only, hex) d'une clé privée hex."""
+    return _private_key(priv_hex).public_key().public_numbers().x.to_bytes(32, "big").hex()
+
+
+def _ecdh_x(priv_hex: str, pub_hex: str) -> bytes:
+    """Coordonnée X du point ECDH secp256k1 (32 octets, non hachée)."""
+    from cryptography.hazmat.primitives.asymmetric import ec
+    return _private_key(priv_hex).exchange(ec.ECDH(), _public_key(pub_hex))
+
+
+# ── Cache des clés de conversation ────────────────────────────────────────────
+
+class ConversationKeyCache:
+    """LRU (priv_hex, pub_hex) -> (secret ECDH, clé de conversation NIP-44).
+    Le secret brut sert aussi de clé NIP-04 : une paire ne paie qu'un ECDH,
+    quel que soit le format. Sûr entre threads (bro_service)."""
+
+    def __init__(self, maxsize: int = CONV_KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, priv_hex: str, pub_hex: str):
+        key = (priv_hex.lower(), pub_hex.lower())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        shared = _ecdh_x(priv_hex, pub_hex)
+        entry = (shared, hmac.new(NIP44_SALT, shared, hashlib.sha256).digest())
+        with self._lock:
+            self.misses += 1
+            if self.maxsize > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_CACHE = ConversationKeyCache()
+
+
+def shared_secret(priv_hex: str, pub_hex: str) -> bytes:
+    """Secret ECDH (X) de la paire, mis en cache."""
+    return _CACHE.get(priv_hex, pub_hex)[0]
+
+
+def conversation_key(priv_hex: str, pub_hex: str) -> bytes:
+    """Clé de conversation NIP-44 v2 : HKDF-Extract(salt='nip44-v2', IKM=X),
+    mise en cache — symétrique : conversation_key(a, B) == conversation_key(b, A)."""
+    return _CACHE.get(priv_hex, pub_hex)[1]
+
+
+def cache_stats() -> dict:
+    return _CACHE.stats()
+
+
+def clear_cache():
+    """Oublie toutes les clés de conversation (rotation de clé, tests)."""
+    _CACHE.clear()
+
+
+# ── NIP-44 v2 ────────────────────────────────────────────────────────────────
+# ECDH secp256k1 → HKDF-Extract("nip44-v2") → HKDF-Expand(nonce) en
+# (clé ChaCha20 32, nonce ChaCha20 12, clé HMAC 32) ; version 0x02, nonce 32
+# octets, padding en puissances de 2, MAC HMAC-SHA256 sur nonce + chiffré.
+
+def _hkdf_expand(prk: bytes, info: bytes, length: int) -> bytes:
+    """HKDF-Expand (RFC 5869) sur HMAC-SHA256 — quelques hmac.new au lieu
+    d'un objet HKDFExpand par message."""
+    okm, block, counter = b"", b"", 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes([counter]), hashlib.sha256).digest()
+        okm += block
+        counter += 1
+    return okm[:length]
+
+
+def _hkdf(ikm: bytes, length: int, salt, info: bytes) -> bytes:
+    prk = hmac.new(salt or b"\x00" * 32, ikm, hashlib.sha256).digest()
+    return _hkdf_expand(prk, info, length)
+
+
+def _chacha20(key: bytes, nonce_12: bytes, data: bytes) -> bytes:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+    # cryptography : nonce 16 octets = compteur 32 bits LE (0) + nonce 12 octets
+    enc = Cipher(algorithms.ChaCha20(key, b"\x00\x00\x00\x00" + nonce_12), mode=None).encryptor()
+    return enc.update(data) + enc.finalize()
+
+
+def _message_keys(conv_key: bytes, nonce: bytes):
+    keys = _hkdf_expand(conv_key, nonce, 76)
+    return keys[0:32], keys[32:44], keys[44:76]
+
+
+def calc_padded_len(n: int) -> int:
+    if n <= 32:
+        return 32
+    nextpow = 1 << (n - 1).bit_length()
+    chunk = 32 if nextpow <= 256 else nextpow // 8
+    return chunk * ((n - 1) // chunk + 1)
+
+
+def _pad(utf8: bytes) -> bytes:
+    n = len(utf8)
+    if not NIP44_MIN_PLAINTEXT <= n <= NIP44_MAX_PLAINTEXT:
+        raise ValueError(f"NIP-44 : taille de message invalide ({n} octets)")
+    return struct.pack(">H", n) + utf8 + b"\x00" * (calc_padded_len(n) - n)
+
+
+def _unpad(padded: bytes) -> bytes:
+    n = struct.unpack(">H", padded[0:2])[0]
+    utf8 = padded[2:2 + n]
+    if n == 0 or len(utf8) != n or len(padded) != 2 + calc_padded_len(n):
+        raise ValueError("NIP-44 : padding invalide")
+    return utf8
+
+
+def nip44_encrypt_with_key(plaintext: str, conv_key: bytes, nonce: bytes = None) -> str:
+    nonce = nonce or os.urandom(32)
+    chacha_key, chacha_nonce, hmac_key = _message_keys(conv_key, nonce)
+    ct = _chacha20(chacha_key, chacha_nonce, _pad(plaintext.encode("utf-8")))
+    mac = hmac.new(hmac_key, nonce + ct, hashlib.sha256).digest()
+    return base64.b64encode(b"\x02" + nonce + ct + mac).decode("ascii")
+
+
+def _nip44_payload(payload: str) -> bytes:
+    if not payload or payload[0] == "#":
+        raise ValueError("NIP-44 : version de chiffrement inconnue")
+    if not 132 <= len(payload) <= 87472:
+        raise ValueError(f"NIP-44 : taille de payload invalide ({len(payload)})")
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except ValueError:
+        raise ValueError("NIP-44 : base64 invalide")
+    if not 99 <= len(data) <= 65603:
+        raise ValueError(f"NIP-44 : taille de données invalide ({len(data)})")
+    if data[0] != 2:
+        raise ValueError(f"NIP-44 : version {data[0]} inconnue")
+    return data
+
+
+def nip44_decrypt_with_key(payload: str, conv_key: bytes) -> str:
+    """Déchiffrement NIP-44 v2 strict (spec) ; ValueError sinon."""
+    data = _nip44_payload(payload)
+    nonce, ct, mac = data[1:33], data[33:-32], data[-32:]
+    chacha_key, chacha_nonce, hmac_key = _message_keys(conv_key, nonce)
+    if not hmac.compare_digest(mac, hmac.new(hmac_key, nonce + ct, hashlib.sha256).digest()):
+        raise ValueError("NIP-44 v2 MAC invalide")
+    return _unpad(_chacha20(chacha_key, chacha_nonce, ct)).decode("utf-8")
+
+
+def nip44_encrypt(plaintext: str, priv_hex: str, pub_hex: str, nonce: bytes = None) -> str:
+    """NIP-44 v2 — version 0x02, compatible avec les extensions NIP-07."""
+    return nip44_encrypt_with_key(plaintext, conversation_key(priv_hex, pub_hex), nonce)
+
+
+def _nip44_decrypt_legacy(data: bytes, shared: bytes) -> str:
+    # Ancienne impl intercom non conforme (HKDF complet, salt=None) : v2 même
+    # enveloppe, autres clés, padding non vérifié.
+    if len(data) >= 99 and data[0] == 2:
+        nonce, ct, mac = data[1:33], data[33:-32], data[-32:]
+        keys = _hkdf(_hkdf(shared, 32, None, NIP44_SALT), 76, nonce, NIP44_SALT)
+        if hmac.compare_digest(mac, hmac.new(keys[44:76], nonce + ct, hashlib.sha256).digest()):
+            padded = _chacha20(keys[0:32], keys[32:44], ct)
+            return padded[2:2 + struct.unpack(">H", padded[0:2])[0]].decode("utf-8")
+        raise ValueError("NIP-44 v2 MAC invalide")
+    # Ancien format (ChaCha20Poly1305, nonce 12 octets)
+    if len(data) >= 13 and data[0] != 2:
+        from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+        from cryptography.exceptions import InvalidTag
+        key = _hkdf(shared, 32, b"nostr-nip44-v1", b"nostr-encryption")
+        try:
+            return ChaCha20Poly1305(key).decrypt(data[:12], data[12:], None).decode("utf-8")
+        except InvalidTag:
+            raise ValueError("NIP-44 (ancien format) : authentification invalide")
+    raise ValueError(f"NIP-44 payload invalide (len={len(data)}, v={data[0] if data else '?'})")
+
+
+def nip44_decrypt(payload: str, priv_hex: str, pub_hex: str, legacy: bool = True) -> str:
+    """NIP-44 v2 (spec), puis — legacy=True — les formats historiques
+    d'intercom, comme avant."""
+    shared, conv_key = _CACHE.get(priv_hex, pub_hex)
+    try:
+        return nip44_decrypt_with_key(payload, conv_key)
+    except ValueError:
+        if not legacy:
+            raise
+    try:
+        data = base64.b64decode(payload)
+    except ValueError:
+        raise ValueError("NIP-44 : base64 invalide")
+    return _nip44_decrypt_legacy(data, shared)
+
+
+# ── NIP-04 (AES-256-CBC) ─────────────────────────────────────────────────────
+
+def nip04_encrypt(message: str, priv_hex: str, pub_hex: str, iv: bytes = None) -> str:
+    """Chiffrement NIP-04 — base64(ct)?iv=base64(iv). Universellement supporté
+    par les extensions NIP-07."""
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives import padding as sym_padding
+    iv = iv or os.urandom(16)
+    padder = sym_padding.PKCS7(128).padder()
+    padded = padder.update(message.encode("utf-8")) + padder.finalize()
+    enc = Cipher(algorithms.AES(shared_secret(priv_hex, pub_hex)), modes.CBC(iv)).encryptor()
+    ct = enc.update(padded) + enc.finalize()
+    return base64.b64encode(ct).decode() + "?iv=" + base64.b64encode(iv).decode()
+
+
+def nip04_decrypt(ciphertext: str, priv_hex: str, pub_hex: str) -> str:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    if "?iv=" not in ciphertext:
+        raise ValueError("Format NIP-04 invalide")
+    ct_b64, iv_b64 = ciphertext.split("?iv=", 1)
+    dec = Cipher(algorithms.AES(shared_secret(priv_hex, pub_hex)),
+                 modes.CBC(base64.b64decode(iv_b64))).decryptor()
+    padded = dec.update(base64.b64decode(ct_b64)) + dec.finalize()
+    return padded[:-padded[-1]].decode("utf-8")
+
+
+def decrypt_content(content: str, priv_hex: str, pub_hex: str) -> str:
+    """NIP-04 si `?iv=`, sinon NIP-44 v2 → anciens formats NIP-44."""
+    if "?iv=" in content:
+        return nip04_decrypt(content, priv_hex, pub_hex)
+    return nip44_decrypt(content, priv_hex, pub_hex)
+
+
+# ── Lots ──────────────────────────────────────────────────────────────────────
+
+def event_peer(event: dict, own_pub_hex: str) -> str:
+    """Interlocuteur d'un DM : l'auteur, ou — pour un DM que l'on a écrit
+    (self-DM compris) — le premier tag p."""
+    author = event.get("pubkey", "")
+    if author.lower() != own_pub_hex:
+        return author
+    for tag in event.get("tags", []):
+        if len(tag) >= 2 and tag[0] == "p":
+            return tag[1]
+    return author
+
+
+def decrypt_events(events, priv_hex: str) -> list:
+    """Déchiffre une liste d'events kind 4 (NIP-04 ou NIP-44) reçus ou écrits
+    par priv_hex : une entrée par event, texte clair ou None si illisible.
+    Un seul ECDH par interlocuteur (cache), quel que soit le nombre d'events."""
+    own = pubkey_hex(priv_hex)
+    results = []
+    for event in events:
+        try:
+            results.append(decrypt_content(event.get("content", ""), priv_hex, event_peer(event, own)))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def nip44_encrypt_many(items, priv_hex: str) -> list:
+    """[(pub_hex destinataire, texte), ...] -> [payload NIP-44, ...]."""
+    return [nip44_encrypt(plaintext, priv_hex, pub_hex) for pub_hex, plaintext in items]
@@ -30,28 +30,14 @@ import sys
 import json
 import argparse
 import hashlib
-import hmac
 import ssl
 import threading
 import time
-import base64
 import os
-import struct
-import math
 
 
 # ── Clés NOSTR ────────────────────────────────────────────────────────────────
 
-def _nsec_to_hex(nsec: str) -> str:
-    """Convertit un nsec bech32 en hex brut de la clé privée."""
-    import bech32 as b32m
-    hrp, data = b32m.bech32_decode(nsec)
-    if hrp != "nsec" or data is None:
-        raise ValueError(f"NSEC invalide : {nsec[:12]}…")
-    raw = bytes(b32m.convertbits(data, 5, 8, False))
-    return raw.hex()
-
-
 def _priv_to_pub_hex(priv_hex: str) -> str:
     """Retourne la pubkey NOSTR (x-only, 32 octets en hex) depuis priv_hex."""
     import coincurve
@@ -59,154 +45,15 @@ def _priv_to_pub_hex(priv_hex: str) -> str:
     return priv.public_key.format(compressed=True)[1:].hex()
 
 
-# ── Crypto ECDH ───────────────────────────────────────────────────────────────
-
-def _derive_shared_secret(priv_hex: str, pub_hex: str) -> bytes:
-    """Retourne la coordonnée X du point ECDH secp256k1 (32 octets)."""
-    from cryptography.hazmat.primitives.asymmetric import ec
-    from cryptography.hazmat.backends import default_backend
-    p = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
-    x = int(pub_hex, 16)
-    y_sq = (pow(x, 3, p) + 7) % p
-    y = pow(y_sq, (p + 1) // 4, p)
-    if y % 2 != 0:
-        y = p - y
-    pub_bytes = b'\x04' + x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
-    priv_obj = ec.derive_private_key(int(priv_hex, 16), ec.SECP256K1(), default_backend())
-    pub_obj = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), pub_bytes)
-    return priv_obj.exchange(ec.ECDH(), pub_obj)
-
-
-# ── NIP-44 v2 ────────────────────────────────────────────────────────────────
-# Standard NIP-44 v2 : ECDH secp256k1 → HKDF("nip44-v2") → ChaCha20 + HMAC-SHA256
-# Version byte 0x02, nonce 32 bytes, power-of-2 padding, MAC sur nonce+ct.
-# Rétrocompatibilité : déchiffrement du vieux format (ChaCha20Poly1305, nonce 12 bytes).
-
-def _nip44_v2_hkdf(ikm: bytes, length: int, salt, info: bytes) -> bytes:
-    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.backends import default_backend
-    return HKDF(
-        algorithm=hashes.SHA256(), length=length,
-        salt=salt, info=info, backend=default_backend(),
-    ).derive(ikm)
-
-
-def _nip44_v2_expand(prk: bytes, info: bytes, length: int) -> bytes:
-    """HKDF-Expand uniquement (sans Extract) — PRK utilisé directement comme clé."""
-    from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.backends import default_backend
-    return HKDFExpand(
-        algorithm=hashes.SHA256(), length=length, info=info, backend=default_backend()
-    ).derive(prk)
-
-
-def _nip44_v2_conv_key(priv_hex: str, pub_hex: str) -> bytes:
-    """Conversation key NIP-44 v2 (spec officielle) :
-    HKDF-Extract(salt=b'nip44-v2', IKM=shared_x) = HMAC-SHA256(key=b'nip44-v2', msg=shared_x)."""
-    import hmac as _hmac, hashlib
-    return _hmac.new(b"nip44-v2", _derive_shared_secret(priv_hex, pub_hex), hashlib.sha256).digest()
-
-
-def _nip44_v2_conv_key_legacy(priv_hex: str, pub_hex: str) -> bytes:
-    """Ancienne conv key non-conforme (HKDF complet, salt=None) — conservée pour fallback."""
-    return _nip44_v2_hkdf(_derive_shared_secret(priv_hex, pub_hex), 32, None, b"nip44-v2")
-
-
-def _nip44_v2_chacha20(key: bytes, nonce_12: bytes, data: bytes) -> bytes:
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
-    from cryptography.hazmat.backends import default_backend
-    # Python cryptography: nonce = 4-byte counter(LE=0) + 12-byte nonce
-    cipher = Cipher(algorithms.ChaCha20(key, b'\x00\x00\x00\x00' + nonce_12),
-                    mode=None, backend=default_backend())
-    enc = cipher.encryptor()
-    return enc.update(data) + enc.finalize()
-
-
-def _nip44_v2_hmac(key: bytes, msg: bytes) -> bytes:
-    import hmac as _h
-    return _h.new(key, msg, hashlib.sha256).digest()
-
-
-def _nip44_v2_pad_len(n: int) -> int:
-    if n <= 32:
-        return 32
-    nextpow = 1 << (math.floor(math.log2(n - 1)) + 1)
-    chunk = 32 if nextpow <= 256 else nextpow // 8
-    return chunk * ((n - 1) // chunk + 1)
-
-
-def _nip44_encrypt(plaintext: str, sender_priv_hex: str, recipient_pub_hex: str) -> str:
-    """NIP-44 v2 encryption conforme spec : HMAC conv_key + HKDF-Expand message keys."""
-    conv_key = _nip44_v2_conv_key(sender_priv_hex, recipient_pub_hex)
-    nonce    = os.urandom(32)
-    utf8     = plaintext.encode('utf-8')
-    pad_len  = _nip44_v2_pad_len(len(utf8))
-    padded   = struct.pack('>H', len(utf8)) + utf8 + b'\x00' * (pad_len - len(utf8))
-    keys     = _nip44_v2_expand(conv_key, nonce, 76)
-    ct       = _nip44_v2_chacha20(keys[0:32], keys[32:44], padded)
-    mac      = _nip44_v2_hmac(keys[44:76], nonce + ct)
-    return base64.b64encode(b'\x02' + nonce + ct + mac).decode('utf-8')
-
-
-def _nip44_decrypt(ciphertext_b64: str, recipient_priv_hex: str, sender_pub_hex: str) -> str:
-    """NIP-44 v2 decryption : essaie la spec officielle, puis l'ancienne impl non-conforme."""
-    import hmac as _h
-    data = base64.b64decode(ciphertext_b64)
-    # ── NIP-44 v2 (version byte = 0x02) ──
-    if len(data) >= 99 and data[0] == 2:
-        nonce, ct, mac = data[1:33], data[33:-32], data[-32:]
-
-        # Tentative 1 : spec officielle NIP-44 v2 (HMAC conv_key + HKDF-Expand(info=nonce))
-        conv_key = _nip44_v2_conv_key(recipient_priv_hex, sender_pub_hex)
-        keys = _nip44_v2_expand(conv_key, nonce, 76)
-        if _h.compare_digest(mac, _nip44_v2_hmac(keys[44:76], nonce + ct)):
-            padded  = _nip44_v2_chacha20(keys[0:32], keys[32:44], ct)
-            msg_len = struct.unpack('>H', padded[0:2])[0]
-            return padded[2:2 + msg_len].decode('utf-8')
-
-        # Tentative 2 : ancienne impl non-conforme (HKDF complet, salt=None)
-        conv_key_l = _nip44_v2_conv_key_legacy(recipient_priv_hex, sender_pub_hex)
-        keys_l = _nip44_v2_hkdf(conv_key_l, 76, nonce, b"nip44-v2")
-        if _h.compare_digest(mac, _nip44_v2_hmac(keys_l[44:76], nonce + ct)):
-            padded  = _nip44_v2_chacha20(keys_l[0:32], keys_l[32:44], ct)
-            msg_len = struct.unpack('>H', padded[0:2])[0]
-            return padded[2:2 + msg_len].decode('utf-8')
-
-        raise ValueError("NIP-44 v2 MAC invalide")
-    # ── Ancien format (ChaCha20Poly1305, nonce 12 bytes — rétrocompatibilité) ──
-    if len(data) >= 13:
-        from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
-        shared = _derive_shared_secret(recipient_priv_hex, sender_pub_hex)
-        key = _nip44_v2_hkdf(shared, 32, b"nostr-nip44-v1", b"nostr-encryption")
-        return ChaCha20Poly1305(key).decrypt(data[:12], data[12:], None).decode('utf-8')
-    raise ValueError(f"NIP-44 payload invalide (len={len(data)}, v={data[0] if data else '?'})")
-
-
-# ── NIP-04 (fallback déchiffrement) ──────────────────────────────────────────
-
-def _nip04_decrypt(ciphertext: str, recipient_priv_hex: str, sender_pub_hex: str) -> str:
-    """AES-256-CBC déchiffrement NIP-04 : base64(ct)?iv=base64(iv)."""
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    if '?iv=' not in ciphertext:
-        raise ValueError("Format NIP-04 invalide")
-    ct_b64, iv_b64 = ciphertext.split('?iv=', 1)
-    ct = base64.b64decode(ct_b64)
-    iv = base64.b64decode(iv_b64)
-    key = _derive_shared_secret(recipient_priv_hex, sender_pub_hex)
-    cipher = Cipher(algorithms.AES(key[:32]), modes.CBC(iv))
-    dec = cipher.decryptor()
-    padded = dec.update(ct) + dec.finalize()
-    pad_len = padded[-1]
-    return padded[:-pad_len].decode('utf-8')
-
-
-def _decrypt_content(content: str, recipient_priv_hex: str, sender_pub_hex: str) -> str:
-    """NIP-44 v2 → ancien NIP-44 custom → NIP-04."""
-    if '?iv=' in content:
-        return _nip04_decrypt(content, recipient_priv_hex, sender_pub_hex)
-    return _nip44_decrypt(content, recipient_priv_hex, sender_pub_hex)
+# ── Chiffrement NIP-44 / NIP-04 ──────────────────────────────────────────────
+# Implémentation partagée avec nostr_send_secure_dm.py (2026-10-18) :
+# tools/nostr_crypto.py — clé de conversation en cache LRU, un seul ECDH par
+# interlocuteur et par processus. Déchiffrement : NIP-44 v2, anciens formats
+# NIP-44 d'intercom, puis NIP-04 (AES-256-CBC) pour la rétrocompatibilité.
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nostr_crypto import (nsec_to_hex as _nsec_to_hex, nip44_encrypt as _nip44_encrypt,
+                          decrypt_content as _decrypt_content)
 
 
 # ── Événement NOSTR (kind 4, Schnorr BIP-340) ────────────────────────────────
@@ -491,28 +338,44 @@ def cmd_query(args):
 
 # ── decrypt (event kind 4 depuis stdin) ───────────────────────────────────────
 
+def _decrypt_event(ev: dict, priv_hex: str) -> dict:
+    if "event" in ev:
+        ev = ev["event"]
+    sender_hex = ev.get("pubkey", "")
+    raw_content = ev.get("content", "")
+    enc = "nip04" if "?iv=" in raw_content else "nip44"
+    decrypted = _decrypt_content(raw_content, priv_hex, sender_hex)
+    try:
+        envelope = json.loads(decrypted)
+    except (json.JSONDecodeError, ValueError):
+        envelope = {"channel": "plain", "payload": {"text": decrypted}}
+    return {
+        "channel":  envelope.get("channel", "plain"),
+        "payload":  envelope.get("payload", {}),
+        "sender":   sender_hex,
+        "event_id": ev.get("id", ""),
+        "enc":      enc,
+    }
+
+
 def cmd_decrypt(args):
+    """Un event JSON -> un objet (code 1 si illisible). Une liste d'events ->
+    une liste, null pour chaque event illisible : un seul processus et un seul
+    ECDH par expéditeur pour tout le lot."""
     nsec = args.nsec or os.environ.get('NOSTR_NSEC', '')
     priv_hex = _nsec_to_hex(nsec)
     try:
-        ev = json.load(sys.stdin)
-        if "event" in ev:
-            ev = ev["event"]
-        sender_hex = ev.get("pubkey", "")
-        raw_content = ev.get("content", "")
-        enc = "nip04" if "?iv=" in raw_content else "nip44"
-        decrypted = _decrypt_content(raw_content, priv_hex, sender_hex)
-        try:
-            envelope = json.loads(decrypted)
-        except (json.JSONDecodeError, ValueError):
-            envelope = {"channel": "plain", "payload": {"text": decrypted}}
-        print(json.dumps({
-            "channel":  envelope.get("channel", "plain"),
-            "payload":  envelope.get("payload", {}),
-            "sender":   sender_hex,
-            "event_id": ev.get("id", ""),
-            "enc":      enc,
-        }))
+        data = json.load(sys.stdin)
+        if isinstance(data, list):
+            results = []
+            for ev in data:
+                try:
+                    results.append(_decrypt_event(ev, priv_hex))
+                except Exception:
+                    results.append(None)
+            print(json.dumps(results))
+            return
+        print(json.dumps(_decrypt_event(data, priv_hex)))
     except Exception:
         sys.exit(1)
 
@@ -560,7 +423,7 @@ if __name__ == "__main__":
     p_recv.add_argument("--since",   default=None)
     p_recv.add_argument("--relays",  nargs="+", required=True)
 
-    p_dec = sub.add_parser("decrypt", help="Déchiffrer un event kind 4 depuis stdin")
+    p_dec = sub.add_parser("decrypt", help="Déchiffrer un event kind 4 (ou une liste d'events) depuis stdin")
     p_dec.add_argument("--nsec", default=None)
     # --nsec-stdin absent ici : decrypt lit déjà le JSON depuis stdin
     # Fallback : variable d'environnement NOSTR_NSEC (invisible dans ps aux)
@@ -12,6 +12,36 @@ Protocole (une requête JSON par ligne, une par connexion cliente) :
   Requête  : {"relay": "wss://...", "pubkey": "<hex>", "event": {...déjà signé...}}
   Réponse  : {"ok": true|false, "error": "..." (si ok=false)}
 
+  Multi-relais (2026-10-18) — même event publié vers toutes les cibles EN
+  PARALLÈLE (une connexion pool (relais, pubkey) chacune) :
+  Requête  : {"relays": ["wss://...", ...], "pubkey": "<hex>", "event": {...},
+              "quorum": N (optionnel — rend la main dès N OK, 1 = premier OK)}
+  Réponse  : {"ok": true|false, "results": {"wss://...": {"ok": bool, "error": "..."}
+                                             | {"pending": true}}}
+  Sans quorum, attend toutes les cibles et ok = au moins un OK (même sémantique
+  que send_secure_direct_message). Les cibles encore "pending" au quorum
+  continuent d'être publiées en arrière-plan.
+
+  Pipelining (2026-10-18) — plusieurs requêtes sur UNE connexion cliente,
+  une par ligne : une requête portant un "id" est traitée en parallèle des
+  suivantes et sa réponse reprend le même "id" (ordre des réponses non
+  garanti) ; sans "id", traitement dans l'ordre (clients historiques). Les
+  requêtes parallèles passent par un pool borné de PIPELINE_WORKERS threads
+  commun à tous les clients, au plus PIPELINE_WORKERS en vol par client.
+  Lecture (2026-10-18) — REQ sur une connexion pool ANONYME (clé (relais, ""),
+  jamais celle d'une identité) jusqu'à EOSE, puis CLOSE ; la connexion reste
+  ouverte pour la requête suivante (même TTL) :
+  Requête  : {"op": "query", "relay": "wss://...", "filters": [{...}, ...],
+              "timeout": s (optionnel, QUERY_WAIT_SEC par défaut)}
+  Réponse  : {"ok": true, "events": [...], "eose": bool} — eose=false si le
+              délai a expiré avant la fin des événements stockés.
+  Statistiques : {"op": "stats"} → compteurs par (relais, pubkey) — connexions,
+  réutilisations, reconnexions, reaps, latence de publication p50/p95, OK /
+  refus / NOTICE / timeouts, lectures (REQ, EOSE, timeouts, latence jusqu'à
+  EOSE p50/p95 — comptées à part des publications), et inactivité p50/p95
+  avant réutilisation (de quoi dimensionner POOL_TTL_SEC sur mesure plutôt
+  qu'au jugé).
+
 Sécurité : ce daemon ne reçoit et ne voit JAMAIS de clé privée — seulement
 des events NOSTR déjà signés par l'appelant. Il ne fait qu'un relais
 transparent vers les WebSockets des relais, rien de plus.
@@ -19,6 +49,7 @@ transparent vers les WebSockets des relais, rien de plus.
 Lancement :
     python3 nostr_pool_daemon.py                # avant-plan (Ctrl+C pour arrêter)
     python3 nostr_pool_daemon.py --daemon        # arrière-plan détaché
+    python3 nostr_pool_daemon.py --stats         # compteurs du daemon en cours
 
 Ce daemon est un pur OPTIMISATEUR, jamais une dépendance dure : si absent ou
 arrêté, les scripts appelants (nostr_send_secure_dm.py) retombent
@@ -41,12 +72,20 @@ import socket
 import signal
 import logging
 import threading
+import itertools
 import websocket
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-from nostr_connection_pool import SOCKET_PATH, POOL_TTL_SEC, POOL_SCAN_INTERVAL_SEC
+from nostr_connection_pool import (SOCKET_PATH, POOL_TTL_SEC, POOL_SCAN_INTERVAL_SEC,
+                                   CONNECT_TIMEOUT_SEC, PUBLISH_WAIT_SEC, QUERY_MAX_WAIT_SEC,
+                                   pool_stats)
 
-CONNECT_TIMEOUT_SEC = 10
-PUBLISH_WAIT_SEC = 15
+QUERY_WAIT_SEC = 8
+QUERY_MAX_EVENTS = 5000
+FANOUT_WORKERS = 32        # publications multi-relais simultanées (tous clients confondus)
+PIPELINE_WORKERS = 16      # requêtes pipelinées ("id") simultanées (tous clients confondus)
+STATS_SAMPLES = 256        # fenêtre glissante des latences par (relais, pubkey)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -55,25 +94,65 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
+def _percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class EntryStats:
+    """Compteurs d'une clé (relais, pubkey) — survivent au reap de la
+    connexion, pour mesurer justement ce que coûte le TTL."""
+
+    def __init__(self):
+        self.connects = self.reuses = self.reconnects = self.reaped = 0
+        self.ok = self.rejected = self.notices = self.timeouts = self.errors = 0
+        self.latencies = deque(maxlen=STATS_SAMPLES)    # secondes, envoi → OK
+        self.queries = self.eose = self.query_timeouts = 0
+        self.query_latencies = deque(maxlen=STATS_SAMPLES)  # secondes, REQ → EOSE
+        self.idle_gaps = deque(maxlen=STATS_SAMPLES)    # secondes d'inactivité avant réutilisation
+
+    def as_dict(self):
+        return {
+            "connects": self.connects, "reuses": self.reuses,
+            "reconnects": self.reconnects, "reaped": self.reaped,
+            "ok": self.ok, "rejected": self.rejected, "notices": self.notices,
+            "timeouts": self.timeouts, "errors": self.errors,
+            "latency_p50": _percentile(self.latencies, 0.50),
+            "latency_p95": _percentile(self.latencies, 0.95),
+            "queries": self.queries, "eose": self.eose,
+            "query_timeouts": self.query_timeouts,
+            "query_latency_p50": _percentile(self.query_latencies, 0.50),
+            "query_latency_p95": _percentile(self.query_latencies, 0.95),
+            "idle_gap_p50": _percentile(self.idle_gaps, 0.50),
+            "idle_gap_p95": _percentile(self.idle_gaps, 0.95),
+        }
+
+
 class PoolEntry:
     """Une connexion WebSocket pool, verrouillée pour sérialiser les
     envois/réceptions (le protocole WebSocket n'est pas thread-safe pour un
     envoi concurrent sur le même socket — deux (relay, pubkey) distincts ont
     chacun leur propre PoolEntry, donc leurs envois restent parallèles)."""
 
-    def __init__(self, relay_url):
+    def __init__(self, relay_url, stats=None):
         self.relay_url = relay_url
         self.ws = None
         self.lock = threading.Lock()
         self.last_used = time.time()
+        self.stats = stats or EntryStats()
 
     def ensure_connected(self):
         if self.ws is not None:
+            self.stats.reuses += 1
             return True
         try:
             self.ws = websocket.create_connection(self.relay_url, timeout=CONNECT_TIMEOUT_SEC)
+            self.stats.connects += 1
             return True
         except Exception as e:
+            self.stats.errors += 1
             log.warning(f"Connexion à {self.relay_url} échouée : {e}")
             self.ws = None
             return False
@@ -90,15 +169,20 @@ class PoolEntry:
 class NostrPool:
     def __init__(self):
         self._entries = {}          # (relay, pubkey) -> PoolEntry
+        self._stats = {}            # (relay, pubkey) -> EntryStats (y compris connexions reapées)
+        self.started_at = time.time()
         self._entries_lock = threading.Lock()
         self._stop = threading.Event()
+        self._fanout = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+        self.pipeline = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+        self._sub_ids = itertools.count(1)
 
     def _get_entry(self, relay_url, pubkey):
         key = (relay_url, pubkey)
         with self._entries_lock:
             entry = self._entries.get(key)
             if entry is None:
-                entry = PoolEntry(relay_url)
+                entry = PoolEntry(relay_url, self._stats.setdefault(key, EntryStats()))
                 self._entries[key] = entry
             return entry
 
@@ -108,7 +192,10 @@ class NostrPool:
         connexion morte (evict + retry), jamais de boucle infinie."""
         entry = self._get_entry(relay_url, pubkey)
         with entry.lock:
-            entry.last_used = time.time()
+            now = time.time()
+            if entry.ws is not None:
+                entry.stats.idle_gaps.append(now - entry.last_used)
+            entry.last_used = now
             for attempt in (1, 2):
                 if not entry.ensure_connected():
                     return False, "connexion impossible"
@@ -118,15 +205,103 @@ class NostrPool:
                         websocket.WebSocketConnectionClosedException) as e:
                     log.info(f"Connexion {relay_url} morte ({e}) — reconnexion tentative {attempt}/2")
                     entry.close()
+                    entry.stats.reconnects += 1
                     if attempt == 2:
                         return False, f"connexion perdue : {e}"
             return False, "échec après retry"
 
+    def publish_many(self, relay_urls, pubkey, event, quorum=None):
+        """Publie `event` vers toutes les cibles en parallèle. Retourne
+        (ok, {relais: {"ok", "error"} | {"pending": True}}) dès que `quorum`
+        OK sont obtenus (ou devenus impossibles), sinon quand toutes les
+        cibles ont répondu."""
+        targets = list(dict.fromkeys(r for r in relay_urls if r))
+        futures = {self._fanout.submit(self.publish, r, pubkey, event): r for r in targets}
+        needed = min(quorum, len(targets)) if quorum else None
+        results, oks = {}, 0
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    ok, error = fut.result()
+                except Exception as e:
+                    ok, error = False, str(e)
+                results[futures[fut]] = {"ok": ok, **({"error": error} if error else {})}
+                oks += bool(ok)
+            if needed and (oks >= needed or oks + len(pending) < needed):
+                break
+        for fut in pending:
+            results[futures[fut]] = {"pending": True}
+        return (oks >= needed) if needed else oks > 0, results
+
+    def query(self, relay_url, filters, timeout=QUERY_WAIT_SEC):
+        """REQ `filters` sur la connexion de lecture anonyme du relais.
+        Retourne (events, eose, erreur) ; même politique de reconnexion que
+        publish (une seule nouvelle tentative)."""
+        entry = self._get_entry(relay_url, "")
+        with entry.lock:
+            now = time.time()
+            if entry.ws is not None:
+                entry.stats.idle_gaps.append(now - entry.last_used)
+            entry.last_used = now
+            for attempt in (1, 2):
+                if not entry.ensure_connected():
+                    return [], False, "connexion impossible"
+                try:
+                    events, eose = self._req_until_eose(entry, filters, timeout)
+                    return events, eose, None
+                except (BrokenPipeError, ConnectionResetError, OSError,
+                        websocket.WebSocketConnectionClosedException) as e:
+                    log.info(f"Connexion {relay_url} morte ({e}) — reconnexion tentative {attempt}/2")
+                    entry.close()
+                    entry.stats.reconnects += 1
+                    if attempt == 2:
+                        return [], False, f"connexion perdue : {e}"
+            return [], False, "échec après retry"
+
+    def _req_until_eose(self, entry, filters, timeout):
+        sub_id = f"pool-q{next(self._sub_ids)}"
+        stats = entry.stats
+        sent_at = time.time()
+        stats.queries += 1
+        entry.ws.send(json.dumps(["REQ", sub_id, *filters]))
+        events, eose = [], False
+        deadline = sent_at + timeout
+        while time.time() < deadline and len(events) < QUERY_MAX_EVENTS:
+            try:
+                entry.ws.settimeout(max(0.5, deadline - time.time()))
+                raw = entry.ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            try:
+                msg = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(msg, list) or len(msg) < 2:
+                continue
+            if msg[0] == "EVENT" and msg[1] == sub_id and len(msg) >= 3:
+                events.append(msg[2])
+            elif msg[0] in ("EOSE", "CLOSED") and msg[1] == sub_id:
+                eose = msg[0] == "EOSE"
+                break
+            elif msg[0] == "NOTICE":
+                stats.notices += 1
+        if eose:
+            stats.eose += 1
+            stats.query_latencies.append(time.time() - sent_at)
+        else:
+            stats.query_timeouts += 1
+        entry.ws.send(json.dumps(["CLOSE", sub_id]))
+        return events, eose
+
     def _send_and_wait(self, entry, event):
         event_id = event.get("id", "")
+        stats = entry.stats
         entry.ws.settimeout(PUBLISH_WAIT_SEC)
+        sent_at = time.time()
         entry.ws.send(json.dumps(["EVENT", event]))
-        deadline = time.time() + PUBLISH_WAIT_SEC
+        deadline = sent_at + PUBLISH_WAIT_SEC
         while time.time() < deadline:
             try:
                 entry.ws.settimeout(max(0.5, deadline - time.time()))
@@ -140,11 +315,20 @@ class NostrPool:
             if not isinstance(msg, list) or not msg:
                 continue
             if msg[0] == "OK" and len(msg) >= 3 and msg[1] == event_id:
+                stats.latencies.append(time.time() - sent_at)
+                if msg[2]:
+                    stats.ok += 1
+                else:
+                    stats.rejected += 1
                 return bool(msg[2])
             if msg[0] == "CLOSED" and len(msg) >= 2 and msg[1] == event_id:
+                stats.rejected += 1
                 return False
+            if msg[0] == "NOTICE":
+                stats.notices += 1
             # NOTICE, AUTH ou OK/CLOSED d'un autre event (ne devrait pas
             # arriver grâce au lock, mais robustesse) — on continue d'attendre.
+        stats.timeouts += 1
         return False
 
     def reap_idle(self):
@@ -164,11 +348,27 @@ class NostrPool:
             with entry.lock:
                 if time.time() - entry.last_used > POOL_TTL_SEC:
                     entry.close()
+                    entry.stats.reaped += 1
                     with self._entries_lock:
                         self._entries.pop(key, None)
                     log.info(f"Connexion {key} fermée (inactive > {POOL_TTL_SEC}s)")
 
+    def stats(self):
+        with self._entries_lock:
+            items = list(self._stats.items())
+            open_keys = {k for k, e in self._entries.items() if e.ws is not None}
+        return {
+            "uptime_sec": int(time.time() - self.started_at),
+            "ttl_sec": POOL_TTL_SEC,
+            "open_connections": len(open_keys),
+            "entries": [{"relay": relay, "pubkey": pubkey, "open": (relay, pubkey) in open_keys,
+                         **st.as_dict()}
+                        for (relay, pubkey), st in sorted(items)],
+        }
+
     def close_all(self):
+        self._fanout.shutdown(wait=False, cancel_futures=True)
+        self.pipeline.shutdown(wait=False, cancel_futures=True)
         with self._entries_lock:
             entries = list(self._entries.values())
             self._entries.clear()
@@ -185,36 +385,98 @@ def _reaper_loop(pool, stop_event):
             log.warning(f"Erreur reaper : {e}")
 
 
+def _handle_request(req, pool):
+    """Une requête décodée → sa réponse (dict), sans "id"."""
+    if req.get("op") == "stats":
+        return {"ok": True, "stats": pool.stats()}
+    if req.get("op") == "query":
+        filters = req.get("filters")
+        if not req.get("relay") or not isinstance(filters, list) or not filters:
+            return {"ok": False, "error": "requête invalide"}
+        timeout = min(float(req.get("timeout") or QUERY_WAIT_SEC), QUERY_MAX_WAIT_SEC)
+        events, eose, error = pool.query(req["relay"], filters, timeout)
+        resp = {"ok": error is None, "events": events, "eose": eose}
+        if error:
+            resp["error"] = error
+        return resp
+    relay = req.get("relay", "")
+    relays = req.get("relays")
+    pubkey = req.get("pubkey", "")
+    event = req.get("event")
+    if isinstance(relays, list) and relays and isinstance(event, dict) and event.get("id"):
+        ok, results = pool.publish_many(relays, pubkey, event, quorum=req.get("quorum"))
+        return {"ok": ok, "results": results}
+    if not relay or not isinstance(event, dict) or not event.get("id"):
+        return {"ok": False, "error": "requête invalide"}
+    ok, error = pool.publish(relay, pubkey, event)
+    resp = {"ok": ok}
+    if error:
+        resp["error"] = error
+    return resp
+
+
 def _handle_client(conn, pool):
+    """Lit des requêtes JSON ligne par ligne jusqu'à la fermeture côté
+    client. Une requête avec "id" part dans pool.pipeline (pipelining : sa
+    réponse peut doubler celles des requêtes précédentes) ; au-delà de
+    PIPELINE_WORKERS requêtes en vol, la lecture attend qu'une se termine.
+    Sans "id", réponse dans l'ordre, avant de lire la ligne suivante."""
+    write_lock = threading.Lock()
+    in_flight = set()
+
+    def _reply(resp):
+        with write_lock:
+            conn.sendall((json.dumps(resp) + "\n").encode())
+
+    def _run(req):
+        try:
+            resp = _handle_request(req, pool)
+        except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+        resp["id"] = req["id"]
+        try:
+            _reply(resp)
+        except Exception:
+            pass
+
     try:
-        conn.settimeout(30)
+        conn.settimeout(POOL_TTL_SEC)
         buf = b""
-        while b"\n" not in buf:
-            chunk = conn.recv(65536)
-            if not chunk:
-                break
-            buf += chunk
-        line = buf.split(b"\n", 1)[0].decode("utf-8", errors="replace")
-        if not line:
-            return
-        req = json.loads(line)
-        relay = req.get("relay", "")
-        pubkey = req.get("pubkey", "")
-        event = req.get("event")
-        if not relay or not isinstance(event, dict) or not event.get("id"):
-            conn.sendall((json.dumps({"ok": False, "error": "requête invalide"}) + "\n").encode())
-            return
-        ok, error = pool.publish(relay, pubkey, event)
-        resp = {"ok": ok}
-        if error:
-            resp["error"] = error
-        conn.sendall((json.dumps(resp) + "\n").encode())
+        while True:
+            while b"\n" not in buf:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                buf += chunk
+            raw, buf = buf.split(b"\n", 1)
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+            except ValueError:
+                _reply({"ok": False, "error": "JSON invalide"})
+                continue
+            if not isinstance(req, dict):
+                _reply({"ok": False, "error": "requête invalide"})
+                continue
+            if "id" in req:
+                if len(in_flight) >= PIPELINE_WORKERS:
+                    _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                in_flight.add(pool.pipeline.submit(_run, req))
+                continue
+            try:
+                resp = _handle_request(req, pool)
+            except Exception as e:
+                resp = {"ok": False, "error": str(e)}
+            _reply(resp)
     except Exception as e:
         try:
-            conn.sendall((json.dumps({"ok": False, "error": str(e)}) + "\n").encode())
+            _reply({"ok": False, "error": str(e)})
         except Exception:
             pass
     finally:
+        wait(in_flight)
         try:
             conn.close()
         except Exception:
@@ -261,6 +523,13 @@ def run_server():
 
 
 def main():
+    if "--stats" in sys.argv:
+        stats = pool_stats()
+        if stats is None:
+            print("Daemon de pool non démarré.")
+            sys.exit(1)
+        print(json.dumps(stats, indent=2))
+        sys.exit(0)
     if "--daemon" in sys.argv:
         log_dir = os.path.expanduser("~/.zen/tmp")
         os.makedirs(log_dir, exist_ok=True)
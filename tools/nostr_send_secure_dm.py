@@ -36,15 +36,11 @@ import sys
 import json
 import argparse
 import time
-import base64
 import os
 import hashlib
 import websocket
 import threading
 import secrets
-import hmac
-import struct
-import math
 from datetime import datetime, timedelta
 from pynostr.event import Event, EventKind
 from pynostr.key import PrivateKey
@@ -67,104 +63,10 @@ def generate_ephemeral_keypair():
     
     return private_hex, public_hex
 
-def derive_shared_secret(sender_private_key: str, recipient_public_key: str) -> bytes:
-    """Derive shared secret using ECDH"""
-    from cryptography.hazmat.primitives.asymmetric import ec
-    from cryptography.hazmat.backends import default_backend
-    
-    # Convert hex keys to private/public key objects
-    sender_private_key_obj = ec.derive_private_key(
-        int(sender_private_key, 16), ec.SECP256K1(), default_backend()
-    )
-    
-    # Convert recipient pubkey to uncompressed SEC1 format
-    recipient_pubkey_bytes = hex_to_uncompressed_pubkey(recipient_public_key)
-    recipient_public_key_obj = ec.EllipticCurvePublicKey.from_encoded_point(
-        ec.SECP256K1(), recipient_pubkey_bytes
-    )
-    
-    # Generate shared secret
-    shared_secret = sender_private_key_obj.exchange(
-        ec.ECDH(), recipient_public_key_obj
-    )
-    
-    return shared_secret
-
-def hex_to_uncompressed_pubkey(pubkey_hex: str) -> bytes:
-    """Convert a 32-byte hex pubkey to uncompressed SEC1 format (0x04 + X + Y, 65 bytes)"""
-    from cryptography.hazmat.primitives.asymmetric import ec
-    from cryptography.hazmat.backends import default_backend
-    if len(pubkey_hex) != 64:
-        raise ValueError("Invalid pubkey hex length")
-    x = int(pubkey_hex, 16)
-    # secp256k1: y^2 = x^3 + 7 mod p
-    # Find y such that y^2 = x^3 + 7 mod p, and y is even (BIP340 convention)
-    curve = ec.SECP256K1()
-    # Get the prime field order
-    p = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
-    y_square = (pow(x, 3, p) + 7) % p
-    y = pow(y_square, (p + 1) // 4, p)
-    if y % 2 != 0:
-        y = p - y
-    x_bytes = x.to_bytes(32, 'big')
-    y_bytes = y.to_bytes(32, 'big')
-    return b'\x04' + x_bytes + y_bytes
-
-def _nip44_v2_hkdf(ikm: bytes, length: int, salt, info: bytes) -> bytes:
-    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.backends import default_backend
-    return HKDF(
-        algorithm=hashes.SHA256(), length=length,
-        salt=salt, info=info, backend=default_backend(),
-    ).derive(ikm)
-
-
-def _nip44_v2_conv_key(priv_hex: str, pub_hex: str) -> bytes:
-    """Conversation key NIP-44 v2 spec : HMAC-SHA256(key=b'nip44-v2', msg=shared_x)."""
-    import hmac as _h
-    return _h.new(b"nip44-v2", derive_shared_secret(priv_hex, pub_hex), hashlib.sha256).digest()
-
-
-def _nip44_v2_expand(prk: bytes, info: bytes, length: int) -> bytes:
-    from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.backends import default_backend
-    return HKDFExpand(algorithm=hashes.SHA256(), length=length, info=info, backend=default_backend()).derive(prk)
-
-
-def _nip44_v2_chacha20(key: bytes, nonce_12: bytes, data: bytes) -> bytes:
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
-    from cryptography.hazmat.backends import default_backend
-    cipher = Cipher(algorithms.ChaCha20(key, b'\x00\x00\x00\x00' + nonce_12),
-                    mode=None, backend=default_backend())
-    enc = cipher.encryptor()
-    return enc.update(data) + enc.finalize()
-
-
-def _nip44_v2_hmac(key: bytes, msg: bytes) -> bytes:
-    return hmac.new(key, msg, hashlib.sha256).digest()
-
-
-def _nip44_v2_pad_len(n: int) -> int:
-    if n <= 32:
-        return 32
-    nextpow = 1 << (math.floor(math.log2(n - 1)) + 1)
-    chunk = 32 if nextpow <= 256 else nextpow // 8
-    return chunk * ((n - 1) // chunk + 1)
-
-
-def nip44_encrypt(message: str, sender_private_key: str, recipient_public_key: str) -> str:
-    """NIP-44 v2 encryption — version byte 0x02, compatible with all standard NIP-07 extensions."""
-    conv_key = _nip44_v2_conv_key(sender_private_key, recipient_public_key)
-    nonce    = os.urandom(32)
-    utf8     = message.encode('utf-8')
-    pad_len  = _nip44_v2_pad_len(len(utf8))
-    padded   = struct.pack('>H', len(utf8)) + utf8 + b'\x00' * (pad_len - len(utf8))
-    keys     = _nip44_v2_expand(conv_key, nonce, 76)
-    ct       = _nip44_v2_chacha20(keys[0:32], keys[32:44], padded)
-    mac      = _nip44_v2_hmac(keys[44:76], nonce + ct)
-    return base64.b64encode(b'\x02' + nonce + ct + mac).decode('utf-8')
+# NIP-44 v2 / NIP-04 : implémentation partagée avec nostr_node_intercom.py
+# (2026-10-18) — tools/nostr_crypto.py, clé de conversation en cache LRU.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nostr_crypto import nip44_encrypt, nip04_encrypt
 
 def add_metadata_protection(message: str, sender_hex: str, recipient_hex: str) -> str:
     """
@@ -359,25 +261,6 @@ class SecureNostrWebSocketClient:
                 pass
         self.connected = False
 
-def nip04_encrypt(message: str, sender_private_key: str, recipient_public_key: str) -> str:
-    """Chiffrement NIP-04 (AES-256-CBC). Universellement supporté par les extensions NIP-07."""
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    from cryptography.hazmat.primitives import padding as sym_padding
-    from cryptography.hazmat.backends import default_backend
-    import base64
-
-    shared = derive_shared_secret(sender_private_key, recipient_public_key)
-    key = shared[0:32]          # x-coordinate secp256k1 (32 bytes AES-256)
-    iv  = os.urandom(16)
-
-    padder   = sym_padding.PKCS7(128).padder()
-    padded   = padder.update(message.encode('utf-8')) + padder.finalize()
-    cipher   = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-    enc      = cipher.encryptor()
-    ct       = enc.update(padded) + enc.finalize()
-
-    return base64.b64encode(ct).decode() + "?iv=" + base64.b64encode(iv).decode()
-
 
 def _publish_event_to_relay(event_dict: dict, relay_url: str) -> bool:
     """Publie un event DÉJÀ SIGNÉ vers un relais — pas de nouvelle signature,
@@ -420,13 +303,49 @@ def _publish_event_to_relay(event_dict: dict, relay_url: str) -> bool:
             pass
 
 
+def _publish_event_to_relays(event_dict: dict, relay_urls: list, quorum: int = None) -> dict:
+    """Publie le MÊME event signé vers plusieurs relais EN PARALLÈLE
+    (2026-10-18) — auparavant l'un après l'autre, chacun pouvant attendre son
+    OK jusqu'à PUBLISH_WAIT_SEC : la latence d'une réponse BRO (relais local +
+    copylaradio) était la SOMME des deux, elle en devient le max.
+
+    Une seule requête multi-cibles au daemon de pool s'il écoute ; sinon une
+    connexion directe par relais, chacune dans son thread. Retourne
+    {relais: bool} ; avec `quorum`, le daemon rend la main dès N OK et les
+    relais encore en cours sont absents du dict (publication poursuivie par
+    le daemon)."""
+    targets = list(dict.fromkeys(r for r in relay_urls if r))
+    if len(targets) > 1:
+        try:
+            sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+            from nostr_connection_pool import try_publish_many_via_pool
+            pooled = try_publish_many_via_pool(event_dict, targets, quorum=quorum)
+            if pooled is not None:
+                return pooled
+        except Exception:
+            pass  # module de pool absent/en erreur -> mode direct ci-dessous
+
+    results = {}
+
+    def _publish(relay):
+        results[relay] = _publish_event_to_relay(event_dict, relay)
+
+    threads = [threading.Thread(target=_publish, args=(r,)) for r in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
 def send_secure_direct_message(sender_nsec: str, recipient_hex: str, message: str,
                                relay_url: str = DEFAULT_RELAY, gift_wrap: bool = False,
                                metadata_protection: bool = False,
                                use_nip04: bool = False,
                                expire_seconds: int = None,
                                extra_tags: list = None,
-                               extra_relays: list = None) -> bool:
+                               extra_relays: list = None,
+                               quorum: int = None) -> bool:
     """
     Send a secure encrypted direct message to a NOSTR user with enhanced security.
 
@@ -451,6 +370,8 @@ def send_secure_direct_message(sender_nsec: str, recipient_hex: str, message: st
                       peut se connecter à l'un ou l'autre relais (ex: station
                       locale en dev vs relais public en production) sans
                       dupliquer visuellement le message.
+        quorum: Avec extra_relays, rend la main dès `quorum` relais ayant
+                confirmé (1 = premier OK) — via le daemon de pool uniquement.
 
     Returns:
         bool: True if message was sent successfully to at least one relay
@@ -512,9 +433,12 @@ def send_secure_direct_message(sender_nsec: str, recipient_hex: str, message: st
         print(f"   - Gift wrapped: {gift_wrap}")
         print(f"   - Metadata protection: {metadata_protection}")
 
-        # Publie le MÊME event signé vers relay_url puis chaque extra_relays —
-        # jamais de re-signature par relais (voir _publish_event_to_relay).
-        success = _publish_event_to_relay(event_dict, relay_url)
+        # Publie le MÊME event signé vers relay_url et chaque extra_relays, en
+        # parallèle — jamais de re-signature par relais (voir
+        # _publish_event_to_relay).
+        results = _publish_event_to_relays(event_dict, [relay_url] + list(extra_relays or []),
+                                           quorum=quorum)
+        success = results.get(relay_url, False)
         if success:
             print(f"\n✅ Secure message sent successfully to {relay_url}!")
             print(f"   - Event ID: {event_dict.get('id', 'N/A')}")
@@ -523,13 +447,16 @@ def send_secure_direct_message(sender_nsec: str, recipient_hex: str, message: st
                 print(f"   - Privacy features: Gift wrapping (NIP-17)")
             if metadata_protection:
                 print(f"   - Privacy features: Metadata protection")
-        else:
+        elif relay_url in results:
             print(f"\n❌ Failed to send secure message to {relay_url}")
 
         for relay in (extra_relays or []):
             if relay == relay_url:
                 continue
-            ok = _publish_event_to_relay(event_dict, relay)
+            if relay not in results:
+                print(f"⏳ Republication vers {relay} : en cours (quorum atteint)")
+                continue
+            ok = results[relay]
             print(f"{'✅' if ok else '❌'} Republication vers {relay} : {'ok' if ok else 'échec'}")
             success = success or ok
 
@@ -590,6 +517,9 @@ def main():
                        help="Relais additionnels séparés par des virgules — republie le MÊME "
                             "event signé (même id) vers chacun, sans dupliquer visuellement "
                             "le message pour un lecteur abonné à un seul de ces relais")
+    parser.add_argument("--quorum", type=int, default=None,
+                       help="Avec --extra-relays : rend la main dès N relais ayant confirmé "
+                            "(1 = premier OK) — via nostr_pool_daemon uniquement")
 
     args = parser.parse_args()
 
@@ -642,6 +572,7 @@ def main():
         expire_seconds=int(args.ttl_days * 86400) if args.ttl_days is not None else None,
         extra_tags=extra_tags,
         extra_relays=extra_relays,
+        quorum=args.quorum,
     )
     
     sys.exit(0 if success else 1)
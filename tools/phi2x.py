@@ -12,9 +12,20 @@ Usage standalone :
   python3 phi2x.py --omega 1.73 70.0 0
   python3 phi2x.py --kin 1985 4 17
   python3 phi2x.py --k 1.234 0.987
+  python3 phi2x.py --bench 2000            # API batch NumPy vs scalaire
+
+API batch (NumPy, optionnelle) : haversine_km_many, nearest_pentagon_ids,
+hex_axial_many, personal_phases, pairwise_resonance_k, group_harmony_many,
+dream_divergence_matrix — une constellation entière en un appel, résultats
+bit à bit identiques aux fonctions scalaires (vérifié par --bench).
 """
 import math, sys, time, argparse
 
+try:
+    import numpy as np
+except ImportError:   # API batch indisponible, fonctions scalaires intactes
+    np = None
+
 # ── Constantes canoniques ────────────────────────────────────────────────────
 PHI              = 1.6180339887          # Nombre d'Or
 F_PHI            = 33.17                 # Fréquence Phi [Hz]
@@ -351,11 +362,13 @@ def compute_conception_unix(birth_unix: int, weight_kg: float = 3.5) -> int:
 
 # ── Score d'harmonie collective H ────────────────────────────────────────────
 def group_harmony_score(phases: list) -> float:
-    """H = moyenne de k pour toutes les paires de la liste."""
+    """H = moyenne de k pour toutes les paires de la liste.
+    Somme par math.fsum (arrondi exact) : le sum() natif devient compensé à
+    partir de Python 3.12, le résultat dépendrait de la version."""
     n = len(phases)
     if n < 2: return 0.5
-    total = sum(compute_resonance_k(phases[i], phases[j])
-                for i in range(n) for j in range(i+1, n))
+    total = math.fsum(compute_resonance_k(phases[i], phases[j])
+                      for i in range(n) for j in range(i+1, n))
     return total / (n * (n-1) / 2)
 
 # ── Bifurcation Relativiste (ATOM4LOVE) ──────────────────────────────────────
@@ -412,6 +425,228 @@ def describe_bifurcation(gamma: float) -> dict:
         return {"key": "friction", "label": "Friction Créatrice. Changement de phase et ajustement des trajectoires."}
     return {"key": "bifurcated", "label": "Bifurcation Relativiste complétée. Séparation des mondes dans la gratitude."}
 
+# ── API batch vectorisée (NumPy) ─────────────────────────────────────────────
+# Chaque fonction reproduit EXACTEMENT la séquence d'opérations flottantes de
+# sa version scalaire (même parenthésage, mêmes constantes, accumulation
+# séquentielle dans le même ordre ou math.fsum des deux côtés — jamais
+# np.sum, dont la sommation par paires arrondit différemment, ni sum(),
+# compensé depuis Python 3.12) : résultats bit à bit identiques, vérifiés par
+# `phi2x.py --bench`. Utilisée pour scorer une constellation entière en un
+# appel au lieu de N² invocations Python (KIN.daily.sh, matching love).
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("phi2x : l'API batch requiert numpy (pip install numpy)")
+
+
+# np.exp et np.arctan2 (implémentations SIMD propres à NumPy) diffèrent de la
+# libm utilisée par math.* d'1 ulp sur quelques % des entrées — mesuré : ~5 %
+# pour exp, ~8 % pour atan2 ; sin/cos/sqrt sont identiques. Ces deux-là
+# passent donc par la libm, élément par élément mais sans boucle Python. De
+# même x**2 : float.__pow__ appelle pow() de la libm, NumPy calcule x*x —
+# ~0,1 % d'écarts d'1 ulp.
+if np is not None:
+    _libm_exp = np.frompyfunc(math.exp, 1, 1)
+    _libm_atan2 = np.frompyfunc(math.atan2, 2, 1)
+    _libm_pow = np.frompyfunc(math.pow, 2, 1)
+
+
+def _exp(x):
+    return np.asarray(_libm_exp(x), dtype=np.float64)
+
+
+def _atan2(y, x):
+    return np.asarray(_libm_atan2(y, x), dtype=np.float64)
+
+
+def _square(x):
+    return np.asarray(_libm_pow(x, 2.0), dtype=np.float64)
+
+
+def haversine_km_many(lat1, lon1, lat2, lon2):
+    """haversine_km vectorisée (broadcast NumPy des quatre arguments)."""
+    _require_numpy()
+    lat1, lon1, lat2, lon2 = (np.asarray(v, dtype=np.float64) for v in (lat1, lon1, lat2, lon2))
+    φ1, φ2 = np.radians(lat1), np.radians(lat2)
+    dφ = np.radians(lat2 - lat1)
+    dλ = np.radians(lon2 - lon1)
+    a = _square(np.sin(dφ/2)) + np.cos(φ1)*np.cos(φ2)*_square(np.sin(dλ/2))
+    return EARTH_RADIUS_KM * 2 * _atan2(np.sqrt(a), np.sqrt(1-a))
+
+
+def _dynamic_pentagons_many(unix_ts):
+    """get_dynamic_pentagons vectorisée : (lats[12], lons[12, *ts.shape])."""
+    ts = np.asarray(unix_ts, dtype=np.float64)
+    angle = (ts % GRID_ROT_S) / GRID_ROT_S * TAU
+    deg = np.degrees(angle)
+    lats = np.array([p[0] for p in PENTAGONS_GPS])
+    lons = []
+    for i, (plat, plon) in enumerate(PENTAGONS_GPS):
+        if i <= 1:
+            lons.append(np.full(ts.shape, plon))
+            continue
+        new_lon = (plon + deg) % 360
+        lons.append(np.where(new_lon > 180, new_lon - 360, new_lon))
+    return lats, lons
+
+
+def nearest_pentagon_ids(lats, lons, unix_ts):
+    """get_nearest_pentagon_id vectorisée ; unix_ts scalaire ou tableau."""
+    _require_numpy()
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    plats, plons = _dynamic_pentagons_many(unix_ts)
+    best_d = np.full(np.broadcast(lats, lons, plons[0]).shape, np.inf)
+    best_idx = np.zeros(best_d.shape, dtype=np.int64)
+    for i in range(len(PENTAGONS_GPS)):
+        d = haversine_km_many(lats, lons, plats[i], plons[i])
+        closer = d < best_d                 # strict : premier minimum, comme la boucle scalaire
+        best_d = np.where(closer, d, best_d)
+        best_idx = np.where(closer, i, best_idx)
+    return best_idx
+
+
+def hex_axial_many(lats, lons):
+    """gps_to_hex_axial vectorisée : (q[], r[]) entiers."""
+    _require_numpy()
+    lat = np.asarray(lats, dtype=np.float64)
+    lon = np.asarray(lons, dtype=np.float64)
+    x = lat * (math.pi / 180) * EARTH_RADIUS_KM
+    y = lon * (math.pi / 180) * EARTH_RADIUS_KM * np.cos(lat * math.pi / 180)
+    qf = (math.sqrt(3) / 3 * x - 1 / 3 * y) / _HEX_SIZE_KM
+    zf = (2 / 3 * y) / _HEX_SIZE_KM
+    yf = -qf - zf
+    rx, ry, rz = np.rint(qf), np.rint(yf), np.rint(zf)   # rint = round() Python (demi → pair)
+    dx, dy, dz = np.abs(rx - qf), np.abs(ry - yf), np.abs(rz - zf)
+    fix_x = (dx > dy) & (dx > dz)
+    fix_z = ~fix_x & ~(dy > dz)
+    rx = np.where(fix_x, -ry - rz, rx)
+    rz = np.where(fix_z, -rx - ry, rz)
+    return rx.astype(np.int64), rz.astype(np.int64)
+
+
+def _pentagon_offset_many(lat, lon, unix_ts):
+    plats, plons = _dynamic_pentagons_many(unix_ts)
+    sum_sin = sum_cos = 0.0
+    for i in range(len(PENTAGONS_GPS)):
+        d = haversine_km_many(lat, lon, plats[i], plons[i])
+        w = _exp(-d / 1500.0)
+        angle = i / 12.0 * TAU
+        sum_sin = sum_sin + math.sin(angle) * w
+        sum_cos = sum_cos + math.cos(angle) * w
+    result = _atan2(sum_sin, sum_cos)
+    return np.where(result >= 0.0, result, result + TAU)
+
+
+def personal_phases(birth_unix, birth_lats, birth_lons, utc_offset_h=0.0):
+    """compute_personal_phase vectorisée (φ_i de toute une constellation)."""
+    _require_numpy()
+    birth_unix = np.asarray(birth_unix, dtype=np.float64)
+    lat = np.asarray(birth_lats, dtype=np.float64)
+    lon = np.asarray(birth_lons, dtype=np.float64)
+    utc_corr_s = -np.asarray(utc_offset_h, dtype=np.float64) * 3600.0
+    birth_unix_utc = birth_unix + utc_corr_s
+    solar_corr_s = lon / 360.0 * ORBITAL_DAY_S
+    theta_annual = (birth_unix_utc % ORBITAL_YEAR_S) / ORBITAL_YEAR_S * TAU
+    theta_daily = ((birth_unix_utc + solar_corr_s) % ORBITAL_DAY_S) / ORBITAL_DAY_S * TAU
+    offset_penta = _pentagon_offset_many(lat, lon, birth_unix_utc)
+    return np.fmod((theta_annual + theta_daily + offset_penta) * WAVE_STRETCH, TAU)
+
+
+def pairwise_resonance_k(phases):
+    """Matrice N×N des compute_resonance_k(φ_i, φ_j)."""
+    _require_numpy()
+    p = np.asarray(phases, dtype=np.float64)
+    return 1.0 / (1.0 + np.abs(np.sin(p[:, None] - p[None, :])))
+
+
+def group_harmony_many(phases):
+    """group_harmony_score en un appel : moyenne des k du triangle supérieur,
+    sommés par math.fsum comme la version scalaire (arrondi exact, donc
+    indépendant de l'ordre et de la version de Python)."""
+    _require_numpy()
+    n = len(phases)
+    if n < 2:
+        return 0.5
+    iu, ju = np.triu_indices(n, k=1)
+    k = pairwise_resonance_k(phases)[iu, ju]
+    return math.fsum(k.tolist()) / (n * (n-1) / 2)
+
+
+def dream_divergence_matrix(tag_sets):
+    """Matrice N×N des compute_dream_divergence (Jaccard inversé) — une
+    seule multiplication matricielle d'appartenance au lieu de N² paires de sets."""
+    _require_numpy()
+    sets = [set(t or []) for t in tag_sets]
+    vocab = {tag: i for i, tag in enumerate(sorted({t for s in sets for t in s}, key=repr))}
+    member = np.zeros((len(sets), len(vocab)), dtype=np.int64)
+    for row, s in enumerate(sets):
+        member[row, [vocab[t] for t in s]] = 1
+    inter = member @ member.T
+    sizes = member.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        div = 1 - inter / union
+    return np.where(union == 0, 0.0, div)
+
+
+def _bench(n: int, seed: int = 42):
+    """Scalaire vs batch sur n profils synthétiques ; vérifie l'identité bit à bit."""
+    import random
+    _require_numpy()
+    rnd = random.Random(seed)
+    lats = [rnd.uniform(-89.9, 89.9) for _ in range(n)]
+    lons = [rnd.uniform(-180.0, 180.0) for _ in range(n)]
+    births = [rnd.randint(0, 1_700_000_000) for _ in range(n)]
+    offsets = [rnd.choice((-5.0, 0.0, 1.0, 2.0, 5.5)) for _ in range(n)]
+    tags = [rnd.sample(["eau", "terre", "feu", "air", "forêt", "océan", "ville", "musique"],
+                       rnd.randint(0, 5)) for _ in range(n)]
+    now = 1_760_000_000
+    m = min(n, 600)     # fonctions en N² : taille bornée pour garder le scalaire mesurable
+
+    def same(a, b):
+        a, b = np.asarray(a), np.asarray(b)
+        if a.dtype.kind == "f":
+            return a.shape == b.shape and np.array_equal(a.view(np.int64), b.astype(np.float64).view(np.int64))
+        return np.array_equal(a, b)
+
+    cases = [
+        ("haversine_km_many", n,
+         lambda: [haversine_km(a, o, 48.86, 2.35) for a, o in zip(lats, lons)],
+         lambda: haversine_km_many(lats, lons, 48.86, 2.35)),
+        ("nearest_pentagon_ids", n,
+         lambda: [get_nearest_pentagon_id(a, o, now) for a, o in zip(lats, lons)],
+         lambda: nearest_pentagon_ids(lats, lons, now)),
+        ("hex_axial_many", n,
+         lambda: [gps_to_hex_axial(a, o) for a, o in zip(lats, lons)],
+         lambda: np.stack(hex_axial_many(lats, lons), axis=1)),
+        ("personal_phases", n,
+         lambda: [compute_personal_phase(b, a, o, u) for b, a, o, u in zip(births, lats, lons, offsets)],
+         lambda: personal_phases(births, lats, lons, offsets)),
+        ("pairwise_resonance_k", m * m,
+         lambda: [[compute_resonance_k(x, y) for y in lats[:m]] for x in lats[:m]],
+         lambda: pairwise_resonance_k(lats[:m])),
+        ("group_harmony_many", m * (m - 1) // 2,
+         lambda: group_harmony_score(lats[:m]),
+         lambda: group_harmony_many(lats[:m])),
+        ("dream_divergence_matrix", m * m,
+         lambda: [[compute_dream_divergence(x, y) for y in tags[:m]] for x in tags[:m]],
+         lambda: dream_divergence_matrix(tags[:m])),
+    ]
+    print(f"{'fonction':<26}{'calculs':>10}{'scalaire':>12}{'batch':>12}{'gain':>8}  identique")
+    ok = True
+    for name, count, scalar_fn, batch_fn in cases:
+        t0 = time.perf_counter()
+        ref = scalar_fn()
+        t1 = time.perf_counter()
+        got = batch_fn()
+        t2 = time.perf_counter()
+        identical = same(got, ref)
+        ok &= identical
+        print(f"{name:<26}{count:>10}{(t1 - t0) * 1000:>10.1f}ms{(t2 - t1) * 1000:>10.1f}ms"
+              f"{(t1 - t0) / max(t2 - t1, 1e-9):>7.0f}x  {'oui' if identical else 'NON'}")
+    return ok
+
 # ── CLI standalone ───────────────────────────────────────────────────────────
 if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Phi2X — Moteur de résonance cosmique")
@@ -426,6 +661,8 @@ if __name__ == "__main__":
                     help="Calculer la résonance k entre deux phases")
     ap.add_argument("--harmony", nargs="+", metavar="PHI",
                     help="Score H d'un groupe de phases")
+    ap.add_argument("--bench", type=int, metavar="N",
+                    help="Benchmark API batch NumPy vs scalaire sur N profils (+ vérif bit à bit)")
     args = ap.parse_args()
 
     if args.phase:
@@ -464,5 +701,11 @@ if __name__ == "__main__":
         H = group_harmony_score(phases)
         print(f"H = {H:.4f}  ({len(phases)} phases, {len(phases)*(len(phases)-1)//2} paires)")
 
+    elif args.bench:
+        if np is None:
+            print("--bench requiert numpy (pip install numpy)", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0 if _bench(args.bench) else 1)
+
     else:
         ap.print_help()
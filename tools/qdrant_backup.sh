@@ -39,27 +39,27 @@ trap 'rm -rf "$BACKUP_TMP"' EXIT
 
 DATE_TAG="$(date -u +%Y%m%d)"
 ENC_FILE="$BACKUP_TMP/qdrant_backup_${DATE_TAG}.enc"
-EXPORT_JSON="$BACKUP_TMP/qdrant_export.json"
-EXPORT_GZ="$BACKUP_TMP/qdrant_export.json.gz"
+EXPORT_FILE="$BACKUP_TMP/qdrant_export.tar"   # archive vecteurs + payloads (memory_manager.py backup)
+EXPORT_GZ="$BACKUP_TMP/qdrant_export.tar.gz"
 
 _log "Démarrage backup Qdrant → $BACKUP_TMP"
 
 # Appel memory_manager.py backup
-if ! python3 "$MY_PATH/../IA/memory_manager.py" backup --output "$EXPORT_JSON" 2>>"$LOGFILE"; then
+if ! python3 "$MY_PATH/../IA/memory_manager.py" backup --output "$EXPORT_FILE" 2>>"$LOGFILE"; then
     _log "ERROR: memory_manager.py backup a échoué"
     exit 1
 fi
 
-# Vérifier que le JSON fait > 10 octets
-if [[ ! -f "$EXPORT_JSON" ]] || [[ $(stat -c%s "$EXPORT_JSON" 2>/dev/null || echo 0) -le 10 ]]; then
-    _log "ERROR: export JSON absent ou trop petit (< 10 octets)"
+# Vérifier que l'export fait > 10 octets
+if [[ ! -f "$EXPORT_FILE" ]] || [[ $(stat -c%s "$EXPORT_FILE" 2>/dev/null || echo 0) -le 10 ]]; then
+    _log "ERROR: export absent ou trop petit (< 10 octets)"
     exit 1
 fi
 
-_log "Export JSON OK ($(stat -c%s "$EXPORT_JSON") octets)"
+_log "Export OK ($(stat -c%s "$EXPORT_FILE") octets)"
 
 # Gzip
-if ! gzip -9 "$EXPORT_JSON"; then
+if ! gzip -9 "$EXPORT_FILE"; then
     _log "ERROR: gzip a échoué"
     exit 1
 fi
@@ -99,7 +99,7 @@ fi
 _log "Fichier chiffré récupéré ($(stat -c%s "$BACKUP_ENC") octets)"
 
 # Déchiffrement natools.py
-BACKUP_GZ="$RESTORE_TMP/backup.json.gz"
+BACKUP_GZ="$RESTORE_TMP/backup.gz"
 if ! python3 "$MY_PATH/natools.py" decrypt -f pubsec \
         -i "$BACKUP_ENC" \
         -k "$DUNIKEY" \
@@ -116,14 +116,14 @@ fi
 _log "Déchiffrement OK"
 
 # Décompression
-BACKUP_JSON="$RESTORE_TMP/backup.json"
+BACKUP_JSON="$RESTORE_TMP/backup.tar"   # archive vectorielle (ou ancien JSON payload-only)
 if ! gunzip -c "$BACKUP_GZ" > "$BACKUP_JSON" 2>>"$LOGFILE"; then
     _log "ERROR: gunzip a échoué"
     exit 1
 fi
 
 if [[ ! -f "$BACKUP_JSON" ]] || [[ $(stat -c%s "$BACKUP_JSON" 2>/dev/null || echo 0) -le 10 ]]; then
-    _log "ERROR: backup.json absent ou trop petit après décompression"
+    _log "ERROR: backup absent ou trop petit après décompression"
     exit 1
 fi
 
@@ -150,7 +150,7 @@ if [[ $RESTORE_EXIT -ne 0 ]]; then
         _log "INFO: Commande à exécuter manuellement quand restore sera disponible:"
         _log "INFO:   python3 $MY_PATH/../IA/memory_manager.py restore --input $BACKUP_JSON"
         # Copier le JSON dans un emplacement persistant pour usage ultérieur
-        PERSISTENT_BACKUP="${HOME}/.zen/tmp/qdrant_last_restore.json"
+        PERSISTENT_BACKUP="${HOME}/.zen/tmp/qdrant_last_restore.backup"
         cp "$BACKUP_JSON" "$PERSISTENT_BACKUP" 2>/dev/null \
             && _log "INFO: Backup JSON copié dans $PERSISTENT_BACKUP" \
             || _log "WARN: impossible de copier dans $PERSISTENT_BACKUP"